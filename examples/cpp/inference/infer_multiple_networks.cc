@@ -242,9 +242,9 @@ int main(int argc, char** argv) {
   // Add these sessions to the queue
   //
   tf::ngraph_bridge::ThreadSafeQueue<unique_ptr<Session>> session_queue;
-  session_queue.Add(move(session_one));
-  session_queue.Add(move(session_two));
-  session_queue.Add(move(session_three));
+  TF_CHECK_OK(session_queue.Add(move(session_one)));
+  TF_CHECK_OK(session_queue.Add(move(session_two)));
+  TF_CHECK_OK(session_queue.Add(move(session_three)));
 
   cout << "Session: " << session_db[session_one.get()] << "\n";
   unordered_map<Session*, pair<float, float>> session_stats;
@@ -280,7 +280,8 @@ int main(int argc, char** argv) {
       tf::ngraph_bridge::Timer execute_inference_timer;
       ngraph::Event evt_get_session("Get Session",
                                     string("Iteration") + to_string(i), "");
-      auto next_available_session = session_queue.GetNextAvailable();
+      unique_ptr<Session> next_available_session;
+      TF_CHECK_OK(session_queue.GetNextAvailable(&next_available_session));
 
       evt_get_session.Stop();
 
@@ -294,7 +295,7 @@ int main(int argc, char** argv) {
                                               &output_each_thread));
       evt_run.Stop();
       Session* next_session_ptr = next_available_session.get();
-      session_queue.Add(move(next_available_session));
+      TF_CHECK_OK(session_queue.Add(move(next_available_session)));
       execute_inference_timer.Stop();
 
       //
@@ -41,7 +41,8 @@ static bool NGraphPlacementRequested(const Node* node) { return true; }
 //
 // Main entry point for the variable-capture.
 //
-Status CaptureVariables(Graph* graph, std::set<string> skip_these_nodes) {
+Status CaptureVariables(Graph* graph, std::set<string> skip_these_nodes,
+                        int graph_id) {
   const static std::map<
       const string,
       const pair<string,
@@ -114,24 +115,24 @@ Status CaptureVariables(Graph* graph, std::set<string> skip_these_nodes) {
   // If Prefetch is requested
   if (std::getenv(NGraphPrefetchSharedResouce::NGRAPH_TF_USE_PREFETCH) !=
       nullptr) {
-    if (make_iterator_nodes.size() > 1) {
-      return errors::Internal(
-          "Found more than 1 MakeIterator nodes. This case is not supported.");
-    }
-    // Else try to capture it
-    Node* make_iterator_node = make_iterator_nodes[0];
-    // We expect the MakeIterator to have 1 input thats
-    // an iterator and the other one can be either a
-    // PrefetchDataset node or a ModelDataset node
-    // Other cases are not handled at the moment.
-    Node* prefetch_node = FindPrefetch(make_iterator_node);
-    if (prefetch_node != nullptr) {
-      return ReplacePrefetch(graph, prefetch_node);
-    } else {
-      return errors::Internal(
-          "Did not find PrefetchDataset or "
-          "ModelDataset+OptimizeDataset+PrefetchDataset as MakeIterator "
-          "nodes' inputs. Only those 2 cases are handled for now.");
+    // Capture the prefetch dataset of every iterator, the NGraphEncapsulates
+    // consuming an iterator are found by its graph id and name
+    for (auto make_iterator_node : make_iterator_nodes) {
+      // We expect the MakeIterator to have 1 input thats
+      // an iterator and the other one can be either a
+      // PrefetchDataset node or a ModelDataset node
+      // Other cases are not handled at the moment.
+      Node* prefetch_node = FindPrefetch(make_iterator_node);
+      if (prefetch_node == nullptr) {
+        return errors::Internal(
+            "Did not find PrefetchDataset or "
+            "ModelDataset+OptimizeDataset+PrefetchDataset as MakeIterator "
+            "nodes' inputs. Only those 2 cases are handled for now.");
+      }
+      Node* iterator_node = nullptr;
+      TF_RETURN_IF_ERROR(make_iterator_node->input_node(1, &iterator_node));
+      TF_RETURN_IF_ERROR(
+          ReplacePrefetch(graph, prefetch_node, iterator_node, graph_id));
     }
   }
 
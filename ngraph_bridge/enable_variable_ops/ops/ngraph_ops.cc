@@ -133,6 +133,8 @@ REGISTER_OP("NGraphPrefetchDataset")
     .Attr("output_types: list(type) >= 1")
     .Attr("output_shapes: list(shape) >= 1")
     .Attr("slack_period: int = 0")
+    .Attr("ngraph_iterator: string = ''")
+    .Attr("ngraph_graph_id: int = -1")
     .SetShapeFn([](shape_inference::InferenceContext* c) {
       shape_inference::ShapeHandle unused;
       // buffer_size should be a scalar.
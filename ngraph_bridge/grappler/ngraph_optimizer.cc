@@ -28,6 +28,7 @@
 #include "ngraph_bridge/grappler/ngraph_optimizer.h"
 #include "ngraph_bridge/ngraph_backend_manager.h"
 #include "ngraph_bridge/ngraph_cluster_manager.h"
+#include "ngraph_bridge/ngraph_cluster_profile.h"
 
 #if defined NGRAPH_DISTRIBUTED
 #include "ngraph/distributed.hpp"
@@ -190,7 +191,7 @@ Status NgraphOptimizer::Optimize(tensorflow::grappler::Cluster* cluster,
   //
 
   // Do variable capture then, if requested, dump the graphs.
-  TF_RETURN_IF_ERROR(CaptureVariables(&graph, skip_these_nodes));
+  TF_RETURN_IF_ERROR(CaptureVariables(&graph, skip_these_nodes, idx));
   if (DumpCapturedGraphs()) {
     DumpGraphs(graph, idx, "captured", "Graph With Variables Captured");
   }
@@ -286,7 +287,14 @@ Status NgraphOptimizer::Optimize(tensorflow::grappler::Cluster* cluster,
 void NgraphOptimizer::Feedback(tensorflow::grappler::Cluster* cluster,
                                const tensorflow::grappler::GrapplerItem& item,
                                const GraphDef& optimize_output, double result) {
-  // no-op
+  // The measured timings of the clusters are fed back through the cluster
+  // profile: write what was recorded so far, to be read by the next run
+  // (see ngraph_cluster_profile.h)
+  Status status = NGraphClusterProfile::Flush();
+  if (!status.ok()) {
+    NGRAPH_VLOG(0) << "NGTF_OPTIMIZER: Cannot write the cluster profile: "
+                   << status.error_message();
+  }
 }
 
 void NgraphOptimizer::DumpGraphs(Graph& graph, int idx,
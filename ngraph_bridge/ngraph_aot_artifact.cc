@@ -0,0 +1,234 @@
+/*******************************************************************************
+ * Copyright 2019 Intel Corporation
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ *******************************************************************************/
+
+#include "ngraph_bridge/ngraph_aot_artifact.h"
+
+#include <map>
+#include <mutex>
+#include <thread>
+
+#include "logging/ngraph_log.h"
+#include "tensorflow/core/lib/core/coding.h"
+#include "tensorflow/core/lib/core/errors.h"
+#include "tensorflow/core/lib/strings/numbers.h"
+#include "tensorflow/core/lib/strings/str_util.h"
+#include "tensorflow/core/lib/strings/strcat.h"
+
+using namespace std;
+
+namespace tensorflow {
+
+namespace ngraph_bridge {
+
+static const char kMagic[] = "NGAOT001";
+static const size_t kMagicSize = sizeof(kMagic) - 1;
+// Offset of the index followed by the magic
+static const size_t kFooterSize = sizeof(uint64) + kMagicSize;
+
+static string MakeRef(uint64 offset, uint64 size) {
+  return strings::StrCat(offset, ",", size);
+}
+
+static Status ParseRef(const string& ref, uint64* offset, uint64* size) {
+  std::vector<string> fields = str_util::Split(ref, ',');
+  if (fields.size() != 2 || !strings::safe_strtou64(fields[0], offset) ||
+      !strings::safe_strtou64(fields[1], size)) {
+    return errors::InvalidArgument("Invalid AOT artifact reference: ", ref);
+  }
+  return Status::OK();
+}
+
+//---------------------------------------------------------------------------
+//  NGraphAOTArtifactWriter::Create
+//---------------------------------------------------------------------------
+Status NGraphAOTArtifactWriter::Create(
+    const string& path, std::unique_ptr<NGraphAOTArtifactWriter>* writer) {
+  Env* env = Env::Default();
+  string tmp_path =
+      strings::StrCat(path, ".tmp.", env->NowMicros(), ".",
+                      std::hash<std::thread::id>()(std::this_thread::get_id()));
+  std::unique_ptr<WritableFile> file;
+  TF_RETURN_IF_ERROR(env->NewWritableFile(tmp_path, &file));
+  writer->reset(new NGraphAOTArtifactWriter(path, tmp_path, std::move(file)));
+  return (*writer)->m_file->Append(StringPiece(kMagic, kMagicSize));
+}
+
+NGraphAOTArtifactWriter::NGraphAOTArtifactWriter(
+    const string& path, const string& tmp_path,
+    std::unique_ptr<WritableFile> file)
+    : m_path(path),
+      m_tmp_path(tmp_path),
+      m_file(std::move(file)),
+      m_offset(kMagicSize) {}
+
+NGraphAOTArtifactWriter::~NGraphAOTArtifactWriter() {
+  if (!m_finished) {
+    m_file.reset();
+    Env::Default()->DeleteFile(m_tmp_path).IgnoreError();
+  }
+}
+
+//---------------------------------------------------------------------------
+//  NGraphAOTArtifactWriter::Append
+//---------------------------------------------------------------------------
+Status NGraphAOTArtifactWriter::Append(const string& encapsulate,
+                                       const string& kind,
+                                       const string& signature,
+                                       StringPiece data, string* ref) {
+  if (m_finished) {
+    return errors::Internal("AOT artifact ", m_path, " is already finished");
+  }
+  TF_RETURN_IF_ERROR(m_file->Append(data));
+  strings::StrAppend(&m_index, encapsulate, "\t", kind, "\t", signature, "\t",
+                     m_offset, "\t", data.size(), "\n");
+  *ref = MakeRef(m_offset, data.size());
+  m_offset += data.size();
+  return Status::OK();
+}
+
+//---------------------------------------------------------------------------
+//  NGraphAOTArtifactWriter::Finish
+//---------------------------------------------------------------------------
+Status NGraphAOTArtifactWriter::Finish() {
+  string footer;
+  core::PutFixed64(&footer, m_offset);
+  footer.append(kMagic, kMagicSize);
+  TF_RETURN_IF_ERROR(m_file->Append(m_index));
+  TF_RETURN_IF_ERROR(m_file->Append(footer));
+  TF_RETURN_IF_ERROR(m_file->Close());
+  TF_RETURN_IF_ERROR(Env::Default()->RenameFile(m_tmp_path, m_path));
+  m_finished = true;
+  NGRAPH_VLOG(1) << "Wrote AOT artifact " << m_path << " ("
+                 << m_offset + m_index.size() + footer.size() << " bytes)";
+  return Status::OK();
+}
+
+//---------------------------------------------------------------------------
+//  NGraphAOTArtifact::Open
+//---------------------------------------------------------------------------
+Status NGraphAOTArtifact::Open(const string& path,
+                               std::shared_ptr<NGraphAOTArtifact>* artifact) {
+  static std::mutex s_mutex;
+  static std::map<string, std::weak_ptr<NGraphAOTArtifact>> s_artifacts;
+
+  std::lock_guard<std::mutex> lock(s_mutex);
+  auto itr = s_artifacts.find(path);
+  if (itr != s_artifacts.end()) {
+    *artifact = itr->second.lock();
+    if (*artifact != nullptr) {
+      return Status::OK();
+    }
+  }
+
+  std::unique_ptr<ReadOnlyMemoryRegion> region;
+  TF_RETURN_IF_ERROR(
+      Env::Default()->NewReadOnlyMemoryRegionFromFile(path, &region));
+  std::shared_ptr<NGraphAOTArtifact> new_artifact(
+      new NGraphAOTArtifact(path, std::move(region)));
+  TF_RETURN_IF_ERROR(new_artifact->ParseIndex());
+  s_artifacts[path] = new_artifact;
+  *artifact = new_artifact;
+  NGRAPH_VLOG(1) << "Mapped AOT artifact " << path << " with "
+                 << new_artifact->m_entries.size() << " entries";
+  return Status::OK();
+}
+
+NGraphAOTArtifact::NGraphAOTArtifact(
+    const string& path, std::unique_ptr<ReadOnlyMemoryRegion> region)
+    : m_path(path), m_region(std::move(region)) {}
+
+//---------------------------------------------------------------------------
+//  NGraphAOTArtifact::ParseIndex
+//---------------------------------------------------------------------------
+Status NGraphAOTArtifact::ParseIndex() {
+  const char* data = static_cast<const char*>(m_region->data());
+  uint64 length = m_region->length();
+  if (length < kMagicSize + kFooterSize ||
+      StringPiece(data, kMagicSize) != StringPiece(kMagic, kMagicSize) ||
+      StringPiece(data + length - kMagicSize, kMagicSize) !=
+          StringPiece(kMagic, kMagicSize)) {
+    return errors::DataLoss(m_path, " is not an AOT artifact");
+  }
+  uint64 index_offset = core::DecodeFixed64(data + length - kFooterSize);
+  if (index_offset < kMagicSize || index_offset > length - kFooterSize) {
+    return errors::DataLoss("Invalid index offset in AOT artifact ", m_path);
+  }
+
+  StringPiece index(data + index_offset, length - kFooterSize - index_offset);
+  for (const string& line :
+       str_util::Split(index, '\n', str_util::SkipEmpty())) {
+    std::vector<string> fields = str_util::Split(line, '\t');
+    uint64 offset, size;
+    if (fields.size() != 5 || !strings::safe_strtou64(fields[3], &offset) ||
+        !strings::safe_strtou64(fields[4], &size) || offset < kMagicSize ||
+        offset > index_offset || size > index_offset - offset) {
+      return errors::DataLoss("Invalid index entry in AOT artifact ", m_path,
+                              ": ", line);
+    }
+    m_entries.insert(make_pair(offset, size));
+  }
+  return Status::OK();
+}
+
+//---------------------------------------------------------------------------
+//  NGraphAOTArtifact::GetBlob
+//---------------------------------------------------------------------------
+Status NGraphAOTArtifact::GetBlob(const string& ref, StringPiece* blob) const {
+  uint64 offset, size;
+  TF_RETURN_IF_ERROR(ParseRef(ref, &offset, &size));
+  if (m_entries.count(make_pair(offset, size)) == 0) {
+    return errors::NotFound("AOT artifact ", m_path,
+                            " has no entry for the reference ", ref);
+  }
+  *blob =
+      StringPiece(static_cast<const char*>(m_region->data()) + offset, size);
+  return Status::OK();
+}
+
+//---------------------------------------------------------------------------
+//  NGraphMemoryStreamBuf
+//---------------------------------------------------------------------------
+NGraphMemoryStreamBuf::NGraphMemoryStreamBuf(StringPiece data) {
+  // The get area is never written to
+  char* begin = const_cast<char*>(data.data());
+  setg(begin, begin, begin + data.size());
+}
+
+NGraphMemoryStreamBuf::pos_type NGraphMemoryStreamBuf::seekoff(
+    off_type off, std::ios_base::seekdir dir, std::ios_base::openmode which) {
+  char* target;
+  if (dir == std::ios_base::beg) {
+    target = eback() + off;
+  } else if (dir == std::ios_base::cur) {
+    target = gptr() + off;
+  } else {
+    target = egptr() + off;
+  }
+  if (!(which & std::ios_base::in) || target < eback() || target > egptr()) {
+    return pos_type(off_type(-1));
+  }
+  setg(eback(), target, egptr());
+  return pos_type(target - eback());
+}
+
+NGraphMemoryStreamBuf::pos_type NGraphMemoryStreamBuf::seekpos(
+    pos_type pos, std::ios_base::openmode which) {
+  return seekoff(off_type(pos), std::ios_base::beg, which);
+}
+
+}  // namespace ngraph_bridge
+
+}  // namespace tensorflow
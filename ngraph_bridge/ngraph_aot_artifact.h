@@ -0,0 +1,125 @@
+/*******************************************************************************
+ * Copyright 2019 Intel Corporation
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ *******************************************************************************/
+
+#ifndef NGRAPH_TF_BRIDGE_AOT_ARTIFACT_H_
+#define NGRAPH_TF_BRIDGE_AOT_ARTIFACT_H_
+#pragma once
+
+#include <memory>
+#include <set>
+#include <streambuf>
+#include <string>
+#include <utility>
+
+#include "tensorflow/core/lib/core/status.h"
+#include "tensorflow/core/lib/core/stringpiece.h"
+#include "tensorflow/core/platform/env.h"
+#include "tensorflow/core/platform/file_system.h"
+
+namespace tensorflow {
+
+namespace ngraph_bridge {
+
+// The AOT artifact is a file written by EncapsulateClusters next to the
+// GraphDef. It holds the executables (and the ngraph functions, for
+// debugging) compiled ahead of time, so that they do not have to be embedded
+// in the GraphDef as attributes.
+//
+// Layout of the file:
+//   magic                   8 bytes, "NGAOT001"
+//   blobs                   the serialized executables and functions
+//   index                   one line per blob:
+//                           <encapsulate>\t<kind>\t<signature>\t<offset>\t<size>
+//   offset of the index     8 bytes, little endian
+//   magic                   8 bytes
+//
+// The NGraphEncapsulate nodes only carry the path of the artifact
+// (_ngraph_aot_artifact) and a reference "<offset>,<size>" for each blob
+// (_ngraph_aot_ngexecref_<signature> and
+// _ngraph_aot_ngfunctionref_<signature>).
+
+// NGraphAOTArtifactWriter appends blobs to a new artifact. The content is
+// written to a temporary file, which replaces the artifact on Finish.
+class NGraphAOTArtifactWriter {
+ public:
+  static Status Create(const std::string& path,
+                       std::unique_ptr<NGraphAOTArtifactWriter>* writer);
+  ~NGraphAOTArtifactWriter();
+
+  // Appends a blob and returns the reference to it
+  Status Append(const std::string& encapsulate, const std::string& kind,
+                const std::string& signature, StringPiece data,
+                std::string* ref);
+
+  // Writes the index and moves the artifact in place
+  Status Finish();
+
+ private:
+  NGraphAOTArtifactWriter(const std::string& path, const std::string& tmp_path,
+                          std::unique_ptr<WritableFile> file);
+
+  const std::string m_path;
+  const std::string m_tmp_path;
+  std::unique_ptr<WritableFile> m_file;
+  uint64 m_offset;
+  std::string m_index;
+  bool m_finished{false};
+};
+
+// NGraphAOTArtifact is a memory mapped artifact. The blobs are handed out as
+// StringPieces pointing into the mapping, so loading an executable does not
+// copy it. An artifact is mapped once per process and shared by all the
+// encapsulates referencing it; it is unmapped when the last one releases it.
+class NGraphAOTArtifact {
+ public:
+  static Status Open(const std::string& path,
+                     std::shared_ptr<NGraphAOTArtifact>* artifact);
+
+  // Returns the blob for a reference returned by
+  // NGraphAOTArtifactWriter::Append. The reference must match an entry of
+  // the index, which catches a GraphDef used with the wrong artifact.
+  Status GetBlob(const std::string& ref, StringPiece* blob) const;
+
+  const std::string& GetPath() const { return m_path; }
+
+ private:
+  NGraphAOTArtifact(const std::string& path,
+                    std::unique_ptr<ReadOnlyMemoryRegion> region);
+  Status ParseIndex();
+
+  const std::string m_path;
+  std::unique_ptr<ReadOnlyMemoryRegion> m_region;
+  // (offset, size) of the blobs listed in the index
+  std::set<std::pair<uint64, uint64>> m_entries;
+};
+
+// A read only streambuf over memory owned by the caller, used to pass a blob
+// of the artifact to Backend::load without copying it into a stringstream
+class NGraphMemoryStreamBuf : public std::streambuf {
+ public:
+  explicit NGraphMemoryStreamBuf(StringPiece data);
+
+ protected:
+  pos_type seekoff(off_type off, std::ios_base::seekdir dir,
+                   std::ios_base::openmode which) override;
+  pos_type seekpos(pos_type pos, std::ios_base::openmode which) override;
+};
+
+}  // namespace ngraph_bridge
+
+}  // namespace tensorflow
+
+#endif  // NGRAPH_TF_BRIDGE_AOT_ARTIFACT_H_
@@ -14,6 +14,10 @@
  * limitations under the License.
  *******************************************************************************/
 
+#include <atomic>
+#include <mutex>
+#include <sstream>
+
 #include "ngraph_bridge/ngraph_api.h"
 
 namespace ng = ngraph;
@@ -25,6 +29,10 @@ namespace config {
 static bool _is_enabled = true;
 static bool _is_logging_placement = false;
 static std::set<std::string> disabled_op_types{};
+static std::mutex cache_stats_mutex;
+static std::map<std::pair<string, int>, std::function<NgraphDataCacheStats()>>
+    cache_stats_getters;
+static std::atomic<size_t> num_fallback_calls{0};
 
 extern "C" {
 void ngraph_enable() { Enable(); }
@@ -72,6 +80,24 @@ extern void ngraph_set_disabled_ops(const char* op_type_list) {
 extern const char* ngraph_get_disabled_ops() {
   return ng::join(GetDisabledOps(), ",").c_str();
 }
+
+// One line per encapsulate op:
+// name hits misses evictions create_time_us num_items size_in_bytes
+// size_in_bytes is an estimate, see NGraphExecutor::EstimateNgItemSizeInBytes
+extern const char* ngraph_get_cache_stats() {
+  static string cache_stats_str;
+  std::stringstream ss;
+  for (auto& itr : GetCacheStats()) {
+    const auto& stats = itr.second;
+    ss << itr.first << " " << stats.hits << " " << stats.misses << " "
+       << stats.evictions << " " << stats.create_time_us << " "
+       << stats.num_items << " " << stats.size_in_bytes << "\n";
+  }
+  cache_stats_str = ss.str();
+  return cache_stats_str.c_str();
+}
+
+size_t ngraph_get_num_fallback_calls() { return GetNumFallbackCalls(); }
 }
 
 // note that TensorFlow always uses camel case for the C++ API, but not for
@@ -119,6 +145,37 @@ void SetDisabledOps(set<string> disabled_ops_set) {
   disabled_op_types = disabled_ops_set;
 }
 
+void RegisterCacheStats(const string& name, int instance_id,
+                        std::function<NgraphDataCacheStats()> get_stats) {
+  std::lock_guard<std::mutex> lock(cache_stats_mutex);
+  cache_stats_getters[make_pair(name, instance_id)] = get_stats;
+}
+
+void UnregisterCacheStats(const string& name, int instance_id) {
+  std::lock_guard<std::mutex> lock(cache_stats_mutex);
+  cache_stats_getters.erase(make_pair(name, instance_id));
+}
+
+std::map<string, NgraphDataCacheStats> GetCacheStats() {
+  std::lock_guard<std::mutex> lock(cache_stats_mutex);
+  // Encapsulate ops with the same name are added up
+  std::map<string, NgraphDataCacheStats> all_stats;
+  for (auto& itr : cache_stats_getters) {
+    NgraphDataCacheStats stats = itr.second();
+    NgraphDataCacheStats& total = all_stats[itr.first.first];
+    total.hits += stats.hits;
+    total.misses += stats.misses;
+    total.evictions += stats.evictions;
+    total.create_time_us += stats.create_time_us;
+    total.num_items += stats.num_items;
+    total.size_in_bytes += stats.size_in_bytes;
+  }
+  return all_stats;
+}
+
+void RecordFallbackCall() { num_fallback_calls++; }
+size_t GetNumFallbackCalls() { return num_fallback_calls; }
+
 }  // namespace config
 }  // namespace ngraph_bridge
 }  // namespace tensorflow
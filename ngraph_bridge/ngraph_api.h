@@ -19,11 +19,14 @@
 #pragma once
 
 #include <string.h>
+#include <functional>
+#include <map>
 #include <vector>
 
 #include "tensorflow/core/lib/core/errors.h"
 
 #include "ngraph_bridge/ngraph_backend_manager.h"
+#include "ngraph_bridge/ngraph_data_cache.h"
 
 using namespace std;
 
@@ -47,6 +50,9 @@ extern bool ngraph_is_logging_placement();
 
 extern void ngraph_set_disabled_ops(const char* op_type_list);
 extern const char* ngraph_get_disabled_ops();
+
+extern const char* ngraph_get_cache_stats();
+extern size_t ngraph_get_num_fallback_calls();
 }
 
 extern void Enable();
@@ -67,6 +73,19 @@ extern bool IsLoggingPlacement();
 extern std::set<string> GetDisabledOps();
 extern void SetDisabledOps(std::set<string>);
 extern void SetDisabledOps(string);
+
+// The executable cache of each encapsulate op registers a function that
+// returns its stats. The instance_id tells apart encapsulate ops with the same
+// name (e.g. the same graph loaded in 2 sessions)
+extern void RegisterCacheStats(const string& name, int instance_id,
+                               std::function<NgraphDataCacheStats()> get_stats);
+extern void UnregisterCacheStats(const string& name, int instance_id);
+extern std::map<string, NgraphDataCacheStats> GetCacheStats();
+
+// Number of calls of the encapsulate ops that ran the TF graph of the cluster
+// instead of the executable (e.g. while compiling in the background)
+extern void RecordFallbackCall();
+extern size_t GetNumFallbackCalls();
 }  // namespace config
 }  // namespace ngraph_bridge
 }  // namespace tensorflow
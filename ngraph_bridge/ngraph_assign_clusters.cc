@@ -14,9 +14,15 @@
  * limitations under the License.
  *******************************************************************************/
 #include <algorithm>
+#include <deque>
 #include <fstream>
 #include <iostream>
+#include <memory>
+#include <numeric>
 #include <sstream>
+#include <unordered_map>
+#include <unordered_set>
+#include <vector>
 
 #include "tensorflow/core/framework/attr_value_util.h"
 #include "tensorflow/core/framework/graph.pb.h"
@@ -85,18 +91,96 @@ namespace ngraph_bridge {
 // already been run. This attaches the "_ngraph_marked_for_clustering"
 // attribute to ops which we will cluster.
 //
-// TODO(amprocte): Say more about the algorithm.
+// Algorithm: each node starts in a cluster of its own, and the clusters are
+// mirrored in a GraphCycles instance, where contracting an edge succeeds only
+// if it does not create a cycle. A worklist starts with every TF edge; an
+// edge is contracted if both its ends are marked, and their clusters have
+// compatible deadness predicates and the same backend. An edge that fails
+// only because of the current shape of its clusters (deadness or a longer
+// path between them) is deferred on both clusters, and queued again when
+// either of them is merged, or when a merge changes the predicate of a
+// cluster it feeds. A cluster holds a deferred edge at most once. The edges
+// that can never be contracted (non-ops, unmarked ops, different backends,
+// same cluster) are dropped. The clusters are kept in a union-find forest
+// over the node ids and the deadness predicates are the ids of the
+// hash-consed predicates of the analysis, so that the contraction is
+// near-linear in the size of the graph. A last pass over all the edges
+// confirms that none can be contracted anymore, it does not defer the edges
+// since it tries all of them again.
 //
 
 namespace {
 struct Cluster {
+  // Index of the cluster in GraphCycles
   int index;
-  std::set<tensorflow::Node*> nodes;
+  std::vector<tensorflow::Node*> nodes;
   std::string backend;
 #if !defined(NGRAPH_TF_DISABLE_DEADNESS_CHECK)
-  std::string predicate_string;
-  std::set<const Edge*> outgoing_edges;
+  int predicate;
+  std::unordered_set<const Edge*> outgoing_edges;
 #endif
+  // Edges from or to the cluster that could not be contracted, but may be
+  // once the cluster is merged
+  std::vector<const Edge*> deferred_edges;
+};
+
+// Maps the nodes to their clusters. The clusters are kept in a union-find
+// forest over the node ids, the root of each tree holds the cluster.
+class ClusterMap {
+ public:
+  explicit ClusterMap(int num_node_ids)
+      : m_parent(num_node_ids), m_clusters(num_node_ids) {
+    std::iota(m_parent.begin(), m_parent.end(), 0);
+  }
+
+  // Creates the cluster of its own of the node
+  Cluster* Create(Node* node) {
+    m_clusters[node->id()].reset(new Cluster());
+    m_clusters[node->id()]->nodes.push_back(node);
+    return m_clusters[node->id()].get();
+  }
+
+  Cluster* at(const Node* node) { return m_clusters[Find(node->id())].get(); }
+
+  // Merges the clusters of the nodes and returns the merged cluster
+  // The nodes and edges of the smaller cluster are moved to the larger one,
+  // the caller sets the other properties of the merged cluster
+  Cluster* Merge(const Node* a, const Node* b) {
+    int root = Find(a->id());
+    int other_root = Find(b->id());
+    if (m_clusters[root]->nodes.size() < m_clusters[other_root]->nodes.size()) {
+      std::swap(root, other_root);
+    }
+    Cluster* cluster = m_clusters[root].get();
+    std::unique_ptr<Cluster> other = std::move(m_clusters[other_root]);
+    cluster->nodes.insert(cluster->nodes.end(), other->nodes.begin(),
+                          other->nodes.end());
+#if !defined(NGRAPH_TF_DISABLE_DEADNESS_CHECK)
+    if (cluster->outgoing_edges.size() < other->outgoing_edges.size()) {
+      std::swap(cluster->outgoing_edges, other->outgoing_edges);
+    }
+    cluster->outgoing_edges.insert(other->outgoing_edges.begin(),
+                                   other->outgoing_edges.end());
+#endif
+    cluster->deferred_edges.insert(cluster->deferred_edges.end(),
+                                   other->deferred_edges.begin(),
+                                   other->deferred_edges.end());
+    m_parent[other_root] = root;
+    return cluster;
+  }
+
+ private:
+  // Returns the root of the tree of the node id, halving the path to it
+  int Find(int id) {
+    while (m_parent[id] != id) {
+      m_parent[id] = m_parent[m_parent[id]];
+      id = m_parent[id];
+    }
+    return id;
+  }
+
+  std::vector<int> m_parent;
+  std::vector<std::unique_ptr<Cluster>> m_clusters;
 };
 
 Status InitialiseNodeBackend(Node* node, string* backend) {
@@ -111,14 +195,13 @@ Status InitialiseNodeBackend(Node* node, string* backend) {
   return Status::OK();
 }
 
-Status CanContractEdgeBackendCheck(
-    Edge* edge, const std::map<Node*, std::shared_ptr<Cluster>>& cluster_map,
-    bool& is_backend_ok) {
+Status CanContractEdgeBackendCheck(const Edge* edge, ClusterMap& cluster_map,
+                                   bool& is_backend_ok) {
   Node* src = edge->src();
   Node* dst = edge->dst();
 
-  string src_backend = cluster_map.at(src)->backend;
-  string dst_backend = cluster_map.at(dst)->backend;
+  const string& src_backend = cluster_map.at(src)->backend;
+  const string& dst_backend = cluster_map.at(dst)->backend;
 
   if (src_backend == dst_backend) {
     is_backend_ok = true;
@@ -133,35 +216,33 @@ Status CanContractEdgeBackendCheck(
 // If Src Predicate is TRUE then merged cluster gets the dst predicate
 // WARNING : This function does not do any checks
 // Use this function when ready to merge
-inline string GetMergedClusterPred(const string& src_predicate,
-                                   const string& dst_predicate) {
-  return DeadnessAnalysis::IsTruePredString(src_predicate) ? dst_predicate
-                                                           : src_predicate;
+inline int GetMergedClusterPred(int src_predicate, int dst_predicate) {
+  return DeadnessAnalysis::IsTruePredId(src_predicate) ? dst_predicate
+                                                       : src_predicate;
 }
 
 // Checks whether it's ok to contract the edge as far as deadness is concerned
 // Source and Dst Predicates of the edge should match
-Status CanContractEdgeDeadnessCheck(
-    Edge* edge, const std::map<Node*, std::shared_ptr<Cluster>>& cluster_map,
-    bool& is_deadness_ok) {
+Status CanContractEdgeDeadnessCheck(const Edge* edge, ClusterMap& cluster_map,
+                                    bool& is_deadness_ok) {
   Node* src = edge->src();
   Node* dst = edge->dst();
 
-  string src_predicate = cluster_map.at(src)->predicate_string;
-  string dst_predicate = cluster_map.at(dst)->predicate_string;
+  int src_predicate = cluster_map.at(src)->predicate;
+  int dst_predicate = cluster_map.at(dst)->predicate;
 
   // If the node marked for clustering has CONTROL_FLOW_PRED_STRING, it
   // breaks our assumption that all supported ops are data flow ops
-  if (DeadnessAnalysis::IsControlFlowPredString(src_predicate) ||
-      DeadnessAnalysis::IsControlFlowPredString(dst_predicate)) {
+  if (DeadnessAnalysis::IsControlFlowPredId(src_predicate) ||
+      DeadnessAnalysis::IsControlFlowPredId(dst_predicate)) {
     return errors::Internal(
         "Attempting to contract edge with control flow ops : ",
         edge->DebugString());
   }
 
   // Case src X , dst Y , X!=Y // cannot be contracted
-  if (!DeadnessAnalysis::IsTruePredString(src_predicate) &&
-      !DeadnessAnalysis::IsTruePredString(dst_predicate) &&
+  if (!DeadnessAnalysis::IsTruePredId(src_predicate) &&
+      !DeadnessAnalysis::IsTruePredId(dst_predicate) &&
       src_predicate != dst_predicate) {
     is_deadness_ok = false;
     return Status::OK();
@@ -170,8 +251,8 @@ Status CanContractEdgeDeadnessCheck(
   // Case src X , dst True // invalid scenario
   // If src has Non-True Predicate and dst has True Predicate, it implies that
   // the dst node is control flow
-  if (!DeadnessAnalysis::IsTruePredString(src_predicate) &&
-      DeadnessAnalysis::IsTruePredString(dst_predicate)) {
+  if (!DeadnessAnalysis::IsTruePredId(src_predicate) &&
+      DeadnessAnalysis::IsTruePredId(dst_predicate)) {
     return errors::Internal("Attempting to cluster control-flow node ",
                             dst->name(), "[", dst->type_string(), "]");
   }
@@ -181,33 +262,22 @@ Status CanContractEdgeDeadnessCheck(
   // have the predicate Y (True & Y = Y). Hence contraction is possible only
   // when, all outputs of the src cluster (other than the current edge) have the
   // predicate Y
-  if (DeadnessAnalysis::IsTruePredString(src_predicate)) {
-    auto src_cluster_out_edges = cluster_map.at(src)->outgoing_edges;
-    bool found_same_out_preds = true;
-    std::string pred_check = dst_predicate;
-
-    for (const Edge* src_cluster_edge : src_cluster_out_edges) {
+  // Note that if dst predicate is True, then it does not matter what the
+  // predicates of the other outputs are; After merge the merged cluster will
+  // always have a less strict predicate, True (since True is the least strict
+  // predicate)
+  if (DeadnessAnalysis::IsTruePredId(src_predicate) &&
+      !DeadnessAnalysis::IsTruePredId(dst_predicate)) {
+    for (const Edge* src_cluster_edge : cluster_map.at(src)->outgoing_edges) {
       if (src_cluster_edge == edge) {
         continue;
       }
-      Node* src_cluster_dst = src_cluster_edge->dst();
-      std::string src_cluster_dst_pred =
-          cluster_map.at(src_cluster_dst)->predicate_string;
-      // Note that if dst predicate is True, then it does not matter what the
-      // src_cluster_dst_pred is; After merge the merged cluster will always
-      // have a less strict predicate, True (since True is the least strict
-      // predicate)
-      if (!DeadnessAnalysis::IsTruePredString(pred_check) &&
-          pred_check != src_cluster_dst_pred) {
-        found_same_out_preds = false;
-        break;
+      // Cannot contract this edge
+      if (cluster_map.at(src_cluster_edge->dst())->predicate != dst_predicate) {
+        is_deadness_ok = false;
+        return Status::OK();
       }
     }
-    // Cannot contract this edge
-    if (!found_same_out_preds) {
-      is_deadness_ok = false;
-      return Status::OK();
-    }
   }
 
   // Case src X, dst Y, X==Y
@@ -220,52 +290,51 @@ Status CanContractEdgeDeadnessCheck(
 
 // Some sanity checks for Node's cluster assignment wrt Deadness
 Status CheckNodeClusterAssignmentWRTDeadness(
-    Node* node, const std::map<Node*, string>& nodes_predicate_map,
-    const std::map<Node*, std::shared_ptr<Cluster>>& cluster_map) {
-  auto itr = nodes_predicate_map.find(node);
-  if (itr == nodes_predicate_map.end()) {
+    Node* node, const std::vector<int>& node_predicates,
+    const DeadnessAnalysis& deadness_analyzer, ClusterMap& cluster_map) {
+  int node_predicate = node_predicates[node->id()];
+  if (node_predicate < 0) {
     return errors::Internal("Node ", node->name(), " [", node->type_string(),
                             "]", " not found in predicate map");
   }
-  std::string node_pred_string = itr->second;
 
-  if (DeadnessAnalysis::IsControlFlowPredString(node_pred_string)) {
+  if (DeadnessAnalysis::IsControlFlowPredId(node_predicate)) {
     return errors::Internal(
         "Node ", node->name(), " [", node->type_string(), "]",
         " should not be clustered as it is a control flow op");
   }
 
-  std::string cluster_pred_string = cluster_map.at(node)->predicate_string;
-  int node_cluster_index = cluster_map.at(node)->index;
+  Cluster* node_cluster = cluster_map.at(node);
+  int cluster_predicate = node_cluster->predicate;
 
   // If the node has Non-True Pred (P1) it can only be placed in a cluster with
   // the same pred
-  if (!DeadnessAnalysis::IsTruePredString(node_pred_string) &&
-      node_pred_string != cluster_pred_string) {
+  if (!DeadnessAnalysis::IsTruePredId(node_predicate) &&
+      node_predicate != cluster_predicate) {
     return errors::Internal(
-        "Node ", node->name(), " [", node->type_string(), "]", " Predicate : ",
-        node_pred_string, "should not be clustered in cluster with predicate ",
-        cluster_pred_string);
+        "Node ", node->name(), " [", node->type_string(), "]",
+        " Predicate : ", deadness_analyzer.GetPredicateString(node_predicate),
+        "should not be clustered in cluster with predicate ",
+        deadness_analyzer.GetPredicateString(cluster_predicate));
   }
 
   // If the node has True Pred (T1) and its cluster pred is non-true (P1)
   // Then all outgoing edges from node which are not in the same cluster should
   // be connected to clusters with pred P1
-  if (DeadnessAnalysis::IsTruePredString(node_pred_string) &&
-      !DeadnessAnalysis::IsTruePredString(cluster_pred_string)) {
+  if (DeadnessAnalysis::IsTruePredId(node_predicate) &&
+      !DeadnessAnalysis::IsTruePredId(cluster_predicate)) {
     for (auto e : node->out_edges()) {
-      Node* e_dst = e->dst();
-      if (cluster_map.at(e_dst)->index != node_cluster_index) {
-        string e_dst_cluster_pred = cluster_map.at(e_dst)->predicate_string;
-        if (e_dst_cluster_pred != cluster_pred_string) {
-          return errors::Internal(
-              "Node ", node->name(), " [", node->type_string(), "]",
-              " Predicate : ", node_pred_string,
-              " cannot not be clustered in cluster with predicate ",
-              cluster_pred_string,
-              " as it has outgoing edge to a cluster with predicate ",
-              e_dst_cluster_pred);
-        }
+      Cluster* e_dst_cluster = cluster_map.at(e->dst());
+      if (e_dst_cluster != node_cluster &&
+          e_dst_cluster->predicate != cluster_predicate) {
+        return errors::Internal(
+            "Node ", node->name(), " [", node->type_string(), "]",
+            " Predicate : ",
+            deadness_analyzer.GetPredicateString(node_predicate),
+            " cannot not be clustered in cluster with predicate ",
+            deadness_analyzer.GetPredicateString(cluster_predicate),
+            " as it has outgoing edge to a cluster with predicate ",
+            deadness_analyzer.GetPredicateString(e_dst_cluster->predicate));
       }
     }
   }
@@ -278,12 +347,13 @@ Status CheckNodeClusterAssignmentWRTDeadness(
 // This function does not do any checks for merging, but rather implements the
 // merge, i.e. updates the properties of the merged cluster
 // WARNING : Use this function when ready to merge
-void MergeClusters(Edge* edge,
-                   std::map<Node*, std::shared_ptr<Cluster>>& cluster_map) {
+void MergeClusters(const Edge* edge, ClusterMap& cluster_map) {
   Node* src = edge->src();
   Node* dst = edge->dst();
-  int src_index = cluster_map[src]->index;
-  int dst_index = cluster_map[dst]->index;
+  Cluster* src_cluster = cluster_map.at(src);
+  Cluster* dst_cluster = cluster_map.at(dst);
+  int src_index = src_cluster->index;
+  int dst_index = dst_cluster->index;
 
   // Merge dst cluster into src cluster
   NGRAPH_VLOG(5) << "Contracting: " << src->name() << "[" << src->type_string()
@@ -292,29 +362,22 @@ void MergeClusters(Edge* edge,
                  << edge->dst_input() << "]@" << dst_index;
 
 #if !defined(NGRAPH_TF_DISABLE_DEADNESS_CHECK)
-  string src_predicate = cluster_map[src]->predicate_string;
-  string dst_predicate = cluster_map[dst]->predicate_string;
-  NGRAPH_VLOG(5) << "Src pred: " << src_predicate
-                 << ", Dst pred: " << dst_predicate;
+  NGRAPH_VLOG(5) << "Src pred: " << src_cluster->predicate
+                 << ", Dst pred: " << dst_cluster->predicate;
+  int cluster_pred =
+      GetMergedClusterPred(src_cluster->predicate, dst_cluster->predicate);
+#endif
 
-  std::string cluster_pred = GetMergedClusterPred(src_predicate, dst_predicate);
+  // The node sets are merged into the larger one, which may be dst's, but
+  // GraphCycles contracts dst into src so the merged cluster has src's index
+  Cluster* cluster = cluster_map.Merge(src, dst);
+  cluster->index = src_index;
 
-  cluster_map[src]->predicate_string = cluster_pred;
+#if !defined(NGRAPH_TF_DISABLE_DEADNESS_CHECK)
+  cluster->predicate = cluster_pred;
   // Update outgoing edges of the merged cluster
-  cluster_map[src]->outgoing_edges.insert(
-      cluster_map[dst]->outgoing_edges.begin(),
-      cluster_map[dst]->outgoing_edges.end());
-  cluster_map[src]->outgoing_edges.erase(edge);
+  cluster->outgoing_edges.erase(edge);
 #endif
-
-  auto cluster_dst = cluster_map[dst];
-  // using cluster_map[dst]->nodes in the loop directly appears to
-  // invalidate the iterator when `node` == `dst`
-  // this happens with clang but not gcc
-  for (auto node : cluster_dst->nodes) {
-    cluster_map[src]->nodes.insert(node);
-    cluster_map[node] = cluster_map[src];
-  }
 }
 
 }  // namespace
@@ -323,13 +386,13 @@ void MergeClusters(Edge* edge,
 // Adds an attribute "_ngraph_cluster" (cluster_id) to each Node that can be
 // encapsulated
 Status AssignClusters(Graph* graph) {
-  std::map<Node*, std::shared_ptr<Cluster>> cluster_map;
+  ClusterMap cluster_map(graph->num_node_ids());
 
 #if !defined(NGRAPH_TF_DISABLE_DEADNESS_CHECK)
-  std::unique_ptr<DeadnessAnalysis> deadness_analyzer;
-  TF_RETURN_IF_ERROR(DeadnessAnalysis::Run(*graph, &deadness_analyzer));
-  // This map is used only for error checking
-  std::map<Node*, std::string> nodes_predicate_map;
+  std::shared_ptr<DeadnessAnalysis> deadness_analyzer;
+  TF_RETURN_IF_ERROR(DeadnessAnalysis::RunCached(*graph, &deadness_analyzer));
+  // Predicate of each node id, used only for error checking
+  std::vector<int> node_predicates(graph->num_node_ids(), -1);
 #endif
 
   GraphCycles gc;
@@ -337,28 +400,28 @@ Status AssignClusters(Graph* graph) {
   // Initial Step: Each node is a cluster of its own
   for (auto node : graph->nodes()) {
     int new_index = gc.NewNode();
-    cluster_map[node] = std::make_shared<Cluster>();
-    cluster_map[node]->index = new_index;
+    Cluster* cluster = cluster_map.Create(node);
+    cluster->index = new_index;
     string backend;
     TF_RETURN_IF_ERROR(InitialiseNodeBackend(node, &backend));
 
-    cluster_map[node]->backend = backend;
-    cluster_map[node]->nodes.insert(node);
+    cluster->backend = backend;
     NGRAPH_VLOG(5) << "Creating graphcycle Node: " << new_index << " for "
                    << node->name() << "[" << node->type_string() << "]"
                    << " backend " << backend;
 
 #if !defined(NGRAPH_TF_DISABLE_DEADNESS_CHECK)
-    // get predicate string for the node
-    string pred_string;
-    TF_RETURN_IF_ERROR(deadness_analyzer->GetNodePredicate(*node, pred_string));
-    nodes_predicate_map[node] = pred_string;
-    cluster_map[node]->predicate_string = pred_string;
+    // get predicate id for the node
+    int pred_id;
+    TF_RETURN_IF_ERROR(deadness_analyzer->GetNodePredicateId(*node, pred_id));
+    node_predicates[node->id()] = pred_id;
+    cluster->predicate = pred_id;
 
-    cluster_map[node]->outgoing_edges = std::set<const Edge*>(
+    cluster->outgoing_edges = std::unordered_set<const Edge*>(
         node->out_edges().begin(), node->out_edges().end());
     NGRAPH_VLOG(5) << node->name() << "[" << node->type_string() << "]"
-                   << "  : Predicate " << pred_string;
+                   << "  : Predicate "
+                   << deadness_analyzer->GetPredicateString(pred_id);
 #endif
   }
 
@@ -377,7 +440,8 @@ Status AssignClusters(Graph* graph) {
       continue;
     }
 
-    if (!gc.InsertEdge(cluster_map[src]->index, cluster_map[dst]->index)) {
+    if (!gc.InsertEdge(cluster_map.at(src)->index,
+                       cluster_map.at(dst)->index)) {
       NGRAPH_VLOG(5) << "Failing due to cycle";
       return errors::Unimplemented(
           "Input graph has a cycle (inserting an edge from ",
@@ -423,9 +487,9 @@ Status AssignClusters(Graph* graph) {
         if (static_edge->src()->type_string() != "Const") {
           int shadow_node_index = gc.NewNode();
           bool gc_success = gc.InsertEdge(
-              cluster_map[static_edge->src()]->index, shadow_node_index);
-          gc_success &= gc.InsertEdge(shadow_node_index,
-                                      cluster_map[static_edge->dst()]->index);
+              cluster_map.at(static_edge->src())->index, shadow_node_index);
+          gc_success &= gc.InsertEdge(
+              shadow_node_index, cluster_map.at(static_edge->dst())->index);
           if (!gc_success)
             return errors::Internal(
                 "Unable to create shadow edges in GraphCycles");
@@ -468,133 +532,224 @@ Status AssignClusters(Graph* graph) {
   std::unordered_map<std::string, tuple<string, string, vector<string>>>
       deadness_info;
 
-  do {
-    changed = false;
+  auto log_reason = [](EdgeNonContractionReasons reason, const Edge* edge) {
+    NGRAPH_VLOG(0) << "NONCONTRACTION: " << reason_string[reason] << ": "
+                   << edge->src()->name() << "<" << edge->src()->type_string()
+                   << ">"
+                   << "[" << edge->src_output() << "] -> "
+                   << edge->dst()->name() << "<" << edge->dst()->type_string()
+                   << ">"
+                   << "[" << edge->dst_input() << "]";
+  };
 
-    auto log_reason = [](EdgeNonContractionReasons reason, Edge* edge) {
-      NGRAPH_VLOG(0) << "NONCONTRACTION: " << reason_string[reason] << ": "
-                     << edge->src()->name() << "<" << edge->src()->type_string()
-                     << ">"
-                     << "[" << edge->src_output() << "] -> "
-                     << edge->dst()->name() << "<" << edge->dst()->type_string()
-                     << ">"
-                     << "[" << edge->dst_input() << "]";
-    };
+  // Edges to attempt to contract, an edge is in the worklist at most once
+  std::deque<const Edge*> worklist;
+  std::vector<bool> is_queued(graph->num_edge_ids(), false);
+  auto enqueue = [&worklist, &is_queued](const Edge* edge) {
+    if (!is_queued[edge->id()]) {
+      is_queued[edge->id()] = true;
+      worklist.push_back(edge);
+    }
+  };
+  // Whether the edge is held in the deferred edges of the cluster of its src
+  // and of its dst. The clusters flush their deferred edges before they are
+  // merged, so the merged cluster holds an edge for one of its ends only.
+  std::vector<bool> is_deferred_on_src(graph->num_edge_ids(), false);
+  std::vector<bool> is_deferred_on_dst(graph->num_edge_ids(), false);
+  bool confirming = false;
+  auto defer = [&](const Edge* edge, Cluster* src_cluster,
+                   Cluster* dst_cluster) {
+    if (confirming) {
+      return;
+    }
+    if (!is_deferred_on_src[edge->id()]) {
+      is_deferred_on_src[edge->id()] = true;
+      src_cluster->deferred_edges.push_back(edge);
+    }
+    if (!is_deferred_on_dst[edge->id()]) {
+      is_deferred_on_dst[edge->id()] = true;
+      dst_cluster->deferred_edges.push_back(edge);
+    }
+  };
+  auto enqueue_deferred_edges = [&](Cluster* cluster) {
+    for (const Edge* edge : cluster->deferred_edges) {
+      if (cluster_map.at(edge->src()) == cluster) {
+        is_deferred_on_src[edge->id()] = false;
+      }
+      if (cluster_map.at(edge->dst()) == cluster) {
+        is_deferred_on_dst[edge->id()] = false;
+      }
+      enqueue(edge);
+    }
+    cluster->deferred_edges.clear();
+  };
 
-    for (auto edge : graph->edges()) {
-      Node* src = edge->src();
-      Node* dst = edge->dst();
+  // Attempts to contract the edge, sets contracted if the clusters of its
+  // ends were merged
+  auto contract_edge = [&](const Edge* edge, bool* contracted) -> Status {
+    *contracted = false;
+    Node* src = edge->src();
+    Node* dst = edge->dst();
 
-      int src_index = cluster_map[src]->index;
-      int dst_index = cluster_map[dst]->index;
+    Cluster* src_cluster = cluster_map.at(src);
+    Cluster* dst_cluster = cluster_map.at(dst);
+    int src_index = src_cluster->index;
+    int dst_index = dst_cluster->index;
 
-      if (!src->IsOp() || !dst->IsOp()) {
-        if (collect_non_contracting_edge_info) {
-          log_reason(EdgeNonContractionReasons::NOTANOP, edge);
-          cluster_separation_reason[get_string_key(src_index, dst_index)]
-              .push_back(EdgeNonContractionReasons::NOTANOP);
-        }
-        continue;
+    if (!src->IsOp() || !dst->IsOp()) {
+      if (collect_non_contracting_edge_info) {
+        log_reason(EdgeNonContractionReasons::NOTANOP, edge);
+        cluster_separation_reason[get_string_key(src_index, dst_index)]
+            .push_back(EdgeNonContractionReasons::NOTANOP);
       }
+      return Status::OK();
+    }
 
-      if (!NodeIsMarkedForClustering(src) || !NodeIsMarkedForClustering(dst)) {
-        NGRAPH_VLOG(5) << "Skipping (not marked): " << src->name() << "["
-                       << edge->src_output() << "]@" << src_index << " -> "
-                       << dst->name() << "[" << edge->dst_input() << "]@"
-                       << dst_index;
-        if (collect_non_contracting_edge_info) {
-          log_reason(EdgeNonContractionReasons::UNSUPPORTED, edge);
-          cluster_separation_reason[get_string_key(src_index, dst_index)]
-              .push_back(EdgeNonContractionReasons::UNSUPPORTED);
-        }
-        continue;
+    if (!NodeIsMarkedForClustering(src) || !NodeIsMarkedForClustering(dst)) {
+      NGRAPH_VLOG(5) << "Skipping (not marked): " << src->name() << "["
+                     << edge->src_output() << "]@" << src_index << " -> "
+                     << dst->name() << "[" << edge->dst_input() << "]@"
+                     << dst_index;
+      if (collect_non_contracting_edge_info) {
+        log_reason(EdgeNonContractionReasons::UNSUPPORTED, edge);
+        cluster_separation_reason[get_string_key(src_index, dst_index)]
+            .push_back(EdgeNonContractionReasons::UNSUPPORTED);
       }
+      return Status::OK();
+    }
 
 #if !defined(NGRAPH_TF_DISABLE_DEADNESS_CHECK)
-      // check if the edge can be contracted with respect to deadness
-      bool is_deadness_ok = false;
-      TF_RETURN_IF_ERROR(
-          CanContractEdgeDeadnessCheck(edge, cluster_map, is_deadness_ok));
-      if (!is_deadness_ok) {
-        // do not contract, src and dst node cannot be in the same cluster
-        NGRAPH_VLOG(5) << "Skipping (deadness not ok): " << src->name() << "["
-                       << edge->src_output() << "]@" << src_index << " -> "
-                       << dst->name() << "[" << edge->dst_input() << "]@"
-                       << dst_index;
-        if (collect_non_contracting_edge_info) {
-          log_reason(EdgeNonContractionReasons::DEADNESS, edge);
-          cluster_separation_reason[get_string_key(src_index, dst_index)]
-              .push_back(EdgeNonContractionReasons::DEADNESS);
-
-          auto src_cluster = cluster_map[src];
-          auto dst_cluster = cluster_map[dst];
-          vector<string> neighbours_predicate;
-          // Collect predicates of src's neighbours (except dst)
-          for (const Edge* src_cluster_edge : src_cluster->outgoing_edges) {
-            if (src_cluster_edge != edge) {
-              neighbours_predicate.push_back(
-                  cluster_map[src_cluster_edge->dst()]->predicate_string);
-            }
+    // check if the edge can be contracted with respect to deadness
+    bool is_deadness_ok = false;
+    TF_RETURN_IF_ERROR(
+        CanContractEdgeDeadnessCheck(edge, cluster_map, is_deadness_ok));
+    if (!is_deadness_ok) {
+      // do not contract, src and dst node cannot be in the same cluster
+      NGRAPH_VLOG(5) << "Skipping (deadness not ok): " << src->name() << "["
+                     << edge->src_output() << "]@" << src_index << " -> "
+                     << dst->name() << "[" << edge->dst_input() << "]@"
+                     << dst_index;
+      if (collect_non_contracting_edge_info) {
+        log_reason(EdgeNonContractionReasons::DEADNESS, edge);
+        cluster_separation_reason[get_string_key(src_index, dst_index)]
+            .push_back(EdgeNonContractionReasons::DEADNESS);
+
+        vector<string> neighbours_predicate;
+        // Collect predicates of src's neighbours (except dst)
+        for (const Edge* src_cluster_edge : src_cluster->outgoing_edges) {
+          if (src_cluster_edge != edge) {
+            neighbours_predicate.push_back(
+                deadness_analyzer->GetPredicateString(
+                    cluster_map.at(src_cluster_edge->dst())->predicate));
           }
-          deadness_info[get_string_key(src_index, dst_index)] = make_tuple(
-              cluster_map.at(src)->predicate_string,
-              cluster_map.at(dst)->predicate_string, neighbours_predicate);
         }
-        continue;
+        deadness_info[get_string_key(src_index, dst_index)] = make_tuple(
+            deadness_analyzer->GetPredicateString(src_cluster->predicate),
+            deadness_analyzer->GetPredicateString(dst_cluster->predicate),
+            neighbours_predicate);
       }
+      // The predicates may match once either cluster is merged
+      defer(edge, src_cluster, dst_cluster);
+      return Status::OK();
+    }
 #endif
 
-      // check if the edge can be constracted with respect to backend
-      bool is_backend_ok = false;
-      TF_RETURN_IF_ERROR(
-          CanContractEdgeBackendCheck(edge, cluster_map, is_backend_ok));
-      if (!is_backend_ok) {
-        NGRAPH_VLOG(5) << "Skipping (backend not ok): " << src->name() << "["
-                       << edge->src_output() << "]@" << src_index << " -> "
-                       << dst->name() << "[" << edge->dst_input() << "]@"
-                       << dst_index;
-        if (collect_non_contracting_edge_info) {
-          log_reason(EdgeNonContractionReasons::BACKEND, edge);
-          cluster_separation_reason[get_string_key(src_index, dst_index)]
-              .push_back(EdgeNonContractionReasons::BACKEND);
-        }
-        // do not contract, src and dst node cannot be in the same cluster
-        continue;
+    // check if the edge can be constracted with respect to backend
+    bool is_backend_ok = false;
+    TF_RETURN_IF_ERROR(
+        CanContractEdgeBackendCheck(edge, cluster_map, is_backend_ok));
+    if (!is_backend_ok) {
+      NGRAPH_VLOG(5) << "Skipping (backend not ok): " << src->name() << "["
+                     << edge->src_output() << "]@" << src_index << " -> "
+                     << dst->name() << "[" << edge->dst_input() << "]@"
+                     << dst_index;
+      if (collect_non_contracting_edge_info) {
+        log_reason(EdgeNonContractionReasons::BACKEND, edge);
+        cluster_separation_reason[get_string_key(src_index, dst_index)]
+            .push_back(EdgeNonContractionReasons::BACKEND);
       }
+      // do not contract, src and dst node cannot be in the same cluster
+      return Status::OK();
+    }
 
-      // Check if contracting the edge will lead to cycles
-      // if not, MergeClusters
-      if (gc.HasEdge(src_index, dst_index) &&
-          gc.ContractEdge(src_index, dst_index)) {
-        MergeClusters(edge, cluster_map);
-        // something changed
-        changed = true;
-      } else {
-        if (collect_non_contracting_edge_info) {
-          // either static input
-          // or there exists a longer path, so contracting this edge causes
-          // cycles
-          std::vector<int32> static_inputs;
-          GetStaticInputs(dst, &static_inputs);
-          bool is_static = std::find(static_inputs.begin(), static_inputs.end(),
-                                     edge->dst_input()) != static_inputs.end();
-          bool is_not_const = src->type_string() != "Const";
-          // 3 possible reasons here:
-          // src dst lies in same cluster, so nothing to do (trivial cycle
-          // induced in graphcycles)
-          // dst has static input
-          // a longer irreducible path exists
-          auto reason = (src_index == dst_index
-                             ? EdgeNonContractionReasons::SAMECLUSTER
-                             : ((is_not_const && is_static)
-                                    ? EdgeNonContractionReasons::STATICINPUT
-                                    : EdgeNonContractionReasons::PATHEXISTS));
-          log_reason(reason, edge);
-          cluster_separation_reason[get_string_key(src_index, dst_index)]
-              .push_back(reason);
+    // Check if contracting the edge will lead to cycles
+    // if not, MergeClusters
+    if (gc.HasEdge(src_index, dst_index) &&
+        gc.ContractEdge(src_index, dst_index)) {
+      // The edges deferred on either cluster may be contractible now
+      enqueue_deferred_edges(src_cluster);
+      enqueue_deferred_edges(dst_cluster);
+#if !defined(NGRAPH_TF_DISABLE_DEADNESS_CHECK)
+      // The nodes of src's cluster get dst's predicate, which may let the
+      // clusters feeding them pass the deadness check
+      if (DeadnessAnalysis::IsTruePredId(src_cluster->predicate) &&
+          !DeadnessAnalysis::IsTruePredId(dst_cluster->predicate)) {
+        for (auto node : src_cluster->nodes) {
+          for (auto in_edge : node->in_edges()) {
+            enqueue_deferred_edges(cluster_map.at(in_edge->src()));
+          }
         }
       }
+#endif
+      MergeClusters(edge, cluster_map);
+      // something changed
+      *contracted = true;
+      return Status::OK();
+    }
+
+    if (collect_non_contracting_edge_info) {
+      // either static input
+      // or there exists a longer path, so contracting this edge causes
+      // cycles
+      std::vector<int32> static_inputs;
+      GetStaticInputs(dst, &static_inputs);
+      bool is_static = std::find(static_inputs.begin(), static_inputs.end(),
+                                 edge->dst_input()) != static_inputs.end();
+      bool is_not_const = src->type_string() != "Const";
+      // 3 possible reasons here:
+      // src dst lies in same cluster, so nothing to do (trivial cycle
+      // induced in graphcycles)
+      // dst has static input
+      // a longer irreducible path exists
+      auto reason = (src_index == dst_index
+                         ? EdgeNonContractionReasons::SAMECLUSTER
+                         : ((is_not_const && is_static)
+                                ? EdgeNonContractionReasons::STATICINPUT
+                                : EdgeNonContractionReasons::PATHEXISTS));
+      log_reason(reason, edge);
+      cluster_separation_reason[get_string_key(src_index, dst_index)].push_back(
+          reason);
+    }
+    // The path between the clusters may go away once either is merged
+    if (src_cluster != dst_cluster) {
+      defer(edge, src_cluster, dst_cluster);
+    }
+    return Status::OK();
+  };
+
+  for (auto edge : graph->edges()) {
+    enqueue(edge);
+  }
+
+  do {
+    changed = false;
+
+    while (!worklist.empty()) {
+      const Edge* edge = worklist.front();
+      worklist.pop_front();
+      is_queued[edge->id()] = false;
+      bool contracted;
+      TF_RETURN_IF_ERROR(contract_edge(edge, &contracted));
+    }
+
+    // Confirm that no edge can be contracted anymore
+    confirming = true;
+    for (auto edge : graph->edges()) {
+      bool contracted;
+      TF_RETURN_IF_ERROR(contract_edge(edge, &contracted));
+      changed |= contracted;
     }
+    confirming = false;
 
     if (!changed && config::IsLoggingPlacement()) {
       // This will be entered only once if logging is enabled
@@ -610,10 +765,10 @@ Status AssignClusters(Graph* graph) {
   NGRAPH_VLOG(2) << "Contraction done";
 
   NGRAPH_VLOG(2) << "Starting tagging";
-  std::set<Cluster*> seen;
+  std::unordered_set<Cluster*> seen;
   unordered_map<int, int> cluster_to_encapsulate;
-  for (auto kv : cluster_map) {
-    auto cluster = kv.second.get();
+  for (auto graph_node : graph->nodes()) {
+    auto cluster = cluster_map.at(graph_node);
     if (seen.count(cluster) != 0) {
       continue;
     }
@@ -628,7 +783,7 @@ Status AssignClusters(Graph* graph) {
 // Some sanity checks for deadness
 #if !defined(NGRAPH_TF_DISABLE_DEADNESS_CHECK)
         TF_RETURN_IF_ERROR(CheckNodeClusterAssignmentWRTDeadness(
-            node, nodes_predicate_map, cluster_map));
+            node, node_predicates, *deadness_analyzer, cluster_map));
 #endif
       } else {
         has_non_ngraph_ops = true;
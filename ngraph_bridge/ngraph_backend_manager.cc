@@ -71,6 +71,17 @@ Status BackendManager::CreateBackend(const string& backend_name) {
     }
     std::unique_ptr<Backend> bend = std::unique_ptr<Backend>(new Backend);
     bend->backend_ptr = std::move(bend_ptr);
+
+    // The lock policy is GLOBAL unless requested otherwise, since the other
+    // policies do not serialize the calls with the compilations
+    const char* lock_policy_env_value =
+        std::getenv("NGRAPH_TF_BACKEND_LOCK_POLICY");
+    if (lock_policy_env_value != nullptr) {
+      BackendLockPolicy env_lock_policy;
+      TF_RETURN_IF_ERROR(GetBackendLockPolicyFromString(
+          string(lock_policy_env_value), &env_lock_policy));
+      bend->lock_policy = env_lock_policy;
+    }
     BackendManager::ng_backend_map_[backend_name] = std::move(bend);
     BackendManager::ref_count_each_backend_[backend_name] = 0;
   }
@@ -132,6 +143,74 @@ void BackendManager::UnlockBackend(const string& backend_name) {
   BackendManager::ng_backend_map_.at(backend_name)->backend_mutex.unlock();
 }
 
+// LockExecutable
+ExecutableLock BackendManager::LockExecutable(
+    const string& backend_name, const ng::runtime::Executable* ng_exec) {
+  Backend* bend = BackendManager::ng_backend_map_.at(backend_name).get();
+  ExecutableLock executable_lock;
+  switch (bend->lock_policy.load()) {
+    case BackendLockPolicy::GLOBAL:
+      executable_lock.m_lock = std::unique_lock<mutex>(bend->backend_mutex);
+      break;
+    case BackendLockPolicy::PER_EXECUTABLE: {
+      {
+        std::lock_guard<std::mutex> lock(bend->executable_mutex_map_mutex);
+        auto& entry = bend->executable_mutex_map[ng_exec];
+        if (entry == nullptr) {
+          entry = make_shared<mutex>();
+        }
+        executable_lock.m_executable_mutex = entry;
+      }
+      executable_lock.m_lock =
+          std::unique_lock<mutex>(*executable_lock.m_executable_mutex);
+      break;
+    }
+    case BackendLockPolicy::LOCK_FREE:
+      break;
+  }
+  return executable_lock;
+}
+
+// RemoveExecutableLock
+void BackendManager::RemoveExecutableLock(
+    const string& backend_name, const ng::runtime::Executable* ng_exec) {
+  Backend* bend = BackendManager::ng_backend_map_.at(backend_name).get();
+  std::lock_guard<std::mutex> lock(bend->executable_mutex_map_mutex);
+  bend->executable_mutex_map.erase(ng_exec);
+}
+
+BackendLockPolicy BackendManager::GetBackendLockPolicy(
+    const string& backend_name) {
+  return BackendManager::ng_backend_map_.at(backend_name)->lock_policy;
+}
+
+Status BackendManager::SetBackendLockPolicy(
+    const string& backend_name, const BackendLockPolicy& lock_policy) {
+  std::lock_guard<std::mutex> lock(BackendManager::ng_backend_map_mutex_);
+  auto itr = BackendManager::ng_backend_map_.find(backend_name);
+  if (itr == BackendManager::ng_backend_map_.end()) {
+    return errors::Internal("Backend ", backend_name, " has not been created");
+  }
+  itr->second->lock_policy = lock_policy;
+  return Status::OK();
+}
+
+Status BackendManager::GetBackendLockPolicyFromString(
+    const string& policy_str, BackendLockPolicy* lock_policy) {
+  if (policy_str == "GLOBAL") {
+    *lock_policy = BackendLockPolicy::GLOBAL;
+  } else if (policy_str == "PER_EXECUTABLE") {
+    *lock_policy = BackendLockPolicy::PER_EXECUTABLE;
+  } else if (policy_str == "LOCK_FREE") {
+    *lock_policy = BackendLockPolicy::LOCK_FREE;
+  } else {
+    return errors::InvalidArgument(
+        "Backend lock policy must be GLOBAL, PER_EXECUTABLE or LOCK_FREE, got ",
+        policy_str);
+  }
+  return Status::OK();
+}
+
 // Returns the nGraph supported backend names
 vector<string> BackendManager::GetSupportedBackendNames() {
 // Register backends for static linking
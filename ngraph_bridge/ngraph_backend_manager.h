@@ -39,9 +39,55 @@ namespace tensorflow {
 
 namespace ngraph_bridge {
 
+// Locking policy used around ng_exec->call() for a backend
+// GLOBAL: Only one executable of the backend runs at a time
+// PER_EXECUTABLE: Calls to different executables run in parallel, calls to
+//   the same executable are serialized
+// LOCK_FREE: No lock is taken. The backend supports concurrent calls as long
+//   as each call uses its own I/O tensors, which is guaranteed by the pipeline
+//   index checked out from the PipelinedTensorsStore. So calls to the same
+//   executable with different pipeline indices run in parallel
+// The compilations take the backend lock (LockBackend), which only GLOBAL
+// takes around the calls. So PER_EXECUTABLE and LOCK_FREE must only be used
+// with backends that support compiling while executables run. The policy is
+// GLOBAL by default, NGRAPH_TF_BACKEND_LOCK_POLICY or SetBackendLockPolicy
+// select another one
+enum class BackendLockPolicy { GLOBAL, PER_EXECUTABLE, LOCK_FREE };
+
 struct Backend {
   shared_ptr<ng::runtime::Backend> backend_ptr;
   mutex backend_mutex;
+  // Read by LockExecutable while SetBackendLockPolicy may change it
+  std::atomic<BackendLockPolicy> lock_policy{BackendLockPolicy::GLOBAL};
+  // Mutexes used when the lock_policy is PER_EXECUTABLE
+  map<const ng::runtime::Executable*, shared_ptr<mutex>> executable_mutex_map;
+  mutex executable_mutex_map_mutex;
+};
+
+// Returned by BackendManager::LockExecutable. Holds the lock that the lock
+// policy of the backend called for at the time of locking, and releases it
+// when destroyed, so a change of the policy in between cannot make the unlock
+// differ from the lock
+class ExecutableLock {
+ public:
+  ExecutableLock() = default;
+  ExecutableLock(ExecutableLock&& other) = default;
+  ExecutableLock& operator=(ExecutableLock&& other) = delete;
+
+  // Releases the lock before the guard is destroyed
+  void Unlock() {
+    if (m_lock.owns_lock()) {
+      m_lock.unlock();
+    }
+  }
+
+ private:
+  friend class BackendManager;
+  // Keeps the mutex of a PER_EXECUTABLE lock alive if the executable is
+  // removed while it is locked. Declared before m_lock, which is destroyed
+  // (and unlocked) first
+  shared_ptr<mutex> m_executable_mutex;
+  std::unique_lock<mutex> m_lock;
 };
 
 class BackendManager {
@@ -86,6 +132,28 @@ class BackendManager {
   // UnlockBackend
   static void UnlockBackend(const string& backend_name);
 
+  // Locks the backend before ng_exec->call() as per the backend's
+  // BackendLockPolicy, till the returned ExecutableLock is destroyed or
+  // unlocked. Compilation must still use LockBackend, see BackendLockPolicy
+  static ExecutableLock LockExecutable(const string& backend_name,
+                                       const ng::runtime::Executable* ng_exec);
+
+  // Drops the per-executable lock when an executable is removed from
+  // the backend
+  static void RemoveExecutableLock(const string& backend_name,
+                                   const ng::runtime::Executable* ng_exec);
+
+  // Returns the lock policy of a created backend
+  static BackendLockPolicy GetBackendLockPolicy(const string& backend_name);
+
+  // Overrides the lock policy of a created backend
+  static Status SetBackendLockPolicy(const string& backend_name,
+                                     const BackendLockPolicy& lock_policy);
+
+  // Parses GLOBAL, PER_EXECUTABLE or LOCK_FREE
+  static Status GetBackendLockPolicyFromString(const string& policy_str,
+                                               BackendLockPolicy* lock_policy);
+
   // Backend Config Functions
   // These functions facilitate getting/setting
   // of additional backend configurations by abstracting the
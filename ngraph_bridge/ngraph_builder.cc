@@ -5164,6 +5164,20 @@ Status Builder::TranslateGraph(
     const std::vector<TensorShape>& inputs,
     const std::vector<const Tensor*>& static_input_map,
     const Graph* input_graph, shared_ptr<ng::Function>& ng_function) {
+  std::vector<ng::PartialShape> partial_shapes;
+  for (const auto& input : inputs) {
+    ng::Shape ng_shape;
+    TF_RETURN_IF_ERROR(TFTensorShapeToNGraphShape(input, &ng_shape));
+    partial_shapes.push_back(ng_shape);
+  }
+  return TranslateGraph(partial_shapes, static_input_map, input_graph,
+                        ng_function);
+}
+
+Status Builder::TranslateGraph(
+    const std::vector<ng::PartialShape>& inputs,
+    const std::vector<const Tensor*>& static_input_map,
+    const Graph* input_graph, shared_ptr<ng::Function>& ng_function) {
   //
   // We will visit ops in topological order.
   //
@@ -5230,13 +5244,10 @@ Status Builder::TranslateGraph(
     ng::element::Type ng_et;
     TF_RETURN_IF_ERROR(TFDataTypeToNGraphElementType(dtype, &ng_et));
 
-    ng::Shape ng_shape;
-    TF_RETURN_IF_ERROR(TFTensorShapeToNGraphShape(inputs[index], &ng_shape));
-
     string prov_tag;
     GetNodeAttr(parm->attrs(), "_prov_tag", &prov_tag);
     auto ng_param =
-        ConstructNgNode<ng::op::Parameter>(prov_tag, ng_et, ng_shape);
+        ConstructNgNode<ng::op::Parameter>(prov_tag, ng_et, inputs[index]);
     SaveNgOp(ng_op_map, parm->name(), ng_param);
     ng_parameter_list[index] = ng_param;
   }
@@ -37,6 +37,14 @@ class Builder {
       const std::vector<const Tensor*>& static_input_map, const Graph* tf_graph,
       std::shared_ptr<ngraph::Function>& ng_function);
 
+  // Translates the graph with partial shapes for the inputs, e.g. with an
+  // unknown batch dimension. Fails if a translation handler requires a
+  // static shape
+  static Status TranslateGraph(
+      const std::vector<ngraph::PartialShape>& inputs,
+      const std::vector<const Tensor*>& static_input_map, const Graph* tf_graph,
+      std::shared_ptr<ngraph::Function>& ng_function);
+
   using OpMap = std::unordered_map<std::string,
                                    std::vector<std::shared_ptr<ngraph::Node>>>;
 
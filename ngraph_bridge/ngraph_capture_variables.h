@@ -24,7 +24,10 @@ namespace tensorflow {
 
 namespace ngraph_bridge {
 
-Status CaptureVariables(Graph* graph, std::set<string> skip_these_nodes);
+// The graph id tags the captured prefetch datasets and their iterators, see
+// ReplacePrefetch
+Status CaptureVariables(Graph* graph, std::set<string> skip_these_nodes,
+                        int graph_id);
 
 }  // namespace ngraph_bridge
 }  // namespace tensorflow
@@ -34,6 +34,9 @@ unordered_map<string, unordered_set<int>>
 unordered_map<string, tuple<string, bool>>
     NGraphCatalog::encap_output_info_map_;
 unordered_map<string, map<int, int>> NGraphCatalog::prefetched_input_index_map_;
+unordered_map<string, string> NGraphCatalog::prefetch_iterator_map_;
+unordered_map<string, set<string>> NGraphCatalog::prefetch_consumers_map_;
+std::mutex NGraphCatalog::prefetch_mutex_;
 
 // Function to create the Node Key
 string NGraphCatalog::CreateNodeKey(const int& graph_id,
@@ -217,15 +220,26 @@ void NGraphCatalog::PrintEncapOutputInfoMap() {
 }
 
 // Functions for PrefetchedInputIndex Map
+// The consumers of the iterator are keyed by the graph id of the node unless
+// the graph id of the iterator is given
 void NGraphCatalog::AddToPrefetchedInputIndexMap(
     const int& graphid, const string& node_name,
-    const map<int, int>& encap_inp_index_map) {
+    const map<int, int>& encap_inp_index_map, const string& iterator_name,
+    const int& iterator_graphid) {
   string key = NGraphCatalog::CreateNodeKey(graphid, node_name);
-  if (NGraphCatalog::ExistsInPrefetchedInputIndexMap(key)) {
+  std::lock_guard<std::mutex> lock(NGraphCatalog::prefetch_mutex_);
+  if (!NGraphCatalog::prefetched_input_index_map_
+           .insert({key, encap_inp_index_map})
+           .second) {
     throw runtime_error("Trying to add an already existing key ( " + key +
                         " ) in PrefetchedInputIndexMap ");
   }
-  NGraphCatalog::prefetched_input_index_map_.insert({key, encap_inp_index_map});
+  if (!iterator_name.empty()) {
+    NGraphCatalog::prefetch_iterator_map_[key] = iterator_name;
+    string iterator_key = NGraphCatalog::CreateNodeKey(
+        iterator_graphid < 0 ? graphid : iterator_graphid, iterator_name);
+    NGraphCatalog::prefetch_consumers_map_[iterator_key].insert(key);
+  }
 }
 
 bool NGraphCatalog::ExistsInPrefetchedInputIndexMap(const int& graphid,
@@ -235,21 +249,27 @@ bool NGraphCatalog::ExistsInPrefetchedInputIndexMap(const int& graphid,
 }
 
 bool NGraphCatalog::ExistsInPrefetchedInputIndexMap(const string& key) {
+  std::lock_guard<std::mutex> lock(NGraphCatalog::prefetch_mutex_);
   auto itr = NGraphCatalog::prefetched_input_index_map_.find(key);
   return itr != NGraphCatalog::prefetched_input_index_map_.end();
 }
 
-const map<int, int>& NGraphCatalog::GetIndexesFromPrefetchedInputIndexMap(
+map<int, int> NGraphCatalog::GetIndexesFromPrefetchedInputIndexMap(
     const int& graphid, const string& node_name) {
   string key = NGraphCatalog::CreateNodeKey(graphid, node_name);
+  std::lock_guard<std::mutex> lock(NGraphCatalog::prefetch_mutex_);
   return NGraphCatalog::prefetched_input_index_map_.at(key);
 }
 
 void NGraphCatalog::ClearPrefetchedInputIndexMap() {
+  std::lock_guard<std::mutex> lock(NGraphCatalog::prefetch_mutex_);
   NGraphCatalog::prefetched_input_index_map_.clear();
+  NGraphCatalog::prefetch_iterator_map_.clear();
+  NGraphCatalog::prefetch_consumers_map_.clear();
 }
 
 void NGraphCatalog::PrintPrefetchedInputIndexMap() {
+  std::lock_guard<std::mutex> lock(NGraphCatalog::prefetch_mutex_);
   NGRAPH_VLOG(4) << "PrefetchedInputIndexMap";
   for (auto it : prefetched_input_index_map_) {
     NGRAPH_VLOG(4) << "Key: (GraphId_NodeName) " << it.first;
@@ -258,6 +278,35 @@ void NGraphCatalog::PrintPrefetchedInputIndexMap() {
                      << ", IteratorGetNext Output Index: " << itr->second;
     }
   }
+  for (auto it : prefetch_consumers_map_) {
+    NGRAPH_VLOG(4) << "Iterator: (GraphId_NodeName) " << it.first;
+    for (const auto& consumer : it.second) {
+      NGRAPH_VLOG(4) << " Consumer: (GraphId_NodeName) " << consumer;
+    }
+  }
+}
+
+// Functions for PrefetchIterator and PrefetchConsumers Maps
+string NGraphCatalog::GetPrefetchIterator(const int& graphid,
+                                          const string& node_name) {
+  string key = NGraphCatalog::CreateNodeKey(graphid, node_name);
+  std::lock_guard<std::mutex> lock(NGraphCatalog::prefetch_mutex_);
+  auto itr = NGraphCatalog::prefetch_iterator_map_.find(key);
+  if (itr == NGraphCatalog::prefetch_iterator_map_.end()) {
+    return "";
+  }
+  return itr->second;
+}
+
+set<string> NGraphCatalog::GetPrefetchConsumers(const int& graphid,
+                                                const string& iterator_name) {
+  string key = NGraphCatalog::CreateNodeKey(graphid, iterator_name);
+  std::lock_guard<std::mutex> lock(NGraphCatalog::prefetch_mutex_);
+  auto itr = NGraphCatalog::prefetch_consumers_map_.find(key);
+  if (itr == NGraphCatalog::prefetch_consumers_map_.end()) {
+    return {};
+  }
+  return itr->second;
 }
 }  // ngraph_bridge
 }  // tensorflow
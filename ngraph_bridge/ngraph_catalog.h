@@ -20,6 +20,7 @@
 #include <atomic>
 #include <mutex>
 #include <ostream>
+#include <set>
 #include <vector>
 
 #include "tensorflow/core/lib/core/errors.h"
@@ -89,6 +90,32 @@ class NGraphCatalog {
 
   static unordered_map<string, map<int, int>> prefetched_input_index_map_;
 
+  // Map keeps track of the iterator that feeds the prefetched inputs of each
+  // encap node in the PrefetchedInputIndexMap.
+  // Will be used by NGraphEncapsulate Op, every encap node has a prefetch
+  // shared resource of its own.
+  // Map of
+  // Key
+  //      string : GraphId + _ + nodename
+  // Value : name of the iterator node (the input of IteratorGetNext)
+  static unordered_map<string, string> prefetch_iterator_map_;
+
+  // Map keeps track of the encap nodes that consume the elements of each
+  // iterator, i.e. the reverse of the PrefetchIteratorMap.
+  // Will be used by NGraphPrefetchDataset Op, which copies every element to
+  // the device tensors of all the consumers.
+  // Map of
+  // Key
+  //      string : GraphId + _ + name of the iterator node (the input of
+  //      MakeIterator), where GraphId is the id of the graph in which the
+  //      prefetch dataset of the iterator was captured
+  // Value : Set of GraphId + _ + nodename
+  // The prefetch dataset reads it while other graphs are rewritten, and the
+  // encap ops read the other two maps while they are created, so the three
+  // maps are guarded by prefetch_mutex_
+  static unordered_map<string, set<string>> prefetch_consumers_map_;
+  static std::mutex prefetch_mutex_;
+
  public:
   // Utility to create key to query the maps
   static string CreateNodeKey(const int& graph_id, const string& node_name,
@@ -156,15 +183,24 @@ class NGraphCatalog {
   // Functions for PrefetedInputs Map
   static void AddToPrefetchedInputIndexMap(
       const int& graphid, const string& node_name,
-      const map<int, int>& encap_inp_index_map);
+      const map<int, int>& encap_inp_index_map,
+      const string& iterator_name = "", const int& iterator_graphid = -1);
   static bool ExistsInPrefetchedInputIndexMap(const int& graphid,
                                               const string& node_name);
   static bool ExistsInPrefetchedInputIndexMap(const string& key);
-  static const map<int, int>& GetIndexesFromPrefetchedInputIndexMap(
+  // Returns a copy, the map may be changed by another graph meanwhile
+  static map<int, int> GetIndexesFromPrefetchedInputIndexMap(
       const int& graphid, const string& node_name);
 
   static void ClearPrefetchedInputIndexMap();
   static void PrintPrefetchedInputIndexMap();
+
+  // Functions for PrefetchIterator and PrefetchConsumers Maps
+  // Returns "" if the prefetched inputs of the node have no known iterator
+  static string GetPrefetchIterator(const int& graphid,
+                                    const string& node_name);
+  static set<string> GetPrefetchConsumers(const int& graphid,
+                                          const string& iterator_name);
 };
 
 }  // ngraph_bridge
@@ -0,0 +1,320 @@
+/*******************************************************************************
+ * Copyright 2019 Intel Corporation
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ *******************************************************************************/
+
+#include <algorithm>
+#include <cstdlib>
+#include <mutex>
+#include <utility>
+
+#include "tensorflow/core/common_runtime/shape_refiner.h"
+#include "tensorflow/core/framework/node_def_util.h"
+#include "tensorflow/core/framework/shape_inference.h"
+#include "tensorflow/core/framework/types.h"
+#include "tensorflow/core/graph/algorithm.h"
+#include "tensorflow/core/lib/strings/strcat.h"
+
+#include "logging/ngraph_log.h"
+#include "ngraph_bridge/ngraph_cluster_cost_model.h"
+
+using namespace std;
+
+namespace tensorflow {
+
+namespace ngraph_bridge {
+
+//---------------------------------------------------------------------------
+//  NodeCountCostModel::ShouldEncapsulate
+//---------------------------------------------------------------------------
+constexpr int NodeCountCostModel::MIN_NONTRIVIAL_NODES;
+
+bool NodeCountCostModel::ShouldEncapsulate(const ClusterCost& cost,
+                                           std::string* reason) const {
+  *reason = strings::StrCat(cost.num_nontrivial_nodes,
+                            " non-trivial nodes, need ", MIN_NONTRIVIAL_NODES);
+  return cost.num_nontrivial_nodes >= MIN_NONTRIVIAL_NODES;
+}
+
+//---------------------------------------------------------------------------
+//  StaticShapeCostModel
+//---------------------------------------------------------------------------
+double StaticShapeCostModel::TFTimeUs(const ClusterCost& cost) const {
+  return cost.num_nontrivial_nodes * m_params.tf_op_overhead_us +
+         cost.flops / m_params.flops_per_us;
+}
+
+double StaticShapeCostModel::NGraphTimeUs(const ClusterCost& cost) const {
+  return m_params.dispatch_overhead_us +
+         (cost.input_bytes + cost.output_bytes) / m_params.copy_bytes_per_us +
+         cost.flops / m_params.flops_per_us * (1.0 - m_params.compute_gain);
+}
+
+bool StaticShapeCostModel::ShouldEncapsulate(const ClusterCost& cost,
+                                             std::string* reason) const {
+  double tf_us = TFTimeUs(cost);
+  double ng_us = NGraphTimeUs(cost);
+  *reason = strings::StrCat("TF ", tf_us, " us, nGraph ", ng_us, " us");
+  if (ng_us < tf_us) {
+    return true;
+  }
+  if (cost.num_unknown_shapes > 0 &&
+      cost.num_nontrivial_nodes >= NodeCountCostModel::MIN_NONTRIVIAL_NODES) {
+    strings::StrAppend(reason, ", kept for ", cost.num_unknown_shapes,
+                       " unknown shapes");
+    return true;
+  }
+  return false;
+}
+
+//---------------------------------------------------------------------------
+//  ProfileGuidedCostModel::ShouldEncapsulate
+//---------------------------------------------------------------------------
+bool ProfileGuidedCostModel::ShouldEncapsulate(const ClusterCost& cost,
+                                               std::string* reason) const {
+  ClusterProfileEntry entry;
+  if (!m_profile->Find(cost.profile_key, &entry) || entry.ngraph_calls == 0 ||
+      entry.tf_calls == 0) {
+    bool encapsulate = m_fallback->ShouldEncapsulate(cost, reason);
+    strings::StrAppend(reason, ", not profiled");
+    return encapsulate;
+  }
+  double tf_us = entry.TFUsPerCall();
+  double ng_us = entry.NGraphUsPerCall();
+  *reason = strings::StrCat("measured TF ", tf_us, " us over ", entry.tf_calls,
+                            " calls, nGraph ", ng_us, " us over ",
+                            entry.ngraph_calls, " calls");
+  return ng_us < tf_us;
+}
+
+//---------------------------------------------------------------------------
+//  GetClusterCostModel/SetClusterCostModel
+//---------------------------------------------------------------------------
+static std::mutex s_cost_model_mutex;
+static std::unique_ptr<ClusterCostModel> s_cost_model;
+
+static std::unique_ptr<ClusterCostModel> CreateClusterCostModelFromEnv() {
+  std::unique_ptr<ClusterCostModel> cost_model(new NodeCountCostModel());
+  const char* cost_model_env = std::getenv("NGRAPH_TF_CLUSTER_COST_MODEL");
+  if (cost_model_env != nullptr) {
+    string cost_model_name(cost_model_env);
+    if (cost_model_name == "static_shape") {
+      cost_model.reset(new StaticShapeCostModel());
+    } else if (cost_model_name != "node_count") {
+      NGRAPH_VLOG(0) << "Unknown NGRAPH_TF_CLUSTER_COST_MODEL "
+                     << cost_model_name << ", using node_count";
+    }
+  }
+  const NGraphClusterProfile* profile = NGraphClusterProfile::Loaded();
+  if (profile != nullptr) {
+    cost_model.reset(
+        new ProfileGuidedCostModel(std::move(cost_model), profile));
+  }
+  return cost_model;
+}
+
+ClusterCostModel* GetClusterCostModel() {
+  std::lock_guard<std::mutex> lock(s_cost_model_mutex);
+  if (s_cost_model == nullptr) {
+    s_cost_model = CreateClusterCostModelFromEnv();
+  }
+  return s_cost_model.get();
+}
+
+void SetClusterCostModel(std::unique_ptr<ClusterCostModel> cost_model) {
+  std::lock_guard<std::mutex> lock(s_cost_model_mutex);
+  s_cost_model = std::move(cost_model);
+}
+
+//---------------------------------------------------------------------------
+//  EstimateNodeFlops
+//---------------------------------------------------------------------------
+bool EstimateNodeFlops(const Node* node,
+                       const std::vector<PartialTensorShape>& input_shapes,
+                       const std::vector<PartialTensorShape>& output_shapes,
+                       int64* flops) {
+  const string& type = node->type_string();
+  if (type == "Const" || type == "Identity") {
+    *flops = 0;
+    return true;
+  }
+
+  // The contractions do a multiply and an add for every element of the
+  // output and every element of the reduced dimension(s)
+  if (type == "MatMul" || type == "BatchMatMul" || type == "BatchMatMulV2") {
+    if (input_shapes.empty() || output_shapes.empty() ||
+        !input_shapes[0].IsFullyDefined() ||
+        !output_shapes[0].IsFullyDefined() || input_shapes[0].dims() < 2) {
+      return false;
+    }
+    bool transpose = false;
+    if (!GetNodeAttr(node->attrs(), type == "MatMul" ? "transpose_a" : "adj_x",
+                     &transpose)
+             .ok()) {
+      transpose = false;
+    }
+    int rank = input_shapes[0].dims();
+    int64 reduced = input_shapes[0].dim_size(transpose ? rank - 2 : rank - 1);
+    *flops = 2 * output_shapes[0].num_elements() * reduced;
+    return true;
+  }
+  if (type == "Conv2D" || type == "Conv3D" || type == "DepthwiseConv2dNative") {
+    if (input_shapes.size() < 2 || output_shapes.empty() ||
+        !input_shapes[1].IsFullyDefined() ||
+        !output_shapes[0].IsFullyDefined() || input_shapes[1].dims() < 2) {
+      return false;
+    }
+    // The filter is [spatial..., in_channels, out_channels (or multiplier)]
+    const PartialTensorShape& filter = input_shapes[1];
+    int64 reduced = filter.num_elements() / filter.dim_size(filter.dims() - 1);
+    if (type == "DepthwiseConv2dNative") {
+      reduced /= filter.dim_size(filter.dims() - 2);
+    }
+    *flops = 2 * output_shapes[0].num_elements() * reduced;
+    return true;
+  }
+
+  // Other ops (elementwise, reductions, data movement) are assumed to touch
+  // every element of their largest input or output once
+  int64 elements = 0;
+  for (const auto& shapes : {&input_shapes, &output_shapes}) {
+    for (const auto& shape : *shapes) {
+      if (!shape.IsFullyDefined()) {
+        return false;
+      }
+      elements = std::max(elements, shape.num_elements());
+    }
+  }
+  *flops = elements;
+  return true;
+}
+
+//---------------------------------------------------------------------------
+//  EstimateClusterCosts
+//---------------------------------------------------------------------------
+// Returns the shape of the tensor, as inferred by `refiner`. The shape is
+// unknown if inference failed for the node
+static PartialTensorShape GetInferredShape(const ShapeRefiner& refiner,
+                                           const Node* node, int index,
+                                           bool is_input) {
+  shape_inference::InferenceContext* ctx = refiner.GetContext(node);
+  if (ctx == nullptr) {
+    return PartialTensorShape();
+  }
+  shape_inference::ShapeHandle handle =
+      is_input ? ctx->input(index) : ctx->output(index);
+  TensorShapeProto proto;
+  ctx->ShapeHandleToProto(handle, &proto);
+  return PartialTensorShape(proto);
+}
+
+// Adds the bytes of the tensor to `bytes`. Returns false if its shape is
+// not static
+static bool AddTensorBytes(const PartialTensorShape& shape, DataType dtype,
+                           int64* bytes) {
+  if (!shape.IsFullyDefined()) {
+    return false;
+  }
+  *bytes += shape.num_elements() * DataTypeSize(dtype);
+  return true;
+}
+
+Status EstimateClusterCosts(const Graph* graph,
+                            const std::map<int, std::set<Node*>>& cluster_map,
+                            bool infer_shapes,
+                            std::map<int, ClusterCost>* cluster_costs) {
+  ShapeRefiner refiner(graph->versions().producer(), graph->op_registry());
+  refiner.set_require_shape_inference_fns(false);
+  if (infer_shapes) {
+    // Shape inference needs the inputs of a node before the node. The back
+    // edges of the loops are left out, so the Merge nodes of a loop get the
+    // shapes of their inputs from outside the loop
+    std::vector<Node*> ordered;
+    GetReversePostOrder(*graph, &ordered, /*stable_comparator=*/{},
+                        /*edge_filter=*/[](const Edge& edge) {
+                          return !edge.src()->IsNextIteration();
+                        });
+    for (auto node : ordered) {
+      Status status = refiner.AddNode(node);
+      if (!status.ok()) {
+        // The shapes of the node, and of the nodes it feeds, stay unknown
+        NGRAPH_VLOG(5) << "Cost model: no shapes for " << node->name() << ": "
+                       << status.error_message();
+      }
+    }
+  }
+
+  for (const auto& kv : cluster_map) {
+    const std::set<Node*>& nodes = kv.second;
+    ClusterCost& cost = (*cluster_costs)[kv.first];
+    // A tensor crossing the boundary is copied once, however many nodes
+    // consume it
+    std::set<std::pair<const Node*, int>> inputs, outputs;
+    std::vector<string> node_names;
+
+    for (auto node : nodes) {
+      cost.num_nodes++;
+      node_names.push_back(node->name());
+      if (node->type_string() != "Const" && node->type_string() != "Identity") {
+        cost.num_nontrivial_nodes++;
+      }
+      if (!infer_shapes) {
+        continue;
+      }
+
+      std::vector<PartialTensorShape> input_shapes, output_shapes;
+      for (int i = 0; i < node->num_inputs(); i++) {
+        input_shapes.push_back(GetInferredShape(refiner, node, i, true));
+      }
+      for (int i = 0; i < node->num_outputs(); i++) {
+        output_shapes.push_back(GetInferredShape(refiner, node, i, false));
+      }
+      int64 node_flops = 0;
+      if (EstimateNodeFlops(node, input_shapes, output_shapes, &node_flops)) {
+        cost.flops += node_flops;
+      } else {
+        cost.num_unknown_shapes++;
+      }
+
+      for (auto edge : node->in_edges()) {
+        if (edge->IsControlEdge() || nodes.count(edge->src()) != 0 ||
+            !inputs.insert({edge->src(), edge->src_output()}).second) {
+          continue;
+        }
+        if (!AddTensorBytes(input_shapes[edge->dst_input()],
+                            node->input_type(edge->dst_input()),
+                            &cost.input_bytes)) {
+          cost.num_unknown_shapes++;
+        }
+      }
+      for (auto edge : node->out_edges()) {
+        if (edge->IsControlEdge() || nodes.count(edge->dst()) != 0 ||
+            !outputs.insert({node, edge->src_output()}).second) {
+          continue;
+        }
+        if (!AddTensorBytes(output_shapes[edge->src_output()],
+                            node->output_type(edge->src_output()),
+                            &cost.output_bytes)) {
+          cost.num_unknown_shapes++;
+        }
+      }
+    }
+    cost.profile_key = NGraphClusterProfile::ClusterKey(std::move(node_names));
+  }
+  return Status::OK();
+}
+
+}  // namespace ngraph_bridge
+
+}  // namespace tensorflow
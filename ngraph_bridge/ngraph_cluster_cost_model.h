@@ -0,0 +1,170 @@
+/*******************************************************************************
+ * Copyright 2019 Intel Corporation
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ *******************************************************************************/
+
+#ifndef NGRAPH_TF_BRIDGE_CLUSTER_COST_MODEL_H_
+#define NGRAPH_TF_BRIDGE_CLUSTER_COST_MODEL_H_
+#pragma once
+
+#include <map>
+#include <memory>
+#include <set>
+#include <string>
+#include <vector>
+
+#include "tensorflow/core/framework/tensor_shape.h"
+#include "tensorflow/core/graph/graph.h"
+
+#include "ngraph_bridge/ngraph_cluster_profile.h"
+
+namespace tensorflow {
+
+namespace ngraph_bridge {
+
+// Static estimates for one cluster, computed from the shapes that can be
+// inferred before the graph runs
+struct ClusterCost {
+  int num_nodes{0};
+  // Nodes other than Const and Identity
+  int num_nontrivial_nodes{0};
+  // Nodes, or tensors crossing the cluster boundary, whose shapes are not
+  // static. They count as 0 in the FLOPs and bytes below
+  int num_unknown_shapes{0};
+  // Floating point operations of one run of the cluster
+  int64 flops{0};
+  // Bytes of the tensors flowing into and out of the cluster, which are
+  // copied at every run
+  int64 input_bytes{0};
+  int64 output_bytes{0};
+  // Key of the cluster in the cluster profile (see ngraph_cluster_profile.h)
+  std::string profile_key;
+};
+
+// Decides whether a cluster is worth encapsulating, i.e. whether running it
+// as one nGraph function beats running its ops one by one in TF. Models are
+// selected with NGRAPH_TF_CLUSTER_COST_MODEL or SetClusterCostModel
+class ClusterCostModel {
+ public:
+  virtual ~ClusterCostModel() {}
+  virtual std::string Name() const = 0;
+  // Returns true to keep the cluster. `reason` is logged with the decision
+  virtual bool ShouldEncapsulate(const ClusterCost& cost,
+                                 std::string* reason) const = 0;
+  // Whether the decision uses the estimates computed from the inferred
+  // shapes (flops, input_bytes, output_bytes and num_unknown_shapes)
+  virtual bool NeedsShapes() const = 0;
+};
+
+// The rule used before there was a cost model: a cluster is kept if it has at
+// least 2 non-trivial nodes. This is the default model
+class NodeCountCostModel : public ClusterCostModel {
+ public:
+  static constexpr int MIN_NONTRIVIAL_NODES = 2;
+  std::string Name() const override { return "node_count"; }
+  bool ShouldEncapsulate(const ClusterCost& cost,
+                         std::string* reason) const override;
+  bool NeedsShapes() const override { return false; }
+};
+
+// Compares the estimated time of a cluster in TF and in nGraph:
+//   TF:     num_nontrivial_nodes * tf_op_overhead_us + compute
+//   nGraph: dispatch_overhead_us + boundary copies + compute * (1 - gain)
+// where compute = flops / flops_per_us and the copies move
+// input_bytes + output_bytes at copy_bytes_per_us. The fused nGraph
+// function saves `compute_gain` of the compute time.
+//
+// Clusters with unknown shapes are under-estimated, so they are kept
+// whenever the node count rule keeps them. The default parameters are not
+// calibrated for any backend, so this model is only used when selected with
+// NGRAPH_TF_CLUSTER_COST_MODEL=static_shape
+class StaticShapeCostModel : public ClusterCostModel {
+ public:
+  struct Parameters {
+    double tf_op_overhead_us{5.0};
+    double dispatch_overhead_us{20.0};
+    double copy_bytes_per_us{4096.0};
+    double flops_per_us{10000.0};
+    double compute_gain{0.2};
+  };
+
+  StaticShapeCostModel() = default;
+  explicit StaticShapeCostModel(const Parameters& params) : m_params(params) {}
+
+  std::string Name() const override { return "static_shape"; }
+  bool ShouldEncapsulate(const ClusterCost& cost,
+                         std::string* reason) const override;
+  bool NeedsShapes() const override { return true; }
+
+  // Estimated time of one run of the cluster
+  double TFTimeUs(const ClusterCost& cost) const;
+  double NGraphTimeUs(const ClusterCost& cost) const;
+
+ private:
+  Parameters m_params;
+};
+
+// Decides with the timings measured in an earlier run (see
+// NGraphClusterProfile), keeping a cluster if its nGraph calls, copies
+// included, took less time than the runs of its TF graph. Clusters that were
+// not measured in both, e.g. because the profiled run did not keep them, are
+// left to `fallback`. Used when NGRAPH_TF_PROFILE_IN is set
+class ProfileGuidedCostModel : public ClusterCostModel {
+ public:
+  ProfileGuidedCostModel(std::unique_ptr<ClusterCostModel> fallback,
+                         const NGraphClusterProfile* profile)
+      : m_fallback(std::move(fallback)), m_profile(profile) {}
+
+  std::string Name() const override {
+    return "profile_guided(" + m_fallback->Name() + ")";
+  }
+  bool ShouldEncapsulate(const ClusterCost& cost,
+                         std::string* reason) const override;
+  // The measured clusters are looked up by profile_key, only the fallback
+  // may need the shapes
+  bool NeedsShapes() const override { return m_fallback->NeedsShapes(); }
+
+ private:
+  std::unique_ptr<ClusterCostModel> m_fallback;
+  const NGraphClusterProfile* m_profile;
+};
+
+// The model used by DeassignClusters. Unless one is set, it is picked by
+// NGRAPH_TF_CLUSTER_COST_MODEL (node_count, the default, or static_shape),
+// and guided by the profile of NGRAPH_TF_PROFILE_IN if it is set
+ClusterCostModel* GetClusterCostModel();
+// Replaces the model, passing nullptr goes back to the one picked by the
+// environment
+void SetClusterCostModel(std::unique_ptr<ClusterCostModel> cost_model);
+
+// Estimates the FLOPs of one run of `node`, from the shapes of its inputs
+// and outputs. Returns false if a shape it needs is not static
+bool EstimateNodeFlops(const Node* node,
+                       const std::vector<PartialTensorShape>& input_shapes,
+                       const std::vector<PartialTensorShape>& output_shapes,
+                       int64* flops);
+
+// Estimates the cost of each cluster of `cluster_map`. Inferring the static
+// shapes of the whole graph is the expensive part, so the estimates that
+// need them are only computed if `infer_shapes` is set, and are 0 otherwise
+Status EstimateClusterCosts(const Graph* graph,
+                            const std::map<int, std::set<Node*>>& cluster_map,
+                            bool infer_shapes,
+                            std::map<int, ClusterCost>* cluster_costs);
+
+}  // namespace ngraph_bridge
+
+}  // namespace tensorflow
+
+#endif  // NGRAPH_TF_BRIDGE_CLUSTER_COST_MODEL_H_
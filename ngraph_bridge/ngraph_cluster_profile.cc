@@ -0,0 +1,229 @@
+/*******************************************************************************
+ * Copyright 2019 Intel Corporation
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ *******************************************************************************/
+
+#include <algorithm>
+#include <cstdlib>
+#include <sstream>
+
+#include "tensorflow/core/lib/core/errors.h"
+#include "tensorflow/core/lib/hash/hash.h"
+#include "tensorflow/core/lib/strings/strcat.h"
+#include "tensorflow/core/platform/env.h"
+
+#include "logging/ngraph_log.h"
+#include "ngraph_bridge/ngraph_cluster_profile.h"
+
+using namespace std;
+
+namespace tensorflow {
+
+namespace ngraph_bridge {
+
+double ClusterProfileEntry::NGraphUsPerCall() const {
+  return ngraph_calls > 0
+             ? static_cast<double>(ngraph_exec_us + ngraph_copy_us) /
+                   ngraph_calls
+             : 0;
+}
+
+double ClusterProfileEntry::TFUsPerCall() const {
+  return tf_calls > 0 ? static_cast<double>(tf_us) / tf_calls : 0;
+}
+
+//---------------------------------------------------------------------------
+//  NGraphClusterProfile::ClusterKey
+//---------------------------------------------------------------------------
+string NGraphClusterProfile::ClusterKey(std::vector<string> node_names) {
+  std::sort(node_names.begin(), node_names.end());
+  uint64 hash = 0;
+  for (const auto& node_name : node_names) {
+    hash = Hash64Combine(hash, Hash64(node_name));
+  }
+  return strings::StrCat(strings::Hex(hash, strings::kZeroPad16));
+}
+
+string NGraphClusterProfile::ClusterKey(const Graph& graph) {
+  std::vector<string> node_names;
+  for (auto node : graph.op_nodes()) {
+    if (node->type_string() != "_Arg" && node->type_string() != "_Retval") {
+      node_names.push_back(node->name());
+    }
+  }
+  return ClusterKey(std::move(node_names));
+}
+
+//---------------------------------------------------------------------------
+//  NGraphClusterProfile::IsRecording/Recorded/Loaded
+//---------------------------------------------------------------------------
+bool NGraphClusterProfile::IsRecording() {
+  static const bool is_recording = []() {
+    const char* profile_out = std::getenv("NGRAPH_TF_PROFILE_OUT");
+    return profile_out != nullptr && string(profile_out) != "";
+  }();
+  return is_recording;
+}
+
+int NGraphClusterProfile::GetTFSamplingPeriod() {
+  static const int sampling_period = []() {
+    int sampling_period = 10;
+    const char* sampling_period_env = std::getenv("NGRAPH_TF_PROFILE_TF_EVERY");
+    if (sampling_period_env != nullptr) {
+      sampling_period = std::max(atoi(sampling_period_env), 0);
+    }
+    return sampling_period;
+  }();
+  return IsRecording() ? sampling_period : 0;
+}
+
+NGraphClusterProfile& NGraphClusterProfile::Recorded() {
+  static NGraphClusterProfile* recorded = new NGraphClusterProfile();
+  return *recorded;
+}
+
+const NGraphClusterProfile* NGraphClusterProfile::Loaded() {
+  static const NGraphClusterProfile* loaded = []() {
+    const char* profile_in = std::getenv("NGRAPH_TF_PROFILE_IN");
+    if (profile_in == nullptr || string(profile_in) == "") {
+      return static_cast<NGraphClusterProfile*>(nullptr);
+    }
+    NGraphClusterProfile* profile = new NGraphClusterProfile();
+    Status status = profile->Read(profile_in);
+    if (!status.ok()) {
+      NGRAPH_VLOG(0) << "Ignoring the cluster profile " << profile_in << ": "
+                     << status.error_message();
+      delete profile;
+      return static_cast<NGraphClusterProfile*>(nullptr);
+    }
+    NGRAPH_VLOG(1) << "Read the profile of " << profile->Size()
+                   << " clusters from " << profile_in;
+    return profile;
+  }();
+  return loaded;
+}
+
+//---------------------------------------------------------------------------
+//  NGraphClusterProfile::Record*
+//---------------------------------------------------------------------------
+void NGraphClusterProfile::RecordNGraphCall(const string& key,
+                                            const string& name, int64 exec_us,
+                                            int64 copy_us) {
+  std::lock_guard<std::mutex> lock(m_mutex);
+  ClusterProfileEntry& entry = m_entries[key];
+  entry.name = name;
+  entry.ngraph_calls++;
+  entry.ngraph_exec_us += exec_us;
+  entry.ngraph_copy_us += copy_us;
+}
+
+void NGraphClusterProfile::RecordTFCall(const string& key, const string& name,
+                                        int64 tf_us) {
+  std::lock_guard<std::mutex> lock(m_mutex);
+  ClusterProfileEntry& entry = m_entries[key];
+  entry.name = name;
+  entry.tf_calls++;
+  entry.tf_us += tf_us;
+}
+
+bool NGraphClusterProfile::Find(const string& key,
+                                ClusterProfileEntry* entry) const {
+  std::lock_guard<std::mutex> lock(m_mutex);
+  auto itr = m_entries.find(key);
+  if (itr == m_entries.end()) {
+    return false;
+  }
+  *entry = itr->second;
+  return true;
+}
+
+size_t NGraphClusterProfile::Size() const {
+  std::lock_guard<std::mutex> lock(m_mutex);
+  return m_entries.size();
+}
+
+//---------------------------------------------------------------------------
+//  NGraphClusterProfile::Write/Read/Flush
+//---------------------------------------------------------------------------
+Status NGraphClusterProfile::Write(const string& file_path) const {
+  std::ostringstream contents;
+  {
+    std::lock_guard<std::mutex> lock(m_mutex);
+    for (const auto& kv : m_entries) {
+      const ClusterProfileEntry& entry = kv.second;
+      contents << kv.first << " " << entry.name << " " << entry.ngraph_calls
+               << " " << entry.ngraph_exec_us << " " << entry.ngraph_copy_us
+               << " " << entry.tf_calls << " " << entry.tf_us << "\n";
+    }
+  }
+  // Write to a temporary file and rename it, so that a reader never sees a
+  // partially written profile
+  Env* env = Env::Default();
+  string tmp_file_path = strings::StrCat(file_path, ".tmp");
+  Status status = WriteStringToFile(env, tmp_file_path, contents.str());
+  if (status.ok()) {
+    status = env->RenameFile(tmp_file_path, file_path);
+  }
+  if (!status.ok()) {
+    env->DeleteFile(tmp_file_path).IgnoreError();
+  }
+  return status;
+}
+
+Status NGraphClusterProfile::Read(const string& file_path) {
+  string contents;
+  TF_RETURN_IF_ERROR(ReadFileToString(Env::Default(), file_path, &contents));
+  std::map<string, ClusterProfileEntry> entries;
+  std::istringstream lines(contents);
+  string line;
+  int line_number = 0;
+  while (std::getline(lines, line)) {
+    line_number++;
+    if (line.empty()) {
+      continue;
+    }
+    std::istringstream fields(line);
+    string key;
+    ClusterProfileEntry entry;
+    if (!(fields >> key >> entry.name >> entry.ngraph_calls >>
+          entry.ngraph_exec_us >> entry.ngraph_copy_us >> entry.tf_calls >>
+          entry.tf_us)) {
+      return errors::InvalidArgument("Malformed line ", line_number, " in ",
+                                     file_path);
+    }
+    entries[key] = entry;
+  }
+  std::lock_guard<std::mutex> lock(m_mutex);
+  m_entries = std::move(entries);
+  return Status::OK();
+}
+
+Status NGraphClusterProfile::Flush() {
+  if (!IsRecording()) {
+    return Status::OK();
+  }
+  // The encapsulate ops flush when they are destroyed, possibly at the same
+  // time, and they all write to the same temporary file
+  static std::mutex s_flush_mutex;
+  std::lock_guard<std::mutex> lock(s_flush_mutex);
+  string file_path = std::getenv("NGRAPH_TF_PROFILE_OUT");
+  TF_RETURN_IF_ERROR(Recorded().Write(file_path));
+  NGRAPH_VLOG(1) << "Wrote the profile of " << Recorded().Size()
+                 << " clusters to " << file_path;
+  return Status::OK();
+}
+
+}  // namespace ngraph_bridge
+
+}  // namespace tensorflow
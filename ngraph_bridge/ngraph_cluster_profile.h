@@ -0,0 +1,107 @@
+/*******************************************************************************
+ * Copyright 2019 Intel Corporation
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ *******************************************************************************/
+
+#ifndef NGRAPH_TF_BRIDGE_CLUSTER_PROFILE_H_
+#define NGRAPH_TF_BRIDGE_CLUSTER_PROFILE_H_
+#pragma once
+
+#include <map>
+#include <mutex>
+#include <string>
+#include <vector>
+
+#include "tensorflow/core/graph/graph.h"
+#include "tensorflow/core/lib/core/status.h"
+
+namespace tensorflow {
+
+namespace ngraph_bridge {
+
+// Measured timings of one cluster, summed over the calls
+struct ClusterProfileEntry {
+  // Name of the encapsulate op, to make the profile readable
+  std::string name;
+  int64 ngraph_calls{0};
+  // Time spent in the nGraph executable
+  int64 ngraph_exec_us{0};
+  // Time spent preparing the input and output tensors and copying them
+  // between TF and nGraph
+  int64 ngraph_copy_us{0};
+  // Runs of the TF graph of the cluster instead of the executable
+  int64 tf_calls{0};
+  int64 tf_us{0};
+
+  // Average time of a call, 0 if there was none
+  double NGraphUsPerCall() const;
+  double TFUsPerCall() const;
+};
+
+// NGraphClusterProfile holds the measured timings of the clusters, keyed by
+// ClusterKey, which stays the same across runs of the same model.
+//
+// Profiling is enabled by setting NGRAPH_TF_PROFILE_OUT to a file. The
+// encapsulate ops record the time of each call, and every
+// NGRAPH_TF_PROFILE_TF_EVERY-th call (10 by default, 0 to disable) runs the
+// TF graph of the cluster instead, to measure it as well. The profile is
+// written when an encapsulate op is destroyed.
+//
+// A later run with NGRAPH_TF_PROFILE_IN set to the file uses the measured
+// timings to decide which clusters to keep (see ProfileGuidedCostModel).
+//
+// The file has one line per cluster:
+//   key name ngraph_calls ngraph_exec_us ngraph_copy_us tf_calls tf_us
+class NGraphClusterProfile {
+ public:
+  // Key of the cluster made of the nodes with these names
+  static std::string ClusterKey(std::vector<std::string> node_names);
+  // Key of the encapsulated graph of a cluster, leaving out the _Arg and
+  // _Retval nodes added by the encapsulation
+  static std::string ClusterKey(const Graph& graph);
+
+  // Whether NGRAPH_TF_PROFILE_OUT is set
+  static bool IsRecording();
+  // Every how many calls the TF graph is run, 0 if it is not
+  static int GetTFSamplingPeriod();
+  // The profile recorded by this process
+  static NGraphClusterProfile& Recorded();
+  // The profile read from NGRAPH_TF_PROFILE_IN, nullptr if it is not set or
+  // cannot be read
+  static const NGraphClusterProfile* Loaded();
+
+  void RecordNGraphCall(const std::string& key, const std::string& name,
+                        int64 exec_us, int64 copy_us);
+  void RecordTFCall(const std::string& key, const std::string& name,
+                    int64 tf_us);
+
+  // Returns false if there is no entry for the key
+  bool Find(const std::string& key, ClusterProfileEntry* entry) const;
+  size_t Size() const;
+
+  Status Write(const std::string& file_path) const;
+  Status Read(const std::string& file_path);
+  // Writes the recorded profile to NGRAPH_TF_PROFILE_OUT
+  static Status Flush();
+
+ private:
+  mutable std::mutex m_mutex;
+  std::map<std::string, ClusterProfileEntry> m_entries;
+};
+
+}  // namespace ngraph_bridge
+
+}  // namespace tensorflow
+
+#endif  // NGRAPH_TF_BRIDGE_CLUSTER_PROFILE_H_
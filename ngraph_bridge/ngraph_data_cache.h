@@ -18,7 +18,8 @@
 #define NGRAPH_DATA_CACHE_H_
 #pragma once
 
-#include <deque>
+#include <future>
+#include <list>
 #include <mutex>
 #include <ostream>
 #include <vector>
@@ -32,6 +33,7 @@
 
 #include "ngraph_bridge/ngraph_freshness_tracker.h"
 #include "ngraph_bridge/ngraph_pipelined_tensors.h"
+#include "ngraph_bridge/ngraph_timer.h"
 
 namespace tensorflow {
 
@@ -41,12 +43,36 @@ namespace ngraph_bridge {
 namespace testing {
 class NGraphDataCacheTest_SameKeyMultiThread_Test;
 class NGraphDataCacheTest_RemoveItemTest_Test;
+class NGraphDataCacheTest_LRUOrder_Test;
+class NGraphDataCacheTest_EvictBySize_Test;
 }
 
+// Counters kept by each NgraphDataCache instance
+struct NgraphDataCacheStats {
+  int64 hits{0};
+  int64 misses{0};
+  int64 evictions{0};
+  // Total time spent in the create callback (i.e. compiling) in microseconds
+  int64 create_time_us{0};
+  int64 num_items{0};
+  // Total size of the items as reported by callback_item_size, which may be
+  // an estimate (see NGraphExecutor::EstimateNgItemSizeInBytes)
+  int64 size_in_bytes{0};
+};
+
+// NgraphDataCache is a LRU cache. When several threads miss on the same key at
+// the same time, only the first one creates the item and the others wait for
+// it. The items are evicted when the number of
+// items reaches depth, or (if max_size_in_bytes is not 0) when the total size
+// of the items, as reported by callback_item_size, would exceed
+// max_size_in_bytes. The size of an item is computed once, when it is added
+// to the cache.
 template <typename KeyType, typename ValueType>
 class NgraphDataCache {
  public:
-  explicit NgraphDataCache(int depth);
+  explicit NgraphDataCache(
+      int depth, size_t max_size_in_bytes = 0,
+      std::function<size_t(const ValueType&)> callback_item_size = nullptr);
   ~NgraphDataCache();
 
   // This method performs lookup in the cache for requested key, if not found
@@ -61,27 +87,68 @@ class NgraphDataCache {
       KeyType key,
       std::function<std::pair<Status, ValueType>(KeyType)> callback_create_item,
       bool& cache_hit);
+  // Looks up the key without creating the item on a miss. Returns true and
+  // sets item if the key is in the cache. Only hits are counted, the miss is
+  // counted when the item is created with LookUpOrCreate
+  bool LookUp(KeyType key, ValueType& item);
+
   Status RemoveItem(KeyType key);
   Status RemoveItem(KeyType key,
                     std::function<void(ValueType)> callback_destroy_item);
   Status RemoveAll(std::function<void(ValueType)> callback_destroy_item);
 
+  NgraphDataCacheStats GetStats();
+
  private:
-  std::unordered_map<KeyType, ValueType> m_ng_items_map;
-  std::deque<KeyType> m_lru;
+  struct CacheItem {
+    ValueType value;
+    size_t size_in_bytes;
+    // Position of the key in m_lru
+    typename std::list<KeyType>::iterator lru_itr;
+  };
+  std::unordered_map<KeyType, CacheItem> m_ng_items_map;
+  // Most recently used key is at the front
+  std::list<KeyType> m_lru;
   int m_depth;
+  size_t m_max_size_in_bytes;
+  size_t m_size_in_bytes{0};
+  std::function<size_t(const ValueType&)> m_callback_item_size;
+  NgraphDataCacheStats m_stats;
   absl::Mutex m_mutex;
 
+  // Keys whose items are being created, with the future result of the
+  // creation. Threads that miss on one of these keys wait for the result
+  // instead of creating the item again
+  std::unordered_map<KeyType, std::shared_future<std::pair<Status, ValueType>>>
+      m_pending_items_map;
+
+  // Removes the least recently used item. Must be called with m_mutex held
+  Status EvictLRUItem(std::function<void(ValueType)> callback_destroy_item);
+
+  // Calls callback_create_item and adds the item to the cache
+  std::pair<Status, ValueType> CreateItem(
+      KeyType key,
+      std::function<std::pair<Status, ValueType>(KeyType)> callback_create_item,
+      std::function<void(ValueType)> callback_destroy_item);
+
   // Test class
   friend class tensorflow::ngraph_bridge::testing::
       NGraphDataCacheTest_SameKeyMultiThread_Test;
   friend class tensorflow::ngraph_bridge::testing::
       NGraphDataCacheTest_RemoveItemTest_Test;
+  friend class tensorflow::ngraph_bridge::testing::
+      NGraphDataCacheTest_LRUOrder_Test;
+  friend class tensorflow::ngraph_bridge::testing::
+      NGraphDataCacheTest_EvictBySize_Test;
 };
 
 template <typename KeyType, typename ValueType>
-NgraphDataCache<KeyType, ValueType>::NgraphDataCache(int depth)
-    : m_depth(depth) {}
+NgraphDataCache<KeyType, ValueType>::NgraphDataCache(
+    int depth, size_t max_size_in_bytes,
+    std::function<size_t(const ValueType&)> callback_item_size)
+    : m_depth(depth),
+      m_max_size_in_bytes(max_size_in_bytes),
+      m_callback_item_size(callback_item_size) {}
 
 template <typename KeyType, typename ValueType>
 NgraphDataCache<KeyType, ValueType>::~NgraphDataCache() {
@@ -93,16 +160,18 @@ template <typename KeyType, typename ValueType>
 Status NgraphDataCache<KeyType, ValueType>::RemoveItem(
     KeyType key, std::function<void(ValueType)> callback_destroy_item) {
   absl::MutexLock lock(&m_mutex);
-  if (m_ng_items_map.find(key) != m_ng_items_map.end()) {
+  auto it = m_ng_items_map.find(key);
+  if (it != m_ng_items_map.end()) {
     try {
-      callback_destroy_item(m_ng_items_map.at(key));
+      callback_destroy_item(it->second.value);
     } catch (std::bad_function_call& exception) {
       return errors::Internal(
           "Failed to destroy item. Invalid Callback to Destroy ",
           exception.what(), "\n");
     }
-    m_ng_items_map.erase(key);
-    m_lru.pop_back();
+    m_size_in_bytes -= it->second.size_in_bytes;
+    m_lru.erase(it->second.lru_itr);
+    m_ng_items_map.erase(it);
   }
   if (m_ng_items_map.size() != m_lru.size()) {
     return errors::Internal(
@@ -122,7 +191,7 @@ Status NgraphDataCache<KeyType, ValueType>::RemoveAll(
   absl::MutexLock lock(&m_mutex);
   for (auto it = m_ng_items_map.begin(); it != m_ng_items_map.end(); it++) {
     try {
-      callback_destroy_item(it->second);
+      callback_destroy_item(it->second.value);
     } catch (std::bad_function_call& exception) {
       return errors::Internal(
           "Failed to destroy item. Invalid Callback to Destroy ",
@@ -135,6 +204,47 @@ Status NgraphDataCache<KeyType, ValueType>::RemoveAll(
   }
   m_ng_items_map.erase(m_ng_items_map.begin(), m_ng_items_map.end());
   m_lru.clear();
+  m_size_in_bytes = 0;
+  return Status::OK();
+}
+
+template <typename KeyType, typename ValueType>
+bool NgraphDataCache<KeyType, ValueType>::LookUp(KeyType key, ValueType& item) {
+  absl::MutexLock lock(&m_mutex);
+  auto it = m_ng_items_map.find(key);
+  if (it == m_ng_items_map.end()) {
+    return false;
+  }
+  m_stats.hits++;
+  m_lru.splice(m_lru.begin(), m_lru, it->second.lru_itr);
+  item = it->second.value;
+  return true;
+}
+
+template <typename KeyType, typename ValueType>
+NgraphDataCacheStats NgraphDataCache<KeyType, ValueType>::GetStats() {
+  absl::MutexLock lock(&m_mutex);
+  NgraphDataCacheStats stats = m_stats;
+  stats.num_items = m_ng_items_map.size();
+  stats.size_in_bytes = m_size_in_bytes;
+  return stats;
+}
+
+template <typename KeyType, typename ValueType>
+Status NgraphDataCache<KeyType, ValueType>::EvictLRUItem(
+    std::function<void(ValueType)> callback_destroy_item) {
+  auto it = m_ng_items_map.find(m_lru.back());
+  try {
+    callback_destroy_item(it->second.value);
+  } catch (std::bad_function_call& exception) {
+    return errors::Internal(
+        "Failed to destroy item. Invalid Callback to Destroy ",
+        exception.what(), "\n");
+  }
+  m_size_in_bytes -= it->second.size_in_bytes;
+  m_ng_items_map.erase(it);
+  m_lru.pop_back();
+  m_stats.evictions++;
   return Status::OK();
 }
 
@@ -146,17 +256,59 @@ NgraphDataCache<KeyType, ValueType>::LookUpOrCreate(
     std::function<void(ValueType)> callback_destroy_item,
     bool& found_in_cache) {
   // look up in the cache
+  std::promise<std::pair<Status, ValueType>> create_promise;
+  std::shared_future<std::pair<Status, ValueType>> pending_item;
   {
     absl::MutexLock lock(&m_mutex);
     auto it = m_ng_items_map.find(key);
     found_in_cache = (it != m_ng_items_map.end());
     if (found_in_cache) {
-      return std::make_pair(Status::OK(), m_ng_items_map.at(key));
+      m_stats.hits++;
+      // Move the key to the front of m_lru
+      m_lru.splice(m_lru.begin(), m_lru, it->second.lru_itr);
+      return std::make_pair(Status::OK(), it->second.value);
+    }
+    m_stats.misses++;
+    // If another thread is already creating the item for this key, wait for
+    // it instead of creating the item again
+    auto pending_itr = m_pending_items_map.find(key);
+    if (pending_itr != m_pending_items_map.end()) {
+      pending_item = pending_itr->second;
+    } else {
+      m_pending_items_map.emplace(key, create_promise.get_future().share());
     }
   }
-  // Item not found in cache, create item
+  if (pending_item.valid()) {
+    return pending_item.get();
+  }
+
+  // Item not found in cache, create item. The waiters (if any) get the same
+  // result, including the error status
+  std::pair<Status, ValueType> status_item_pair;
+  try {
+    status_item_pair =
+        CreateItem(key, callback_create_item, callback_destroy_item);
+  } catch (const std::exception& exp) {
+    status_item_pair = std::make_pair(
+        errors::Internal("Caught exception while creating item: ", exp.what()),
+        ValueType());
+  }
+  {
+    absl::MutexLock lock(&m_mutex);
+    m_pending_items_map.erase(key);
+  }
+  create_promise.set_value(status_item_pair);
+  return status_item_pair;
+}
+
+template <typename KeyType, typename ValueType>
+std::pair<Status, ValueType> NgraphDataCache<KeyType, ValueType>::CreateItem(
+    KeyType key,
+    std::function<std::pair<Status, ValueType>(KeyType)> callback_create_item,
+    std::function<void(ValueType)> callback_destroy_item) {
   ValueType item;
   pair<Status, ValueType> status_item_pair;
+  Timer create_item_timer;
   try {
     status_item_pair = callback_create_item(key);
   } catch (std::bad_function_call& exception) {
@@ -166,44 +318,44 @@ NgraphDataCache<KeyType, ValueType>::LookUpOrCreate(
             exception.what(), "\n"),
         item);
   }
+  int create_time_us = create_item_timer.ElapsedInMicroSec();
   // If item is successfully created we will place in the cache.
   if (status_item_pair.first == Status::OK()) {
     item = status_item_pair.second;
+    size_t item_size =
+        (m_callback_item_size == nullptr) ? 0 : m_callback_item_size(item);
     // lock begins
     {
       absl::MutexLock lock(&m_mutex);
-      // Remove item if cache is full
-      if (m_ng_items_map.size() == m_depth) {
-        auto key_to_evict = m_lru.back();
-        try {
-          callback_destroy_item(m_ng_items_map.at(key_to_evict));
-        } catch (std::bad_function_call& exception) {
-          return std::make_pair(
-              errors::Internal(
-                  "Failed to destroy item. Invalid Callback to Destroy ",
-                  exception.what(), "\n"),
-              item);
-        }
-        m_ng_items_map.erase(key_to_evict);
-        m_lru.pop_back();
-      }
-      // Add item to cache
-      auto it = m_ng_items_map.emplace(key, item);
-      if (it.second == true) {
-        m_lru.push_front(key);
+      m_stats.create_time_us += create_time_us;
+      auto it = m_ng_items_map.find(key);
+      if (it != m_ng_items_map.end()) {
+        // The same key was added in the meantime
+        m_lru.splice(m_lru.begin(), m_lru, it->second.lru_itr);
       } else {
-        auto key_itr = find(m_lru.begin(), m_lru.end(), key);
-        m_lru.erase(key_itr);
+        // Remove items if cache is full
+        while (!m_lru.empty() &&
+               (m_ng_items_map.size() >= m_depth ||
+                (m_max_size_in_bytes != 0 &&
+                 m_size_in_bytes + item_size > m_max_size_in_bytes))) {
+          Status status = EvictLRUItem(callback_destroy_item);
+          if (status != Status::OK()) {
+            return std::make_pair(status, item);
+          }
+        }
+        // Add item to cache
         m_lru.push_front(key);
+        m_ng_items_map.emplace(key, CacheItem{item, item_size, m_lru.begin()});
+        m_size_in_bytes += item_size;
       }
-    }  // lock ends here.
 
-    if (m_ng_items_map.size() != m_lru.size()) {
-      return std::make_pair(
-          errors::Internal("Error occured: size of m_ng_items_map is not same "
-                           "as that of m_lru"),
-          item);
-    }
+      if (m_ng_items_map.size() != m_lru.size()) {
+        return std::make_pair(
+            errors::Internal("Error occured: size of m_ng_items_map is not "
+                             "same as that of m_lru"),
+            item);
+      }
+    }  // lock ends here.
     return std::make_pair(Status::OK(), item);
   }
 
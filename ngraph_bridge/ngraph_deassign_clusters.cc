@@ -30,6 +30,7 @@
 #include "logging/ngraph_log.h"
 #include "ngraph_bridge/ngraph_api.h"
 #include "ngraph_bridge/ngraph_assign_clusters.h"
+#include "ngraph_bridge/ngraph_cluster_cost_model.h"
 #include "ngraph_bridge/ngraph_deassign_clusters.h"
 #include "ngraph_bridge/ngraph_mark_for_clustering.h"
 #include "ngraph_bridge/ngraph_utils.h"
@@ -41,21 +42,29 @@ namespace tensorflow {
 namespace ngraph_bridge {
 
 //
-// The clustering pass of ngraph_assign_clusters.cc sometimes generates many
-// small, trivial clusters. In this pass, we simply deassign (i.e., remove the
-// _ngraph_cluster and _ngraph_marked_for_clustering attributes) any such
-// trivial clusters. For now, "trivial" just means that there are not at least
-// two non-trivial ops in the graph, where a "trivial op" means "Const" or
-// "Identity".
+// The clustering pass of ngraph_assign_clusters.cc sometimes generates
+// clusters that run slower in nGraph than in TF. In this pass, we deassign
+// (i.e., remove the _ngraph_cluster and _ngraph_marked_for_clustering
+// attributes) the clusters that the cluster cost model does not find worth
+// encapsulating. The default model keeps clusters with at least 2
+// non-trivial nodes. NGRAPH_TF_CLUSTER_COST_MODEL=static_shape selects a
+// model that weighs the compute FLOPs and the bytes copied at the cluster
+// boundary, estimated from the static shapes, against the per-call overhead
+// (see ngraph_cluster_cost_model.h).
 //
 // For unit testing purposes, this pass can be bypassed by setting
 // NGRAPH_TF_DISABLE_DEASSIGN_CLUSTERS=1.
 //
 
-static const int MIN_NONTRIVIAL_NODES = 2;
-
 unordered_map<string, int> deassigned_histogram;
 int num_nodes_marked_before_deassign = 0;
+// Estimates and decision of the cost model for each cluster, for logging
+struct ClusterDecision {
+  ClusterCost cost;
+  bool encapsulate;
+  string reason;
+};
+static std::map<int, ClusterDecision> cluster_decisions;
 
 static void MaybeLogPlacement(const Graph* graph) {
   if (!config::IsLoggingPlacement()) return;
@@ -125,7 +134,21 @@ static void MaybeLogPlacement(const Graph* graph) {
   // log the ops gets deassigned
   std::cout << "NGTF_SUMMARY: Op_deassigned: ";
   print_node_histogram(deassigned_histogram);
-  std::cout << "\n" << endl;  // insert a line between summary and op placement
+  std::cout << endl;
+
+  // log the estimates and decisions of the cost model
+  for (const auto& kv : cluster_decisions) {
+    const ClusterDecision& decision = kv.second;
+    std::cout << "NGTF_SUMMARY: Cost of cluster[" << kv.first
+              << "]:\t nodes: " << decision.cost.num_nodes
+              << ", FLOPs: " << decision.cost.flops
+              << ", input bytes: " << decision.cost.input_bytes
+              << ", output bytes: " << decision.cost.output_bytes
+              << ", unknown shapes: " << decision.cost.num_unknown_shapes
+              << " -> " << (decision.encapsulate ? "kept" : "deassigned")
+              << " (" << decision.reason << ")" << std::endl;
+  }
+  std::cout << endl;  // insert a line between summary and op placement
 
   for (auto kv : final_cluster_map) {
     int cluster_idx = kv.first;
@@ -152,6 +175,7 @@ Status DeassignClusters(Graph* graph) {
   //
   num_nodes_marked_before_deassign = 0;  // reset for every TF graph
   deassigned_histogram.clear();          // reset the histogram
+  cluster_decisions.clear();
 
   if (std::getenv("NGRAPH_TF_DISABLE_DEASSIGN_CLUSTERS") != nullptr) {
     // still need to calculate num_nodes_marked_before_deassign
@@ -179,20 +203,27 @@ Status DeassignClusters(Graph* graph) {
     cluster_map[cluster_idx].insert(node);
   }
 
+  // The shapes are only inferred if the model or the placement log uses the
+  // estimates computed from them
+  ClusterCostModel* cost_model = GetClusterCostModel();
+  std::map<int, ClusterCost> cluster_costs;
+  TF_RETURN_IF_ERROR(EstimateClusterCosts(
+      graph, cluster_map,
+      cost_model->NeedsShapes() || config::IsLoggingPlacement(),
+      &cluster_costs));
+
   for (auto& kv : cluster_map) {
     int cluster_idx = kv.first;
     std::set<Node*>& nodes = kv.second;
 
-    int non_trivial_count = 0;
-
-    for (auto node : nodes) {
-      // TODO(amprocte): less hard-coding here
-      if (node->type_string() != "Const" && node->type_string() != "Identity") {
-        non_trivial_count++;
-      }
-    }
+    ClusterDecision& decision = cluster_decisions[cluster_idx];
+    decision.cost = cluster_costs[cluster_idx];
+    decision.encapsulate =
+        cost_model->ShouldEncapsulate(decision.cost, &decision.reason);
+    NGRAPH_VLOG(2) << "Cost model " << cost_model->Name() << ": cluster "
+                   << cluster_idx << ": " << decision.reason;
 
-    if (non_trivial_count < MIN_NONTRIVIAL_NODES) {
+    if (!decision.encapsulate) {
       NGRAPH_VLOG(2) << "Busting cluster " << cluster_idx;
       for (auto node : nodes) {
         NGRAPH_VLOG(2) << "Busting node: " << node->name() << " ["
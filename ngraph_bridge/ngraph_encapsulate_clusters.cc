@@ -19,6 +19,7 @@
 #include <iomanip>
 #include <iostream>
 #include <sstream>
+#include <unordered_map>
 
 #include "tensorflow/core/framework/attr_value_util.h"
 #include "tensorflow/core/framework/function.pb.h"
@@ -31,12 +32,17 @@
 #include "tensorflow/core/graph/node_builder.h"
 #include "tensorflow/core/graph/tensor_id.h"
 #include "tensorflow/core/graph/validate.h"
+#include "tensorflow/core/lib/core/blocking_counter.h"
+#include "tensorflow/core/lib/core/threadpool.h"
+#include "tensorflow/core/lib/strings/strcat.h"
+#include "tensorflow/core/platform/cpu_info.h"
 #include "tensorflow/core/platform/default/logging.h"
 #include "tensorflow/core/platform/protobuf.h"
 #include "tensorflow/core/util/device_name_utils.h"
 
 #include "logging/ngraph_log.h"
 #include "logging/tf_graph_writer.h"
+#include "ngraph_bridge/ngraph_aot_artifact.h"
 #include "ngraph_bridge/ngraph_api.h"
 #include "ngraph_bridge/ngraph_assign_clusters.h"
 #include "ngraph_bridge/ngraph_builder.h"
@@ -44,6 +50,7 @@
 #include "ngraph_bridge/ngraph_encapsulate_clusters.h"
 #include "ngraph_bridge/ngraph_mark_for_clustering.h"
 #include "ngraph_bridge/ngraph_partial_shapes.h"
+#include "ngraph_bridge/ngraph_shape_buckets.h"
 #include "ngraph_bridge/ngraph_utils.h"
 #include "ngraph_bridge/version.h"
 
@@ -73,6 +80,72 @@ static void AddInput(NodeDef* dst, StringPiece src_name, int src_slot) {
 }
 // ...end code copied and pasted (and modified) from graph.cc
 
+// An encapsulate to compile ahead of time for the input shapes of a shape
+// hint. Everything but the translation and the compilation is done serially
+// by EncapsulateClusters, the results are attached to the node afterwards
+struct AOTCompileTask {
+  Node* node;
+  int cluster_idx;
+  string signature;
+  std::vector<TensorShape> input_shapes;
+  string op_backend_name;
+  std::unordered_map<std::string, std::string> additional_attribute_map;
+
+  string serialized_ngfunc;
+  string serialized_exec;
+  Status status;
+};
+
+// Translates the graph of the encapsulate and compiles it. Called
+// concurrently for the tasks of EncapsulateClusters, the backend must be
+// created
+static Status TranslateAndCompileForAOT(AOTCompileTask* task) {
+  GraphConstructorOptions opts;
+  opts.allow_internal_ops = true;
+  Graph graph(OpRegistry::Global());
+  TF_RETURN_IF_ERROR(ConvertGraphDefToGraph(
+      opts, *NGraphClusterManager::GetClusterGraph(task->cluster_idx), &graph));
+
+  // TranslateGraph must be called AFTER CreateBackend because some TF
+  // ops like CNMS and gather use backend specific nodes
+  std::vector<const Tensor*> static_input_map;
+  std::shared_ptr<ngraph::Function> ng_function;
+  TF_RETURN_IF_ERROR(Builder::TranslateGraph(
+      task->input_shapes, static_input_map, &graph, ng_function));
+  int json_indentation = 4;
+  task->serialized_ngfunc = ngraph::serialize(ng_function, json_indentation);
+
+  ng::runtime::Backend* op_backend = nullptr;
+  try {
+    op_backend = BackendManager::GetBackend(task->op_backend_name);
+  } catch (const std::out_of_range& e) {
+    return errors::Internal("Backend not available: ", task->op_backend_name);
+  }
+  // The encapsulates sharing a backend may have different configs, so the
+  // config is set under the backend lock, right before the compilation
+  BackendManager::LockBackend(task->op_backend_name);
+  std::shared_ptr<ngraph::runtime::Executable> ng_exec;
+  try {
+    BackendManager::SetConfig(task->op_backend_name,
+                              task->additional_attribute_map);
+    ng_exec = op_backend->compile(ng_function);
+  } catch (...) {
+    BackendManager::UnlockBackend(task->op_backend_name);
+    Status st = NgraphSerialize("tf_function_error_aot.json", ng_function);
+    return errors::Internal(
+        "Failed to compile ng_function for AOT.",
+        (st.ok() ? ""
+                 : " Failed to serialize as well with error: " +
+                       st.error_message()));
+  }
+  BackendManager::UnlockBackend(task->op_backend_name);
+
+  stringstream exec_dump;
+  ng_exec->save(exec_dump);
+  task->serialized_exec = exec_dump.str();
+  return Status::OK();
+}
+
 Status EncapsulateClusters(
     Graph* graph, int graph_id, FunctionDefLibrary* fdeflib,
     std::unordered_map<std::string, std::string> device_config,
@@ -268,6 +341,17 @@ Status EncapsulateClusters(
                    &((*(new_input_node_def->mutable_attr()))["index"]));
       SetAttrValue(input_prov_tag,
                    &((*(new_input_node_def->mutable_attr()))["_prov_tag"]));
+      // The shape of the input, when TF knows it, lets the encapsulate
+      // compile before its first call (see NGraphExecutor::WarmUp)
+      std::vector<PartialTensorShape> src_output_shapes;
+      if (GetNodeAttr(src->attrs(), "_output_shapes", &src_output_shapes)
+              .ok() &&
+          edge->src_output() < static_cast<int>(src_output_shapes.size())) {
+        SetAttrValue(
+            std::vector<PartialTensorShape>{
+                src_output_shapes[edge->src_output()]},
+            &((*(new_input_node_def->mutable_attr()))["_output_shapes"]));
+      }
 
       arg_index_count[dst_cluster_idx]++;
 
@@ -309,10 +393,24 @@ Status EncapsulateClusters(
     }
   }
 
+  // The names of the tensors flowing out of each cluster, in the order of
+  // its outputs
+  std::map<int, std::vector<string>> cluster_output_names;
+  for (auto& kv : output_remap_map) {
+    int cluster_idx, output_idx;
+    std::tie(cluster_idx, output_idx) = kv.second;
+    auto& output_names = cluster_output_names[cluster_idx];
+    output_names.resize(cluster_output_dt_map[cluster_idx].size());
+    output_names[output_idx] =
+        strings::StrCat(graph->FindNodeId(std::get<0>(kv.first))->name(), ":",
+                        std::get<1>(kv.first));
+  }
+
   // Pass 3: Create encapsulation nodes for all clusters.
   for (auto& kv : device_name_map) {
     int cluster_idx = kv.first;
     string cluster_backend = backend_name_map[cluster_idx];
+    std::vector<string> input_names;
 
     std::stringstream ss;
     ss << "ngraph_cluster_" << cluster_idx;
@@ -330,6 +428,8 @@ Status EncapsulateClusters(
 
       inputs.push_back(
           NodeBuilder::NodeOut(graph->FindNodeId(src_node_id), src_output_idx));
+      input_names.push_back(strings::StrCat(
+          graph->FindNodeId(src_node_id)->name(), ":", src_output_idx));
     }
 
     Node* n;
@@ -347,10 +447,24 @@ Status EncapsulateClusters(
     if (!device_config.empty()) {
       NGRAPH_VLOG(3) << "Device config is not empty";
       for (auto const& i : device_config) {
-        // Adding the optional attributes
-        NGRAPH_VLOG(3) << "Attaching Attribute " << i.first << " Val "
-                       << i.second;
-        nb.Attr(i.first, i.second);
+        if (i.first == "_ngraph_shape_buckets") {
+          // The rules name the tensors, only the ones for the inputs of this
+          // cluster are attached to it
+          string shape_buckets;
+          TF_RETURN_IF_ERROR(NGraphShapeBuckets::ScopeToEncapsulate(
+              i.second, input_names, cluster_output_names[cluster_idx],
+              &shape_buckets));
+          if (!shape_buckets.empty()) {
+            NGRAPH_VLOG(3) << "Attaching Attribute " << i.first << " Val "
+                           << shape_buckets;
+            nb.Attr(i.first, shape_buckets);
+          }
+        } else {
+          // Adding the optional attributes
+          NGRAPH_VLOG(3) << "Attaching Attribute " << i.first << " Val "
+                         << i.second;
+          nb.Attr(i.first, i.second);
+        }
       }
     }
     Status status = nb.Finalize(graph, &n);
@@ -542,6 +656,15 @@ Status EncapsulateClusters(
           "AOT requested for non grappler build. Please use grappler build if "
           "AOT is required");
     }
+    // If an artifact is requested the executables are written to it and the
+    // encapsulates only carry references. Otherwise they are embedded as
+    // attributes
+    std::unique_ptr<NGraphAOTArtifactWriter> aot_artifact_writer;
+    auto itr_artifact = device_config.find("_ngraph_aot_artifact");
+    if (itr_artifact != device_config.end()) {
+      TF_RETURN_IF_ERROR(NGraphAOTArtifactWriter::Create(itr_artifact->second,
+                                                         &aot_artifact_writer));
+    }
     string input_node_type = "Placeholder";
     // In case of grappler, we have Placeholder, which might contain shape info,
     // so it is possible we can aot without any provided shapes
@@ -607,6 +730,10 @@ Status EncapsulateClusters(
     }
     // TODO: .....CHECK ABOVE IF
 
+    // The encapsulates to compile, for all the shape hints
+    std::vector<AOTCompileTask> aot_tasks;
+    std::set<std::pair<string, string>> aot_signatures;
+
     // Iterate over each shape hint and see if they can be used
     for (ShapeHintMap single_hint : node_shapes_hints_sets) {
       // A boolean to determine if we can AOT for this single_hint
@@ -722,7 +849,8 @@ Status EncapsulateClusters(
                 "that is not supported");
           }
 
-          std::vector<TensorShape> input_shapes;
+          AOTCompileTask task;
+          task.node = node;
           std::stringstream signature_ss;
           for (auto in_node : node->in_nodes()) {
             if (!in_node->IsSource()) {
@@ -742,7 +870,7 @@ Status EncapsulateClusters(
               } else {
                 std::vector<int64> converted_to_int64(itr_shape->second.begin(),
                                                       itr_shape->second.end());
-                input_shapes.push_back(TensorShape(converted_to_int64));
+                task.input_shapes.push_back(TensorShape(converted_to_int64));
                 for (auto itr1 : itr_shape->second) {
                   signature_ss << itr1 << ",";
                 }
@@ -752,59 +880,36 @@ Status EncapsulateClusters(
           }
 
           signature_ss << "/";
-          string signature = signature_ss.str();
+          task.signature = signature_ss.str();
+          // Different hints may give the same input shapes to an encapsulate
+          if (!aot_signatures.insert({node->name(), task.signature}).second) {
+            continue;
+          }
           NGRAPH_VLOG(3) << "Performing AOT for " << node->name()
-                         << " for signature = " << signature << "\n";
+                         << " for signature = " << task.signature << "\n";
 
-          std::vector<const Tensor*> static_input_map;
-          std::shared_ptr<ngraph::Function> ng_function;
-          int cluster_idx;
           TF_RETURN_IF_ERROR(
-              GetNodeAttr(node->attrs(), "ngraph_cluster", &cluster_idx));
-          GraphDef* gdef_for_current_encapsulate;
-          gdef_for_current_encapsulate =
-              NGraphClusterManager::GetClusterGraph(cluster_idx);
-          GraphConstructorOptions opts;
-          opts.allow_internal_ops = true;
-          Graph graph_for_current_encapsulate(OpRegistry::Global());
-          TF_RETURN_IF_ERROR(
-              ConvertGraphDefToGraph(opts, *gdef_for_current_encapsulate,
-                                     &graph_for_current_encapsulate));
+              GetNodeAttr(node->attrs(), "ngraph_cluster", &task.cluster_idx));
 
           // get backend.
           // TODO: Note that this is code duplication of some stuff present
           // in NGraphEncapsulateOp
           // Once NGraphEncapsulateOp is refactored, this code should be
           // removed and a common function should be used
-
-          // TODO: these sections can be hoisted out of the main loop
           std::string backend_name;
           TF_RETURN_IF_ERROR(
               GetNodeAttr(node->attrs(), "ngraph_backend", &backend_name));
           std::string device_id;
           TF_RETURN_IF_ERROR(
               GetNodeAttr(node->attrs(), "ngraph_device_id", &device_id));
-
-          string op_backend_name;
           try {
-            op_backend_name = BackendManager::GetBackendCreationString(
+            task.op_backend_name = BackendManager::GetBackendCreationString(
                 backend_name, device_id);
           } catch (const std::exception& exp) {
             return errors::Internal(
                 "Caught exception while creating backend string ", exp.what(),
                 "\n");
           }
-          TF_RETURN_IF_ERROR(BackendManager::CreateBackend(
-              op_backend_name));  // Created a backend here. must free it
-          // TranslateGraph must be called AFTER CreateBackend because some TF
-          // ops like CNMS and gather use backend specific nodes
-          TF_RETURN_IF_ERROR(Builder::TranslateGraph(
-              input_shapes, static_input_map, &graph_for_current_encapsulate,
-              ng_function));
-          int json_indentation = 4;
-          string serialized_ngfunc(
-              ngraph::serialize(ng_function, json_indentation));
-          std::unordered_map<std::string, std::string> additional_attribute_map;
           for (auto itr : node->attrs()) {
             // Find the optional attributes to be sent to the backend.
             // The optional attributes have '_ngraph_' appended to the start
@@ -814,59 +919,94 @@ Status EncapsulateClusters(
             // '_ngraph_' is only appended for the bridge.
             // For e.g. _ngraph_ice_cores --> ice_cores
             if (itr.first.find("_ngraph_") != std::string::npos) {
-              // leave out _ngraph_aot_requested
-              if (itr.first.find("_ngraph_aot_requested") ==
-                  std::string::npos) {
-                additional_attribute_map.insert(
+              // leave out _ngraph_aot_requested and _ngraph_aot_artifact
+              if (itr.first.find("_ngraph_aot_") == std::string::npos) {
+                task.additional_attribute_map.insert(
                     {itr.first.substr(strlen("_ngraph_")), itr.second.s()});
               }
             }
           }
-          BackendManager::SetConfig(op_backend_name, additional_attribute_map);
-          ng::runtime::Backend* op_backend = nullptr;
-          try {
-            op_backend = BackendManager::GetBackend(op_backend_name);
-          } catch (const std::out_of_range& e) {
-            NGRAPH_VLOG(5) << "Exception: " << e.what();
-            BackendManager::ReleaseBackend(op_backend_name);
-            throw;
-          }
-          BackendManager::LockBackend(op_backend_name);
-          std::shared_ptr<ngraph::runtime::Executable> ng_exec;
-          try {
-            ng_exec = op_backend->compile(ng_function);
-          } catch (...) {
-            BackendManager::UnlockBackend(op_backend_name);
-            Status st =
-                NgraphSerialize("tf_function_error_aot.json", ng_function);
-            BackendManager::ReleaseBackend(op_backend_name);
-            return errors::Internal(
-                "Failed to compile ng_function for AOT.",
-                (st.ok() ? ""
-                         : " Failed to serialize as well with error: " +
-                               st.error_message()));
-          }
-          BackendManager::UnlockBackend(op_backend_name);
-          BackendManager::ReleaseBackend(op_backend_name);
-
-          stringstream exec_dump;
-          ng_exec->save(exec_dump);
-          // ng function attached as debugging information
-          node->AddAttr("_ngraph_aot_ngfunction_" + signature,
-                        serialized_ngfunc);
-          // Compute will use this ngexec
-          node->AddAttr("_ngraph_aot_ngexec_" + signature, exec_dump.str());
-          // We do not need to add "_ngraph_aot_requested" attribute since it
-          // already is already present in device_config and inserted into the
-          // currently created NGraphEncapsulate
-          // TODO: create a separate namespace of node attributes for backend
-          // and for bridge
-          performed_aot_on_enc.insert(node->name());
-          NGRAPH_VLOG(5) << "Performed AOT on " << node->name();
+          aot_tasks.push_back(std::move(task));
         }
       }
     }  // end of for (ShapeHintMap single_hint : node_shapes_hints_sets)
 
+    // Translate and compile the encapsulates concurrently. The compilations
+    // on a backend are still serialized by the backend lock, but the
+    // translations and the compilations on different backends overlap
+    {
+      int num_threads = std::max(1, std::min(static_cast<int>(aot_tasks.size()),
+                                             port::NumSchedulableCPUs()));
+      thread::ThreadPool thread_pool(Env::Default(), "ngraph_aot", num_threads);
+      // The backends are created before the compilations start, so that the
+      // backend map does not change while they run
+      std::set<string> op_backend_names;
+      for (const auto& task : aot_tasks) {
+        op_backend_names.insert(task.op_backend_name);
+      }
+      std::vector<string> created_backend_names;
+      Status status;
+      for (const auto& op_backend_name : op_backend_names) {
+        status = BackendManager::CreateBackend(op_backend_name);
+        if (!status.ok()) {
+          break;
+        }
+        created_backend_names.push_back(op_backend_name);
+      }
+      if (status.ok()) {
+        BlockingCounter counter(aot_tasks.size());
+        for (auto& task : aot_tasks) {
+          AOTCompileTask* task_ptr = &task;
+          thread_pool.Schedule([task_ptr, &counter]() {
+            try {
+              task_ptr->status = TranslateAndCompileForAOT(task_ptr);
+            } catch (const std::exception& exp) {
+              task_ptr->status = errors::Internal(
+                  "Caught exception while compiling for AOT: ", exp.what());
+            }
+            counter.DecrementCount();
+          });
+        }
+        counter.Wait();
+      }
+      for (const auto& op_backend_name : created_backend_names) {
+        BackendManager::ReleaseBackend(op_backend_name);
+      }
+      TF_RETURN_IF_ERROR(status);
+    }
+
+    // The results are attached in order, so that the graph and the artifact
+    // do not depend on the order in which the compilations finished
+    for (auto& task : aot_tasks) {
+      TF_RETURN_IF_ERROR(task.status);
+      Node* node = task.node;
+      const string& signature = task.signature;
+      if (aot_artifact_writer != nullptr) {
+        string function_ref, exec_ref;
+        TF_RETURN_IF_ERROR(
+            aot_artifact_writer->Append(node->name(), "ngfunction", signature,
+                                        task.serialized_ngfunc, &function_ref));
+        TF_RETURN_IF_ERROR(
+            aot_artifact_writer->Append(node->name(), "ngexec", signature,
+                                        task.serialized_exec, &exec_ref));
+        node->AddAttr("_ngraph_aot_ngfunctionref_" + signature, function_ref);
+        node->AddAttr("_ngraph_aot_ngexecref_" + signature, exec_ref);
+      } else {
+        // ng function attached as debugging information
+        node->AddAttr("_ngraph_aot_ngfunction_" + signature,
+                      task.serialized_ngfunc);
+        // Compute will use this ngexec
+        node->AddAttr("_ngraph_aot_ngexec_" + signature, task.serialized_exec);
+      }
+      // We do not need to add "_ngraph_aot_requested" attribute since it
+      // already is already present in device_config and inserted into the
+      // currently created NGraphEncapsulate
+      // TODO: create a separate namespace of node attributes for backend
+      // and for bridge
+      performed_aot_on_enc.insert(node->name());
+      NGRAPH_VLOG(5) << "Performed AOT on " << node->name();
+    }
+
     // In the end assert that all encapsulates have performed AOT
     for (auto node : graph->op_nodes()) {
       if (node->type_string() == "NGraphEncapsulate") {
@@ -877,6 +1017,9 @@ Status EncapsulateClusters(
         }
       }
     }
+    if (aot_artifact_writer != nullptr) {
+      TF_RETURN_IF_ERROR(aot_artifact_writer->Finish());
+    }
   }  // end of if (aot_requested)
 
   // Pass 9 (optional, only run if environment variable
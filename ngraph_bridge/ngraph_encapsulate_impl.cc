@@ -27,6 +27,7 @@
 #include "tensorflow/core/framework/tensor.h"
 #include "tensorflow/core/graph/graph.h"
 #include "tensorflow/core/graph/graph_constructor.h"
+#include "tensorflow/core/lib/strings/numbers.h"
 
 #include "ngraph/event_tracing.hpp"
 #include "ngraph/runtime/backend.hpp"
@@ -73,29 +74,9 @@ Status NGraphEncapsulateImpl::ComputeSignature(
     const std::vector<Tensor>& tf_input_tensors,
     std::vector<TensorShape>& input_shapes,
     std::vector<const Tensor*>& static_input_map,
-    std::stringstream& signature_ss) {
-  // Get the inputs
-  for (int i = 0; i < tf_input_tensors.size(); i++) {
-    const Tensor& input_tensor = tf_input_tensors[i];
-    input_shapes.push_back(input_tensor.shape());
-    for (const auto& x : input_tensor.shape()) {
-      signature_ss << x.size << ",";
-    }
-    signature_ss << ";";
-  }
-
-  signature_ss << "/";
-
-  static_input_map.resize(tf_input_tensors.size());
-  for (int i = 0; i < tf_input_tensors.size(); i++) {
-    const Tensor& input_tensor = tf_input_tensors[i];
-    if (m_input_is_static[i]) {
-      static_input_map[i] = &input_tensor;
-      TF_RETURN_IF_ERROR(TensorToStream(signature_ss, input_tensor));
-      signature_ss << ";";
-    }
-  }
-  return Status::OK();
+    NGraphSignature& signature) {
+  return signature.Compute(tf_input_tensors, m_input_is_static, input_shapes,
+                           static_input_map);
 }
 
 // Calls ComputeSignature and gets ngraph executable
@@ -105,8 +86,7 @@ Status NGraphEncapsulateImpl::GetNgExecutable(
     std::vector<const Tensor*>& static_input_map,
     ng::runtime::Backend*& op_backend,
     std::shared_ptr<ngraph::runtime::Executable>& ng_exec) {
-  std::stringstream signature_ss;
-  string signature;
+  NGraphSignature signature;
 
   std::shared_ptr<ngraph::Function> ng_function;
   std::shared_ptr<ngraph::runtime::Executable> evicted_ng_exec;
@@ -117,10 +97,14 @@ Status NGraphEncapsulateImpl::GetNgExecutable(
 
   // Compute Signature
   TF_RETURN_IF_ERROR(ComputeSignature(tf_input_tensors, input_shapes,
-                                      static_input_map, signature_ss));
-  signature = signature_ss.str();
+                                      static_input_map, signature));
 
-  NGRAPH_VLOG(5) << "Computed signature: " << signature;
+  // The human readable signature is needed for AOT and for logging only
+  string signature_str;
+  if (m_do_aot || NGRAPH_VLOG_IS_ON(5)) {
+    TF_RETURN_IF_ERROR(signature.ToString(&signature_str));
+  }
+  NGRAPH_VLOG(5) << "Computed signature: " << signature_str;
 
   auto it = m_ng_exec_map.find(signature);
 
@@ -142,13 +126,19 @@ Status NGraphEncapsulateImpl::GetNgExecutable(
       int json_indentation = 4;
       serialized_ng_func = ngraph::serialize(ng_function, json_indentation);
     } else {
-      auto itr = m_aot_functions.find(signature);
-      if (itr == m_aot_functions.end()) {
+      auto itr = m_aot_functions.find(signature_str);
+      auto itr_ref = m_aot_function_refs.find(signature_str);
+      if (itr != m_aot_functions.end()) {
+        serialized_ng_func = itr->second;
+      } else if (itr_ref != m_aot_function_refs.end()) {
+        StringPiece blob;
+        TF_RETURN_IF_ERROR(m_aot_artifact->GetBlob(itr_ref->second, &blob));
+        serialized_ng_func = string(blob);
+      } else {
         return errors::Internal(
             "Expected to find AOT precompiled ng function of signature: ",
-            signature);
+            signature_str);
       }
-      serialized_ng_func = itr->second;
     }
 
     // Serialize to nGraph if needed
@@ -177,6 +167,8 @@ Status NGraphEncapsulateImpl::GetNgExecutable(
       m_serialized_ng_function_map.erase(evicted_ng_exec);
 
       // Call delete function here for the erased func
+      BackendManager::RemoveExecutableLock(m_op_backend_name,
+                                           evicted_ng_exec.get());
       op_backend->remove_compiled_function(evicted_ng_exec);
       // Now clean the input cache
       std::vector<std::pair<void*, std::shared_ptr<ng::runtime::Tensor>>>&
@@ -208,16 +200,28 @@ Status NGraphEncapsulateImpl::GetNgExecutable(
     BackendManager::LockBackend(m_op_backend_name);
     try {
       if (m_do_aot) {
-        auto itr = m_aot_execs.find(signature);
-        if (itr == m_aot_execs.end()) {
-          BackendManager::UnlockBackend(m_op_backend_name);
-          return errors::Internal(
+        // The executable is read in place, from the attribute or from the
+        // mapped artifact
+        StringPiece serialized_exec;
+        auto itr = m_aot_execs.find(signature_str);
+        auto itr_ref = m_aot_exec_refs.find(signature_str);
+        Status status;
+        if (itr != m_aot_execs.end()) {
+          serialized_exec = itr->second;
+        } else if (itr_ref != m_aot_exec_refs.end()) {
+          status = m_aot_artifact->GetBlob(itr_ref->second, &serialized_exec);
+        } else {
+          status = errors::Internal(
               "Requested AOT, but could not find string with the "
               "signature: ",
-              signature);
+              signature_str);
+        }
+        if (!status.ok()) {
+          BackendManager::UnlockBackend(m_op_backend_name);
+          return status;
         }
-        stringstream serialized_exec_read;
-        serialized_exec_read << (itr->second);
+        NGraphMemoryStreamBuf serialized_exec_buf(serialized_exec);
+        std::istream serialized_exec_read(&serialized_exec_buf);
         ng_exec = op_backend->load(serialized_exec_read);
       } else {
         ng_exec = op_backend->compile(ng_function);
@@ -490,6 +494,10 @@ std::shared_ptr<ng::runtime::Tensor> NGraphEncapsulateImpl::GetCurrentNgTensor(
 Status NGraphEncapsulateImpl::ParseNodeAttributes(
     const google::protobuf::Map<string, AttrValue>& additional_attributes,
     std::unordered_map<std::string, std::string>* additional_attribute_map) {
+  const char* pipeline_depth_env = std::getenv("NGRAPH_TF_PIPELINE_DEPTH");
+  if (pipeline_depth_env != nullptr) {
+    m_depth = atoi(pipeline_depth_env);
+  }
   for (auto itx : additional_attributes) {
     // Find the optional attributes to be sent to the backend.
     // The optional attributes have '_ngraph_' appended to the start
@@ -505,8 +513,11 @@ Status NGraphEncapsulateImpl::ParseNodeAttributes(
       auto attr_value = itx.second.s();
       if (attr_name.find("_ngraph_aot_") != std::string::npos) {
         // The string is in the format: _ngraph_aot_ngexec_signature or
-        // _ngraph_aot_ngfunction_signature or _ngraph_aot_requested
-        // TODO: do not pass these 3 attributes to set_config of backend
+        // _ngraph_aot_ngfunction_signature or _ngraph_aot_requested, or
+        // _ngraph_aot_artifact, _ngraph_aot_ngexecref_signature and
+        // _ngraph_aot_ngfunctionref_signature if the executables are stored
+        // in an AOT artifact
+        // TODO: do not pass these attributes to set_config of backend
         if (attr_name.find("_ngraph_aot_ngexec_") != std::string::npos) {
           m_aot_execs[ng::split(attr_name, '_')[4]] = attr_value;
         } else if (attr_name.find("_ngraph_aot_ngfunction_") !=
@@ -515,6 +526,17 @@ Status NGraphEncapsulateImpl::ParseNodeAttributes(
           // No need to save or do anything with _ngraph_aot_ngfunction_. They
           // are there for debugging only
           m_aot_functions[ng::split(attr_name, '_')[4]] = attr_value;
+        } else if (attr_name.find("_ngraph_aot_ngexecref_") !=
+                   std::string::npos) {
+          m_aot_exec_refs[ng::split(attr_name, '_')[4]] = attr_value;
+        } else if (attr_name.find("_ngraph_aot_ngfunctionref_") !=
+                   std::string::npos) {
+          m_aot_function_refs[ng::split(attr_name, '_')[4]] = attr_value;
+        } else if (attr_name == "_ngraph_aot_artifact") {
+          // Mapping the artifact is cheap, the pages are read when an
+          // executable is loaded
+          TF_RETURN_IF_ERROR(
+              NGraphAOTArtifact::Open(attr_value, &m_aot_artifact));
         } else if (attr_name.find("_ngraph_aot_requested") !=
                    std::string::npos) {
           m_do_aot = (attr_value == "1");
@@ -525,11 +547,23 @@ Status NGraphEncapsulateImpl::ParseNodeAttributes(
         } else {
           return errors::Internal(
               "Ngraph attribues beginning with _ngraph_aot_ "
-              "must be _ngraph_aot_ngexec_<signature> or "
-              "_ngraph_aot_ngfunction_<signature>. But got "
+              "must be _ngraph_aot_ngexec_<signature>, "
+              "_ngraph_aot_ngfunction_<signature>, "
+              "_ngraph_aot_ngexecref_<signature>, "
+              "_ngraph_aot_ngfunctionref_<signature> or "
+              "_ngraph_aot_artifact. But got "
               "attribute named: ",
               itx.first);
         }
+      } else if (attr_name == "_ngraph_pipeline_depth") {
+        if (!strings::safe_strto32(attr_value, &m_depth)) {
+          return errors::Internal("Expected an integer for ", attr_name,
+                                  " but got ", attr_value);
+        }
+      } else if (attr_name == "_ngraph_pipeline_max_depth" ||
+                 attr_name == "_ngraph_shape_buckets") {
+        // The legacy executor does not grow the pipeline or pad the inputs
+        NGRAPH_VLOG(1) << "Ignoring " << attr_name << " for " << m_name;
       } else {
         NGRAPH_VLOG(4) << "Attribute: " << attr_name.substr(strlen("_ngraph_"))
                        << " Value: " << attr_value;
@@ -538,11 +572,23 @@ Status NGraphEncapsulateImpl::ParseNodeAttributes(
       }
     }
   }
-  if (((m_aot_functions.size() > 0) || (m_aot_execs.size() > 0)) && !m_do_aot) {
+  if ((m_aot_functions.size() > 0 || m_aot_execs.size() > 0 ||
+       m_aot_function_refs.size() > 0 || m_aot_exec_refs.size() > 0) &&
+      !m_do_aot) {
     return errors::Internal("The encapsulate ", m_name,
                             " has ngraph functions or executables embedded "
                             "in it, even though AOT was not requested.");
   }
+  if ((m_aot_function_refs.size() > 0 || m_aot_exec_refs.size() > 0) &&
+      m_aot_artifact == nullptr) {
+    return errors::Internal("The encapsulate ", m_name,
+                            " references AOT executables, but has no "
+                            "_ngraph_aot_artifact attribute");
+  }
+  if (m_depth < 1) {
+    return errors::Internal("Pipeline depth for ", m_name,
+                            " must be at least 1, but got ", m_depth);
+  }
   return Status::OK();
 }
 
@@ -574,8 +620,8 @@ Status NGraphEncapsulateImpl::UpdatePipelinedTensorCache(
       }
     }
     m_executable_pipelined_tensors_map.insert(
-        {ng_exec, PipelinedTensorsStore(pipelined_input_tensors,
-                                        pipelined_output_tensors)});
+        {ng_exec, make_shared<PipelinedTensorsStore>(
+                      pipelined_input_tensors, pipelined_output_tensors)});
   }
   return Status::OK();
 }
@@ -583,7 +629,8 @@ Status NGraphEncapsulateImpl::UpdatePipelinedTensorCache(
 std::tuple<int, PipelinedTensorVector, PipelinedTensorVector>
 NGraphEncapsulateImpl::GetTensorsFromPipeline(
     std::shared_ptr<ngraph::runtime::Executable> ng_exec) {
-  PipelinedTensorsStore pts = m_executable_pipelined_tensors_map.at(ng_exec);
+  shared_ptr<PipelinedTensorsStore> pts =
+      m_executable_pipelined_tensors_map.at(ng_exec);
 
   // TODO: do something about this spin lock
   // get_tensors returns an index integer, that can be -1, 0, ... depth-1
@@ -591,7 +638,7 @@ NGraphEncapsulateImpl::GetTensorsFromPipeline(
   // or the pipeline is full. In that case, we need to wait, hence the while
   std::tuple<int, PipelinedTensorVector, PipelinedTensorVector> out_tpl;
   while (true) {
-    out_tpl = pts.get_tensors();
+    out_tpl = pts->get_tensors();
 
     if (std::get<0>(out_tpl) >= 0) {
       break;
@@ -647,7 +694,7 @@ Status NGraphEncapsulateImpl::GetPipelineIdxAndTensors(
 Status NGraphEncapsulateImpl::ReturnPipelinedTensors(
     std::shared_ptr<ngraph::runtime::Executable> ng_exec, size_t idx) {
   try {
-    m_executable_pipelined_tensors_map.at(ng_exec).return_tensors(idx);
+    m_executable_pipelined_tensors_map.at(ng_exec)->return_tensors(idx);
   } catch (const std::exception& exp) {
     return errors::Internal(
         "Caught exception while returning pipelined tensors: ", exp.what(),
@@ -27,8 +27,10 @@
 #include "ngraph/ngraph.hpp"
 
 #include "logging/ngraph_log.h"
+#include "ngraph_bridge/ngraph_aot_artifact.h"
 #include "ngraph_bridge/ngraph_freshness_tracker.h"
 #include "ngraph_bridge/ngraph_pipelined_tensors.h"
+#include "ngraph_bridge/ngraph_signature.h"
 
 namespace tensorflow {
 
@@ -48,7 +50,7 @@ class NGraphEncapsulateImpl {
   Status ComputeSignature(const std::vector<Tensor>& tf_input_tensors,
                           std::vector<TensorShape>& input_shapes,
                           std::vector<const Tensor*>& static_input_map,
-                          std::stringstream& signature_ss);
+                          NGraphSignature& signature);
 
   // Calls Compute Signature and gets ngraph executable
   Status GetNgExecutable(const std::vector<Tensor>& tf_input_tensors,
@@ -155,12 +157,13 @@ class NGraphEncapsulateImpl {
     m_input_is_static[index] = value;
   }
 
-  std::unordered_map<std::string, std::shared_ptr<ngraph::runtime::Executable>>
+  std::unordered_map<NGraphSignature,
+                     std::shared_ptr<ngraph::runtime::Executable>>
   GetNgExecMap() {
     return m_ng_exec_map;
   }
 
-  void SetNgExecMap(const std::string& ng_map_key,
+  void SetNgExecMap(const NGraphSignature& ng_map_key,
                     const std::shared_ptr<ngraph::runtime::Executable>& exec) {
     m_ng_exec_map[ng_map_key] = exec;
   }
@@ -226,14 +229,20 @@ class NGraphEncapsulateImpl {
   std::stringstream copy_log_str;
   bool log_copies = false;
   std::vector<bool> m_input_is_static;
-  std::list<std::string> m_lru;
+  std::list<NGraphSignature> m_lru;
   static int s_instance_count;
   bool m_do_aot = false;
   map<string, string> m_aot_functions;
   map<string, string> m_aot_execs;
+  // References to the functions and executables stored in the AOT artifact
+  // instead of being embedded in the node
+  std::shared_ptr<NGraphAOTArtifact> m_aot_artifact;
+  map<string, string> m_aot_function_refs;
+  map<string, string> m_aot_exec_refs;
 
   // ng_function, ng_executable, Output and Input Cache maps
-  std::unordered_map<std::string, std::shared_ptr<ngraph::runtime::Executable>>
+  std::unordered_map<NGraphSignature,
+                     std::shared_ptr<ngraph::runtime::Executable>>
       m_ng_exec_map;
   std::unordered_map<std::shared_ptr<ngraph::runtime::Executable>, std::string>
       m_serialized_ng_function_map;
@@ -249,7 +258,7 @@ class NGraphEncapsulateImpl {
 
   bool m_executable_can_create_tensor = false;
   std::unordered_map<std::shared_ptr<ngraph::runtime::Executable>,
-                     PipelinedTensorsStore>
+                     shared_ptr<PipelinedTensorsStore>>
       m_executable_pipelined_tensors_map;
 
   Status UpdatePipelinedTensorCache(
@@ -257,7 +266,8 @@ class NGraphEncapsulateImpl {
   std::tuple<int, PipelinedTensorVector, PipelinedTensorVector>
   GetTensorsFromPipeline(std::shared_ptr<ngraph::runtime::Executable> ng_exec);
 
-  int m_depth{2};  // TODO make this settable
+  // Set using NGRAPH_TF_PIPELINE_DEPTH or _ngraph_pipeline_depth
+  int32 m_depth{2};
 };
 
 }  // namespace ngraph_bridge
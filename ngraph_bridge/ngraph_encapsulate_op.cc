@@ -13,6 +13,7 @@
  * See the License for the specific language governing permissions and
  * limitations under the License.
  *******************************************************************************/
+#include <algorithm>
 #include <cstdlib>
 #include <mutex>
 #include <utility>
@@ -21,13 +22,17 @@
 #include "tensorflow/core/common_runtime/function.h"
 #include "tensorflow/core/common_runtime/optimization_registry.h"
 #include "tensorflow/core/framework/attr_value.pb.h"
+#include "tensorflow/core/framework/function.h"
 #include "tensorflow/core/framework/graph.pb.h"
+#include "tensorflow/core/framework/graph_to_functiondef.h"
 #include "tensorflow/core/framework/node_def_util.h"
 #include "tensorflow/core/framework/op.h"
 #include "tensorflow/core/framework/op_kernel.h"
 #include "tensorflow/core/framework/tensor.h"
 #include "tensorflow/core/graph/graph.h"
 #include "tensorflow/core/graph/graph_constructor.h"
+#include "tensorflow/core/lib/core/notification.h"
+#include "tensorflow/core/platform/env.h"
 
 #include "ngraph/event_tracing.hpp"
 #include "ngraph/runtime/backend.hpp"
@@ -37,9 +42,11 @@
 #endif
 
 #include "logging/ngraph_log.h"
+#include "ngraph_bridge/ngraph_api.h"
 #include "ngraph_bridge/ngraph_backend_manager.h"
 #include "ngraph_bridge/ngraph_builder.h"
 #include "ngraph_bridge/ngraph_cluster_manager.h"
+#include "ngraph_bridge/ngraph_cluster_profile.h"
 #include "ngraph_bridge/ngraph_encapsulate_impl.h"
 #include "ngraph_bridge/ngraph_encapsulate_op.h"
 #include "ngraph_bridge/ngraph_encapsulate_op_utils.h"
@@ -50,6 +57,7 @@
 #include "ngraph_bridge/ngraph_timer.h"
 #include "ngraph_bridge/ngraph_utils.h"
 #include "ngraph_bridge/ngraph_var.h"
+#include "ngraph_bridge/ngraph_zero_copy.h"
 
 #if defined(NGRAPH_TF_ENABLE_VARIABLES_AND_OPTIMIZERS)
 #include "ngraph_bridge/ngraph_catalog.h"
@@ -99,6 +107,13 @@ NGraphEncapsulateOp::NGraphEncapsulateOp(OpKernelConstruction* ctx)
 
   if (m_use_parallel_executor) {
     CreateParallelExecutor(ctx, be_name);
+    // Compile in the background and run the TF graph of the cluster till the
+    // executable is ready. Not used with prefetching, which expects the
+    // pipelined tensors to be used at every step
+    m_use_async_compile =
+        std::getenv("NGRAPH_TF_ASYNC_COMPILE") != nullptr &&
+        std::getenv(NGraphPrefetchSharedResouce::NGRAPH_TF_USE_PREFETCH) ==
+            nullptr;
   } else {
     CreateLegacyExecutor(ctx, be_name);
   }
@@ -144,6 +159,7 @@ void NGraphEncapsulateOp::CreateParallelExecutor(OpKernelConstruction* ctx,
 
   int graph_id{-1};
   OP_REQUIRES_OK(ctx, ctx->GetAttr("ngraph_graph_id", &graph_id));
+  m_profile_key = NGraphClusterProfile::ClusterKey(*encap_subgraph);
 
   const int cache_depth = 16;
   int my_function_cache_depth_in_items = cache_depth;
@@ -152,11 +168,21 @@ void NGraphEncapsulateOp::CreateParallelExecutor(OpKernelConstruction* ctx,
   if (cache_depth_specified != nullptr) {
     my_function_cache_depth_in_items = atoi(cache_depth_specified);
   }
+  // When set, items are also evicted when the estimated memory held by the
+  // cached items exceeds this size (see
+  // NGraphExecutor::EstimateNgItemSizeInBytes)
+  size_t my_function_cache_max_bytes = 0;
+  const char* cache_max_bytes_specified =
+      std::getenv("NGRAPH_TF_FUNCTION_CACHE_MAX_BYTES");
+  if (cache_max_bytes_specified != nullptr) {
+    my_function_cache_max_bytes =
+        strtoull(cache_max_bytes_specified, nullptr, 10);
+  }
 
   // Create the Executor object
   m_parallel_executor = move(unique_ptr<NGraphExecutor>(new NGraphExecutor(
       s_instance_id, cluster_id, graph_id, encap_subgraph, backend_name, name(),
-      my_function_cache_depth_in_items)));
+      my_function_cache_depth_in_items, my_function_cache_max_bytes)));
 
   auto tensor_manager = m_parallel_executor->GetTensorManager();
   OP_REQUIRES(ctx, tensor_manager->GetNumberOfInputs() == ctx->num_inputs(),
@@ -172,8 +198,27 @@ void NGraphEncapsulateOp::CreateParallelExecutor(OpKernelConstruction* ctx,
   auto node_def = ctx->def();
   OP_REQUIRES_OK(ctx, m_parallel_executor->ParseNodeAttributes(
                           node_def.attr(), &additional_attribute_map));
+  // Prefetched inputs are written to the pipelined tensors before the
+  // encapsulate sees them, so they cannot be padded
+  OP_REQUIRES(
+      ctx,
+      !m_parallel_executor->GetShapeBuckets().IsEnabled() ||
+          std::getenv(NGraphPrefetchSharedResouce::NGRAPH_TF_USE_PREFETCH) ==
+              nullptr,
+      errors::InvalidArgument("Shape buckets are not supported with "
+                              "prefetching, set for ",
+                              name()));
   // SetConfig will be called for each EncapsulateOp
   BackendManager::SetConfig(backend_name, additional_attribute_map);
+
+  // TF creates the kernels of a graph before running any of them, so with
+  // NGRAPH_TF_WARMUP_COMPILE set the encapsulates compile their known
+  // signatures in the background, before the first call. Only the
+  // translations run concurrently, the compiles on a backend still take
+  // turns under its lock (see NGraphExecutor::WarmUp)
+  if (std::getenv("NGRAPH_TF_WARMUP_COMPILE") != nullptr) {
+    m_parallel_executor->WarmUp();
+  }
 }
 
 //---------------------------------------------------------------------------
@@ -232,6 +277,7 @@ void NGraphEncapsulateOp::CreateLegacyExecutor(OpKernelConstruction* ctx,
   int graph_id{-1};
   OP_REQUIRES_OK(ctx, ctx->GetAttr("ngraph_graph_id", &graph_id));
   ng_encap_impl_.SetGraphId(graph_id);
+  m_profile_key = NGraphClusterProfile::ClusterKey(ng_encap_impl_.m_graph);
   //
   // Initialize the "m_input_is_static" vector as follows:
   // (1) create m_input_is_static with n+1 elements, where n is the max arg
@@ -322,6 +368,14 @@ NGraphEncapsulateOp::~NGraphEncapsulateOp() {
   ngraph::Event event(oss.str(), name(), "");
   NGRAPH_VLOG(2) << "~NGraphEncapsulateOp::" << name();
 
+  // Write the timings recorded so far, the process may end without
+  // destroying the other encapsulate ops
+  Status profile_status = NGraphClusterProfile::Flush();
+  if (!profile_status.ok()) {
+    NGRAPH_VLOG(0) << "Cannot write the cluster profile: "
+                   << profile_status.error_message();
+  }
+
   if (m_use_parallel_executor) {
     NGRAPH_VLOG(2)
         << "~NGraphEncapsulateOp():: ParallelExecutor: ReleaseBackend";
@@ -411,6 +465,90 @@ void NGraphEncapsulateOp::Compute(OpKernelContext* ctx) {
   ngraph::Event::write_trace(event_compute);
 }
 
+//---------------------------------------------------------------------------
+// GetFallbackFunctionHandle
+//---------------------------------------------------------------------------
+Status NGraphEncapsulateOp::GetFallbackFunctionHandle(
+    FunctionLibraryRuntime* flr, FunctionLibraryRuntime::Handle* handle) {
+  std::lock_guard<std::mutex> lock(m_fallback_mutex);
+  if (m_fallback_flib == nullptr) {
+    // Make a function out of the encapsulated TF graph and instantiate it
+    // using a library that overlays the library of the runtime
+    string fallback_name = name() + "_fallback";
+    FunctionDef fdef;
+    TF_RETURN_IF_ERROR(GraphToFunctionDef(*m_parallel_executor->GetGraph(),
+                                          fallback_name, &fdef));
+    unique_ptr<FunctionLibraryDefinition> fallback_flib(
+        new FunctionLibraryDefinition(OpRegistry::Global(),
+                                      FunctionDefLibrary()));
+    TF_RETURN_IF_ERROR(fallback_flib->AddFunctionDef(fdef));
+    FunctionLibraryRuntime::InstantiateOptions instantiate_opts;
+    instantiate_opts.overlay_lib = fallback_flib.get();
+    TF_RETURN_IF_ERROR(flr->Instantiate(fallback_name, AttrSlice(),
+                                        instantiate_opts, &m_fallback_handle));
+    m_fallback_flib = std::move(fallback_flib);
+  }
+  *handle = m_fallback_handle;
+  return Status::OK();
+}
+
+//---------------------------------------------------------------------------
+// ComputeUsingFallback
+//---------------------------------------------------------------------------
+void NGraphEncapsulateOp::ComputeUsingFallback(
+    OpKernelContext* ctx, const std::vector<Tensor>& tf_input_tensors) {
+  NGRAPH_VLOG(1) << "Compute using the TF graph of " << name();
+  ngraph::Event event("ComputeUsingFallback", name(), "");
+
+  FunctionLibraryRuntime* flr = ctx->function_library();
+  OP_REQUIRES(ctx, flr != nullptr,
+              errors::Internal("No function library runtime to run the TF "
+                               "graph of ",
+                               name()));
+  FunctionLibraryRuntime::Handle handle;
+  OP_REQUIRES_OK(ctx, GetFallbackFunctionHandle(flr, &handle));
+
+  FunctionLibraryRuntime::Options opts;
+  opts.step_id = ctx->step_id();
+  opts.rendezvous = ctx->rendezvous();
+  opts.cancellation_manager = ctx->cancellation_manager();
+  opts.step_container = ctx->step_container();
+  opts.collective_executor = ctx->collective_executor();
+  // The function body runs inline, on this thread. Scheduling it on the
+  // inter-op pool (ctx->runner()) while this thread blocks waiting for it
+  // deadlocks when all the threads of the pool are waiting the same way
+  std::function<void(std::function<void()>)> inline_runner =
+      [](std::function<void()> fn) { fn(); };
+  opts.runner = &inline_runner;
+
+  std::vector<Tensor> tf_output_tensors;
+  Notification done;
+  Status status;
+  int64 start_us = Env::Default()->NowMicros();
+  flr->Run(opts, handle, tf_input_tensors, &tf_output_tensors,
+           [&done, &status](const Status& s) {
+             status = s;
+             done.Notify();
+           });
+  done.WaitForNotification();
+  OP_REQUIRES_OK(ctx, status);
+  config::RecordFallbackCall();
+  if (NGraphClusterProfile::IsRecording()) {
+    NGraphClusterProfile::Recorded().RecordTFCall(
+        m_profile_key, name(), Env::Default()->NowMicros() - start_us);
+  }
+  OP_REQUIRES(ctx, tf_output_tensors.size() == ctx->num_outputs(),
+              errors::Internal("TF graph of ", name(), " returned ",
+                               tf_output_tensors.size(), " outputs, expected ",
+                               ctx->num_outputs()));
+  for (int i = 0; i < ctx->num_outputs(); i++) {
+    ctx->set_output(i, tf_output_tensors[i]);
+  }
+
+  event.Stop();
+  ngraph::Event::write_trace(event);
+}
+
 //---------------------------------------------------------------------------
 // ComputeUsingParallelExecutor
 //---------------------------------------------------------------------------
@@ -428,16 +566,59 @@ void NGraphEncapsulateOp::ComputeUsingParallelExecutor(OpKernelContext* ctx) {
     tf_input_tensors.push_back(ctx->input(i));
   }
 
+  // When profiling, the TF graph of the cluster is run now and then to
+  // measure it. Not with prefetching, which expects the pipelined tensors to
+  // be used at every step
+  int tf_sampling_period = NGraphClusterProfile::GetTFSamplingPeriod();
+  if (tf_sampling_period > 0 &&
+      std::getenv(NGraphPrefetchSharedResouce::NGRAPH_TF_USE_PREFETCH) ==
+          nullptr &&
+      ++m_num_calls % tf_sampling_period == 0) {
+    ComputeUsingFallback(ctx, tf_input_tensors);
+    return;
+  }
+
+  // With shape buckets the executable runs on the inputs padded up to their
+  // bucket shapes, and the outputs are sliced back. The fallback runs on the
+  // original inputs
+  const NGraphShapeBuckets& shape_buckets =
+      m_parallel_executor->GetShapeBuckets();
+  std::vector<Tensor> ng_input_tensors;
+  if (shape_buckets.IsEnabled()) {
+    ngraph::Event event_pad_inputs("Pad Inputs", "", "");
+    OP_REQUIRES_OK(
+        ctx, shape_buckets.PadInputs(tf_input_tensors, &ng_input_tensors));
+    event_pad_inputs.Stop();
+    ngraph::Event::write_trace(event_pad_inputs);
+  } else {
+    ng_input_tensors = tf_input_tensors;
+  }
+
   // Get ngraph executable,function and Pipelined Tensor Store
   ngraph::Event event_get_ng_item("GetExecutableAndTensors", "", "");
   std::shared_ptr<ngraph::runtime::Executable> ng_exec;
   std::string serialized_ng_function;
   shared_ptr<PipelinedTensorsStore> pipelined_tensor_store;
+  shared_ptr<NGraphOutputPlan> output_plan;
   bool cache_hit;
 
-  OP_REQUIRES_OK(ctx, m_parallel_executor->GetExecutableFunctionAndTensors(
-                          tf_input_tensors, ng_exec, serialized_ng_function,
-                          pipelined_tensor_store, cache_hit));
+  if (m_use_async_compile) {
+    OP_REQUIRES_OK(ctx,
+                   m_parallel_executor->GetExecutableFunctionAndTensorsAsync(
+                       ng_input_tensors, ng_exec, serialized_ng_function,
+                       pipelined_tensor_store, cache_hit, &output_plan));
+    if (!cache_hit) {
+      // The executable is being compiled in the background
+      event_get_ng_item.Stop();
+      ngraph::Event::write_trace(event_get_ng_item);
+      ComputeUsingFallback(ctx, tf_input_tensors);
+      return;
+    }
+  } else {
+    OP_REQUIRES_OK(ctx, m_parallel_executor->GetExecutableFunctionAndTensors(
+                            ng_input_tensors, ng_exec, serialized_ng_function,
+                            pipelined_tensor_store, cache_hit, &output_plan));
+  }
   NGRAPH_VLOG(2) << "CACHE HIT: " << PrintBool(cache_hit) << endl;
   NGRAPH_VLOG(2) << " Step_ID: " << ctx->step_id();
 
@@ -448,12 +629,8 @@ void NGraphEncapsulateOp::ComputeUsingParallelExecutor(OpKernelContext* ctx) {
   event_get_ng_item.Stop();
   ngraph::Event::write_trace(event_get_ng_item);
 
-  // Error check for pipelined tensors and pipeline depth
-  OP_REQUIRES(ctx, m_parallel_executor->GetTensorPipelineDepth() == 2,
-              errors::Internal("Pipeline Depth is not 2, got ",
-                               m_parallel_executor->GetTensorPipelineDepth()));
-
   // Get Tensor Manager and some error checking
+  int64 prepare_start_us = Env::Default()->NowMicros();
   ngraph::Event event_prepare_ng_tensors("Prepare NG In/Out Tensors", "", "");
   auto tensor_manager = m_parallel_executor->GetTensorManager();
   int num_of_inputs = tensor_manager->GetNumberOfInputs();
@@ -487,11 +664,29 @@ void NGraphEncapsulateOp::ComputeUsingParallelExecutor(OpKernelContext* ctx) {
   // Get pipelined input output tensors for this iteration
   std::tuple<int, PipelinedTensorVector, PipelinedTensorVector>
       pipelined_io_tensors;
-  OP_REQUIRES_OK(ctx, GetPipelinedIOTensorsReadyForExecution(
-                          ctx, tf_input_tensors, pipelined_tensor_store,
-                          tensor_manager, pipelined_io_tensors));
+  ng::runtime::Backend* zero_copy_backend =
+      m_parallel_executor->IsZeroCopyInputsEnabled()
+          ? BackendManager::GetBackend(m_parallel_executor->GetOpBackendName())
+          : nullptr;
+  OP_REQUIRES_OK(
+      ctx, GetPipelinedIOTensorsReadyForExecution(
+               ctx, ng_input_tensors, pipelined_tensor_store, tensor_manager,
+               pipelined_io_tensors, zero_copy_backend));
 
   int current_iter_pipeline_depth = get<0>(pipelined_io_tensors);
+  // The index is returned to the store when the step ends, also when it fails
+  ScopedPipelineIndex pipeline_index(pipelined_tensor_store,
+                                     current_iter_pipeline_depth);
+  // In the zero-copy mode the slot is returned to the store once TF releases
+  // the output tensors that use its buffers. When TF holds as many slots as
+  // the store can have, less one, the outputs are copied instead, so that
+  // the steps do not wait for TF to release them
+  shared_ptr<NGraphPipelineSlot> zero_copy_slot;
+  if (m_parallel_executor->IsZeroCopyOutputsEnabled() &&
+      pipelined_tensor_store->try_hold()) {
+    zero_copy_slot = make_shared<NGraphPipelineSlot>(pipelined_tensor_store,
+                                                     pipeline_index.release());
+  }
   vector<shared_ptr<ng::runtime::Tensor>> ng_inputs(num_of_inputs);
   vector<shared_ptr<ng::runtime::Tensor>> ng_outputs(num_of_outputs);
 
@@ -508,13 +703,15 @@ void NGraphEncapsulateOp::ComputeUsingParallelExecutor(OpKernelContext* ctx) {
       "Execute Graph Pipeline Indx" + to_string(current_iter_pipeline_depth),
       "", "");
 
-  BackendManager::LockBackend(m_parallel_executor->GetOpBackendName());
+  ExecutableLock executable_lock = BackendManager::LockExecutable(
+      m_parallel_executor->GetOpBackendName(), ng_exec.get());
   NGRAPH_VLOG(4) << "NGraphEncapsulateOp::Compute call starting for cluster "
                  << m_parallel_executor->GetNgraphClusterId();
+  int64 exec_start_us = Env::Default()->NowMicros();
   try {
     ng_exec->call(ng_outputs, ng_inputs);
   } catch (const std::exception& exp) {
-    BackendManager::UnlockBackend(m_parallel_executor->GetOpBackendName());
+    executable_lock.Unlock();
     Status st =
         StringToFile("tf_function_error" + ctx->op_kernel().name() + ".json",
                      serialized_ng_function);
@@ -525,7 +722,7 @@ void NGraphEncapsulateOp::ComputeUsingParallelExecutor(OpKernelContext* ctx) {
                          st.error_message()));
     OP_REQUIRES(ctx, false, errors::Internal(status_string));
   } catch (...) {
-    BackendManager::UnlockBackend(m_parallel_executor->GetOpBackendName());
+    executable_lock.Unlock();
     Status st =
         StringToFile("tf_function_error" + ctx->op_kernel().name() + ".json",
                      serialized_ng_function);
@@ -535,7 +732,8 @@ void NGraphEncapsulateOp::ComputeUsingParallelExecutor(OpKernelContext* ctx) {
                          st.error_message()));
     OP_REQUIRES(ctx, false, errors::Internal(status_string));
   }
-  BackendManager::UnlockBackend(m_parallel_executor->GetOpBackendName());
+  executable_lock.Unlock();
+  int64 exec_end_us = Env::Default()->NowMicros();
   event_execute_graph.Stop();
   ngraph::Event::write_trace(event_execute_graph);
 
@@ -546,57 +744,108 @@ void NGraphEncapsulateOp::ComputeUsingParallelExecutor(OpKernelContext* ctx) {
 
   ngraph::Event event_prepare_tf_output_tensors("Prepare TF Output Tensor", "",
                                                 "");
+  // The shapes, types and classification of the outputs are computed when
+  // the executable is cached
+  const auto& planned_outputs = output_plan->GetOutputs();
+  const auto& output_indexes_to_be_copied =
+      output_plan->GetCopiedOutputIndexes();
+  OP_REQUIRES(ctx, planned_outputs.size() == num_of_outputs,
+              errors::Internal("Expected ", num_of_outputs,
+                               " outputs in the output plan, but found ",
+                               planned_outputs.size()));
   vector<Tensor*> tf_output_tensors;
-  for (auto i = 0; i < ng_exec->get_results().size(); i++) {
-    auto ng_element = ng_exec->get_results()[i];
-    auto ng_shape = ng_element->get_shape();
-    auto ng_element_type = ng_element->get_element_type();
+  vector<bool> output_is_zero_copy(num_of_outputs, false);
+  for (auto i = 0; i < num_of_outputs; i++) {
+    const auto& planned_output = planned_outputs[i];
+    TensorShape tf_shape = planned_output.shape;
+    // The outputs of an executable compiled with dynamic shapes get their
+    // shapes when it is called
+    if (planned_output.is_dynamic) {
+      tf_shape = TensorShape();
+      for (auto dim : ng_outputs[i]->get_shape()) {
+        tf_shape.AddDim(dim);
+      }
+    }
+    if (shape_buckets.IsEnabled()) {
+      TensorShape ng_shape = tf_shape;
+      OP_REQUIRES_OK(ctx, shape_buckets.GetOutputShape(
+                              i, ng_shape, tf_input_tensors, &tf_shape));
+    }
 
-    // Create the TF output tensor
-    vector<int64> dims;
-    for (auto dim : ng_shape) {
-      dims.push_back(dim);
+    // Use the host buffer of the nGraph tensor, unless the output was
+    // computed on padded inputs
+    void* host_data = nullptr;
+    if (zero_copy_slot != nullptr && planned_output.needs_copy &&
+        tf_shape.num_elements() * planned_output.element_size ==
+            ng_outputs[i]->get_size_in_bytes()) {
+      host_data = GetHostTensorData(ng_outputs[i]);
+    }
+    if (host_data != nullptr) {
+      Tensor zero_copy_tensor;
+      OP_REQUIRES_OK(
+          ctx, MakeZeroCopyTensor(planned_output.dtype, tf_shape, host_data,
+                                  zero_copy_slot, &zero_copy_tensor));
+      ctx->set_output(i, zero_copy_tensor);
+      tf_output_tensors.push_back(ctx->mutable_output(i));
+      output_is_zero_copy[i] = true;
+    } else {
+      Tensor* tf_output_tensor = nullptr;
+      OP_REQUIRES_OK(ctx, ctx->allocate_output(i, tf_shape, &tf_output_tensor));
+      tf_output_tensors.push_back(tf_output_tensor);
     }
-    TensorShape tf_shape(dims);
-    Tensor* tf_output_tensor = nullptr;
-    OP_REQUIRES_OK(ctx, ctx->allocate_output(i, tf_shape, &tf_output_tensor));
-    tf_output_tensors.push_back(tf_output_tensor);
-    // Make sure the nGraph-inferred element type agrees with what TensorFlow
-    // expected.
-    ng::element::Type expected_elem_type;
-    OP_REQUIRES_OK(ctx,
-                   TFDataTypeToNGraphElementType(ctx->expected_output_dtype(i),
-                                                 &expected_elem_type));
-    OP_REQUIRES(
-        ctx, ng_element_type == expected_elem_type,
-        errors::Internal("Element type inferred by nGraph does not match "
-                         "the element type expected by TensorFlow"));
   }
 
   // Copy Tensors that are required
   NGRAPH_VLOG(4) << "NGraphEncapsulateOp::Compute Read NG Output Tensors "
                  << m_parallel_executor->GetNgraphClusterId();
 
-  std::vector<std::unique_ptr<ngraph::Event>> output_copy_events;
-
-  auto output_indexes_to_be_copied =
-      tensor_manager->GetOutputIndexesThatNeedCopy();
+  // The copies of the different outputs run concurrently if the transfer
+  // thread pool is enabled. The buffer of the copies is kept by the thread
+  // for its next steps, and the copies only capture raw pointers, which fit
+  // in the std::function without an allocation. The tensors outlive the
+  // copies, which are done when RunTensorCopies returns
+  static thread_local std::vector<TensorCopy> output_copies;
+  output_copies.clear();
+  output_copies.reserve(output_indexes_to_be_copied.size());
   for (auto output_index : output_indexes_to_be_copied) {
+    if (output_is_zero_copy[output_index]) {
+      continue;
+    }
     // Copy the nGraph Tensor to Host Tensor
-    std::unique_ptr<ngraph::Event> event_copy_d2h(new ngraph::Event(
-        "D2H_Output_" + std::to_string(output_index), "", ""));
-    void* dst_ptr = (void*)DMAHelper::base(tf_output_tensors[output_index]);
-    ng_outputs[output_index]->read(
-        dst_ptr, ng_outputs[output_index]->get_element_count() *
-                     ng_outputs[output_index]->get_element_type().size());
-    event_copy_d2h->Stop();
-    output_copy_events.push_back(std::move(event_copy_d2h));
-  }
-  for (auto& next : output_copy_events) {
-    ngraph::Event::write_trace(*next.get());
+    ng::runtime::Tensor* ng_output = ng_outputs[output_index].get();
+    Tensor* tf_output = tf_output_tensors[output_index];
+    output_copies.push_back(
+        {planned_outputs[output_index].copy_name,
+         [ng_output, tf_output]() -> Status {
+           void* dst_ptr = (void*)DMAHelper::base(tf_output);
+           size_t ng_output_size = ng_output->get_element_count() *
+                                   ng_output->get_element_type().size();
+           if (tf_output->TotalBytes() == ng_output_size) {
+             ng_output->read(dst_ptr, ng_output_size);
+             return Status::OK();
+           }
+           // The output was computed on padded inputs, read it and keep the
+           // elements within the output shape
+           vector<int64> dims;
+           for (auto dim : ng_output->get_shape()) {
+             dims.push_back(dim);
+           }
+           Tensor padded_output(tf_output->dtype(), TensorShape(dims));
+           ng_output->read(DMAHelper::base(&padded_output), ng_output_size);
+           return NGraphShapeBuckets::CopyCorner(padded_output, tf_output);
+         }});
   }
+  Status copy_status = RunTensorCopies(output_copies);
+  output_copies.clear();
+  OP_REQUIRES_OK(ctx, copy_status);
   event_prepare_tf_output_tensors.Stop();
   ngraph::Event::write_trace(event_prepare_tf_output_tensors);
+  if (NGraphClusterProfile::IsRecording()) {
+    NGraphClusterProfile::Recorded().RecordNGraphCall(
+        m_profile_key, name(), exec_end_us - exec_start_us,
+        (exec_start_us - prepare_start_us) +
+            (Env::Default()->NowMicros() - exec_end_us));
+  }
 
   // Synch Var Output Tensors as required
   NGRAPH_VLOG(4)
@@ -611,7 +860,8 @@ void NGraphEncapsulateOp::ComputeUsingParallelExecutor(OpKernelContext* ctx) {
   NGRAPH_VLOG(4) << "NGraphEncapsulateOp::Returning Tensors "
                  << m_parallel_executor->GetNgraphClusterId();
   ngraph::Event event_return_tensor("Return Tensor", "", "");
-  pipelined_tensor_store->return_tensors(current_iter_pipeline_depth);
+  zero_copy_slot.reset();
+  pipeline_index.reset();
 
   event_return_tensor.Stop();
   ngraph::Event::write_trace(event_return_tensor);
@@ -845,13 +1095,14 @@ void NGraphEncapsulateOp::ComputeUsingLegacyExecutor(OpKernelContext* ctx) {
   ngraph::Event event_execute_function("Execute nGraph", name(), "");
   Timer execute_function;
   {
-    BackendManager::LockBackend(ng_encap_impl_.GetOpBackend());
+    ExecutableLock executable_lock = BackendManager::LockExecutable(
+        ng_encap_impl_.GetOpBackend(), ng_exec.get());
     NGRAPH_VLOG(4) << "NGraphEncapsulateOp::Compute call starting for cluster "
                    << ng_encap_impl_.GetNgraphCluster();
     try {
       ng_exec->call(ng_outputs, ng_inputs);
     } catch (const std::exception& exp) {
-      BackendManager::UnlockBackend(ng_encap_impl_.GetOpBackend());
+      executable_lock.Unlock();
       Status st = ng_encap_impl_.DumpNgFunction(
           "tf_function_error_" + ctx->op_kernel().name() + ".json", ng_exec);
       string status_string =
@@ -861,7 +1112,7 @@ void NGraphEncapsulateOp::ComputeUsingLegacyExecutor(OpKernelContext* ctx) {
                            st.error_message()));
       OP_REQUIRES(ctx, false, errors::Internal(status_string));
     } catch (...) {
-      BackendManager::UnlockBackend(ng_encap_impl_.GetOpBackend());
+      executable_lock.Unlock();
       Status st = ng_encap_impl_.DumpNgFunction(
           "tf_function_error_" + ctx->op_kernel().name() + ".json", ng_exec);
       string status_string =
@@ -870,7 +1121,7 @@ void NGraphEncapsulateOp::ComputeUsingLegacyExecutor(OpKernelContext* ctx) {
                            st.error_message()));
       OP_REQUIRES(ctx, false, errors::Internal(status_string));
     }
-    BackendManager::UnlockBackend(ng_encap_impl_.GetOpBackend());
+    executable_lock.Unlock();
   }
   int time_execute_function = execute_function.ElapsedInMS();
   event_execute_function.Stop();
@@ -1009,6 +1260,12 @@ void NGraphEncapsulateOp::ComputeUsingLegacyExecutor(OpKernelContext* ctx) {
   }
   int time_copy_output_tensors_to_host =
       copy_output_tensors_to_host.ElapsedInMS();
+  if (NGraphClusterProfile::IsRecording()) {
+    NGraphClusterProfile::Recorded().RecordNGraphCall(
+        m_profile_key, name(), execute_function.ElapsedInMicroSec(),
+        create_or_lookup_tensors.ElapsedInMicroSec() +
+            copy_output_tensors_to_host.ElapsedInMicroSec());
+  }
 
   if (ng_encap_impl_.GetExecCanCreateTensor()) {
     OP_REQUIRES_OK(
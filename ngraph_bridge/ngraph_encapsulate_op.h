@@ -18,9 +18,11 @@
 #define NGRAPH_TF_ENCAPSULATE_OP_H_
 #pragma once
 
+#include <atomic>
 #include <ostream>
 #include <vector>
 
+#include "tensorflow/core/framework/function.h"
 #include "tensorflow/core/framework/tensor_shape.h"
 #include "tensorflow/core/graph/graph.h"
 
@@ -47,12 +49,29 @@ class NGraphEncapsulateOp : public OpKernel {
                             const string& backend_name);
   void ComputeUsingLegacyExecutor(OpKernelContext* ctx);
   void ComputeUsingParallelExecutor(OpKernelContext* ctx);
+  // Runs the encapsulated TF graph, while the executable is compiled in the
+  // background
+  void ComputeUsingFallback(OpKernelContext* ctx,
+                            const std::vector<Tensor>& tf_input_tensors);
+  Status GetFallbackFunctionHandle(FunctionLibraryRuntime* flr,
+                                   FunctionLibraryRuntime::Handle* handle);
 
   static int s_instance_id;
   NGraphEncapsulateImpl ng_encap_impl_;
   bool m_use_parallel_executor = false;
   std::mutex m_compute_lock_;
   unique_ptr<NGraphExecutor> m_parallel_executor;
+
+  // Set by NGRAPH_TF_ASYNC_COMPILE
+  bool m_use_async_compile = false;
+  std::mutex m_fallback_mutex;
+  unique_ptr<FunctionLibraryDefinition> m_fallback_flib;
+  FunctionLibraryRuntime::Handle m_fallback_handle;
+
+  // Key of the cluster in the cluster profile, and the number of calls, to
+  // run the TF graph every NGRAPH_TF_PROFILE_TF_EVERY calls when profiling
+  string m_profile_key;
+  std::atomic<int64> m_num_calls{0};
 };
 
 }  // namespace ngraph_bridge
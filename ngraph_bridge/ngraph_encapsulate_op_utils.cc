@@ -14,11 +14,20 @@
  * limitations under the License.
  *******************************************************************************/
 
+#include <cstdlib>
+
+#include "tensorflow/core/lib/core/blocking_counter.h"
+#include "tensorflow/core/lib/core/refcount.h"
+#include "tensorflow/core/lib/core/threadpool.h"
+#include "tensorflow/core/platform/env.h"
+
+#include "ngraph_bridge/ngraph_catalog.h"
 #include "ngraph_bridge/ngraph_encapsulate_op_utils.h"
 #include "ngraph_bridge/ngraph_prefetch_shared_data.h"
 #include "ngraph_bridge/ngraph_utils.h"
 
 #include "ngraph_bridge/ngraph_var.h"
+#include "ngraph_bridge/ngraph_zero_copy.h"
 
 using namespace std;
 
@@ -26,6 +35,111 @@ namespace tensorflow {
 
 namespace ngraph_bridge {
 
+//---------------------------------------------------------------------------
+//  Tensor copies
+//---------------------------------------------------------------------------
+// Thread pool shared by all the encapsulates for the copies between TF and
+// nGraph tensors. The number of threads is set by NGRAPH_TF_TRANSFER_THREADS,
+// without it there is no pool and the copies are made by the compute thread
+static thread::ThreadPool* GetTransferThreadPool() {
+  static thread::ThreadPool* thread_pool = []() -> thread::ThreadPool* {
+    const char* num_threads_env = std::getenv("NGRAPH_TF_TRANSFER_THREADS");
+    if (num_threads_env == nullptr || atoi(num_threads_env) <= 0) {
+      return nullptr;
+    }
+    return new thread::ThreadPool(Env::Default(), "ngraph_transfer",
+                                  atoi(num_threads_env));
+  }();
+  return thread_pool;
+}
+
+static Status WriteNGTensor(const shared_ptr<ng::runtime::Tensor>& ng_tensor,
+                            const void* src_ptr, size_t size_in_bytes) {
+  try {
+    ng_tensor->write(src_ptr, size_in_bytes);
+  } catch (const std::exception& exp) {
+    return errors::Internal("Error copying TF tensor to device tensor: ",
+                            exp.what());
+  } catch (...) {
+    return errors::Internal("Error copying TF tensor to device tensor");
+  }
+  return Status::OK();
+}
+
+Status RunTensorCopies(const vector<TensorCopy>& copies) {
+  vector<Status> statuses(copies.size());
+  vector<unique_ptr<ngraph::Event>> events(copies.size());
+  auto run_copy = [&copies, &statuses, &events](size_t i) {
+    events[i].reset(new ngraph::Event(copies[i].name, "", ""));
+    try {
+      statuses[i] = copies[i].copy();
+    } catch (const std::exception& exp) {
+      statuses[i] =
+          errors::Internal("Error in ", copies[i].name, ": ", exp.what());
+    } catch (...) {
+      statuses[i] = errors::Internal("Error in ", copies[i].name);
+    }
+    events[i]->Stop();
+  };
+
+  thread::ThreadPool* thread_pool = GetTransferThreadPool();
+  if (thread_pool == nullptr || copies.size() < 2) {
+    for (size_t i = 0; i < copies.size(); i++) {
+      run_copy(i);
+    }
+  } else {
+    BlockingCounter counter(copies.size() - 1);
+    for (size_t i = 1; i < copies.size(); i++) {
+      thread_pool->Schedule([&run_copy, &counter, i]() {
+        run_copy(i);
+        counter.DecrementCount();
+      });
+    }
+    // The calling thread makes one of the copies
+    run_copy(0);
+    counter.Wait();
+  }
+
+  for (auto& event : events) {
+    ngraph::Event::write_trace(*event.get());
+  }
+  for (auto& status : statuses) {
+    TF_RETURN_IF_ERROR(status);
+  }
+  return Status::OK();
+}
+
+// Gives the IO tensors left in the queues of a terminated prefetch shared
+// data back to the store, and removes the shared data from the resource
+// manager, so that the next prefetch iterator gets a new one
+static Status ReleasePrefetchSharedResource(
+    OpKernelContext* ctx, const string& resource_name,
+    NGraphPrefetchSharedResouce* shared_data,
+    const shared_ptr<PipelinedTensorsStore>& pipelined_tensor_store) {
+  NGraphPrefetchSharedResouce::IOTensorBundle io_tensor_bundle;
+  // The queues of the terminated shared data return the tensors left in them
+  // without waiting, and then fail
+  while (shared_data
+             ->GetNextIOTensorBundleForDeviceTransfer(&io_tensor_bundle,
+                                                      absl::ZeroDuration())
+             .ok()) {
+    pipelined_tensor_store->return_tensors(io_tensor_bundle.Id);
+  }
+  while (shared_data
+             ->GetNextIOTensorBundleReadyForDeviceExecution(
+                 &io_tensor_bundle, absl::ZeroDuration())
+             .ok()) {
+    pipelined_tensor_store->return_tensors(io_tensor_bundle.Id);
+  }
+  // Another iteration may have removed it already
+  Status status = ctx->resource_manager()->Delete<NGraphPrefetchSharedResouce>(
+      NGraphPrefetchSharedResouce::CONTAINER_NAME, resource_name);
+  if (!status.ok() && !errors::IsNotFound(status)) {
+    return status;
+  }
+  return Status::OK();
+}
+
 //---------------------------------------------------------------------------
 //  GetPipelinedIOTensorsReadyForExecution
 //---------------------------------------------------------------------------
@@ -34,16 +148,19 @@ Status GetPipelinedIOTensorsReadyForExecution(
     const shared_ptr<PipelinedTensorsStore>& pipelined_tensor_store,
     const shared_ptr<NGraphTensorManager>& tensor_manager,
     tuple<int, PipelinedTensorVector, PipelinedTensorVector>&
-        pipelined_io_tensors) {
+        pipelined_io_tensors,
+    ng::runtime::Backend* zero_copy_backend) {
   auto io_tensors = pipelined_tensor_store->get_tensors();
 
-  int current_iter_pipeline_depth = get<0>(io_tensors);
+  // The index goes back to the store if this function fails
+  ScopedPipelineIndex current_iter_pipeline_depth(pipelined_tensor_store,
+                                                  get<0>(io_tensors));
   PipelinedTensorVector ng_pipelined_inputs = get<1>(io_tensors);
   PipelinedTensorVector ng_pipelined_outputs = get<2>(io_tensors);
   auto pipelined_input_indexes = tensor_manager->GetPipelinedInputIndexes();
   auto pipelined_output_indexes = tensor_manager->GetPipelinedOutputIndexes();
 
-  if (current_iter_pipeline_depth < 0) {
+  if (current_iter_pipeline_depth.get() < 0) {
     return errors::Internal("No free tensor available");
   }
 
@@ -64,17 +181,21 @@ Status GetPipelinedIOTensorsReadyForExecution(
   bool skip_tf2ng_copy = false;
   // Prefetch only if there are input tensors that are prefetched && prefetch
   // has been requested
-  // [TODO] we support prefetching only when there is atmost 1 encap
-  // that has prefetched inputs
+  // Each encap with prefetched inputs has its own shared data, named after
+  // the encap and the iterator it is fed by
   if (std::getenv(NGraphPrefetchSharedResouce::NGRAPH_TF_USE_PREFETCH) !=
           nullptr &&
       !(tensor_manager->GetPipelinedInputIndexesThatArePrefetched()).empty()) {
     NGRAPH_VLOG(2) << "[PREFETCH] NGRAPH_TF_USE_PREFETCH Set";
     // Set the prefetch shared obj if applicable
+    const string resource_name = NGraphPrefetchSharedResouce::GetResourceName(
+        NGraphCatalog::CreateNodeKey(tensor_manager->GetGraphId(),
+                                     tensor_manager->GetName()),
+        tensor_manager->GetPrefetchIteratorName());
     NGraphPrefetchSharedResouce* shared_data = nullptr;
     Status s = ctx->resource_manager()->Lookup(
-        NGraphPrefetchSharedResouce::CONTAINER_NAME,
-        NGraphPrefetchSharedResouce::RESOURCE_NAME, &shared_data);
+        NGraphPrefetchSharedResouce::CONTAINER_NAME, resource_name,
+        &shared_data);
 
     if (!s.ok()) {
       // We are using this for the first time i.e., we need to do the following
@@ -86,7 +207,10 @@ Status GetPipelinedIOTensorsReadyForExecution(
       shared_data = new NGraphPrefetchSharedResouce(
           tensor_manager->GetName(), tensor_manager->GetGraphId(),
           tensor_manager->GetClusterId(),
-          tensor_manager->GetInputIndexesForPrefetchSharedObject());
+          tensor_manager->GetInputIndexesForPrefetchSharedObject(),
+          tensor_manager->GetPrefetchIteratorName(), pipelined_tensor_store);
+      // This step gets the first element of the iterator
+      shared_data->NextStepSequence();
 
       // Get the set of IO tensors for the next iteration
       tuple<int, PipelinedTensorVector, PipelinedTensorVector>
@@ -97,95 +221,191 @@ Status GetPipelinedIOTensorsReadyForExecution(
       NGraphPrefetchSharedResouce::IOTensorBundle next_io_tensor_bundle{
           get<0>(io_tensors_next_iter), get<1>(io_tensors_next_iter),
           get<2>(io_tensors_next_iter)};
+      ScopedPipelineIndex next_iter_pipeline_depth(pipelined_tensor_store,
+                                                   next_io_tensor_bundle.Id);
 
-      if (current_iter_pipeline_depth != (!next_io_tensor_bundle.Id)) {
+      if (next_io_tensor_bundle.Id < 0) {
+        return errors::Internal(
+            "Prefetching needs a pipeline depth of at least 2, got ",
+            pipelined_tensor_store->get_depth());
+      }
+      if (current_iter_pipeline_depth.get() == next_io_tensor_bundle.Id) {
+        next_iter_pipeline_depth.release();
         return errors::Internal("Current Pipeline Depth is ",
-                                current_iter_pipeline_depth,
+                                current_iter_pipeline_depth.get(),
                                 " and next iter pipeline depth is also  ",
                                 next_io_tensor_bundle.Id);
       }
 
-      shared_data->AddNextIOTensorBundleForDeviceTransfer(
-          next_io_tensor_bundle);
+      TF_RETURN_IF_ERROR(shared_data->AddNextIOTensorBundleForDeviceTransfer(
+          next_io_tensor_bundle));
+      next_iter_pipeline_depth.release();
+      shared_data->IncrNumSlots();
 
       ctx->SetStatus(ctx->resource_manager()->Create(
-          NGraphPrefetchSharedResouce::CONTAINER_NAME,
-          NGraphPrefetchSharedResouce::RESOURCE_NAME, shared_data));
+          NGraphPrefetchSharedResouce::CONTAINER_NAME, resource_name,
+          shared_data));
       // Continue the execution with the currently supplied TF tensor for the
       // last time
       NGRAPH_VLOG(2) << "[PREFETCH] COMPUTE: Creating the shared object to "
                         "signal prefetching";
     } else {
-      int prefetch_buffer_depth = shared_data->GetBufferDepth();
-      int skip_count = shared_data->GetSkipCount();
-      NGRAPH_VLOG(2) << "[PREFETCH] COMPUTE: DEPTH: " << prefetch_buffer_depth
-                     << " skip count; " << skip_count;
-      if (skip_count >= prefetch_buffer_depth) {
-        // We have been using the pipelined tensors - therefore do the
-        // following:
-        // 1. Save the prefetched Input/Output tensors for the current iteration
-        //    to the shared data object so that the prefetcher
-        //    can continue with copying the next set of inout tensor to the
-        //    device
-        // 3. Execute the nGraph call for this iteration using the
-        //    nG prefeteched input tensors we got from the shared data
-
-        // Add the current prefetched tensors for the next iteration
-        // Get prefetched inputs
-        NGraphPrefetchSharedResouce::IOTensorBundle prefetch_io_tensor_bundle{
-            current_iter_pipeline_depth, ng_pipelined_inputs,
-            ng_pipelined_outputs};
-        shared_data->AddNextIOTensorBundleForDeviceTransfer(
-            prefetch_io_tensor_bundle);
-
-        // Update the input_tensors with the one ready for exdcution
-        auto ng_io_tensor_bundle_ready =
-            shared_data->GetNextIOTensorBundleReadyForDeviceExecution();
-        current_iter_pipeline_depth = ng_io_tensor_bundle_ready.Id;
-        ng_pipelined_inputs = ng_io_tensor_bundle_ready.Inputs;
-        ng_pipelined_outputs = ng_io_tensor_bundle_ready.Outputs;
-        if (current_iter_pipeline_depth != (!prefetch_io_tensor_bundle.Id)) {
-          return errors::Internal("Current Pipeline Depth is ",
-                                  current_iter_pipeline_depth,
-                                  " and next iter pipeline depth is ", "also ",
-                                  prefetch_io_tensor_bundle.Id);
+      core::ScopedUnref unref_shared_data(shared_data);
+      int64 step_sequence = shared_data->NextStepSequence();
+      int prefetch_buffer_depth = 0;
+      Status depth_status = shared_data->GetBufferDepth(&prefetch_buffer_depth);
+      if (!depth_status.ok() || shared_data->IsTerminated()) {
+        // The prefetch iterator is gone, copy the inputs of this iteration
+        NGRAPH_VLOG(2) << "[PREFETCH] COMPUTE: Prefetching is terminated";
+        TF_RETURN_IF_ERROR(ReleasePrefetchSharedResource(
+            ctx, resource_name, shared_data, pipelined_tensor_store));
+      } else {
+        // The prefetcher paces itself with the time between the steps
+        shared_data->RecordStep(Env::Default()->NowMicros());
+        NGRAPH_VLOG(2) << "[PREFETCH] COMPUTE: DEPTH: " << prefetch_buffer_depth
+                       << " element: " << step_sequence;
+        // Give the prefetcher more IO tensors, so that it can copy the inputs
+        // of as many iterations ahead as the prefetch dataset buffers. The
+        // store cannot provide more once it has reached its max depth
+        while (shared_data->GetNumSlots() < prefetch_buffer_depth) {
+          auto io_tensors_slot = pipelined_tensor_store->try_get_tensors();
+          if (get<0>(io_tensors_slot) < 0) {
+            break;
+          }
+          NGraphPrefetchSharedResouce::IOTensorBundle slot_io_tensor_bundle{
+              get<0>(io_tensors_slot), get<1>(io_tensors_slot),
+              get<2>(io_tensors_slot)};
+          if (!shared_data
+                   ->AddNextIOTensorBundleForDeviceTransfer(
+                       slot_io_tensor_bundle)
+                   .ok()) {
+            pipelined_tensor_store->return_tensors(slot_io_tensor_bundle.Id);
+            break;
+          }
+          shared_data->IncrNumSlots();
+          NGRAPH_VLOG(2) << "[PREFETCH] COMPUTE: Added slot "
+                         << slot_io_tensor_bundle.Id
+                         << ", number of slots: " << shared_data->GetNumSlots();
+        }
+        // The elements buffered before the prefetcher found the shared data
+        // are not copied to the device
+        if (step_sequence >= shared_data->GetFirstPrefetchedSequence()) {
+          // The prefetcher copies the inputs of this element - therefore do
+          // the following:
+          // 1. Get the Input/Output tensors the prefetcher has copied the
+          //    inputs of this element to. If the prefetcher does not
+          //    provide them in time, the inputs are copied as usual, and
+          //    the tensors it provides later are given back to it
+          // 2. Save the prefetched Input/Output tensors for the current
+          //    iteration to the shared data object so that the prefetcher
+          //    can continue with copying the next set of inout tensor to the
+          //    device
+          // 3. Execute the nGraph call for this iteration using the
+          //    nG prefeteched input tensors we got from the shared data
+          NGraphPrefetchSharedResouce::IOTensorBundle ng_io_tensor_bundle_ready;
+          Status ready_status;
+          while (true) {
+            ready_status =
+                shared_data->GetNextIOTensorBundleReadyForDeviceExecution(
+                    &ng_io_tensor_bundle_ready,
+                    absl::Milliseconds(
+                        NGraphPrefetchSharedResouce::READY_TIMEOUT_MS));
+            if (!ready_status.ok() ||
+                ng_io_tensor_bundle_ready.Sequence >= step_sequence) {
+              break;
+            }
+            // An earlier step has copied the inputs of this element itself
+            NGRAPH_VLOG(1) << "[PREFETCH] COMPUTE: Dropping the prefetched "
+                              "inputs of the stale element "
+                           << ng_io_tensor_bundle_ready.Sequence;
+            if (!shared_data
+                     ->AddNextIOTensorBundleForDeviceTransfer(
+                         ng_io_tensor_bundle_ready)
+                     .ok()) {
+              pipelined_tensor_store->return_tensors(
+                  ng_io_tensor_bundle_ready.Id);
+              shared_data->DecrNumSlots();
+            }
+          }
+          if (ready_status.ok() &&
+              ng_io_tensor_bundle_ready.Sequence != step_sequence) {
+            pipelined_tensor_store->return_tensors(
+                ng_io_tensor_bundle_ready.Id);
+            shared_data->DecrNumSlots();
+            return errors::Internal("Got the prefetched inputs of element ",
+                                    ng_io_tensor_bundle_ready.Sequence,
+                                    " for element ", step_sequence);
+          }
+          if (ready_status.ok()) {
+            // Add the current prefetched tensors for the next iteration
+            NGraphPrefetchSharedResouce::IOTensorBundle
+                prefetch_io_tensor_bundle{current_iter_pipeline_depth.release(),
+                                          ng_pipelined_inputs,
+                                          ng_pipelined_outputs};
+            if (!shared_data
+                     ->AddNextIOTensorBundleForDeviceTransfer(
+                         prefetch_io_tensor_bundle)
+                     .ok()) {
+              // Terminated meanwhile, the tensors are not used any more
+              pipelined_tensor_store->return_tensors(
+                  prefetch_io_tensor_bundle.Id);
+            }
+
+            if (ng_io_tensor_bundle_ready.Id == prefetch_io_tensor_bundle.Id) {
+              return errors::Internal("Current Pipeline Depth is ",
+                                      ng_io_tensor_bundle_ready.Id,
+                                      " and next iter pipeline depth is ",
+                                      "also ", prefetch_io_tensor_bundle.Id);
+            }
+            // Update the input_tensors with the one ready for exdcution
+            current_iter_pipeline_depth.reset(ng_io_tensor_bundle_ready.Id);
+            ng_pipelined_inputs = ng_io_tensor_bundle_ready.Inputs;
+            ng_pipelined_outputs = ng_io_tensor_bundle_ready.Outputs;
+            skip_tf2ng_copy = true;
+            NGRAPH_VLOG(2) << "[PREFETCH] COMPUTE: Using device tensors";
+          } else if (errors::IsDeadlineExceeded(ready_status)) {
+            NGRAPH_VLOG(1) << "[PREFETCH] COMPUTE: Prefetched inputs are not "
+                              "ready, copying the inputs";
+          } else {
+            NGRAPH_VLOG(2) << "[PREFETCH] COMPUTE: Prefetching is terminated";
+            TF_RETURN_IF_ERROR(ReleasePrefetchSharedResource(
+                ctx, resource_name, shared_data, pipelined_tensor_store));
+          }
         }
-        skip_tf2ng_copy = true;
-        NGRAPH_VLOG(2) << "[PREFETCH] COMPUTE: Using device tensors";
       }
-      shared_data->IncrSkipCount();
     }
   }
 
   // Allocate the input/
   ngraph::Event event_copy_input_tensor("Copy Pipelined Input Tensors", "", "");
-  std::vector<std::unique_ptr<ngraph::Event>> input_write_events;
+  std::vector<TensorCopy> input_copies;
   if (!skip_tf2ng_copy) {
     // All pipelined inputs are copied
 
     for (auto i = 0; i < pipelined_input_indexes.size(); i++) {
       int tf_index = pipelined_input_indexes[i];
+      if (zero_copy_backend != nullptr) {
+        auto ng_alias =
+            CreateAliasTensor(zero_copy_backend, tf_input_tensors[tf_index],
+                              ng_pipelined_inputs[i]);
+        if (ng_alias != nullptr) {
+          ng_pipelined_inputs[i] = ng_alias;
+          continue;
+        }
+      }
       ng::element::Type ng_element_type;
       TF_RETURN_IF_ERROR(TFDataTypeToNGraphElementType(
           tf_input_tensors[tf_index].dtype(), &ng_element_type));
       void* current_src_ptr =
           (void*)DMAHelper::base(&tf_input_tensors[tf_index]);
-
-      std::unique_ptr<ngraph::Event> event_copy_h2d(
-          new ngraph::Event("H2D_Input_" + std::to_string(tf_index), "", ""));
-
-      try {
-        ng_pipelined_inputs[i]->write(
-            current_src_ptr, ng_pipelined_inputs[i]->get_element_count() *
-                                 ng_element_type.size());
-      } catch (const std::exception& exp) {
-        return errors::Internal("Error copying TF tensor to device tensor: ",
-                                exp.what());
-      } catch (...) {
-        return errors::Internal("Error copying TF tensor to device tensor");
-      }
-      event_copy_h2d->Stop();
-      input_write_events.push_back(std::move(event_copy_h2d));
+      auto ng_tensor = ng_pipelined_inputs[i];
+      size_t size_in_bytes =
+          ng_tensor->get_element_count() * ng_element_type.size();
+      input_copies.push_back({"H2D_Input_" + std::to_string(tf_index),
+                              [ng_tensor, current_src_ptr, size_in_bytes]() {
+                                return WriteNGTensor(ng_tensor, current_src_ptr,
+                                                     size_in_bytes);
+                              }});
     }
   } else {
     // All pipelined inputs that are not prefetched are copied
@@ -204,36 +424,35 @@ Status GetPipelinedIOTensorsReadyForExecution(
     for (auto i = 0; i < pipelined_input_indexes_not_prefetched.size(); i++) {
       int tf_index = pipelined_not_prefetched_input_indexes[i];
       int ng_index = pipelined_input_indexes_not_prefetched[i];
+      if (zero_copy_backend != nullptr) {
+        auto ng_alias =
+            CreateAliasTensor(zero_copy_backend, tf_input_tensors[tf_index],
+                              ng_pipelined_inputs[ng_index]);
+        if (ng_alias != nullptr) {
+          ng_pipelined_inputs[ng_index] = ng_alias;
+          continue;
+        }
+      }
       ng::element::Type ng_element_type;
       TF_RETURN_IF_ERROR(TFDataTypeToNGraphElementType(
           tf_input_tensors[tf_index].dtype(), &ng_element_type));
       void* current_src_ptr =
           (void*)DMAHelper::base(&tf_input_tensors[tf_index]);
-      unique_ptr<ngraph::Event> event_copy_h2d(
-          new ngraph::Event("H2D_Input_" + to_string(tf_index), "", ""));
-      try {
-        ng_pipelined_inputs[ng_index]->write(
-            current_src_ptr,
-            ng_pipelined_inputs[ng_index]->get_element_count() *
-                ng_element_type.size());
-      } catch (const exception& exp) {
-        return errors::Internal("Error copying TF tensor to device tensor: ",
-                                exp.what());
-      } catch (...) {
-        return errors::Internal("Error copying TF tensor to device tensor");
-      }
-      event_copy_h2d->Stop();
-      input_write_events.push_back(move(event_copy_h2d));
+      auto ng_tensor = ng_pipelined_inputs[ng_index];
+      size_t size_in_bytes =
+          ng_tensor->get_element_count() * ng_element_type.size();
+      input_copies.push_back({"H2D_Input_" + to_string(tf_index),
+                              [ng_tensor, current_src_ptr, size_in_bytes]() {
+                                return WriteNGTensor(ng_tensor, current_src_ptr,
+                                                     size_in_bytes);
+                              }});
     }
   }
-
-  for (auto& next : input_write_events) {
-    ngraph::Event::write_trace(*next.get());
-  }
+  TF_RETURN_IF_ERROR(RunTensorCopies(input_copies));
   event_copy_input_tensor.Stop();
   ngraph::Event::write_trace(event_copy_input_tensor);
 
-  pipelined_io_tensors = make_tuple(current_iter_pipeline_depth,
+  pipelined_io_tensors = make_tuple(current_iter_pipeline_depth.release(),
                                     ng_pipelined_inputs, ng_pipelined_outputs);
 
   return Status::OK();
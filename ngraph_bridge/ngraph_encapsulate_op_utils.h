@@ -19,6 +19,8 @@
 
 #pragma once
 
+#include <functional>
+
 #include "tensorflow/core/graph/graph.h"
 
 #include "logging/ngraph_log.h"
@@ -30,6 +32,18 @@ namespace tensorflow {
 
 namespace ngraph_bridge {
 
+// A copy between a TF tensor and an nGraph tensor. It is traced as an
+// ngraph::Event with the given name, e.g. "D2H_Output_0"
+struct TensorCopy {
+  string name;
+  std::function<Status()> copy;
+};
+
+// Runs the copies concurrently on the transfer thread pool, whose size is set
+// by NGRAPH_TF_TRANSFER_THREADS. Without the pool the copies run one after the
+// other on the calling thread. Returns the first error
+Status RunTensorCopies(const vector<TensorCopy>& copies);
+
 // This function does the following
 // 1. Gets pipelined tensors for current execution from pipelined tensor store
 // (PTS)
@@ -42,7 +56,9 @@ namespace ngraph_bridge {
 //               gets the tensors from prefetch object and adds the tensors from
 //               step 1 to the prefetch object
 // 3. Copies the tf input tensors that are not prefetched to the ngraph
-// pipelined input tensors
+// pipelined input tensors. If zero_copy_backend is given, the tf input
+// tensors whose buffers the backend can use in place are not copied, the
+// returned input tensors alias them instead (see ngraph_zero_copy.h)
 //
 
 Status GetPipelinedIOTensorsReadyForExecution(
@@ -50,7 +66,8 @@ Status GetPipelinedIOTensorsReadyForExecution(
     const shared_ptr<PipelinedTensorsStore>& pipelined_tensor_store,
     const shared_ptr<NGraphTensorManager>& tensor_manager,
     tuple<int, PipelinedTensorVector, PipelinedTensorVector>&
-        pipelined_io_tensors);
+        pipelined_io_tensors,
+    ng::runtime::Backend* zero_copy_backend = nullptr);
 
 // Assembles the different types of input and output tensors
 // Variable tensors and pipelined tensors are put together in the right order
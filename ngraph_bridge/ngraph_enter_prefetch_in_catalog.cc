@@ -42,6 +42,14 @@ namespace ngraph_bridge {
 // "NGraphEncapsulate" node to the PrefetchedInputIndexMap
 // We add mapping of {graphId_nodename : (input_indexs)} to the
 // PrefetchedInputIndexMap
+// 2. The iterator node that feeds the IteratorGetNext, so that the
+// NGraphPrefetchDataset of that iterator knows the "NGraphEncapsulate" nodes
+// it copies to. Several encapsulates can consume the same iterator, and each
+// of them gets its own prefetch shared resource. An encapsulate is prefetched
+// from one iterator only, its inputs from other iterators are copied as usual
+// The iterator is entered with the graph id it was tagged with when its
+// prefetch dataset was captured, it runs in a different graph than the
+// "NGraphEncapsulate" nodes. An untagged iterator gets the graph_id given here
 //
 
 Status EnterPrefetchInCatalog(Graph* graph, int graph_id) {
@@ -56,26 +64,48 @@ Status EnterPrefetchInCatalog(Graph* graph, int graph_id) {
     // If the node is a NGraphEncapsulate, go over all it's
     // inputs
     map<int, int> in_indexes_for_encap;
+    string iterator_name;
+    int iterator_graph_id = graph_id;
     if (node->type_string() == "NGraphEncapsulate") {
-      for (auto edge : node->in_edges()) {
+      std::vector<const Edge*> input_edges;
+      TF_RETURN_IF_ERROR(node->input_edges(&input_edges));
+      for (auto edge : input_edges) {
         // If any input is coming from "IteratorGetNext" then
         // add the input index for it to the set
-        // [TODO] Data Pipeling assumes there is only 1 IteratorGetNext
-        //
         if (edge->src()->type_string() == "IteratorGetNext") {
+          Node* iterator_node = nullptr;
+          TF_RETURN_IF_ERROR(edge->src()->input_node(0, &iterator_node));
+          if (iterator_name.empty()) {
+            iterator_name = iterator_node->name();
+            if (HasNodeAttr(iterator_node->def(),
+                            "_ngraph_prefetch_graph_id")) {
+              TF_RETURN_IF_ERROR(GetNodeAttr(iterator_node->attrs(),
+                                             "_ngraph_prefetch_graph_id",
+                                             &iterator_graph_id));
+            }
+          } else if (iterator_name != iterator_node->name()) {
+            NGRAPH_VLOG(4) << "Not prefetching input " << edge->dst_input()
+                           << " of " << node->name() << " from iterator "
+                           << iterator_node->name() << ", it is prefetched "
+                           << "from " << iterator_name;
+            continue;
+          }
           NGRAPH_VLOG(4) << "Adding to PrefetchedInputIndexMap";
           NGRAPH_VLOG(4) << "Key: " << node->name();
           NGRAPH_VLOG(4) << "NGEncap Input index: " << edge->dst_input();
           NGRAPH_VLOG(4) << "IteratorGetNext Output index: "
                          << edge->src_output();
+          NGRAPH_VLOG(4) << "Iterator: " << iterator_graph_id << "_"
+                         << iterator_name;
           in_indexes_for_encap.insert({edge->dst_input(), edge->src_output()});
         }
       }  // end loop over input edges
 
       if (in_indexes_for_encap.size() > 0) {
         try {
-          NGraphCatalog::AddToPrefetchedInputIndexMap(graph_id, node->name(),
-                                                      in_indexes_for_encap);
+          NGraphCatalog::AddToPrefetchedInputIndexMap(
+              graph_id, node->name(), in_indexes_for_encap, iterator_name,
+              iterator_graph_id);
         } catch (const std::exception& exp) {
           return errors::Internal(
               "Caught exception while entering in catalog: ", exp.what(), "\n");
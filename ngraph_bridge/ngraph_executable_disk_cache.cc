@@ -0,0 +1,220 @@
+/*******************************************************************************
+ * Copyright 2019 Intel Corporation
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ *******************************************************************************/
+
+#include "ngraph_bridge/ngraph_executable_disk_cache.h"
+
+#include <sstream>
+#include <thread>
+
+#include "logging/ngraph_log.h"
+#include "ngraph_bridge/version.h"
+#include "tensorflow/core/framework/graph.pb.h"
+#include "tensorflow/core/lib/core/errors.h"
+#include "tensorflow/core/lib/hash/hash.h"
+#include "tensorflow/core/lib/io/path.h"
+#include "tensorflow/core/lib/strings/numbers.h"
+#include "tensorflow/core/lib/strings/proto_serialization.h"
+#include "tensorflow/core/lib/strings/strcat.h"
+#include "tensorflow/core/platform/env.h"
+
+using namespace std;
+
+namespace tensorflow {
+
+namespace ngraph_bridge {
+
+static const char* const kEntryExtension = ".ngexec";
+
+NGraphExecutableDiskCache::NGraphExecutableDiskCache(const string& cache_dir,
+                                                     int64 max_size_in_bytes)
+    : m_cache_dir(cache_dir), m_max_size_in_bytes(max_size_in_bytes) {}
+
+//---------------------------------------------------------------------------
+//  NGraphExecutableDiskCache::Get
+//---------------------------------------------------------------------------
+NGraphExecutableDiskCache* NGraphExecutableDiskCache::Get() {
+  static NGraphExecutableDiskCache* disk_cache = []() {
+    const char* cache_dir = std::getenv("NGRAPH_TF_DISK_CACHE_DIR");
+    if (cache_dir == nullptr || string(cache_dir) == "") {
+      return static_cast<NGraphExecutableDiskCache*>(nullptr);
+    }
+    int64 max_size_in_bytes = 1LL << 30;
+    const char* max_size_env = std::getenv("NGRAPH_TF_DISK_CACHE_MAX_BYTES");
+    if (max_size_env != nullptr &&
+        !strings::safe_strto64(max_size_env, &max_size_in_bytes)) {
+      NGRAPH_VLOG(0) << "Ignoring invalid NGRAPH_TF_DISK_CACHE_MAX_BYTES: "
+                     << max_size_env;
+    }
+    Status status = Env::Default()->RecursivelyCreateDir(cache_dir);
+    if (!status.ok()) {
+      NGRAPH_VLOG(0) << "Disabling the executable disk cache, cannot create "
+                     << cache_dir << ": " << status.error_message();
+      return static_cast<NGraphExecutableDiskCache*>(nullptr);
+    }
+    NGRAPH_VLOG(1) << "Using executable disk cache " << cache_dir;
+    return new NGraphExecutableDiskCache(cache_dir, max_size_in_bytes);
+  }();
+  return disk_cache;
+}
+
+//---------------------------------------------------------------------------
+//  NGraphExecutableDiskCache::ComputeGraphHash
+//---------------------------------------------------------------------------
+Status NGraphExecutableDiskCache::ComputeGraphHash(const Graph& graph,
+                                                   uint64* graph_hash) {
+  GraphDef graph_def;
+  graph.ToGraphDef(&graph_def);
+  string serialized_graph;
+  if (!SerializeToStringDeterministic(graph_def, &serialized_graph)) {
+    return errors::Internal("Failed to serialize the graph to compute hash");
+  }
+  *graph_hash = Hash64(serialized_graph);
+  return Status::OK();
+}
+
+//---------------------------------------------------------------------------
+//  NGraphExecutableDiskCache::GetKey
+//---------------------------------------------------------------------------
+string NGraphExecutableDiskCache::GetKey(uint64 graph_hash,
+                                         const string& signature,
+                                         const string& backend_name) {
+  return strings::StrCat(strings::Hex(graph_hash, strings::kZeroPad16), "|",
+                         signature, "|", backend_name, "|", ngraph_tf_version(),
+                         "|", ngraph_lib_version());
+}
+
+string NGraphExecutableDiskCache::GetFilePath(const string& key) const {
+  return io::JoinPath(
+      m_cache_dir,
+      strings::StrCat(strings::Hex(Hash64(key), strings::kZeroPad16),
+                      kEntryExtension));
+}
+
+int64 NGraphExecutableDiskCache::GetSizeInBytes() const {
+  Env* env = Env::Default();
+  std::vector<string> children;
+  if (!env->GetChildren(m_cache_dir, &children).ok()) {
+    return 0;
+  }
+  int64 size_in_bytes = 0;
+  for (const auto& child : children) {
+    uint64 file_size;
+    if (env->GetFileSize(io::JoinPath(m_cache_dir, child), &file_size).ok()) {
+      size_in_bytes += file_size;
+    }
+  }
+  return size_in_bytes;
+}
+
+//---------------------------------------------------------------------------
+//  NGraphExecutableDiskCache::Load
+//---------------------------------------------------------------------------
+Status NGraphExecutableDiskCache::Load(
+    const string& key, ng::runtime::Backend* backend,
+    std::shared_ptr<ng::runtime::Executable>& ng_exec,
+    string& serialized_ng_function) {
+  Env* env = Env::Default();
+  string file_path = GetFilePath(key);
+  if (!env->FileExists(file_path).ok()) {
+    return errors::NotFound("No executable in the disk cache for ", key);
+  }
+  string contents;
+  TF_RETURN_IF_ERROR(ReadFileToString(env, file_path, &contents));
+
+  // The first line is the key
+  auto key_end = contents.find('\n');
+  if (key_end == string::npos || contents.compare(0, key_end, key) != 0) {
+    return errors::NotFound("Entry ", file_path, " is for a different key");
+  }
+
+  // The second line is the size of the serialized function that follows it
+  auto size_end = contents.find('\n', key_end + 1);
+  uint64 function_size;
+  if (size_end == string::npos ||
+      !strings::safe_strtou64(
+          StringPiece(contents).substr(key_end + 1, size_end - key_end - 1),
+          &function_size) ||
+      function_size > contents.size() - size_end - 1) {
+    // The entry cannot be used, remove it so that it is written again
+    env->DeleteFile(file_path).IgnoreError();
+    return errors::Internal("Malformed entry in the disk cache: ", file_path);
+  }
+  auto exec_begin = size_end + 1 + function_size;
+
+  stringstream serialized_exec;
+  serialized_exec << contents.substr(exec_begin);
+  try {
+    ng_exec = backend->load(serialized_exec);
+  } catch (const std::exception& exp) {
+    // The entry cannot be used, remove it so that it is written again
+    env->DeleteFile(file_path).IgnoreError();
+    return errors::Internal("Failed to load executable from ", file_path, ": ",
+                            exp.what());
+  }
+  if (ng_exec == nullptr) {
+    return errors::Internal("Failed to load executable from ", file_path);
+  }
+  serialized_ng_function = contents.substr(size_end + 1, function_size);
+  NGRAPH_VLOG(1) << "Loaded executable from the disk cache: " << file_path;
+  return Status::OK();
+}
+
+//---------------------------------------------------------------------------
+//  NGraphExecutableDiskCache::Store
+//---------------------------------------------------------------------------
+Status NGraphExecutableDiskCache::Store(
+    const string& key, const std::shared_ptr<ng::runtime::Executable>& ng_exec,
+    const string& serialized_ng_function) {
+  stringstream serialized_exec;
+  serialized_exec << key << '\n'
+                  << serialized_ng_function.size() << '\n'
+                  << serialized_ng_function;
+  try {
+    ng_exec->save(serialized_exec);
+  } catch (const std::exception& exp) {
+    return errors::Unimplemented("Failed to save executable: ", exp.what());
+  }
+  string contents = serialized_exec.str();
+
+  if (GetSizeInBytes() + static_cast<int64>(contents.size()) >
+      m_max_size_in_bytes) {
+    return errors::ResourceExhausted(
+        "Not writing executable of ", contents.size(),
+        " bytes, the disk cache would exceed ", m_max_size_in_bytes, " bytes");
+  }
+
+  // Write to a file that is unique to this thread and rename it, so that the
+  // readers see either a complete entry or none
+  Env* env = Env::Default();
+  string file_path = GetFilePath(key);
+  string tmp_file_path =
+      strings::StrCat(file_path, ".tmp.", env->NowMicros(), ".",
+                      std::hash<std::thread::id>()(std::this_thread::get_id()));
+  Status status = WriteStringToFile(env, tmp_file_path, contents);
+  if (status.ok()) {
+    status = env->RenameFile(tmp_file_path, file_path);
+  }
+  if (!status.ok()) {
+    env->DeleteFile(tmp_file_path).IgnoreError();
+    return status;
+  }
+  NGRAPH_VLOG(1) << "Stored executable in the disk cache: " << file_path;
+  return Status::OK();
+}
+
+}  // namespace ngraph_bridge
+
+}  // namespace tensorflow
@@ -0,0 +1,93 @@
+/*******************************************************************************
+ * Copyright 2019 Intel Corporation
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ *******************************************************************************/
+
+#ifndef NGRAPH_TF_BRIDGE_EXECUTABLE_DISK_CACHE_H_
+#define NGRAPH_TF_BRIDGE_EXECUTABLE_DISK_CACHE_H_
+#pragma once
+
+#include <memory>
+#include <string>
+
+#include "ngraph/runtime/backend.hpp"
+#include "tensorflow/core/graph/graph.h"
+#include "tensorflow/core/lib/core/status.h"
+
+namespace ng = ngraph;
+
+namespace tensorflow {
+
+namespace ngraph_bridge {
+
+// NGraphExecutableDiskCache stores compiled executables in a directory, so
+// that processes running the same graphs (e.g. after a restart, or a fleet
+// of identical servers sharing a directory) can load them instead of
+// compiling again.
+//
+// An entry is keyed by a hash of
+// 1. The GraphDef of the cluster
+// 2. The human readable signature of the inputs (NGraphSignature::ToString)
+// 3. The backend creation string
+// 4. The versions of the bridge and of nGraph
+// The file starts with the full (unhashed) description of the key, which is
+// checked when loading, so a hash collision results in a miss. The
+// serialized nGraph function is stored next to the executable, so that a hit
+// does not need to translate the graph again.
+//
+// Files are written to a temporary file first and renamed, so a reader never
+// sees a partially written entry. An entry is not written if the total size
+// of the directory would exceed the size limit.
+//
+// The cache is enabled by setting NGRAPH_TF_DISK_CACHE_DIR. The size limit is
+// set by NGRAPH_TF_DISK_CACHE_MAX_BYTES (1 GB by default).
+class NGraphExecutableDiskCache {
+ public:
+  NGraphExecutableDiskCache(const std::string& cache_dir,
+                            int64 max_size_in_bytes);
+
+  // Returns the cache configured by the env variables, nullptr if the disk
+  // cache is not enabled
+  static NGraphExecutableDiskCache* Get();
+
+  // Hash of the deterministic serialization of the graph
+  static Status ComputeGraphHash(const Graph& graph, uint64* graph_hash);
+
+  // The description of the key. The file name is a hash of this
+  static std::string GetKey(uint64 graph_hash, const std::string& signature,
+                            const std::string& backend_name);
+
+  // Returns errors::NotFound if there is no entry for the key
+  Status Load(const std::string& key, ng::runtime::Backend* backend,
+              std::shared_ptr<ng::runtime::Executable>& ng_exec,
+              std::string& serialized_ng_function);
+
+  Status Store(const std::string& key,
+               const std::shared_ptr<ng::runtime::Executable>& ng_exec,
+               const std::string& serialized_ng_function);
+
+ private:
+  std::string GetFilePath(const std::string& key) const;
+  // Total size of the entries in the directory
+  int64 GetSizeInBytes() const;
+
+  const std::string m_cache_dir;
+  const int64 m_max_size_in_bytes;
+};
+
+}  // namespace ngraph_bridge
+
+}  // namespace tensorflow
+
+#endif  // NGRAPH_TF_BRIDGE_EXECUTABLE_DISK_CACHE_H_
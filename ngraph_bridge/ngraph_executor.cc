@@ -13,7 +13,12 @@
  * See the License for the specific language governing permissions and
  * limitations under the License.
  *******************************************************************************/
+#include <algorithm>
+#include <atomic>
 #include <cstdlib>
+#include <limits>
+#include <set>
+#include <sstream>
 #include <utility>
 
 #include "tensorflow/core/common_runtime/dma_helper.h"
@@ -26,6 +31,10 @@
 #include "tensorflow/core/framework/tensor.h"
 #include "tensorflow/core/graph/graph.h"
 #include "tensorflow/core/graph/graph_constructor.h"
+#include "tensorflow/core/lib/core/threadpool.h"
+#include "tensorflow/core/lib/strings/numbers.h"
+#include "tensorflow/core/lib/strings/str_util.h"
+#include "tensorflow/core/platform/cpu_info.h"
 
 #include "ngraph/event_tracing.hpp"
 #include "ngraph/runtime/backend.hpp"
@@ -35,15 +44,20 @@
 #endif
 
 #include "logging/ngraph_log.h"
+#include "ngraph_bridge/ngraph_api.h"
 #include "ngraph_bridge/ngraph_backend_manager.h"
 #include "ngraph_bridge/ngraph_builder.h"
 #include "ngraph_bridge/ngraph_cluster_manager.h"
 #include "ngraph_bridge/ngraph_data_cache.h"
+#include "ngraph_bridge/ngraph_executable_disk_cache.h"
 #include "ngraph_bridge/ngraph_executor.h"
 #include "ngraph_bridge/ngraph_mark_for_clustering.h"
+#include "ngraph_bridge/ngraph_output_plan.h"
+#include "ngraph_bridge/ngraph_prefetch_shared_data.h"
 #include "ngraph_bridge/ngraph_timer.h"
 #include "ngraph_bridge/ngraph_utils.h"
 #include "ngraph_bridge/ngraph_var.h"
+#include "ngraph_bridge/ngraph_zero_copy.h"
 
 #if defined(NGRAPH_TF_ENABLE_VARIABLES_AND_OPTIMIZERS)
 #include "ngraph_bridge/ngraph_catalog.h"
@@ -56,20 +70,128 @@ namespace tensorflow {
 
 namespace ngraph_bridge {
 
+// Max depth of the pipeline of an executor with zero-copy outputs, unless the
+// max depth is set
+static const int ZERO_COPY_MAX_DEPTH = 16;
+
+//---------------------------------------------------------------------------
+//  Background compilation
+//---------------------------------------------------------------------------
+// Thread pool shared by all the executors for compiling in the background.
+// The number of threads is set by NGRAPH_TF_ASYNC_COMPILE_THREADS
+static thread::ThreadPool* GetAsyncCompileThreadPool() {
+  static thread::ThreadPool* thread_pool = []() {
+    int num_threads = 2;
+    const char* num_threads_env =
+        std::getenv("NGRAPH_TF_ASYNC_COMPILE_THREADS");
+    if (num_threads_env != nullptr && atoi(num_threads_env) > 0) {
+      num_threads = atoi(num_threads_env);
+    }
+    return new thread::ThreadPool(Env::Default(), "ngraph_async_compile",
+                                  num_threads);
+  }();
+  return thread_pool;
+}
+
+// The number of compilations that are queued or running is bounded by
+// NGRAPH_TF_ASYNC_COMPILE_MAX_PENDING. Once the bound is reached, misses are
+// not queued and the caller tries again at the next step
+static std::atomic<int> s_num_pending_async_compiles{0};
+
+static bool ReserveAsyncCompile() {
+  static const int max_pending = []() {
+    int max_pending = 16;
+    const char* max_pending_env =
+        std::getenv("NGRAPH_TF_ASYNC_COMPILE_MAX_PENDING");
+    if (max_pending_env != nullptr) {
+      max_pending = atoi(max_pending_env);
+    }
+    return max_pending;
+  }();
+  if (++s_num_pending_async_compiles > max_pending) {
+    s_num_pending_async_compiles--;
+    return false;
+  }
+  return true;
+}
+
+// Thread pool shared by all the executors for compiling the known signatures
+// at setup (see NGraphExecutor::WarmUp). The number of threads is set by
+// NGRAPH_TF_WARMUP_COMPILE_THREADS, by default one per core. The threads
+// translate the graphs concurrently, but the compiles on a backend are
+// serialized by its lock, so more threads mostly help graphs that are slow
+// to translate
+static thread::ThreadPool* GetWarmUpThreadPool() {
+  static thread::ThreadPool* thread_pool = []() {
+    int num_threads = port::NumSchedulableCPUs();
+    const char* num_threads_env =
+        std::getenv("NGRAPH_TF_WARMUP_COMPILE_THREADS");
+    if (num_threads_env != nullptr && atoi(num_threads_env) > 0) {
+      num_threads = atoi(num_threads_env);
+    }
+    return new thread::ThreadPool(Env::Default(), "ngraph_warmup_compile",
+                                  std::max(num_threads, 1));
+  }();
+  return thread_pool;
+}
+
+// Parses the input shapes from the human readable signature of an AOT
+// executable, "d0,d1,;d0,;/". AOT does not support static inputs, so there
+// is nothing after the "/"
+static Status ParseSignatureShapes(const string& signature_str,
+                                   std::vector<TensorShape>* input_shapes) {
+  std::vector<string> parts = str_util::Split(signature_str, '/');
+  if (parts.size() != 2 || !parts[1].empty()) {
+    return errors::InvalidArgument("Cannot parse the input shapes of ",
+                                   signature_str);
+  }
+  std::vector<string> shapes = str_util::Split(parts[0], ';');
+  // Each shape ends with ";", so the last piece is empty. There are no pieces
+  // if there are no inputs
+  if (!shapes.empty()) {
+    shapes.pop_back();
+  }
+  for (const auto& shape : shapes) {
+    TensorShape input_shape;
+    for (const auto& dim : str_util::Split(shape, ',', str_util::SkipEmpty())) {
+      int64 dim_size;
+      if (!strings::safe_strto64(dim, &dim_size) || dim_size < 0) {
+        return errors::InvalidArgument("Cannot parse the input shapes of ",
+                                       signature_str);
+      }
+      input_shape.AddDim(dim_size);
+    }
+    input_shapes->push_back(input_shape);
+  }
+  return Status::OK();
+}
+
+static std::vector<Tensor> CreateInputTensors(
+    const std::vector<DataType>& input_dtypes,
+    const std::vector<TensorShape>& input_shapes) {
+  std::vector<Tensor> tf_input_tensors;
+  for (size_t i = 0; i < input_shapes.size(); i++) {
+    tf_input_tensors.push_back(Tensor(input_dtypes[i], input_shapes[i]));
+  }
+  return tf_input_tensors;
+}
+
 //---------------------------------------------------------------------------
 //  NGraphExecutor::ctor
 //---------------------------------------------------------------------------
 NGraphExecutor::NGraphExecutor(int instance_id, int cluster_id, int graph_id,
                                unique_ptr<tensorflow::Graph>& graph,
                                const string& backend_name,
-                               const string& node_name, const int cache_depth)
+                               const string& node_name, const int cache_depth,
+                               const size_t cache_max_size_in_bytes)
     : m_instance_id(instance_id),
       m_ngraph_cluster_id(cluster_id),
       m_graph_id(graph_id),
       m_graph(std::move(graph)),
       m_op_backend_name(backend_name),
       m_node_name(node_name),
-      m_ng_data_cache(cache_depth) {
+      m_ng_data_cache(cache_depth, cache_max_size_in_bytes,
+                      &NGraphExecutor::EstimateNgItemSizeInBytes) {
   // Sanity checks
   if (m_graph == nullptr) {
     throw std::runtime_error("Graph is nullptr!");
@@ -82,10 +204,39 @@ NGraphExecutor::NGraphExecutor(int instance_id, int cluster_id, int graph_id,
   try {
     auto backend = BackendManager::GetBackend(m_op_backend_name);
     m_executable_can_create_tensor = backend->executable_can_create_tensors();
+    m_use_dynamic_batch = std::getenv("NGRAPH_TF_DYNAMIC_BATCH") != nullptr &&
+                          backend->supports_dynamic_tensors();
+    // The inputs and outputs can be shared with TF only if the backend
+    // tensors are in host memory. Prefetching expects the pipeline to
+    // alternate between two fixed slots, which would be held by TF
+    string backend_type = BackendManager::GetBackendAttributeValues(
+        m_op_backend_name)["ngraph_backend"];
+    bool host_backend = backend_type == "CPU" || backend_type == "INTERPRETER";
+    m_zero_copy_inputs =
+        std::getenv("NGRAPH_TF_ZERO_COPY_INPUTS") != nullptr && host_backend;
+    m_use_prefetch =
+        std::getenv(NGraphPrefetchSharedResouce::NGRAPH_TF_USE_PREFETCH) !=
+        nullptr;
+    m_zero_copy_outputs =
+        std::getenv("NGRAPH_TF_ZERO_COPY_OUTPUTS") != nullptr &&
+        !m_use_prefetch && host_backend;
   } catch (...) {
     throw std::runtime_error(string("Requested backend: '") +
                              m_op_backend_name + string("' not available."));
   }
+  // The pipeline depth can be set per encapsulate using the
+  // _ngraph_pipeline_depth and _ngraph_pipeline_max_depth attributes (see
+  // ParseNodeAttributes). The env variables provide the default
+  const char* pipeline_depth_env = std::getenv("NGRAPH_TF_PIPELINE_DEPTH");
+  if (pipeline_depth_env != nullptr) {
+    m_depth = atoi(pipeline_depth_env);
+  }
+  const char* pipeline_max_depth_env =
+      std::getenv("NGRAPH_TF_PIPELINE_MAX_DEPTH");
+  if (pipeline_max_depth_env != nullptr) {
+    m_max_depth = atoi(pipeline_max_depth_env);
+  }
+
   // Initialize the "m_input_is_static" vector as follows:
   // (1) create m_input_is_static with n+1 elements, where n is the max arg
   //     index
@@ -115,6 +266,7 @@ NGraphExecutor::NGraphExecutor(int instance_id, int cluster_id, int graph_id,
 
   int size = max_arg_index + 1;
   m_input_is_static.resize(size);
+  m_input_dtypes.resize(size, DT_INVALID);
 
   for (int i = 0; i < size; i++) {
     m_input_is_static[i] = false;
@@ -128,6 +280,11 @@ NGraphExecutor::NGraphExecutor(int instance_id, int cluster_id, int graph_id,
       throw std::runtime_error("error getting node attribute index");
     }
 
+    if (GetNodeAttr(node->attrs(), "T", &m_input_dtypes[index]) !=
+        Status::OK()) {
+      throw std::runtime_error("error getting node attribute T");
+    }
+
     bool is_static = false;
     for (auto edge : node->out_edges()) {
       if (edge->IsControlEdge() || !edge->dst()->IsOp()) {
@@ -147,6 +304,13 @@ NGraphExecutor::NGraphExecutor(int instance_id, int cluster_id, int graph_id,
     m_input_is_static[index] = is_static;
   }
 
+  // The values of the static inputs are folded into the translated graph, so
+  // such graphs are compiled for every signature
+  if (std::find(m_input_is_static.begin(), m_input_is_static.end(), true) !=
+      m_input_is_static.end()) {
+    m_use_dynamic_batch = false;
+  }
+
   // Some error checking before refactoring the above code
   int number_of_inputs = FindNumberOfNodes(m_graph.get(), "_Arg");
   int number_of_outputs = FindNumberOfNodes(m_graph.get(), "_Retval");
@@ -161,20 +325,73 @@ NGraphExecutor::NGraphExecutor(int instance_id, int cluster_id, int graph_id,
   m_tensor_manager = make_shared<NGraphTensorManager>(
       GetNgraphClusterName(), GetNgraphClusterId(), GetGraphId(),
       number_of_inputs, number_of_outputs);
+
+  // The TF types of the outputs, used to validate the results of the
+  // executables once when they are cached
+  m_output_dtypes.resize(number_of_outputs, DT_INVALID);
+  for (auto node : m_graph->nodes()) {
+    if (node->type_string() == "_Retval") {
+      int32 index;
+      DataType dtype;
+      if (GetNodeAttr(node->attrs(), "index", &index) != Status::OK() ||
+          GetNodeAttr(node->attrs(), "T", &dtype) != Status::OK() ||
+          index < 0 || index >= number_of_outputs) {
+        throw std::runtime_error("error getting attributes of " + node->name());
+      }
+      m_output_dtypes[index] = dtype;
+    }
+  }
+
+  if (NGraphExecutableDiskCache::Get() != nullptr) {
+    auto status =
+        NGraphExecutableDiskCache::ComputeGraphHash(*m_graph, &m_graph_hash);
+    if (status != Status::OK()) {
+      throw std::runtime_error(status.error_message());
+    }
+  }
+
+  config::RegisterCacheStats(m_node_name, m_instance_id,
+                             [this]() { return GetCacheStats(); });
 }
 
 //---------------------------------------------------------------------------
 //  NGraphExecutor::~NGraphExecutor
 //---------------------------------------------------------------------------
 NGraphExecutor::~NGraphExecutor() {
+  // Wait for the background compilations, they use this object
+  WaitForBackgroundCompiles();
+  config::UnregisterCacheStats(m_node_name, m_instance_id);
   auto backend = BackendManager::GetBackend(m_op_backend_name);
 
   auto destroy_ng_item_callback = std::bind(
       &NGraphExecutor::DestroyCallback, this, std::placeholders::_1, backend);
   m_ng_data_cache.RemoveAll(destroy_ng_item_callback);
+  // The dynamic executables are shared by the cache items, and are not
+  // removed by DestroyCallback
+  for (auto& itr : m_dynamic_execs) {
+    auto ng_exec = itr.second.first;
+    BackendManager::RemoveExecutableLock(m_op_backend_name, ng_exec.get());
+    backend->remove_compiled_function(ng_exec);
+  }
+  m_dynamic_execs.clear();
   m_tensor_manager.reset();
 }
 
+//---------------------------------------------------------------------------
+//  NGraphExecutor::EstimateNgItemSizeInBytes
+//---------------------------------------------------------------------------
+size_t NGraphExecutor::EstimateNgItemSizeInBytes(
+    const std::tuple<std::shared_ptr<ngraph::runtime::Executable>, std::string,
+                     shared_ptr<PipelinedTensorsStore>,
+                     shared_ptr<NGraphOutputPlan>>& ng_item) {
+  size_t size_in_bytes = std::get<1>(ng_item).size();
+  auto pts = std::get<2>(ng_item);
+  if (pts != nullptr) {
+    size_in_bytes += pts->get_size_in_bytes();
+  }
+  return size_in_bytes;
+}
+
 //---------------------------------------------------------------------------
 //  NGraphExecutor::ComputeSignature
 //---------------------------------------------------------------------------
@@ -182,30 +399,11 @@ Status NGraphExecutor::ComputeSignature(
     const std::vector<Tensor>& tf_input_tensors,
     std::vector<TensorShape>& input_shapes,
     std::vector<const Tensor*>& static_input_map,
-    std::stringstream& signature_ss) const {
+    NGraphSignature& signature) const {
   // Use tensorflow input tensors to get input_shapes, static_input_map
   // and compute the signature
-  for (int i = 0; i < tf_input_tensors.size(); i++) {
-    const Tensor& input_tensor = tf_input_tensors[i];
-    input_shapes.push_back(input_tensor.shape());
-    for (const auto& x : input_tensor.shape()) {
-      signature_ss << x.size << ",";
-    }
-    signature_ss << ";";
-  }
-
-  signature_ss << "/";
-
-  static_input_map.resize(tf_input_tensors.size());
-  for (int i = 0; i < tf_input_tensors.size(); i++) {
-    const Tensor& input_tensor = tf_input_tensors[i];
-    if (m_input_is_static[i]) {
-      static_input_map[i] = &input_tensor;
-      TF_RETURN_IF_ERROR(TensorToStream(signature_ss, input_tensor));
-      signature_ss << ";";
-    }
-  }
-  return Status::OK();
+  return signature.Compute(tf_input_tensors, m_input_is_static, input_shapes,
+                           static_input_map);
 }
 
 //---------------------------------------------------------------------------
@@ -215,16 +413,19 @@ Status NGraphExecutor::GetExecutableFunctionAndTensors(
     const std::vector<Tensor>& tf_input_tensors,
     std::shared_ptr<ngraph::runtime::Executable>& ng_exec,
     std::string& serialized_ng_func, shared_ptr<PipelinedTensorsStore>& pts,
-    bool& cache_hit) {
-  std::stringstream signature_ss;
+    bool& cache_hit, shared_ptr<NGraphOutputPlan>* output_plan) {
+  NGraphSignature signature;
   std::vector<TensorShape> input_shapes;
   std::vector<const Tensor*> static_input_map;
   TF_RETURN_IF_ERROR(ComputeSignature(tf_input_tensors, input_shapes,
-                                      static_input_map, signature_ss));
-  string signature;
-  signature = signature_ss.str();
+                                      static_input_map, signature));
 
-  NGRAPH_VLOG(5) << "Computed signature: " << signature;
+  // The human readable signature is only formatted when it is logged
+  if (NGRAPH_VLOG_IS_ON(5)) {
+    string signature_str;
+    TF_RETURN_IF_ERROR(signature.ToString(&signature_str));
+    NGRAPH_VLOG(5) << "Computed signature: " << signature_str;
+  }
 
   NGRAPH_VLOG(4) << "GetNgExecutable: Got backend of type: "
                  << m_op_backend_name;
@@ -251,17 +452,212 @@ Status NGraphExecutor::GetExecutableFunctionAndTensors(
                                      destroy_ng_items_callback, cache_hit);
 
   if (status_ng_item_pair.first == Status::OK()) {
-    std::tie(ng_exec, serialized_ng_func, pts) = status_ng_item_pair.second;
+    std::tie(ng_exec, serialized_ng_func, pts, std::ignore) =
+        status_ng_item_pair.second;
+    if (output_plan != nullptr) {
+      *output_plan = std::get<3>(status_ng_item_pair.second);
+    }
   }
   return status_ng_item_pair.first;
 }
 
+//---------------------------------------------------------------------------
+//  NGraphExecutor::GetExecutableFunctionAndTensorsAsync
+//---------------------------------------------------------------------------
+Status NGraphExecutor::GetExecutableFunctionAndTensorsAsync(
+    const std::vector<Tensor>& tf_input_tensors,
+    std::shared_ptr<ngraph::runtime::Executable>& ng_exec,
+    std::string& serialized_ng_func, shared_ptr<PipelinedTensorsStore>& pts,
+    bool& ready, shared_ptr<NGraphOutputPlan>* output_plan) {
+  NGraphSignature signature;
+  std::vector<TensorShape> input_shapes;
+  std::vector<const Tensor*> static_input_map;
+  TF_RETURN_IF_ERROR(ComputeSignature(tf_input_tensors, input_shapes,
+                                      static_input_map, signature));
+
+  std::tuple<std::shared_ptr<ngraph::runtime::Executable>, std::string,
+             shared_ptr<PipelinedTensorsStore>, shared_ptr<NGraphOutputPlan>>
+      ng_item;
+  ready = m_ng_data_cache.LookUp(signature, ng_item);
+  if (ready) {
+    std::tie(ng_exec, serialized_ng_func, pts, std::ignore) = ng_item;
+    if (output_plan != nullptr) {
+      *output_plan = std::get<3>(ng_item);
+    }
+    return Status::OK();
+  }
+
+  {
+    std::lock_guard<std::mutex> lock(m_async_compile_mutex);
+    auto error_itr = m_async_compile_errors.find(signature);
+    if (error_itr != m_async_compile_errors.end()) {
+      // Report the error once, the next miss compiles again
+      Status status = error_itr->second;
+      m_async_compile_errors.erase(error_itr);
+      return status;
+    }
+    if (m_async_compiles.count(signature) != 0) {
+      NGRAPH_VLOG(2) << "Still compiling in the background for " << m_node_name;
+      return Status::OK();
+    }
+    if (!ReserveAsyncCompile()) {
+      NGRAPH_VLOG(2) << "Background compilation queue is full, not compiling "
+                     << m_node_name << " in this step";
+      return Status::OK();
+    }
+    m_async_compiles.insert(signature);
+  }
+
+  NGRAPH_VLOG(2) << "Compiling in the background for " << m_node_name;
+  // The closure holds a copy of the input tensors (which shares the buffers)
+  // so that the static inputs are available after this step is done
+  GetAsyncCompileThreadPool()->Schedule([this, tf_input_tensors, signature]() {
+    std::shared_ptr<ngraph::runtime::Executable> ng_exec;
+    std::string serialized_ng_func;
+    shared_ptr<PipelinedTensorsStore> pts;
+    bool cache_hit;
+    Status status = GetExecutableFunctionAndTensors(
+        tf_input_tensors, ng_exec, serialized_ng_func, pts, cache_hit);
+    // Notified under the lock, since the executor may be destroyed as soon
+    // as the waiter sees that there is no background compilation left
+    std::lock_guard<std::mutex> lock(m_async_compile_mutex);
+    if (status != Status::OK()) {
+      m_async_compile_errors[signature] = status;
+    }
+    m_async_compiles.erase(signature);
+    s_num_pending_async_compiles--;
+    m_async_compile_cv.notify_all();
+  });
+  return Status::OK();
+}
+
+//---------------------------------------------------------------------------
+//  NGraphExecutor::GetKnownInputShapes
+//---------------------------------------------------------------------------
+Status NGraphExecutor::GetKnownInputShapes(
+    std::vector<std::vector<TensorShape>>* input_shapes_list) const {
+  input_shapes_list->clear();
+  if (std::find(m_input_is_static.begin(), m_input_is_static.end(), true) !=
+      m_input_is_static.end()) {
+    return Status::OK();
+  }
+
+  if (m_do_aot) {
+    std::set<string> signatures;
+    for (const auto& itr : m_aot_execs) {
+      signatures.insert(itr.first);
+    }
+    for (const auto& itr : m_aot_exec_refs) {
+      signatures.insert(itr.first);
+    }
+    for (const auto& signature : signatures) {
+      std::vector<TensorShape> input_shapes;
+      TF_RETURN_IF_ERROR(ParseSignatureShapes(signature, &input_shapes));
+      if (input_shapes.size() != m_input_dtypes.size()) {
+        return errors::Internal("The AOT signature ", signature, " of ",
+                                m_node_name, " has ", input_shapes.size(),
+                                " inputs, expected ", m_input_dtypes.size());
+      }
+      input_shapes_list->push_back(input_shapes);
+    }
+    return Status::OK();
+  }
+
+  std::vector<TensorShape> input_shapes(m_input_dtypes.size());
+  for (auto node : m_graph->op_nodes()) {
+    if (node->type_string() != "_Arg") {
+      continue;
+    }
+    int32 index;
+    TF_RETURN_IF_ERROR(GetNodeAttr(node->attrs(), "index", &index));
+    std::vector<PartialTensorShape> output_shapes;
+    if (GetNodeAttr(node->attrs(), "_output_shapes", &output_shapes) !=
+            Status::OK() ||
+        output_shapes.size() != 1 ||
+        !output_shapes[0].AsTensorShape(&input_shapes[index])) {
+      return Status::OK();
+    }
+    for (int dim = 0; dim < input_shapes[index].dims(); dim++) {
+      input_shapes[index].set_dim(
+          dim, m_shape_buckets.GetBucketSize(
+                   index, dim, input_shapes[index].dim_size(dim)));
+    }
+  }
+  input_shapes_list->push_back(input_shapes);
+  return Status::OK();
+}
+
+//---------------------------------------------------------------------------
+//  NGraphExecutor::WarmUp
+//---------------------------------------------------------------------------
+int NGraphExecutor::WarmUp() {
+  std::vector<std::vector<TensorShape>> input_shapes_list;
+  Status status = GetKnownInputShapes(&input_shapes_list);
+  if (status != Status::OK()) {
+    NGRAPH_VLOG(0) << "Not warming up " << m_node_name << ": "
+                   << status.error_message();
+    return 0;
+  }
+
+  int num_scheduled = 0;
+  for (const auto& input_shapes : input_shapes_list) {
+    NGraphSignature signature;
+    std::vector<TensorShape> signature_input_shapes;
+    std::vector<const Tensor*> static_input_map;
+    if (ComputeSignature(CreateInputTensors(m_input_dtypes, input_shapes),
+                         signature_input_shapes, static_input_map,
+                         signature) != Status::OK()) {
+      continue;
+    }
+    {
+      std::lock_guard<std::mutex> lock(m_async_compile_mutex);
+      if (!m_async_compiles.insert(signature).second) {
+        continue;
+      }
+    }
+    GetWarmUpThreadPool()->Schedule([this, input_shapes, signature]() {
+      // The input tensors are only created when the compilation runs, since
+      // there may be many of them queued
+      std::shared_ptr<ngraph::runtime::Executable> ng_exec;
+      std::string serialized_ng_func;
+      shared_ptr<PipelinedTensorsStore> pts;
+      bool cache_hit;
+      Status status = GetExecutableFunctionAndTensors(
+          CreateInputTensors(m_input_dtypes, input_shapes), ng_exec,
+          serialized_ng_func, pts, cache_hit);
+      if (status != Status::OK()) {
+        // The first call with this signature compiles again and reports
+        // the error
+        NGRAPH_VLOG(0) << "Could not warm up " << m_node_name << ": "
+                       << status.error_message();
+      }
+      // Notified under the lock, see GetExecutableFunctionAndTensorsAsync
+      std::lock_guard<std::mutex> lock(m_async_compile_mutex);
+      m_async_compiles.erase(signature);
+      m_async_compile_cv.notify_all();
+    });
+    num_scheduled++;
+  }
+  NGRAPH_VLOG(1) << "Warming up " << m_node_name << " for " << num_scheduled
+                 << " signatures";
+  return num_scheduled;
+}
+
+//---------------------------------------------------------------------------
+//  NGraphExecutor::WaitForBackgroundCompiles
+//---------------------------------------------------------------------------
+void NGraphExecutor::WaitForBackgroundCompiles() {
+  std::unique_lock<std::mutex> lock(m_async_compile_mutex);
+  m_async_compile_cv.wait(lock, [this] { return m_async_compiles.empty(); });
+}
+
 //---------------------------------------------------------------------------
 //  NGraphExecutor::CallbackCreateItem
 //---------------------------------------------------------------------------
 std::pair<Status, std::tuple<std::shared_ptr<ngraph::runtime::Executable>,
-                             std::string, shared_ptr<PipelinedTensorsStore>>>
-NGraphExecutor::CreateCallback(const std::string signature,
+                             std::string, shared_ptr<PipelinedTensorsStore>,
+                             shared_ptr<NGraphOutputPlan>>>
+NGraphExecutor::CreateCallback(const NGraphSignature signature,
                                std::vector<TensorShape> input_shapes,
                                std::vector<const Tensor*> static_input_map,
                                ng::runtime::Backend*& op_backend) {
@@ -269,27 +665,74 @@ NGraphExecutor::CreateCallback(const std::string signature,
   std::shared_ptr<ngraph::runtime::Executable> ng_exec;
   std::shared_ptr<ngraph::Function> ng_function;
   shared_ptr<PipelinedTensorsStore> pts;
+  shared_ptr<NGraphOutputPlan> output_plan;
   NGRAPH_VLOG(1) << "Compilation cache miss: " << m_node_name;
+
+  // AOT executables and the entries of the disk cache are keyed by the human
+  // readable signature
+  string signature_str;
+  if (m_do_aot || NGraphExecutableDiskCache::Get() != nullptr) {
+    auto status = signature.ToString(&signature_str);
+    if (status != Status::OK()) {
+      return std::make_pair(status, std::make_tuple(ng_exec, serialized_ng_func,
+                                                    pts, output_plan));
+    }
+  }
+
+  if (m_use_dynamic_batch && !m_do_aot) {
+    ng_exec =
+        GetDynamicExecutable(input_shapes, op_backend, serialized_ng_func);
+    if (ng_exec != nullptr) {
+      auto status_ng_pts_pair =
+          InitializeDynamicIOTensorPipeline(ng_exec, input_shapes, op_backend);
+      pts = status_ng_pts_pair.second;
+      Status status = status_ng_pts_pair.first;
+      if (status == Status::OK()) {
+        status = NGraphOutputPlan::Create(ng_exec, m_output_dtypes,
+                                          m_tensor_manager, &output_plan);
+      }
+      return std::make_pair(status, std::make_tuple(ng_exec, serialized_ng_func,
+                                                    pts, output_plan));
+    }
+  }
+
+  // An entry of the disk cache holds the serialized function next to the
+  // executable, so the graph is only translated on a miss
   if (!m_do_aot) {
+    ng_exec = LoadFromDiskCache(signature_str, op_backend, serialized_ng_func);
+  }
+
+  if (m_do_aot) {
+    auto itr = m_aot_functions.find(signature_str);
+    auto itr_ref = m_aot_function_refs.find(signature_str);
+    if (itr != m_aot_functions.end()) {
+      serialized_ng_func = itr->second;
+    } else if (itr_ref != m_aot_function_refs.end()) {
+      StringPiece blob;
+      auto status = m_aot_artifact->GetBlob(itr_ref->second, &blob);
+      if (status != Status::OK()) {
+        return std::make_pair(
+            status,
+            std::make_tuple(ng_exec, serialized_ng_func, pts, output_plan));
+      }
+      serialized_ng_func = string(blob);
+    } else {
+      return std::make_pair(
+          errors::Internal(
+              "Expected to find AOT precompiled ng function of signature: ",
+              signature_str),
+          std::make_tuple(ng_exec, serialized_ng_func, pts, output_plan));
+    }
+  } else if (ng_exec == nullptr) {
     auto status = Builder::TranslateGraph(input_shapes, static_input_map,
                                           m_graph.get(), ng_function);
     if (status != Status::OK()) {
-      return std::make_pair(status,
-                            std::make_tuple(ng_exec, serialized_ng_func, pts));
+      return std::make_pair(status, std::make_tuple(ng_exec, serialized_ng_func,
+                                                    pts, output_plan));
     }
     ng_function->set_friendly_name(m_node_name);
     int json_indentation = 4;
     serialized_ng_func = ngraph::serialize(ng_function, json_indentation);
-  } else {
-    auto itr = m_aot_functions.find(signature);
-    if (itr == m_aot_functions.end()) {
-      return std::make_pair(
-          errors::Internal(
-              "Expected to find AOT precompiled ng function of signature: ",
-              signature),
-          std::make_tuple(ng_exec, serialized_ng_func, pts));
-    }
-    serialized_ng_func = itr->second;
   }
 
   // Serialize to nGraph if needed
@@ -301,21 +744,24 @@ NGraphExecutor::CreateCallback(const std::string signature,
         "tf_function_" + m_node_name + "_" + to_string(rank_id) + ".json",
         serialized_ng_func);
     if (status != Status::OK()) {
-      return std::make_pair(status,
-                            std::make_tuple(ng_exec, serialized_ng_func, pts));
+      return std::make_pair(status, std::make_tuple(ng_exec, serialized_ng_func,
+                                                    pts, output_plan));
     }
 #else
     auto status_ser = StringToFile("tf_function_" + m_node_name + ".json",
                                    serialized_ng_func);
     if (status_ser != Status::OK()) {
-      return std::make_pair(status_ser,
-                            std::make_tuple(ng_exec, serialized_ng_func, pts));
+      return std::make_pair(
+          status_ser,
+          std::make_tuple(ng_exec, serialized_ng_func, pts, output_plan));
     }
 #endif
   }
   // Get NgExecutable
   auto status_ng_exec_pair =
-      GetNgExecutable(signature, ng_function, op_backend);
+      ng_exec != nullptr ? std::make_pair(Status::OK(), ng_exec)
+                         : GetNgExecutable(signature_str, ng_function,
+                                           serialized_ng_func, op_backend);
   // Create PipelinedTensorStore
   if (status_ng_exec_pair.first == Status::OK()) {
     ng_exec = status_ng_exec_pair.second;
@@ -323,8 +769,13 @@ NGraphExecutor::CreateCallback(const std::string signature,
         ng_exec, m_tensor_manager->GetPipelinedInputIndexes(),
         m_tensor_manager->GetPipelinedOutputIndexes());
     pts = status_ng_pts_pair.second;
-    return std::make_pair(status_ng_pts_pair.first,
-                          std::make_tuple(ng_exec, serialized_ng_func, pts));
+    Status status = status_ng_pts_pair.first;
+    if (status == Status::OK()) {
+      status = NGraphOutputPlan::Create(ng_exec, m_output_dtypes,
+                                        m_tensor_manager, &output_plan);
+    }
+    return std::make_pair(
+        status, std::make_tuple(ng_exec, serialized_ng_func, pts, output_plan));
   } else {
     Status st = StringToFile("tf_function_error_" + m_node_name + ".json",
                              serialized_ng_func);
@@ -333,8 +784,9 @@ NGraphExecutor::CreateCallback(const std::string signature,
         status_ng_exec_pair.first.error_message() +
         (st.ok() ? "" : (" Also error in dumping serialized function: " +
                          st.error_message()));
-    return std::make_pair(errors::Internal(status_string),
-                          std::make_tuple(ng_exec, serialized_ng_func, pts));
+    return std::make_pair(
+        errors::Internal(status_string),
+        std::make_tuple(ng_exec, serialized_ng_func, pts, output_plan));
   }
 }
 
@@ -342,8 +794,9 @@ NGraphExecutor::CreateCallback(const std::string signature,
 //  NGraphExecutor::GetNgExecutable
 //---------------------------------------------------------------------------
 std::pair<Status, std::shared_ptr<ngraph::runtime::Executable>>
-NGraphExecutor::GetNgExecutable(std::string signature,
+NGraphExecutor::GetNgExecutable(const std::string& signature,
                                 std::shared_ptr<ngraph::Function>& ng_function,
+                                const std::string& serialized_ng_function,
                                 ng::runtime::Backend*& op_backend) {
   std::shared_ptr<ngraph::runtime::Executable> ng_exec;
 
@@ -351,21 +804,41 @@ NGraphExecutor::GetNgExecutable(std::string signature,
   BackendManager::LockBackend(m_op_backend_name);
   try {
     if (m_do_aot) {
+      // The executable is read in place, from the attribute or from the
+      // mapped artifact
+      StringPiece serialized_exec;
       auto itr = m_aot_execs.find(signature);
-      if (itr == m_aot_execs.end()) {
+      auto itr_ref = m_aot_exec_refs.find(signature);
+      Status status;
+      if (itr != m_aot_execs.end()) {
+        serialized_exec = itr->second;
+      } else if (itr_ref != m_aot_exec_refs.end()) {
+        status = m_aot_artifact->GetBlob(itr_ref->second, &serialized_exec);
+      } else {
+        status = errors::Internal(
+            "Requested AOT, but could not find string with the "
+            "signature: ",
+            signature);
+      }
+      if (!status.ok()) {
         BackendManager::UnlockBackend(m_op_backend_name);
-        return std::make_pair(
-            errors::Internal(
-                "Requested AOT, but could not find string with the "
-                "signature: ",
-                signature),
-            nullptr);
+        return std::make_pair(status, nullptr);
       }
-      stringstream serialized_exec_read;
-      serialized_exec_read << (itr->second);
+      NGraphMemoryStreamBuf serialized_exec_buf(serialized_exec);
+      std::istream serialized_exec_read(&serialized_exec_buf);
       ng_exec = op_backend->load(serialized_exec_read);
     } else {
       ng_exec = op_backend->compile(ng_function);
+      NGraphExecutableDiskCache* disk_cache = NGraphExecutableDiskCache::Get();
+      if (disk_cache != nullptr) {
+        string disk_cache_key = NGraphExecutableDiskCache::GetKey(
+            m_graph_hash, signature, m_op_backend_name);
+        Status status =
+            disk_cache->Store(disk_cache_key, ng_exec, serialized_ng_function);
+        if (!status.ok()) {
+          NGRAPH_VLOG(1) << "Disk cache: " << status.error_message();
+        }
+      }
     }
   } catch (const std::exception& exp) {
     BackendManager::UnlockBackend(m_op_backend_name);
@@ -384,17 +857,127 @@ NGraphExecutor::GetNgExecutable(std::string signature,
   return std::make_pair(Status::OK(), ng_exec);
 }
 
+//---------------------------------------------------------------------------
+//  NGraphExecutor::LoadFromDiskCache
+//---------------------------------------------------------------------------
+std::shared_ptr<ngraph::runtime::Executable> NGraphExecutor::LoadFromDiskCache(
+    const std::string& signature, ng::runtime::Backend*& op_backend,
+    std::string& serialized_ng_function) {
+  std::shared_ptr<ngraph::runtime::Executable> ng_exec;
+  NGraphExecutableDiskCache* disk_cache = NGraphExecutableDiskCache::Get();
+  if (disk_cache == nullptr) {
+    return ng_exec;
+  }
+  ngraph::Event event_load("Load nGraph", m_node_name, "");
+  BackendManager::LockBackend(m_op_backend_name);
+  string disk_cache_key = NGraphExecutableDiskCache::GetKey(
+      m_graph_hash, signature, m_op_backend_name);
+  Status status = disk_cache->Load(disk_cache_key, op_backend, ng_exec,
+                                   serialized_ng_function);
+  BackendManager::UnlockBackend(m_op_backend_name);
+  event_load.Stop();
+  ngraph::Event::write_trace(event_load);
+  if (!status.ok()) {
+    if (!errors::IsNotFound(status)) {
+      NGRAPH_VLOG(1) << "Disk cache: " << status.error_message();
+    }
+    return nullptr;
+  }
+  return ng_exec;
+}
+
+//---------------------------------------------------------------------------
+//  NGraphExecutor::GetDynamicExecutable
+//---------------------------------------------------------------------------
+std::shared_ptr<ngraph::runtime::Executable>
+NGraphExecutor::GetDynamicExecutable(
+    const std::vector<TensorShape>& input_shapes,
+    ng::runtime::Backend*& op_backend, std::string& serialized_ng_function) {
+  // Only the leading (batch) dimension is unknown, the graphs usually need
+  // the rank and the other dimensions to be translated
+  std::vector<ng::PartialShape> partial_shapes;
+  std::stringstream key_ss;
+  for (const auto& input_shape : input_shapes) {
+    std::vector<ng::Dimension> dims;
+    for (int i = 0; i < input_shape.dims(); i++) {
+      dims.push_back(i == 0 ? ng::Dimension::dynamic()
+                            : ng::Dimension(input_shape.dim_size(i)));
+    }
+    partial_shapes.push_back(ng::PartialShape(dims));
+    key_ss << partial_shapes.back() << ";";
+  }
+  string key = key_ss.str();
+
+  std::lock_guard<std::mutex> lock(m_dynamic_execs_mutex);
+  auto itr = m_dynamic_execs.find(key);
+  if (itr != m_dynamic_execs.end()) {
+    serialized_ng_function = itr->second.second;
+    return itr->second.first;
+  }
+  if (m_dynamic_failures.find(key) != m_dynamic_failures.end()) {
+    return nullptr;
+  }
+
+  std::shared_ptr<ngraph::Function> ng_function;
+  std::vector<const Tensor*> static_input_map(input_shapes.size(), nullptr);
+  auto status = Builder::TranslateGraph(partial_shapes, static_input_map,
+                                        m_graph.get(), ng_function);
+  std::shared_ptr<ngraph::runtime::Executable> ng_exec;
+  if (status == Status::OK()) {
+    ng_function->set_friendly_name(m_node_name);
+    ngraph::Event event_compile("Compile nGraph dynamic", m_node_name, "");
+    BackendManager::LockBackend(m_op_backend_name);
+    try {
+      ng_exec = op_backend->compile(ng_function);
+    } catch (const std::exception& exp) {
+      status = errors::Internal("Caught exception while compiling op_backend: ",
+                                exp.what());
+    } catch (...) {
+      status = errors::Internal("Error in compiling op_backend.");
+    }
+    BackendManager::UnlockBackend(m_op_backend_name);
+    event_compile.Stop();
+    ngraph::Event::write_trace(event_compile);
+  }
+  if (status != Status::OK()) {
+    NGRAPH_VLOG(1) << "Cannot compile " << m_node_name
+                   << " for the input shapes " << key << ": "
+                   << status.error_message();
+    m_dynamic_failures.insert(key);
+    return nullptr;
+  }
+
+  int json_indentation = 4;
+  serialized_ng_function = ngraph::serialize(ng_function, json_indentation);
+  m_dynamic_execs[key] = std::make_pair(ng_exec, serialized_ng_function);
+  NGRAPH_VLOG(1) << "Compiled " << m_node_name << " for the input shapes "
+                 << key;
+  return ng_exec;
+}
+
 //---------------------------------------------------------------------------
 //  NGraphExecutor::DestroyCallback
 //---------------------------------------------------------------------------
 void NGraphExecutor::DestroyCallback(
     std::tuple<std::shared_ptr<ngraph::runtime::Executable>, std::string,
-               shared_ptr<PipelinedTensorsStore>>
+               shared_ptr<PipelinedTensorsStore>, shared_ptr<NGraphOutputPlan>>
         evicted_ng_item,
     ng::runtime::Backend*& op_backend) {
   std::shared_ptr<ngraph::runtime::Executable> evicted_ng_exec;
-  std::tie(evicted_ng_exec, std::ignore, std::ignore) = evicted_ng_item;
+  std::tie(evicted_ng_exec, std::ignore, std::ignore, std::ignore) =
+      evicted_ng_item;
+  {
+    // The dynamic executables are removed in the destructor
+    std::lock_guard<std::mutex> lock(m_dynamic_execs_mutex);
+    for (auto& itr : m_dynamic_execs) {
+      if (itr.second.first == evicted_ng_exec) {
+        return;
+      }
+    }
+  }
   // Call delete function here for the erased func
+  BackendManager::RemoveExecutableLock(m_op_backend_name,
+                                       evicted_ng_exec.get());
   op_backend->remove_compiled_function(evicted_ng_exec);
   evicted_ng_exec.reset();
 }
@@ -420,8 +1003,11 @@ Status NGraphExecutor::ParseNodeAttributes(
       auto attr_value = itx.second.s();
       if (attr_name.find("_ngraph_aot_") != std::string::npos) {
         // The string is in the format: _ngraph_aot_ngexec_signature or
-        // _ngraph_aot_ngfunction_signature or _ngraph_aot_requested
-        // TODO: do not pass these 3 attributes to set_config of backend
+        // _ngraph_aot_ngfunction_signature or _ngraph_aot_requested, or
+        // _ngraph_aot_artifact, _ngraph_aot_ngexecref_signature and
+        // _ngraph_aot_ngfunctionref_signature if the executables are stored
+        // in an AOT artifact
+        // TODO: do not pass these attributes to set_config of backend
         if (attr_name.find("_ngraph_aot_ngexec_") != std::string::npos) {
           m_aot_execs[ng::split(attr_name, '_')[4]] = attr_value;
         } else if (attr_name.find("_ngraph_aot_ngfunction_") !=
@@ -430,6 +1016,17 @@ Status NGraphExecutor::ParseNodeAttributes(
           // No need to save or do anything with _ngraph_aot_ngfunction_. They
           // are there for debugging only
           m_aot_functions[ng::split(attr_name, '_')[4]] = attr_value;
+        } else if (attr_name.find("_ngraph_aot_ngexecref_") !=
+                   std::string::npos) {
+          m_aot_exec_refs[ng::split(attr_name, '_')[4]] = attr_value;
+        } else if (attr_name.find("_ngraph_aot_ngfunctionref_") !=
+                   std::string::npos) {
+          m_aot_function_refs[ng::split(attr_name, '_')[4]] = attr_value;
+        } else if (attr_name == "_ngraph_aot_artifact") {
+          // Mapping the artifact is cheap, the pages are read when an
+          // executable is loaded
+          TF_RETURN_IF_ERROR(
+              NGraphAOTArtifact::Open(attr_value, &m_aot_artifact));
         } else if (attr_name.find("_ngraph_aot_requested") !=
                    std::string::npos) {
           m_do_aot = (attr_value == "1");
@@ -440,11 +1037,32 @@ Status NGraphExecutor::ParseNodeAttributes(
         } else {
           return errors::Internal(
               "Ngraph attribues beginning with _ngraph_aot_ "
-              "must be _ngraph_aot_ngexec_<signature> or "
-              "_ngraph_aot_ngfunction_<signature>. But got "
+              "must be _ngraph_aot_ngexec_<signature>, "
+              "_ngraph_aot_ngfunction_<signature>, "
+              "_ngraph_aot_ngexecref_<signature>, "
+              "_ngraph_aot_ngfunctionref_<signature> or "
+              "_ngraph_aot_artifact. But got "
               "attribute named: ",
               itx.first);
         }
+      } else if (attr_name == "_ngraph_pipeline_depth" ||
+                 attr_name == "_ngraph_pipeline_max_depth") {
+        // Used by the bridge to size the PipelinedTensorsStore, not passed
+        // to the backend
+        int32 depth;
+        if (!strings::safe_strto32(attr_value, &depth)) {
+          return errors::Internal("Expected an integer for ", attr_name,
+                                  " but got ", attr_value);
+        }
+        if (attr_name == "_ngraph_pipeline_depth") {
+          m_depth = depth;
+        } else {
+          m_max_depth = depth;
+        }
+      } else if (attr_name == "_ngraph_shape_buckets") {
+        // Used by the bridge to pad the inputs, not passed to the backend
+        TF_RETURN_IF_ERROR(
+            NGraphShapeBuckets::Parse(attr_value, &m_shape_buckets));
       } else {
         NGRAPH_VLOG(4) << "Attribute: " << attr_name.substr(strlen("_ngraph_"))
                        << " Value: " << attr_value;
@@ -453,11 +1071,47 @@ Status NGraphExecutor::ParseNodeAttributes(
       }
     }
   }
-  if (((m_aot_functions.size() > 0) || (m_aot_execs.size() > 0)) && !m_do_aot) {
+  if ((m_aot_functions.size() > 0 || m_aot_execs.size() > 0 ||
+       m_aot_function_refs.size() > 0 || m_aot_exec_refs.size() > 0) &&
+      !m_do_aot) {
     return errors::Internal("The encapsulate ", m_node_name,
                             " has ngraph functions or executables embedded "
                             "in it, even though AOT was not requested.");
   }
+  if ((m_aot_function_refs.size() > 0 || m_aot_exec_refs.size() > 0) &&
+      m_aot_artifact == nullptr) {
+    return errors::Internal("The encapsulate ", m_node_name,
+                            " references AOT executables, but has no "
+                            "_ngraph_aot_artifact attribute");
+  }
+  if (m_depth < 1) {
+    return errors::Internal("Pipeline depth for ", m_node_name,
+                            " must be at least 1, but got ", m_depth);
+  }
+  if (m_max_depth != 0 && m_max_depth < m_depth) {
+    return errors::Internal("Pipeline max depth for ", m_node_name, " is ",
+                            m_max_depth, ", which is less than the depth ",
+                            m_depth);
+  }
+  NGRAPH_VLOG(3) << "Pipeline depth for " << m_node_name << ": " << m_depth
+                 << " max depth: " << m_max_depth;
+  if (m_shape_buckets.IsEnabled()) {
+    TF_RETURN_IF_ERROR(m_shape_buckets.Validate(
+        m_input_is_static, m_tensor_manager->GetNumberOfOutputs()));
+    // Only the outputs that are copied to TF tensors can be sliced
+    const vector<int>& output_indexes_to_be_copied =
+        m_tensor_manager->GetOutputIndexesThatNeedCopy();
+    for (int i = 0; i < m_tensor_manager->GetNumberOfOutputs(); i++) {
+      if (m_shape_buckets.HasOutputRule(i) &&
+          std::find(output_indexes_to_be_copied.begin(),
+                    output_indexes_to_be_copied.end(),
+                    i) == output_indexes_to_be_copied.end()) {
+        return errors::InvalidArgument("Shape bucket rule for output ", i,
+                                       " of ", m_node_name,
+                                       ", which is not copied to TF");
+      }
+    }
+  }
   return Status::OK();
 }
 
@@ -486,6 +1140,26 @@ NGraphExecutor::InitializeIOTensorPipeline(
                  << num_pipelined_inputs
                  << " No. of Pipelined Pipelined Outputs: "
                  << num_pipelined_outputs;
+  // In the zero-copy mode the output tensors are created over host buffers
+  // that TF tensors can use
+  ng::runtime::Backend* op_backend =
+      m_zero_copy_outputs ? BackendManager::GetBackend(m_op_backend_name)
+                          : nullptr;
+  auto create_output_tensors = [ng_exec, op_backend](
+                                   int output_index,
+                                   int depth) -> PipelinedTensorVector {
+    if (op_backend == nullptr) {
+      return ng_exec->create_output_tensor(output_index, depth);
+    }
+    auto ng_result = ng_exec->get_results()[output_index];
+    PipelinedTensorVector tensors;
+    for (int i = 0; i < depth; i++) {
+      tensors.push_back(CreateHostTensor(
+          op_backend, ng_result->get_element_type(), ng_result->get_shape()));
+    }
+    return tensors;
+  };
+
   PipelinedTensorMatrix pipelined_input_tensors(m_depth);
   PipelinedTensorMatrix pipelined_output_tensors(m_depth);
   PipelinedTensorVector temp;
@@ -498,14 +1172,115 @@ NGraphExecutor::InitializeIOTensorPipeline(
   }
   for (size_t i = 0; i < num_pipelined_outputs; i++) {
     int output_index = pipelined_output_indexes[i];
-    temp = ng_exec->create_output_tensor(output_index, m_depth);
+    temp = create_output_tensors(output_index, m_depth);
     for (size_t j = 0; j < temp.size(); j++) {
       pipelined_output_tensors[j].push_back(temp[j]);
     }
   }
 
-  shared_ptr<PipelinedTensorsStore> pts(new PipelinedTensorsStore(
-      pipelined_input_tensors, pipelined_output_tensors));
+  shared_ptr<PipelinedTensorsStore> pts;
+  if (IsPipelineDepthAdaptive() || m_zero_copy_outputs || m_use_prefetch) {
+    // Creates one more group of tensors when the store runs out of them
+    auto creator = [ng_exec, pipelined_input_indexes, pipelined_output_indexes,
+                    create_output_tensors]() {
+      PipelinedTensorVector inputs, outputs;
+      for (auto input_index : pipelined_input_indexes) {
+        inputs.push_back(ng_exec->create_input_tensor(input_index, 1)[0]);
+      }
+      for (auto output_index : pipelined_output_indexes) {
+        outputs.push_back(create_output_tensors(output_index, 1)[0]);
+      }
+      return make_pair(inputs, outputs);
+    };
+    // The slots used by the zero-copy outputs are held till TF releases the
+    // outputs, which may be much later (or never, e.g. if TF keeps the
+    // buffer in a variable). So the pipeline grows instead of waiting, till
+    // the max depth or ZERO_COPY_MAX_DEPTH. Beyond that the outputs are
+    // copied (see PipelinedTensorsStore::try_hold).
+    // With prefetching the pipeline grows to hold the tensors that the
+    // prefetcher fills ahead of the execution, as many as the buffer size of
+    // the prefetch dataset, unless the max depth is set
+    size_t max_depth = m_max_depth;
+    if (m_zero_copy_outputs && !IsPipelineDepthAdaptive()) {
+      max_depth = std::max(m_depth, ZERO_COPY_MAX_DEPTH);
+    } else if (m_use_prefetch && !IsPipelineDepthAdaptive()) {
+      max_depth = std::numeric_limits<int>::max();
+    }
+    pts.reset(new PipelinedTensorsStore(
+        pipelined_input_tensors, pipelined_output_tensors, max_depth, creator));
+  } else {
+    pts.reset(new PipelinedTensorsStore(pipelined_input_tensors,
+                                        pipelined_output_tensors));
+  }
+  return std::make_pair(Status::OK(), pts);
+}
+
+//---------------------------------------------------------------------------
+//  InitializeDynamicIOTensorPipeline
+//---------------------------------------------------------------------------
+
+std::pair<Status, shared_ptr<PipelinedTensorsStore>>
+NGraphExecutor::InitializeDynamicIOTensorPipeline(
+    std::shared_ptr<ngraph::runtime::Executable> ng_exec,
+    const std::vector<TensorShape>& input_shapes,
+    ng::runtime::Backend* op_backend) {
+  const vector<int>& pipelined_input_indexes =
+      m_tensor_manager->GetPipelinedInputIndexes();
+  const vector<int>& pipelined_output_indexes =
+      m_tensor_manager->GetPipelinedOutputIndexes();
+
+  std::vector<ng::Shape> ng_input_shapes;
+  for (const auto& input_shape : input_shapes) {
+    ng::Shape ng_shape;
+    auto status = TFTensorShapeToNGraphShape(input_shape, &ng_shape);
+    if (status != Status::OK()) {
+      return std::make_pair(status, nullptr);
+    }
+    ng_input_shapes.push_back(ng_shape);
+  }
+
+  // Creates one group of tensors, the output tensors get their shapes when
+  // the executable is called
+  auto creator = [ng_exec, ng_input_shapes, op_backend, pipelined_input_indexes,
+                  pipelined_output_indexes]() {
+    PipelinedTensorVector inputs, outputs;
+    for (auto input_index : pipelined_input_indexes) {
+      auto ng_param = ng_exec->get_parameters()[input_index];
+      inputs.push_back(op_backend->create_tensor(ng_param->get_element_type(),
+                                                 ng_input_shapes[input_index]));
+    }
+    for (auto output_index : pipelined_output_indexes) {
+      auto ng_result = ng_exec->get_results()[output_index];
+      outputs.push_back(op_backend->create_dynamic_tensor(
+          ng_result->get_element_type(),
+          ng_result->get_output_partial_shape(0)));
+    }
+    return make_pair(inputs, outputs);
+  };
+
+  PipelinedTensorMatrix pipelined_input_tensors;
+  PipelinedTensorMatrix pipelined_output_tensors;
+  shared_ptr<PipelinedTensorsStore> pts;
+  try {
+    for (int i = 0; i < m_depth; i++) {
+      auto group = creator();
+      pipelined_input_tensors.push_back(group.first);
+      pipelined_output_tensors.push_back(group.second);
+    }
+    if (IsPipelineDepthAdaptive()) {
+      pts.reset(new PipelinedTensorsStore(pipelined_input_tensors,
+                                          pipelined_output_tensors, m_max_depth,
+                                          creator));
+    } else {
+      pts.reset(new PipelinedTensorsStore(pipelined_input_tensors,
+                                          pipelined_output_tensors));
+    }
+  } catch (const std::exception& exp) {
+    return std::make_pair(
+        errors::Internal("Caught exception while creating dynamic tensors: ",
+                         exp.what()),
+        nullptr);
+  }
   return std::make_pair(Status::OK(), pts);
 }
 
@@ -18,8 +18,11 @@
 #define NGRAPH_EXECUTOR_H_
 #pragma once
 
+#include <condition_variable>
 #include <mutex>
 #include <ostream>
+#include <unordered_map>
+#include <unordered_set>
 #include <vector>
 
 #include "tensorflow/core/framework/tensor_shape.h"
@@ -28,9 +31,13 @@
 #include "ngraph/ngraph.hpp"
 
 #include "logging/ngraph_log.h"
+#include "ngraph_bridge/ngraph_aot_artifact.h"
 #include "ngraph_bridge/ngraph_data_cache.h"
 #include "ngraph_bridge/ngraph_freshness_tracker.h"
+#include "ngraph_bridge/ngraph_output_plan.h"
 #include "ngraph_bridge/ngraph_pipelined_tensors.h"
+#include "ngraph_bridge/ngraph_shape_buckets.h"
+#include "ngraph_bridge/ngraph_signature.h"
 #include "ngraph_bridge/ngraph_tensor_manager.h"
 
 namespace tensorflow {
@@ -43,18 +50,58 @@ class NGraphExecutor {
   explicit NGraphExecutor(int instance_id, int cluster_id, int graph_id,
                           unique_ptr<tensorflow::Graph>& graph,
                           const string& backend_name, const string& node_name,
-                          const int cache_depth);
+                          const int cache_depth,
+                          const size_t cache_max_size_in_bytes = 0);
 
   ~NGraphExecutor();
 
   // Calls Compute Signature and gets ngraph executable
   // Update the cache and if called again with the same input shapes,
-  // return fromm the cache
+  // return fromm the cache. If output_plan is set, it gets the plan of the
+  // outputs of the executable (see ngraph_output_plan.h)
   Status GetExecutableFunctionAndTensors(
       const std::vector<Tensor>& tf_input_tensors,
       std::shared_ptr<ngraph::runtime::Executable>& ng_exec,
       std::string& serialized_ng_function,
-      shared_ptr<PipelinedTensorsStore>& pts, bool& cache_hit);
+      shared_ptr<PipelinedTensorsStore>& pts, bool& cache_hit,
+      shared_ptr<NGraphOutputPlan>* output_plan = nullptr);
+
+  // Same as GetExecutableFunctionAndTensors, but on a cache miss the
+  // executable is compiled on a background thread pool and ready is set to
+  // false. The caller is expected to run the computation some other way (e.g.
+  // using the TF graph of the cluster) till the executable is ready. If the
+  // background compilation fails, the error is returned by the next call
+  // with the same signature
+  Status GetExecutableFunctionAndTensorsAsync(
+      const std::vector<Tensor>& tf_input_tensors,
+      std::shared_ptr<ngraph::runtime::Executable>& ng_exec,
+      std::string& serialized_ng_function,
+      shared_ptr<PipelinedTensorsStore>& pts, bool& ready,
+      shared_ptr<NGraphOutputPlan>* output_plan = nullptr);
+
+  // Input shapes of the signatures known before the first call: the
+  // signatures of the AOT executables, or else the shapes of the _Arg nodes
+  // (their _output_shapes, padded to the shape buckets) if all are fully
+  // defined. Nothing is known if an input is static, since its value is not
+  // known
+  Status GetKnownInputShapes(
+      std::vector<std::vector<TensorShape>>* input_shapes_list) const;
+
+  // Compiles the executables of the known signatures on a background thread
+  // pool shared by all the executors, so that they are cached before the
+  // first call. A call that misses on a signature being compiled waits for
+  // it. Returns the number of signatures scheduled.
+  // The compiles still take BackendManager::LockBackend, so with several
+  // encapsulates on one backend only the graph translations (and the disk
+  // cache lookups) overlap, the compiles run one at a time
+  int WarmUp();
+
+  // Waits for the background compilations of WarmUp and
+  // GetExecutableFunctionAndTensorsAsync
+  void WaitForBackgroundCompiles();
+
+  // The encapsulated TF graph
+  const Graph* GetGraph() { return m_graph.get(); }
 
   // TODO Rename this to DecodeAttributes
   Status ParseNodeAttributes(
@@ -65,8 +112,10 @@ class NGraphExecutor {
   // Creates ng_executable, serialized_ng_function, and initializes I/O
   // TensorPipeline
   std::pair<Status, std::tuple<std::shared_ptr<ngraph::runtime::Executable>,
-                               std::string, shared_ptr<PipelinedTensorsStore>>>
-  CreateCallback(std::string signature, std::vector<TensorShape> input_shapes,
+                               std::string, shared_ptr<PipelinedTensorsStore>,
+                               shared_ptr<NGraphOutputPlan>>>
+  CreateCallback(NGraphSignature signature,
+                 std::vector<TensorShape> input_shapes,
                  std::vector<const Tensor*> static_input_map,
                  ng::runtime::Backend*& op_backend);
 
@@ -74,7 +123,8 @@ class NGraphExecutor {
 
   void DestroyCallback(
       std::tuple<std::shared_ptr<ngraph::runtime::Executable>, std::string,
-                 shared_ptr<PipelinedTensorsStore>>
+                 shared_ptr<PipelinedTensorsStore>,
+                 shared_ptr<NGraphOutputPlan>>
           evicted_ng_item,
       ng::runtime::Backend*& op_backend);
   const string& GetNgraphClusterName() { return m_node_name; }
@@ -85,21 +135,48 @@ class NGraphExecutor {
 
   bool IsTensorPipeliningSupported() { return m_executable_can_create_tensor; }
 
+  // Initial depth of the PipelinedTensorsStore
   int GetTensorPipelineDepth() {
     return m_executable_can_create_tensor ? m_depth : 1;
   }
 
+  // In the adaptive mode the PipelinedTensorsStore grows on demand till
+  // m_max_depth, and callers wait for free tensors instead of failing
+  bool IsPipelineDepthAdaptive() { return m_max_depth > m_depth; }
+
+  // In the zero-copy mode the pipelined output tensors are in host memory
+  // (see ngraph_zero_copy.h), and the TF outputs are created over them
+  bool IsZeroCopyOutputsEnabled() { return m_zero_copy_outputs; }
+
+  // In the zero-copy mode the TF inputs are bound to the executable in place
+  // when their buffers are suitable, instead of being copied
+  bool IsZeroCopyInputsEnabled() { return m_zero_copy_inputs; }
+
   const shared_ptr<NGraphTensorManager>& GetTensorManager() {
     return m_tensor_manager;
   }
 
+  // Padding policy of the inputs, set using _ngraph_shape_buckets
+  const NGraphShapeBuckets& GetShapeBuckets() { return m_shape_buckets; }
+
+  // Hits, misses, evictions and compile time of the executable cache
+  NgraphDataCacheStats GetCacheStats() { return m_ng_data_cache.GetStats(); }
+
  private:
   // This method is called from CreateCallback(), It compiles ngraph
-  // Or load ng_executable from backend in case of AOT
+  // Or load ng_executable from backend in case of AOT. A compiled executable
+  // is stored in the disk cache along with serialized_ng_function
   std::pair<Status, std::shared_ptr<ngraph::runtime::Executable>>
-  GetNgExecutable(std::string signature,
+  GetNgExecutable(const std::string& signature,
                   std::shared_ptr<ngraph::Function>& ng_function,
+                  const std::string& serialized_ng_function,
                   ng::runtime::Backend*& op_backend);
+  // Returns the executable of the disk cache entry for the signature and sets
+  // serialized_ng_function from it. Returns nullptr if the disk cache is not
+  // enabled or has no usable entry
+  std::shared_ptr<ngraph::runtime::Executable> LoadFromDiskCache(
+      const std::string& signature, ng::runtime::Backend*& op_backend,
+      std::string& serialized_ng_function);
   // Allocates the necessary tensors from the Executable (or backend in future)
   // Called from CreateCallback
   std::pair<Status, shared_ptr<PipelinedTensorsStore>>
@@ -108,18 +185,48 @@ class NGraphExecutor {
       const vector<int>& pipelined_input_indexes,
       const vector<int>& pipelined_output_indexes);
 
+  // Returns the executable compiled for the inputs with an unknown batch
+  // dimension, compiling it on first use. Returns nullptr if the graph cannot
+  // be compiled with dynamic shapes, in which case the caller compiles it for
+  // the concrete input shapes
+  std::shared_ptr<ngraph::runtime::Executable> GetDynamicExecutable(
+      const std::vector<TensorShape>& input_shapes,
+      ng::runtime::Backend*& op_backend, std::string& serialized_ng_function);
+
+  // Allocates the pipelined tensors of a dynamic executable, the inputs with
+  // the concrete input shapes and the outputs as dynamic tensors
+  std::pair<Status, shared_ptr<PipelinedTensorsStore>>
+  InitializeDynamicIOTensorPipeline(
+      std::shared_ptr<ngraph::runtime::Executable> ng_exec,
+      const std::vector<TensorShape>& input_shapes,
+      ng::runtime::Backend* op_backend);
+
+  // Approximate size of a cache item, used for the size based eviction and
+  // reported as size_in_bytes in the cache stats. nGraph does not expose the
+  // memory held by a compiled executable, so this is the length of the
+  // serialized function plus the size of the pipelined IO tensors. It
+  // underestimates the executable (e.g. its constants and its scratch
+  // memory), and overestimates it when the function was serialized with
+  // indentation
+  static size_t EstimateNgItemSizeInBytes(
+      const std::tuple<std::shared_ptr<ngraph::runtime::Executable>,
+                       std::string, shared_ptr<PipelinedTensorsStore>,
+                       shared_ptr<NGraphOutputPlan>>& ng_item);
+
   // Get tensorflow input tensors, input shapes, static_inputs to Compute
   // Signature
   Status ComputeSignature(const std::vector<Tensor>& tf_input_tensors,
                           std::vector<TensorShape>& input_shapes,
                           std::vector<const Tensor*>& static_input_map,
-                          std::stringstream& signature_ss) const;
+                          NGraphSignature& signature) const;
 
  private:
   const int m_instance_id;
   const int m_ngraph_cluster_id{-1};
   const int m_graph_id{-1};
   const unique_ptr<Graph> m_graph;
+  // Hash of m_graph, used for the disk cache keys
+  uint64 m_graph_hash{0};
 
   const string m_op_backend_name;
   string m_node_name;
@@ -128,21 +235,65 @@ class NGraphExecutor {
   bool m_do_aot = false;
   map<string, string> m_aot_functions;
   map<string, string> m_aot_execs;
+  // References to the functions and executables stored in the AOT artifact
+  // instead of being embedded in the node
+  std::shared_ptr<NGraphAOTArtifact> m_aot_artifact;
+  map<string, string> m_aot_function_refs;
+  map<string, string> m_aot_exec_refs;
 
   // NgraphDataCache<Key, Value> where key is signature, and value is a tuple
-  // of ng_executable, serialized_ng_function and PipelinedTensorsStore
-  NgraphDataCache<std::string,
+  // of ng_executable, serialized_ng_function, PipelinedTensorsStore and
+  // NGraphOutputPlan
+  NgraphDataCache<NGraphSignature,
                   std::tuple<std::shared_ptr<ngraph::runtime::Executable>,
-                             std::string, shared_ptr<PipelinedTensorsStore>>>
+                             std::string, shared_ptr<PipelinedTensorsStore>,
+                             shared_ptr<NGraphOutputPlan>>>
       m_ng_data_cache;
 
   bool m_executable_can_create_tensor;
 
   mutex m_mutex;
-  int m_depth{2};  // TODO make this settable
+
+  // Signatures being compiled in the background, and the errors of the
+  // background compilations that are not reported yet
+  std::mutex m_async_compile_mutex;
+  std::condition_variable m_async_compile_cv;
+  std::unordered_set<NGraphSignature> m_async_compiles;
+  std::unordered_map<NGraphSignature, Status> m_async_compile_errors;
+  // Set using NGRAPH_TF_PIPELINE_DEPTH or _ngraph_pipeline_depth
+  int m_depth{2};
+  // Set using NGRAPH_TF_PIPELINE_MAX_DEPTH or _ngraph_pipeline_max_depth.
+  // 0 (or m_depth) means the depth is fixed
+  int m_max_depth{0};
+
+  NGraphShapeBuckets m_shape_buckets;
+
+  // Set using NGRAPH_TF_DYNAMIC_BATCH, if the backend supports dynamic
+  // tensors. The executables compiled with an unknown batch dimension are
+  // shared by the cache items of all the batch sizes, keyed by the partial
+  // input shapes. Partial shapes that failed to compile are not tried again
+  bool m_use_dynamic_batch{false};
+  std::mutex m_dynamic_execs_mutex;
+  std::unordered_map<
+      std::string,
+      std::pair<std::shared_ptr<ngraph::runtime::Executable>, std::string>>
+      m_dynamic_execs;
+  std::unordered_set<std::string> m_dynamic_failures;
+
+  // Set using NGRAPH_TF_USE_PREFETCH
+  bool m_use_prefetch{false};
+
+  // Set using NGRAPH_TF_ZERO_COPY_INPUTS and NGRAPH_TF_ZERO_COPY_OUTPUTS,
+  // for the host backends
+  bool m_zero_copy_inputs{false};
+  bool m_zero_copy_outputs{false};
 
   // NGraphTensorManager
   shared_ptr<NGraphTensorManager> m_tensor_manager;
+
+  // TF types of the inputs and outputs, from the _Arg and _Retval nodes
+  std::vector<DataType> m_input_dtypes;
+  std::vector<DataType> m_output_dtypes;
 };
 
 }  // namespace ngraph_bridge
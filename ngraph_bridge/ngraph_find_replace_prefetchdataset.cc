@@ -55,7 +55,8 @@ Node* FindPrefetch(Node* makeiterator_node) {
   return prefetch_node;
 }
 
-Status ReplacePrefetch(Graph* graph, Node* prefetch_node) {
+Status ReplacePrefetch(Graph* graph, Node* prefetch_node, Node* iterator_node,
+                       const int& graph_id) {
   NodeBuilder::NodeOut input_dataset;
   NodeBuilder::NodeOut buffer_size;
 
@@ -86,12 +87,15 @@ Status ReplacePrefetch(Graph* graph, Node* prefetch_node) {
                          .Attr("output_types", output_types)
                          .Attr("output_shapes", output_shapes)
                          .Attr("slack_period", slack_period)
+                         .Attr("ngraph_iterator", iterator_node->name())
+                         .Attr("ngraph_graph_id", graph_id)
                          .Device(prefetch_node->assigned_device_name())
                          .Finalize(graph, &replacement));
   replacement->set_assigned_device_name(prefetch_node->assigned_device_name());
 
   string new_name = graph->NewName("NGraph" + prefetch_node->name());
   replacement->set_name(new_name);
+  iterator_node->AddAttr("_ngraph_prefetch_graph_id", graph_id);
 
   std::vector<const Edge*> edges;
 
@@ -32,7 +32,13 @@ namespace ngraph_bridge {
 
 Node* FindPrefetch(Node* makeiterator_node);
 
-Status ReplacePrefetch(Graph* graph, Node* prefetch_node);
+// Replaces the prefetch dataset with an NGraphPrefetchDataset, that copies the
+// elements to the NGraphEncapsulates consuming the given iterator. The
+// iterator is tagged with the graph id, so that the consumers found in the
+// graphs executed later are entered in the catalog under the same graph id
+// that the NGraphPrefetchDataset looks up
+Status ReplacePrefetch(Graph* graph, Node* prefetch_node, Node* iterator_node,
+                       const int& graph_id);
 
 }  // namespace ngraph_bridge
 
@@ -13,6 +13,8 @@
  * See the License for the specific language governing permissions and
  * limitations under the License.
  *******************************************************************************/
+#include "tensorflow/core/lib/hash/hash.h"
+
 #include "ngraph_bridge/ngraph_freshness_tracker.h"
 
 using namespace std;
@@ -24,55 +26,83 @@ namespace ngraph_bridge {
 // ngraph backend api change returns executable, so changing function to
 // executable
 
+NGraphFreshnessTracker::Shard& NGraphFreshnessTracker::GetShard(
+    const void* base_pointer) {
+  // The base pointers are aligned, hash them to use all the shards
+  uint64 hash = Hash64(reinterpret_cast<const char*>(&base_pointer),
+                       sizeof(base_pointer));
+  return shards_[hash % kNumShards];
+}
+
 void NGraphFreshnessTracker::MarkFresh(
     const void* base_pointer,
     const std::shared_ptr<ngraph::runtime::Executable>& user) {
-  mutex_lock l(mu_);
-  auto it = freshness_map_.find(base_pointer);
-  if (it != freshness_map_.end()) {
-    it->second.insert(user);
+  Shard& shard = GetShard(base_pointer);
+  {
+    tf_shared_lock l(shard.mu);
+    auto it = shard.freshness_map.find(base_pointer);
+    if (it == shard.freshness_map.end()) {
+      return;
+    }
+    auto user_it = it->second.users.find(user);
+    if (user_it != it->second.users.end()) {
+      user_it->second.store(it->second.epoch.load());
+      return;
+    }
+  }
+  // First use of the tensor by this user
+  mutex_lock l(shard.mu);
+  auto it = shard.freshness_map.find(base_pointer);
+  if (it != shard.freshness_map.end()) {
+    it->second.users[user].store(it->second.epoch.load());
   }
 }
 
 bool NGraphFreshnessTracker::IsFresh(
     const void* base_pointer,
     const std::shared_ptr<ngraph::runtime::Executable>& user) {
-  mutex_lock l(mu_);
-  auto it = freshness_map_.find(base_pointer);
-  if (it == freshness_map_.end()) {
+  Shard& shard = GetShard(base_pointer);
+  tf_shared_lock l(shard.mu);
+  auto it = shard.freshness_map.find(base_pointer);
+  if (it == shard.freshness_map.end()) {
     return false;
-  } else {
-    return (it->second.count(user) > 0);
   }
+  auto user_it = it->second.users.find(user);
+  if (user_it == it->second.users.end()) {
+    return false;
+  }
+  return user_it->second.load() == it->second.epoch.load();
 }
 
 void NGraphFreshnessTracker::MarkStale(const void* base_pointer) {
-  mutex_lock l(mu_);
-  auto it = freshness_map_.find(base_pointer);
-  if (it != freshness_map_.end()) {
-    it->second.clear();
+  Shard& shard = GetShard(base_pointer);
+  tf_shared_lock l(shard.mu);
+  auto it = shard.freshness_map.find(base_pointer);
+  if (it != shard.freshness_map.end()) {
+    it->second.epoch++;
   }
 }
 
 void NGraphFreshnessTracker::AddTensor(const void* base_pointer) {
-  mutex_lock l(mu_);
-  auto it = freshness_map_.find(base_pointer);
-  if (it == freshness_map_.end()) {
-    freshness_map_[base_pointer] =
-        std::set<std::shared_ptr<ngraph::runtime::Executable>>{};
-  }
+  Shard& shard = GetShard(base_pointer);
+  mutex_lock l(shard.mu);
+  // Does not change the freshness of a tensor that is already tracked
+  shard.freshness_map[base_pointer];
 }
 
 void NGraphFreshnessTracker::RemoveTensor(const void* base_pointer) {
-  mutex_lock l(mu_);
-  freshness_map_.erase(base_pointer);
+  Shard& shard = GetShard(base_pointer);
+  mutex_lock l(shard.mu);
+  shard.freshness_map.erase(base_pointer);
 }
 
 void NGraphFreshnessTracker::RemoveUser(
     const std::shared_ptr<ngraph::runtime::Executable>& user) {
-  mutex_lock l(mu_);
-  for (auto& kv : freshness_map_) {
-    kv.second.erase(user);
+  for (auto& shard : shards_) {
+    mutex_lock l(shard.mu);
+    for (auto& kv : shard.freshness_map) {
+      kv.second.users.erase(user);
+    }
   }
 }
 
@@ -16,7 +16,8 @@
 #ifndef NGRAPH_FRESHNESS_TRACKER_H_
 #define NGRAPH_FRESHNESS_TRACKER_H_
 
-#include <set>
+#include <atomic>
+#include <unordered_map>
 
 #include "tensorflow/core/framework/resource_mgr.h"
 
@@ -83,6 +84,15 @@ namespace ngraph_bridge {
 // the ResourceMgr's default container, with the resource name
 // "ngraph_freshness_tracker".
 //
+// One tracker is shared by all the encapsulate and variable ops, and IsFresh
+// and MarkFresh are called for every input at every step. So the tensors are
+// spread over kNumShards shards, each with its own mutex, and the freshness is
+// kept as epochs: every tensor has an epoch that MarkStale increments, and
+// every user of the tensor remembers the epoch it was marked fresh in. A user
+// is fresh if that is the current epoch. IsFresh, MarkStale and MarkFresh (for
+// a known user) only need a shared lock on the shard of the tensor, the
+// exclusive lock is taken when tensors or users are added and removed.
+//
 class NGraphFreshnessTracker : public ResourceBase {
  public:
   explicit NGraphFreshnessTracker() {}
@@ -92,38 +102,53 @@ class NGraphFreshnessTracker : public ResourceBase {
 
   std::string DebugString() const override { return "FreshnessTracker"; }
 
-  // If freshness_map_ has the base_pointer, then inserts the user function into
-  // its set of user functions
+  // If the base_pointer is tracked, then marks it fresh for the user function
   void MarkFresh(const void* base_pointer,
                  const std::shared_ptr<ngraph::runtime::Executable>& user);
 
-  // Checks if the freshness_map_ has the user function for base_pointer, else
-  // returns false
+  // Checks if the base_pointer is fresh for the user function, returns false
+  // if the base_pointer is not tracked
   bool IsFresh(const void* base_pointer,
                const std::shared_ptr<ngraph::runtime::Executable>& user);
 
-  // Removes all the functions for the base_pointer in the freshness_map_, i.e.
-  // sets the set<ng::Function> for base_pointer to empty
+  // Marks the base_pointer stale for all the user functions
   void MarkStale(const void* base_pointer);
 
-  // Inserts the base_pointer in the map, initialises the set of functions as
-  // empty set
+  // Starts tracking the base_pointer, it is not fresh for any user function
   void AddTensor(const void* base_pointer);
 
-  // Erases the base_pointer from the freshness_map_
+  // Stops tracking the base_pointer
   void RemoveTensor(const void* base_pointer);
 
-  // Removes the user function from the freshness_map_
+  // Removes the user function from all the tracked base_pointers
   void RemoveUser(const std::shared_ptr<ngraph::runtime::Executable>& user);
 
  private:
-  // mutex protecting the freshness_map_
-  mutex mu_;
-  // for each base pointer (of tensor), maintains a set of ng::Functions that
-  // use it
-  // Each ng function in the set is then a user of the base_pointer
-  std::map<const void*, std::set<std::shared_ptr<ngraph::runtime::Executable>>>
-      freshness_map_;
+  static const int kNumShards = 16;
+
+  // Freshness of a tensor. The epochs are updated under a shared lock of the
+  // shard, the users map is changed under the exclusive lock. Epochs start at
+  // 1, a user epoch of 0 means the user was never marked fresh
+  struct TensorFreshness {
+    std::atomic<uint64> epoch{1};
+    // For each user (ng::Executable) of the tensor, the epoch it was marked
+    // fresh in
+    std::unordered_map<std::shared_ptr<ngraph::runtime::Executable>,
+                       std::atomic<uint64>>
+        users;
+  };
+
+  struct Shard {
+    // mutex protecting the freshness_map
+    mutex mu;
+    // for each base pointer (of tensor), its freshness. The map is node
+    // based, so the entries do not move when it grows
+    std::unordered_map<const void*, TensorFreshness> freshness_map;
+  };
+
+  Shard& GetShard(const void* base_pointer);
+
+  Shard shards_[kNumShards];
 
   ~NGraphFreshnessTracker() override {}
 };
@@ -0,0 +1,90 @@
+/*******************************************************************************
+ * Copyright 2019 Intel Corporation
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ *******************************************************************************/
+
+
+#include <algorithm>
+
+#include "tensorflow/core/lib/core/errors.h"
+
+#include "ngraph_bridge/ngraph_output_plan.h"
+#include "ngraph_bridge/ngraph_utils.h"
+
+using namespace std;
+namespace ng = ngraph;
+
+namespace tensorflow {
+
+namespace ngraph_bridge {
+
+static bool Contains(const vector<int>& indexes, int index) {
+  return std::find(indexes.begin(), indexes.end(), index) != indexes.end();
+}
+
+//---------------------------------------------------------------------------
+//  NGraphOutputPlan::Create
+//---------------------------------------------------------------------------
+Status NGraphOutputPlan::Create(
+    const shared_ptr<ng::runtime::Executable>& ng_exec,
+    const vector<DataType>& output_dtypes,
+    const shared_ptr<NGraphTensorManager>& tensor_manager,
+    shared_ptr<NGraphOutputPlan>* plan) {
+  const auto& ng_results = ng_exec->get_results();
+  if (ng_results.size() != output_dtypes.size()) {
+    return errors::Internal("Executable has ", ng_results.size(),
+                            " results, but ", output_dtypes.size(),
+                            " outputs are expected");
+  }
+
+  auto new_plan = make_shared<NGraphOutputPlan>();
+  for (size_t i = 0; i < ng_results.size(); i++) {
+    const auto& ng_result = ng_results[i];
+    Output output;
+    output.dtype = output_dtypes[i];
+
+    // Make sure the nGraph-inferred element type agrees with what TensorFlow
+    // expected.
+    ng::element::Type expected_elem_type;
+    TF_RETURN_IF_ERROR(
+        TFDataTypeToNGraphElementType(output.dtype, &expected_elem_type));
+    if (ng_result->get_element_type() != expected_elem_type) {
+      return errors::Internal(
+          "Element type inferred by nGraph does not match "
+          "the element type expected by TensorFlow");
+    }
+    output.element_size = expected_elem_type.size();
+
+    output.is_dynamic = !ng_result->get_output_partial_shape(0).is_static();
+    if (!output.is_dynamic) {
+      for (auto dim : ng_result->get_shape()) {
+        output.shape.AddDim(dim);
+      }
+    }
+
+    output.needs_copy =
+        Contains(tensor_manager->GetOutputIndexesThatNeedCopy(), i);
+    if (output.needs_copy) {
+      output.copy_name = "D2H_Output_" + to_string(i);
+      new_plan->m_copied_output_indexes.push_back(i);
+    }
+    new_plan->m_outputs.push_back(output);
+  }
+  *plan = new_plan;
+  return Status::OK();
+}
+
+}  // namespace ngraph_bridge
+
+}  // namespace tensorflow
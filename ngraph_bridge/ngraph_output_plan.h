@@ -0,0 +1,80 @@
+/*******************************************************************************
+ * Copyright 2019 Intel Corporation
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ *******************************************************************************/
+
+
+#ifndef NGRAPH_TF_BRIDGE_OUTPUT_PLAN_H_
+#define NGRAPH_TF_BRIDGE_OUTPUT_PLAN_H_
+#pragma once
+
+#include <memory>
+#include <vector>
+
+#include "tensorflow/core/framework/tensor_shape.h"
+#include "tensorflow/core/framework/types.h"
+#include "tensorflow/core/lib/core/status.h"
+
+#include "ngraph/runtime/executable.hpp"
+
+#include "ngraph_bridge/ngraph_tensor_manager.h"
+
+namespace tensorflow {
+
+namespace ngraph_bridge {
+
+// NGraphOutputPlan holds what the encapsulate op needs to know about the
+// outputs of an executable to prepare the TF outputs at every step: the TF
+// shapes and types, and which outputs are copied from the nGraph tensors,
+// as classified by the NGraphTensorManager. It is computed once, when the
+// executable is added to the cache, so that the per-step path only reads it.
+class NGraphOutputPlan {
+ public:
+  struct Output {
+    // Shape of the TF output. Not set for the outputs of executables compiled
+    // with dynamic shapes, whose shapes are known after the call
+    TensorShape shape;
+    bool is_dynamic{false};
+    DataType dtype{DT_INVALID};
+    size_t element_size{0};
+    // Copied from the nGraph tensor to the TF tensor
+    bool needs_copy{false};
+    // Name of the copy, for the event traces
+    string copy_name;
+  };
+
+  // Computes the plan of the results of ng_exec. Fails if the element types
+  // of the results do not match output_dtypes, the types expected by TF
+  static Status Create(
+      const std::shared_ptr<ngraph::runtime::Executable>& ng_exec,
+      const std::vector<DataType>& output_dtypes,
+      const std::shared_ptr<NGraphTensorManager>& tensor_manager,
+      std::shared_ptr<NGraphOutputPlan>* plan);
+
+  const std::vector<Output>& GetOutputs() const { return m_outputs; }
+  // Indexes of the outputs that have needs_copy set
+  const std::vector<int>& GetCopiedOutputIndexes() const {
+    return m_copied_output_indexes;
+  }
+
+ private:
+  std::vector<Output> m_outputs;
+  std::vector<int> m_copied_output_indexes;
+};
+
+}  // namespace ngraph_bridge
+
+}  // namespace tensorflow
+
+#endif  // NGRAPH_TF_BRIDGE_OUTPUT_PLAN_H_
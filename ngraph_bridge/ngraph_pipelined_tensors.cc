@@ -75,6 +75,24 @@ int IndexLibrary::get_index() {
   }
 }
 
+void IndexLibrary::grow(size_t new_depth) {
+  std::lock_guard<std::mutex> lock(m_mtx);
+  if (new_depth < m_depth) {
+    throw std::runtime_error(
+        "IndexLibrary can only grow. Depth = " + to_string(m_depth) +
+        " but requested depth = " + to_string(new_depth));
+  }
+  for (size_t i = m_depth; i < new_depth; i++) {
+    m_free_depth_indexes.insert(i);
+  }
+  m_depth = new_depth;
+}
+
+size_t IndexLibrary::get_depth() {
+  std::lock_guard<std::mutex> lock(m_mtx);
+  return m_depth;
+}
+
 void IndexLibrary::insert_to_free_set(size_t id) {
   std::lock_guard<std::mutex> lock(m_mtx);
   m_free_depth_indexes.insert(id);
@@ -91,7 +109,13 @@ bool IndexLibrary::is_free(size_t id) {
 
 PipelinedTensorsStore::PipelinedTensorsStore(PipelinedTensorMatrix in,
                                              PipelinedTensorMatrix out)
-    : m_in_tensors(in), m_out_tensors(out) {
+    : PipelinedTensorsStore(in, out, in.size(), nullptr) {}
+
+PipelinedTensorsStore::PipelinedTensorsStore(PipelinedTensorMatrix in,
+                                             PipelinedTensorMatrix out,
+                                             size_t max_depth,
+                                             PipelinedTensorsCreator creator)
+    : m_in_tensors(in), m_out_tensors(out), m_creator(creator) {
   auto m_depth_in = in.size();
   auto m_depth_out = out.size();
 
@@ -103,19 +127,97 @@ PipelinedTensorsStore::PipelinedTensorsStore(PipelinedTensorMatrix in,
 
   // We assume that input and output depths are same
   m_depth = m_depth_in;
+  m_initial_depth = m_depth;
+  m_max_depth = max_depth < m_depth ? m_depth : max_depth;
+
+  if (is_adaptive() && m_creator == nullptr) {
+    throw std::runtime_error(
+        "PipelinedTensorsStore requires a tensor creator to grow till depth " +
+        to_string(m_max_depth));
+  }
 
   idx_lib = make_shared<IndexLibrary>(m_depth);
 }
 
 tuple<int, PipelinedTensorVector, PipelinedTensorVector>
 PipelinedTensorsStore::get_tensors() {
+  return get_tensors(true);
+}
+
+tuple<int, PipelinedTensorVector, PipelinedTensorVector>
+PipelinedTensorsStore::try_get_tensors() {
+  return get_tensors(false);
+}
+
+tuple<int, PipelinedTensorVector, PipelinedTensorVector>
+PipelinedTensorsStore::get_tensors(bool wait) {
+  std::unique_lock<std::mutex> lock(m_mtx);
   int i = idx_lib->get_index();
+  while (i < 0 && is_adaptive()) {
+    if (m_depth < m_max_depth) {
+      // All indices are checked out, create one more group of tensors
+      auto new_group = m_creator();
+      m_in_tensors.push_back(new_group.first);
+      m_out_tensors.push_back(new_group.second);
+      m_depth++;
+      idx_lib->grow(m_depth);
+    } else if (!wait) {
+      break;
+    } else {
+      // Reached max_depth, wait for an index to be returned
+      m_cv.wait(lock);
+    }
+    i = idx_lib->get_index();
+  }
   return make_tuple(i, (i < 0 ? PipelinedTensorVector{} : get_group(true, i)),
                     (i < 0 ? PipelinedTensorVector{} : get_group(false, i)));
 }
 
 void PipelinedTensorsStore::return_tensors(size_t id) {
-  idx_lib->return_index(id);
+  {
+    std::lock_guard<std::mutex> lock(m_mtx);
+    idx_lib->return_index(id);
+  }
+  m_cv.notify_one();
+}
+
+bool PipelinedTensorsStore::try_hold() {
+  std::lock_guard<std::mutex> lock(m_mtx);
+  if (m_num_held + 1 >= m_max_depth) {
+    return false;
+  }
+  m_num_held++;
+  return true;
+}
+
+void PipelinedTensorsStore::return_held_tensors(size_t id) {
+  {
+    std::lock_guard<std::mutex> lock(m_mtx);
+    m_num_held--;
+    idx_lib->return_index(id);
+  }
+  m_cv.notify_one();
+}
+
+size_t PipelinedTensorsStore::get_depth() {
+  std::lock_guard<std::mutex> lock(m_mtx);
+  return m_depth;
+}
+
+size_t PipelinedTensorsStore::get_size_in_bytes() {
+  std::lock_guard<std::mutex> lock(m_mtx);
+  size_t size_in_bytes = 0;
+  for (auto tensor_matrix : {&m_in_tensors, &m_out_tensors}) {
+    for (auto& group : *tensor_matrix) {
+      for (auto& tensor : group) {
+        // Dynamic tensors are allocated when the executable is called
+        if (tensor->get_partial_shape().is_static()) {
+          size_in_bytes += tensor->get_size_in_bytes();
+        }
+      }
+    }
+  }
+  return size_in_bytes;
 }
 
 PipelinedTensorVector PipelinedTensorsStore::get_group(bool is_input,
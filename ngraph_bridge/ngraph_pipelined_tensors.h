@@ -18,6 +18,10 @@
 #define NGRAPH_TF_BRIDGE_PIPELINED_TENSORS_H_
 #pragma once
 
+#include <condition_variable>
+#include <functional>
+#include <mutex>
+
 #include "ngraph/event_tracing.hpp"
 #include "ngraph/runtime/backend.hpp"
 
@@ -60,6 +64,13 @@
 // that we are done using the tensors of that pipeline depth,
 // and it can give it to other threads that request tensors.
 
+// Adaptive mode: PipelinedTensorsStore can optionally be given a max_depth
+// (greater than the initial depth) and a PipelinedTensorsCreator. In that
+// mode, when all indices are checked out, get_tensors creates one more group
+// of input and output tensors (growing the pipeline depth) as long as the
+// depth is smaller than max_depth. Once max_depth is reached, get_tensors
+// blocks till an index is returned, instead of returning -1
+
 // PipelinedTensorsStore relies on IndexLibrary to be threadsafe.
 // IndexLibrary manages a set of integers: 0,1,...depth-1
 // It supports 2 functions get_index and return_index
@@ -96,12 +107,18 @@ class IndexLibrary {
   // so its available again for reuse when get_index is called again
   void return_index(size_t id);
 
-  // TODO: if needed implement get_depth() and get_num_free_idxs()
-  // Implementing get_depth() might make some sense because if one receives an
-  // IndexLibrary object that only gives return_index()==-1 then one might want
-  // to know is there any point in waiting for it (it will never return anything
-  // other than -1 if depth==0). So the user of the object can query depth and
-  // throw an error or take appropriate steps if its 0
+  // Grows the library to own 0, 1, ... new_depth-1. The newly added integers
+  // are free
+  void grow(size_t new_depth);
+
+  // If one receives an IndexLibrary object that only gives get_index()==-1
+  // then one might want to know is there any point in waiting for it (it will
+  // never return anything other than -1 if depth==0). So the user of the
+  // object can query depth and throw an error or take appropriate steps if
+  // its 0
+  size_t get_depth();
+
+  // TODO: if needed implement get_num_free_idxs()
 
  private:
   set<int> m_free_depth_indexes;
@@ -114,28 +131,107 @@ class IndexLibrary {
   bool is_free(size_t id);
 };
 
+// Creates one group (pipeline depth of 1) of input and output tensors. Used
+// to grow the PipelinedTensorsStore in adaptive mode
+typedef std::function<pair<PipelinedTensorVector, PipelinedTensorVector>()>
+    PipelinedTensorsCreator;
+
 class PipelinedTensorsStore {
  public:
   PipelinedTensorsStore(PipelinedTensorMatrix in, PipelinedTensorMatrix out);
 
+  // Adaptive mode. The store grows till max_depth using creator
+  PipelinedTensorsStore(PipelinedTensorMatrix in, PipelinedTensorMatrix out,
+                        size_t max_depth, PipelinedTensorsCreator creator);
+
   // returns a tuple of idx, and 2 vectors of ng tensors (input and output
   // groups). If the idx is negative, then its an invalid group (because
-  // pipeline is filled right now)
+  // pipeline is filled right now). In adaptive mode the idx is never negative
   tuple<int, PipelinedTensorVector, PipelinedTensorVector> get_tensors();
 
+  // Same as get_tensors, but never waits. In adaptive mode the store grows
+  // till max_depth, and the idx is negative once max_depth is reached and all
+  // the tensors are checked out
+  tuple<int, PipelinedTensorVector, PipelinedTensorVector> try_get_tensors();
+
+  // Current depth of the pipeline
+  size_t get_depth();
+
+  // Total size of all the input and output tensors
+  size_t get_size_in_bytes();
+
+  bool is_adaptive() { return m_max_depth > m_initial_depth; }
+
   // Return an integer that was checked out by get_tensors.
   // This indicates that the tensors corresponding to depth=id in the pipeline
   // are ready for reuse and can be returned when get_tensors is called again
   void return_tensors(size_t id);
 
+  // Reserves a checked out index to be held past the step that got it, e.g.
+  // by zero-copy outputs till TF releases them. Returns false if that would
+  // leave less than one index of max_depth to the other steps, which then
+  // return their index at the end of the step instead
+  bool try_hold();
+
+  // Returns an index reserved with try_hold
+  void return_held_tensors(size_t id);
+
  private:
   PipelinedTensorMatrix m_in_tensors;
   PipelinedTensorMatrix m_out_tensors;
   size_t m_depth;
+  size_t m_initial_depth;
+  size_t m_max_depth;
+  PipelinedTensorsCreator m_creator;
   shared_ptr<IndexLibrary> idx_lib;
+  // Number of indexes reserved with try_hold
+  size_t m_num_held{0};
+  // protects m_in_tensors, m_out_tensors, m_depth and m_num_held
+  std::mutex m_mtx;
+  std::condition_variable m_cv;
 
   // Get the i'th depth tensors for inputs if is_input is true, else for outputs
   PipelinedTensorVector get_group(bool is_input, size_t i);
+
+  // Used by get_tensors and try_get_tensors, waits at max_depth if wait is
+  // true
+  tuple<int, PipelinedTensorVector, PipelinedTensorVector> get_tensors(
+      bool wait);
+};
+
+// Holds an index checked out by get_tensors, and returns it to the store when
+// it goes out of scope, so that a step that fails does not lose its index.
+// release() hands the index over to its next owner, e.g. the prefetch shared
+// data or an NGraphPipelineSlot
+class ScopedPipelineIndex {
+ public:
+  ScopedPipelineIndex(const shared_ptr<PipelinedTensorsStore>& pts, int index)
+      : m_pts(pts), m_index(index) {}
+  ~ScopedPipelineIndex() { reset(); }
+
+  int get() const { return m_index; }
+
+  // Returns the held index (if any) to the store and holds index instead
+  void reset(int index = -1) {
+    if (m_index >= 0) {
+      m_pts->return_tensors(m_index);
+    }
+    m_index = index;
+  }
+
+  // Stops holding the index and returns it
+  int release() {
+    int index = m_index;
+    m_index = -1;
+    return index;
+  }
+
+ private:
+  shared_ptr<PipelinedTensorsStore> m_pts;
+  int m_index;
+
+  ScopedPipelineIndex(const ScopedPipelineIndex&) = delete;
+  ScopedPipelineIndex& operator=(const ScopedPipelineIndex&) = delete;
 };
 }
 }
@@ -39,19 +39,25 @@ File: tensorflow/core/kernels/data/prefetch_dataset_op.cc
 
 #include "ngraph_bridge/ngraph_prefetch_dataset_op.h"
 
+#include <algorithm>
+#include <chrono>
 #include <deque>
+#include <set>
 
 #include "tensorflow/core/common_runtime/metrics.h"
 #include "tensorflow/core/framework/partial_tensor_shape.h"
 #include "tensorflow/core/framework/stats_aggregator.h"
 #include "tensorflow/core/framework/tensor.h"
 #include "tensorflow/core/lib/core/error_codes.pb.h"
+#include "tensorflow/core/lib/core/refcount.h"
 #include "tensorflow/core/lib/gtl/cleanup.h"
 #include "tensorflow/core/lib/strings/str_util.h"
 #include "tensorflow/core/lib/strings/stringprintf.h"
 
 #include "ngraph/event_tracing.hpp"
 
+#include "ngraph_bridge/ngraph_catalog.h"
+#include "ngraph_bridge/ngraph_encapsulate_op_utils.h"
 #include "ngraph_bridge/ngraph_prefetch_shared_data.h"
 #include "ngraph_bridge/ngraph_utils.h"
 #include "ngraph_bridge/stats_utils.h"
@@ -64,16 +70,33 @@ namespace data {
 
 // Determines the fraction of slack time by which to delay prefetching of data.
 constexpr double kSleepFactor = 0.2;
+// Determines the fraction of the measured slack, i.e. the time the buffered
+// elements last the consumer minus the time to produce the next element, by
+// which to delay prefetching of data. The rest absorbs the jitter of the
+// measurements
+constexpr double kJustInTimeFactor = 0.5;
 constexpr char kDatasetName[] = "NGraphPrefetch";
 
+// The bytes the buffer of an iterator may hold, set by
+// NGRAPH_TF_PREFETCH_MAX_BYTES. 0 means no limit
+static int64 GetPrefetchMaxBufferBytes() {
+  const char* max_bytes_env = std::getenv("NGRAPH_TF_PREFETCH_MAX_BYTES");
+  if (max_bytes_env == nullptr) {
+    return 0;
+  }
+  return strtoll(max_bytes_env, nullptr, 10);
+}
+
 class NGraphPrefetchDatasetOp::Dataset : public DatasetBase {
  public:
   Dataset(OpKernelContext* ctx, const DatasetBase* input, int64 buffer_size,
-          int64 slack_period)
+          int64 slack_period, int graph_id, const string& iterator_name)
       : DatasetBase(DatasetContext(ctx)),
         input_(input),
         buffer_size_(buffer_size),
-        slack_period_(slack_period) {
+        slack_period_(slack_period),
+        graph_id_(graph_id),
+        iterator_name_(iterator_name) {
     input_->Ref();
     m_resource_mgr = ctx->resource_manager();
   }
@@ -111,9 +134,16 @@ class NGraphPrefetchDatasetOp::Dataset : public DatasetBase {
     TF_RETURN_IF_ERROR(b->AddScalar(buffer_size_, &buffer_size));
     AttrValue slack_period_attr;
     b->BuildAttrValue(slack_period_, &slack_period_attr);
-    TF_RETURN_IF_ERROR(b->AddDataset(
-        this, {input_graph_node, buffer_size},
-        {std::make_pair("slack_period", slack_period_attr)}, output));
+    AttrValue iterator_name_attr;
+    b->BuildAttrValue(iterator_name_, &iterator_name_attr);
+    AttrValue graph_id_attr;
+    b->BuildAttrValue(graph_id_, &graph_id_attr);
+    TF_RETURN_IF_ERROR(
+        b->AddDataset(this, {input_graph_node, buffer_size},
+                      {std::make_pair("slack_period", slack_period_attr),
+                       std::make_pair("ngraph_iterator", iterator_name_attr),
+                       std::make_pair("ngraph_graph_id", graph_id_attr)},
+                      output));
     return Status::OK();
   }
 
@@ -122,9 +152,9 @@ class NGraphPrefetchDatasetOp::Dataset : public DatasetBase {
    public:
     explicit Iterator(const Params& params, ResourceMgr* rm)
         : DatasetIterator<Dataset>(params),
-          auto_tuner_(params.dataset->buffer_size_),
-          m_resource_mgr(rm),
-          m_buffer_size(params.dataset->buffer_size_) {
+          auto_tuner_(params.dataset->buffer_size_,
+                      GetPrefetchMaxBufferBytes()),
+          m_resource_mgr(rm) {
       slack_us_ = 0;
     }
 
@@ -137,10 +167,32 @@ class NGraphPrefetchDatasetOp::Dataset : public DatasetBase {
       // but it would be possible to thread a cancellation manager
       // through the IteratorContext to upstream,
       // potentially-blocking iterators, when we add these.
+      std::unique_ptr<Thread> prefetch_thread;
       {
         mutex_lock l(mu_);
         cancelled_ = true;
         cond_var_.notify_all();
+        prefetch_thread = std::move(prefetch_thread_);
+      }
+      // Join the prefetch thread, so that all the nGraph tensors it was given
+      // are back in the shared data. Then terminate the shared data, so that
+      // the encapsulate op does not wait for the prefetched tensors any more
+      // and takes the tensors back
+      prefetch_thread.reset();
+      for (const auto& consumer :
+           ngraph_bridge::NGraphCatalog::GetPrefetchConsumers(
+               dataset()->graph_id_, dataset()->iterator_name_)) {
+        ngraph_bridge::NGraphPrefetchSharedResouce* shared_data = nullptr;
+        Status s = m_resource_mgr->Lookup(
+            ngraph_bridge::NGraphPrefetchSharedResouce::CONTAINER_NAME,
+            ngraph_bridge::NGraphPrefetchSharedResouce::GetResourceName(
+                consumer, dataset()->iterator_name_),
+            &shared_data);
+        if (s.ok()) {
+          shared_data->Terminate(
+              errors::Cancelled("The prefetch iterator is destroyed"));
+          shared_data->Unref();
+        }
       }
     }
 
@@ -168,7 +220,17 @@ class NGraphPrefetchDatasetOp::Dataset : public DatasetBase {
         // produced, or we are shutting down.
         while (!cancelled_ && buffer_.empty() && !prefetch_thread_finished_ &&
                auto_tuner_.buffer_limit() != 0) {
+          // Record the starvation, so that it can be seen against the
+          // memory held by the buffer
+          if (stats_aggregator) {
+            stats_aggregator->AddToHistogram(
+                stats_utils::BufferUtilizationHistogramName(
+                    dataset()->node_name()),
+                {0.0f}, num_elements());
+          }
+          int64 old_buffer_limit = auto_tuner_.buffer_limit();
           auto_tuner_.RecordEmpty();
+          ReportBufferLimit(ctx, old_buffer_limit);
           RecordStop(ctx);
           cond_var_.wait(l);
           RecordStart(ctx);
@@ -242,6 +304,7 @@ class NGraphPrefetchDatasetOp::Dataset : public DatasetBase {
       mutex_lock parent_l(parent_mu_);
       mutex_lock l(mu_);
       buffer_.clear();
+      buffer_bytes_ = 0;
       TF_RETURN_IF_ERROR(RestoreInput(ctx, reader, input_impl_));
       size_t buffer_size;
       {
@@ -268,6 +331,8 @@ class NGraphPrefetchDatasetOp::Dataset : public DatasetBase {
                 full_name(strings::StrCat("buffer[", i, "][", j, "]")),
                 &buffer_element.value.back()));
           }
+          buffer_element.bytes = TotalBytes(buffer_element.value);
+          buffer_bytes_ += buffer_element.bytes;
         }
       }
       return Status::OK();
@@ -282,8 +347,36 @@ class NGraphPrefetchDatasetOp::Dataset : public DatasetBase {
       // The buffered data element.
       std::vector<Tensor> value;
       int64 created_us;
+      // Total size of the tensors in `value`
+      int64 bytes = 0;
     };
 
+    static int64 TotalBytes(const std::vector<Tensor>& value) {
+      int64 bytes = 0;
+      for (const auto& tensor : value) {
+        bytes += tensor.TotalBytes();
+      }
+      return bytes;
+    }
+
+    // Publishes the buffer limit, if the autotuner has changed it since it
+    // was `old_buffer_limit`
+    void ReportBufferLimit(IteratorContext* ctx, int64 old_buffer_limit)
+        EXCLUSIVE_LOCKS_REQUIRED(mu_) {
+      if (auto_tuner_.buffer_limit() == old_buffer_limit) {
+        return;
+      }
+      NGRAPH_VLOG(2) << "[PREFETCH] Buffer limit changed from "
+                     << old_buffer_limit << " to " << auto_tuner_.buffer_limit()
+                     << ", element bytes " << auto_tuner_.element_bytes();
+      const auto& stats_aggregator = ctx->stats_aggregator();
+      if (stats_aggregator) {
+        stats_aggregator->AddScalar(
+            stats_utils::BufferCapacityScalarName(dataset()->node_name()),
+            static_cast<float>(auto_tuner_.buffer_limit()), num_elements());
+      }
+    }
+
     Status Consume(IteratorContext* ctx, std::vector<Tensor>* out_tensors,
                    bool* end_of_sequence) EXCLUSIVE_LOCKS_REQUIRED(mu_) {
       ngraph::Event evt_consume("Prefetch_Consume", "Prefetch_Consume", "");
@@ -301,6 +394,9 @@ class NGraphPrefetchDatasetOp::Dataset : public DatasetBase {
         stats_aggregator->AddScalar(
             stats_utils::BufferCapacityScalarName(dataset()->node_name()),
             static_cast<float>(auto_tuner_.buffer_limit()), num_elements());
+        stats_aggregator->AddScalar(
+            stats_utils::BufferBytesScalarName(dataset()->node_name()),
+            static_cast<float>(buffer_bytes_), num_elements());
       }
       // A new element is available. Forward the status from computing it, and
       // (if we successfully got an element) the output values.
@@ -327,7 +423,10 @@ class NGraphPrefetchDatasetOp::Dataset : public DatasetBase {
         }
         RecordBufferDequeue(ctx, *out_tensors);
       }
+      int64 old_buffer_limit = auto_tuner_.buffer_limit();
       auto_tuner_.RecordConsumption(buffer_.size());
+      ReportBufferLimit(ctx, old_buffer_limit);
+      buffer_bytes_ -= buffer_.front().bytes;
       buffer_.pop_front();
       *end_of_sequence = false;
 
@@ -362,12 +461,15 @@ class NGraphPrefetchDatasetOp::Dataset : public DatasetBase {
     void PrefetchThread(const std::shared_ptr<IteratorContext>& ctx) {
       RecordStart(ctx.get());
       auto cleanup = gtl::MakeCleanup([this, ctx] { RecordStop(ctx.get()); });
-      // Keep track of where we are in an iteration "burst"
+      // Keep track of where we are in an iteration "burst". This is also the
+      // sequence number of the next element
       int num_produced = 0;
       while (true) {
         ngraph::Event evt_prefetch("Prefetch_Produce", "Prefetch_Produce", "");
 
         // 1. Wait for a slot in the buffer.
+        int64 buffer_limit;
+        size_t num_buffered;
         {
           mutex_lock l(mu_);
           while (!cancelled_ && buffer_.size() >= auto_tuner_.buffer_limit()) {
@@ -379,15 +481,31 @@ class NGraphPrefetchDatasetOp::Dataset : public DatasetBase {
           if (cancelled_) {
             return;
           }
+          buffer_limit = auto_tuner_.buffer_limit();
+          num_buffered = buffer_.size();
         }
 
-        if (dataset()->slack_period_ > 0 &&
-            num_produced % dataset()->slack_period_ == 0) {
-          // For the first element in the "burst", sleep for a bit if there is
-          // slack.
-          VLOG(2) << "Sleeping for: " << slack_us_ * kSleepFactor;
-          ctx->env()->SleepForMicroseconds(slack_us_ * kSleepFactor);
+        if (dataset()->slack_period_ > 0) {
+          int64 sleep_us = 0;
+          if (consumer_step_us_ > 0) {
+            // The nGraph encapsulate measures how long it takes per element,
+            // so produce the next element just in time, i.e. when the
+            // buffered elements are about to run out. This keeps the input
+            // preprocessing from competing with the nGraph kernels for the
+            // cores while the consumer does not need it yet
+            sleep_us = kJustInTimeFactor *
+                       (static_cast<int64>(num_buffered) * consumer_step_us_ -
+                        produce_us_);
+          } else if (num_produced % dataset()->slack_period_ == 0) {
+            // For the first element in the "burst", sleep for a bit if there
+            // is slack.
+            sleep_us = slack_us_ * kSleepFactor;
+          }
+          if (!SleepForSlack(ctx.get(), sleep_us, num_buffered)) {
+            return;
+          }
         }
+        int64 produce_start_us = ctx->env()->NowMicros();
 
         // 2. Read the next element.
         // Acquire the parent lock since we will be reading an element
@@ -400,6 +518,9 @@ class NGraphPrefetchDatasetOp::Dataset : public DatasetBase {
         BufferElement buffer_element;
         buffer_element.status = input_impl_->GetNext(
             ctx.get(), &buffer_element.value, &end_of_sequence);
+        // The time to produce the element leaves out the wait for the tensors
+        // to copy to
+        int64 produce_us = ctx->env()->NowMicros() - produce_start_us;
         if (buffer_element.status.ok() && end_of_sequence) {
           mutex_lock l(mu_);
           prefetch_thread_finished_ = true;
@@ -408,82 +529,34 @@ class NGraphPrefetchDatasetOp::Dataset : public DatasetBase {
           return;
         }
 
-        // Check if the shared data exist
-        ngraph_bridge::NGraphPrefetchSharedResouce* shared_data = nullptr;
-        Status s = m_resource_mgr->Lookup(
-            ngraph_bridge::NGraphPrefetchSharedResouce::CONTAINER_NAME,
-            ngraph_bridge::NGraphPrefetchSharedResouce::RESOURCE_NAME,
-            &shared_data);
-        if (s.ok()) {
-          shared_data->SetBufferDepth(m_buffer_size);
-
-          auto ng_input_tensor_bundle =
-              shared_data->GetNextIOTensorBundleForDeviceTransfer();
-          auto ng_prefetch_input_indexes_map =
-              shared_data->GetPrefetchInputIndexesMap();
-          ngraph::Event evt_dev_cp(
-              "Prf Dev Copy: Pipe_Ind_" + to_string(ng_input_tensor_bundle.Id),
-              "Copy", "");
-          int number_of_buffer_elements = buffer_element.value.size();
-          if (number_of_buffer_elements !=
-              ng_prefetch_input_indexes_map.size()) {
-            throw std::runtime_error(
-                "Prefetch buffer elements size " +
-                to_string(number_of_buffer_elements) +
-                " does not match the number of prefetch inputs expected by "
-                "encap " +
-                to_string(ng_prefetch_input_indexes_map.size()));
-          }
-          std::vector<std::unique_ptr<ngraph::Event>>
-              prefetch_input_write_events;
-          // Write to these tensors
-          for (auto itr : ng_prefetch_input_indexes_map) {
-            int ng_index = itr.first;
-            int tf_index = itr.second;
-
-            ng::element::Type ng_element_type;
-            auto status = ngraph_bridge::TFDataTypeToNGraphElementType(
-                buffer_element.value[tf_index].dtype(), &ng_element_type);
-
-            void* current_src_ptr =
-                (void*)DMAHelper::base(&buffer_element.value[tf_index]);
-            std::unique_ptr<ngraph::Event> event_copy_h2d(new ngraph::Event(
-                "H2D_PrefetchInput_" + std::to_string(tf_index), "Copy", ""));
-            try {
-              NGRAPH_VLOG(2)
-                  << "[PREFETCH] INPUT tensor being written by Prefetch: "
-                  << " Value: " << buffer_element.value[tf_index].DebugString();
-              ng_input_tensor_bundle.Inputs[ng_index]->write(
-                  current_src_ptr,
-                  ng_input_tensor_bundle.Inputs[ng_index]->get_element_count() *
-                      ng_element_type.size());
-            } catch (const std::exception& exp) {
-              throw exp;
-            } catch (...) {
-              throw std::runtime_error(
-                  "Error copying TF tensor to device tensor");
-            }
-            event_copy_h2d->Stop();
-            prefetch_input_write_events.push_back(std::move(event_copy_h2d));
-          }
-
-          for (auto& next : prefetch_input_write_events) {
-            ngraph::Event::write_trace(*next.get());
+        // Copy the element to the device tensors of every NGraphEncapsulate
+        // consuming the iterator, each of them has its own shared data
+        int64 consumer_step_us = 0;
+        for (const auto& consumer :
+             ngraph_bridge::NGraphCatalog::GetPrefetchConsumers(
+                 dataset()->graph_id_, dataset()->iterator_name_)) {
+          if (!CopyToDevice(ctx.get(), consumer, buffer_limit, num_produced,
+                            buffer_element, &produce_us, &consumer_step_us)) {
+            return;
           }
-
-          // Now add them back to the other queue
-          shared_data->AddNextIOTensorBundleReadyForDeviceExecution(
-              ng_input_tensor_bundle);
-          shared_data->Unref();
-          evt_dev_cp.Stop();
-          ngraph::Event::write_trace(evt_dev_cp);
         }
+        // The slowest consumer paces the prefetching. If there is no nGraph
+        // consumer, it is 0
+        consumer_step_us_ = consumer_step_us;
+
+        produce_us_ = ngraph_bridge::NGraphPrefetchSharedResouce::MovingAverage(
+            produce_us_, produce_us);
 
         // 3. Signal that the element has been produced.
         {
           mutex_lock l(mu_);
           RecordBufferEnqueue(ctx.get(), buffer_element.value);
           buffer_element.created_us = ctx->env()->NowMicros();
+          buffer_element.bytes = TotalBytes(buffer_element.value);
+          int64 old_buffer_limit = auto_tuner_.buffer_limit();
+          auto_tuner_.RecordElementBytes(buffer_element.bytes);
+          ReportBufferLimit(ctx.get(), old_buffer_limit);
+          buffer_bytes_ += buffer_element.bytes;
           buffer_.push_back(std::move(buffer_element));
           cond_var_.notify_all();
         }
@@ -493,6 +566,189 @@ class NGraphPrefetchDatasetOp::Dataset : public DatasetBase {
       }
     }
 
+    // Copies the prefetched inputs of `buffer_element`, the element with the
+    // sequence number `sequence`, to the device tensors of the
+    // NGraphEncapsulate `consumer` (GraphId_nodename), once it has created
+    // its shared data. Adds the transfer time to `produce_us` and
+    // raises `consumer_step_us` to the step time of the consumer. A consumer
+    // that gives no tensors back within STALL_TIMEOUT_MS is skipped, and is
+    // not waited for again until it does. Returns false if the iterator is
+    // cancelled meanwhile
+    bool CopyToDevice(IteratorContext* ctx, const string& consumer,
+                      int64 buffer_limit, int64 sequence,
+                      const BufferElement& buffer_element, int64* produce_us,
+                      int64* consumer_step_us) {
+      ngraph_bridge::NGraphPrefetchSharedResouce* shared_data = nullptr;
+      Status s = m_resource_mgr->Lookup(
+          ngraph_bridge::NGraphPrefetchSharedResouce::CONTAINER_NAME,
+          ngraph_bridge::NGraphPrefetchSharedResouce::GetResourceName(
+              consumer, dataset()->iterator_name_),
+          &shared_data);
+      if (!s.ok()) {
+        // The encapsulate has not run yet
+        return true;
+      }
+      core::ScopedUnref unref_shared_data(shared_data);
+      shared_data->SetFirstPrefetchedSequence(sequence);
+      // The encapsulate op keeps as many device tensors in flight as the
+      // buffer holds elements when the pipeline starts
+      shared_data->SetBufferDepth(buffer_limit);
+
+      // Wait for the encapsulate op to give back tensors to write to.
+      // The shared data may be terminated (e.g. by an earlier iterator),
+      // in which case this element is not copied to the device. A consumer
+      // that stalled before is only checked for tensors, without waiting
+      ngraph_bridge::NGraphPrefetchSharedResouce::IOTensorBundle
+          ng_input_tensor_bundle;
+      Status bundle_status;
+      bool stalled = stalled_consumers_.count(consumer) != 0;
+      int64 wait_ms =
+          stalled
+              ? 0
+              : ngraph_bridge::NGraphPrefetchSharedResouce::STALL_TIMEOUT_MS;
+      do {
+        {
+          mutex_lock l(mu_);
+          if (cancelled_) {
+            return false;
+          }
+        }
+        int64 timeout_ms = std::min(
+            wait_ms,
+            ngraph_bridge::NGraphPrefetchSharedResouce::TRANSFER_TIMEOUT_MS);
+        bundle_status = shared_data->GetNextIOTensorBundleForDeviceTransfer(
+            &ng_input_tensor_bundle, absl::Milliseconds(timeout_ms));
+        wait_ms -= timeout_ms;
+      } while (errors::IsDeadlineExceeded(bundle_status) && wait_ms > 0);
+      if (errors::IsDeadlineExceeded(bundle_status)) {
+        if (!stalled) {
+          NGRAPH_VLOG(1) << "[PREFETCH] " << consumer << " gave no tensors "
+                         << "back, not waiting for it until it does";
+          stalled_consumers_.insert(consumer);
+        }
+        return true;
+      }
+      if (stalled) {
+        NGRAPH_VLOG(1) << "[PREFETCH] " << consumer << " is back";
+        stalled_consumers_.erase(consumer);
+      }
+      if (!bundle_status.ok()) {
+        NGRAPH_VLOG(2) << "[PREFETCH] Not copying to the device of " << consumer
+                       << ": " << bundle_status.error_message();
+        return true;
+      }
+
+      auto ng_prefetch_input_indexes_map =
+          shared_data->GetPrefetchInputIndexesMap();
+      ngraph::Event evt_dev_cp("Prf Dev Copy: " + consumer + " Pipe_Ind_" +
+                                   to_string(ng_input_tensor_bundle.Id),
+                               "Copy", "");
+      int number_of_buffer_elements = buffer_element.value.size();
+      if (number_of_buffer_elements != ng_prefetch_input_indexes_map.size()) {
+        throw std::runtime_error(
+            "Prefetch buffer elements size " +
+            to_string(number_of_buffer_elements) +
+            " does not match the number of prefetch inputs expected by "
+            "encap " +
+            to_string(ng_prefetch_input_indexes_map.size()));
+      }
+      // Write to these tensors. The writes to the different inputs run
+      // concurrently on the transfer thread pool, if it is enabled
+      std::vector<ngraph_bridge::TensorCopy> prefetch_input_writes;
+      for (auto itr : ng_prefetch_input_indexes_map) {
+        int ng_index = itr.first;
+        int tf_index = itr.second;
+
+        ng::element::Type ng_element_type;
+        auto status = ngraph_bridge::TFDataTypeToNGraphElementType(
+            buffer_element.value[tf_index].dtype(), &ng_element_type);
+
+        void* current_src_ptr =
+            (void*)DMAHelper::base(&buffer_element.value[tf_index]);
+        auto ng_tensor = ng_input_tensor_bundle.Inputs[ng_index];
+        size_t size_in_bytes =
+            ng_tensor->get_element_count() * ng_element_type.size();
+        NGRAPH_VLOG(2) << "[PREFETCH] INPUT tensor being written by Prefetch: "
+                       << " Value: "
+                       << buffer_element.value[tf_index].DebugString();
+        prefetch_input_writes.push_back(
+            {"H2D_PrefetchInput_" + std::to_string(tf_index),
+             [ng_tensor, current_src_ptr, size_in_bytes]() {
+               ng_tensor->write(current_src_ptr, size_in_bytes);
+               return Status::OK();
+             }});
+      }
+      int64 transfer_start_us = ctx->env()->NowMicros();
+      Status write_status =
+          ngraph_bridge::RunTensorCopies(prefetch_input_writes);
+      if (!write_status.ok()) {
+        throw std::runtime_error("Error copying TF tensor to device tensor: " +
+                                 write_status.error_message());
+      }
+
+      int64 transfer_us = ctx->env()->NowMicros() - transfer_start_us;
+      shared_data->RecordTransferTime(transfer_us);
+      *produce_us += transfer_us;
+      *consumer_step_us =
+          std::max(*consumer_step_us, shared_data->GetStepTimeUs());
+
+      // Now add them back to the other queue, tagged with the element, so
+      // that the encapsulate op can tell whether they are for its step. This
+      // fails only if the shared data is terminated, and then the tensors are
+      // not used. The encapsulate op may have drained the queues already, so
+      // they go back to its store here
+      ng_input_tensor_bundle.Sequence = sequence;
+      Status ready_status =
+          shared_data->AddNextIOTensorBundleReadyForDeviceExecution(
+              ng_input_tensor_bundle);
+      if (!ready_status.ok()) {
+        NGRAPH_VLOG(2) << "[PREFETCH] " << ready_status.error_message();
+        shared_data->ReturnIOTensorBundle(ng_input_tensor_bundle);
+      }
+      evt_dev_cp.Stop();
+      ngraph::Event::write_trace(evt_dev_cp);
+      return true;
+    }
+
+    // Sleeps for `sleep_us`, if positive, and publishes the sleep time along
+    // with the timings it is based on. Returns false if the iterator is
+    // cancelled meanwhile
+    bool SleepForSlack(IteratorContext* ctx, int64 sleep_us,
+                       size_t num_buffered) {
+      const auto& stats_aggregator = ctx->stats_aggregator();
+      if (stats_aggregator) {
+        stats_aggregator->AddScalar(
+            stats_utils::SlackTimeScalarName(dataset()->node_name()),
+            static_cast<float>(std::max<int64>(sleep_us, 0)), num_elements());
+        stats_aggregator->AddScalar(
+            stats_utils::ConsumerStepTimeScalarName(dataset()->node_name()),
+            static_cast<float>(consumer_step_us_), num_elements());
+        stats_aggregator->AddScalar(
+            stats_utils::ProduceTimeScalarName(dataset()->node_name()),
+            static_cast<float>(produce_us_), num_elements());
+      }
+      if (sleep_us <= 0) {
+        return true;
+      }
+      NGRAPH_VLOG(2) << "[PREFETCH] Sleeping for: " << sleep_us
+                     << " us, buffered: " << num_buffered
+                     << ", consumer step: " << consumer_step_us_
+                     << " us, produce: " << produce_us_ << " us";
+      ngraph::Event evt_sleep("Prefetch_Sleep", "Prefetch_Sleep", "");
+      // Wait on the condition variable rather than sleep, so that the
+      // destructor does not wait for the sleep to end
+      mutex_lock l(mu_);
+      const uint64 deadline_us = ctx->env()->NowMicros() + sleep_us;
+      for (uint64 now_us = ctx->env()->NowMicros();
+           !cancelled_ && now_us < deadline_us;
+           now_us = ctx->env()->NowMicros()) {
+        cond_var_.wait_for(l, std::chrono::microseconds(deadline_us - now_us));
+      }
+      evt_sleep.Stop();
+      ngraph::Event::write_trace(evt_sleep);
+      return !cancelled_;
+    }
+
     Status WriteStatus(IteratorStateWriter* writer, size_t index,
                        const Status& status) EXCLUSIVE_LOCKS_REQUIRED(mu_) {
       TF_RETURN_IF_ERROR(writer->WriteScalar(
@@ -540,13 +796,23 @@ class NGraphPrefetchDatasetOp::Dataset : public DatasetBase {
     condition_variable cond_var_;
     PrefetchAutotuner auto_tuner_ GUARDED_BY(mu_);
     std::deque<BufferElement> buffer_ GUARDED_BY(mu_);
+    // Total size of the elements in `buffer_`
+    int64 buffer_bytes_ GUARDED_BY(mu_) = 0;
     std::unique_ptr<Thread> prefetch_thread_ GUARDED_BY(mu_);
     bool cancelled_ GUARDED_BY(mu_) = false;
     bool prefetch_thread_finished_ GUARDED_BY(mu_) = false;
 
     std::atomic<int64> slack_us_;
+    // Moving averages of the time the consumer takes per element, measured
+    // by the nGraph encapsulate, and of the time the prefetch thread takes
+    // to produce an element, including the copy to the device. Used by the
+    // prefetch thread only
+    int64 consumer_step_us_{0};
+    int64 produce_us_{0};
+    // The consumers that gave no tensors back within STALL_TIMEOUT_MS. Used
+    // by the prefetch thread only
+    std::set<string> stalled_consumers_;
     ResourceMgr* m_resource_mgr{nullptr};
-    const int m_buffer_size{0};
   };
   const DatasetBase* const input_;
   const int64 buffer_size_;
@@ -555,6 +821,10 @@ class NGraphPrefetchDatasetOp::Dataset : public DatasetBase {
   // execution.
   const int64 slack_period_;
 
+  // Graph id and name of the iterator node, see NGraphPrefetchDatasetOp
+  const int graph_id_;
+  const string iterator_name_;
+
   // Store the resource manager
   ResourceMgr* m_resource_mgr{nullptr};
 };
@@ -576,7 +846,8 @@ void NGraphPrefetchDatasetOp::MakeDataset(OpKernelContext* ctx,
     metrics::RecordTFDataAutotune(kDatasetName);
   }
 
-  *output = new Dataset(ctx, input, buffer_size, slack_period_);
+  *output = new Dataset(ctx, input, buffer_size, slack_period_, graph_id_,
+                        iterator_name_);
 }
 
 namespace {
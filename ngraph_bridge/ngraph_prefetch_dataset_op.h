@@ -54,6 +54,12 @@ class NGraphPrefetchDatasetOp : public UnaryDatasetOpKernel {
     if (ctx->HasAttr("slack_period")) {
       OP_REQUIRES_OK(ctx, ctx->GetAttr("slack_period", &slack_period_));
     }
+    if (ctx->HasAttr("ngraph_iterator")) {
+      OP_REQUIRES_OK(ctx, ctx->GetAttr("ngraph_iterator", &iterator_name_));
+    }
+    if (ctx->HasAttr("ngraph_graph_id")) {
+      OP_REQUIRES_OK(ctx, ctx->GetAttr("ngraph_graph_id", &graph_id_));
+    }
   }
 
  protected:
@@ -63,6 +69,10 @@ class NGraphPrefetchDatasetOp : public UnaryDatasetOpKernel {
  private:
   class Dataset;
   int64 slack_period_ = 0;
+  // Graph id and name of the iterator node, the NGraphEncapsulates consuming
+  // it are looked up in the NGraphCatalog
+  int graph_id_ = -1;
+  string iterator_name_;
 };
 
 }  // namespace data
@@ -18,6 +18,8 @@
 #define NGRAPH_PREFETCH_SHARED_DATA_H_
 #pragma once
 
+#include <algorithm>
+#include <atomic>
 #include <mutex>
 #include <ostream>
 #include <string>
@@ -27,6 +29,7 @@
 
 #include "ngraph/runtime/tensor.hpp"
 
+#include "ngraph_bridge/ngraph_pipelined_tensors.h"
 #include "ngraph_bridge/thread_safe_queue.h"
 
 namespace ng = ngraph;
@@ -40,11 +43,15 @@ class NGraphPrefetchSharedResouce : public ResourceBase {
  public:
   explicit NGraphPrefetchSharedResouce(
       const std::string& ng_enc_op_name, int cluster_id, int graph_id,
-      const map<int, int>& prefetch_input_index_map)
+      const map<int, int>& prefetch_input_index_map,
+      const std::string& iterator_name = "",
+      const shared_ptr<PipelinedTensorsStore>& pipelined_tensor_store = nullptr)
       : m_ng_enc_op_name(ng_enc_op_name),
         m_graph_id(graph_id),
         m_cluster_id(cluster_id),
-        m_prefetch_input_index_map(prefetch_input_index_map) {}
+        m_prefetch_input_index_map(prefetch_input_index_map),
+        m_iterator_name(iterator_name),
+        m_pipelined_tensor_store(pipelined_tensor_store) {}
 
   // Returns a debug string for *this.
   string DebugString() const override { return "NGraphPrefetchSharedResouce"; }
@@ -54,73 +61,193 @@ class NGraphPrefetchSharedResouce : public ResourceBase {
   std::string GetName() const { return m_ng_enc_op_name; }
   int GetGraphId() const { return m_graph_id; }
   int GetClusterId() const { return m_cluster_id; }
+  // Name of the iterator node whose prefetch dataset fills this resource
+  std::string GetIteratorName() const { return m_iterator_name; }
 
   static constexpr const char* RESOURCE_NAME = "NG_PREFETCH_DATA";
+  // There is one resource per NGEncOp and iterator. The consumer key is the
+  // NGraphCatalog node key (GraphId_nodename) of the NGEncOp
+  static std::string GetResourceName(const std::string& consumer_key,
+                                     const std::string& iterator_name) {
+    return std::string(RESOURCE_NAME) + "_" + consumer_key + "_" +
+           iterator_name;
+  }
   static constexpr const char* CONTAINER_NAME = "NG_PREFETCH_DATA_CONTAINER";
   static constexpr const char* NGRAPH_TF_USE_PREFETCH =
       "NGRAPH_TF_USE_PREFETCH";
+  // How long the NGEncOp waits for the prefetcher to copy the inputs of an
+  // iteration, before it copies them itself
+  static constexpr int64 READY_TIMEOUT_MS = 1000;
+  // How often the prefetcher checks whether it is cancelled, while it waits
+  // for the NGEncOp to give it tensors to copy to
+  static constexpr int64 TRANSFER_TIMEOUT_MS = 100;
+  // How long the prefetcher waits for an NGEncOp to give it tensors before
+  // it skips the NGEncOp for the element, so that a stalled NGEncOp does not
+  // hold up the others consuming the same iterator. The NGEncOp stops
+  // waiting for the element after READY_TIMEOUT_MS anyway
+  static constexpr int64 STALL_TIMEOUT_MS = READY_TIMEOUT_MS;
 
   struct IOTensorBundle {
     int Id;
     std::vector<shared_ptr<ng::runtime::Tensor>> Inputs;
     std::vector<shared_ptr<ng::runtime::Tensor>> Outputs;
+    // Set by the prefetcher to the sequence number of the iterator element
+    // whose inputs it copied to the tensors
+    int64 Sequence;
   };
 
   // Adds the given nGraph input output tensors to write to
   // Uses m_prefetch_input_indexes to figure out which input tensors
   // are prefetched and writes into them
   // This is called by the NGraphEncapOp
-  void AddNextIOTensorBundleForDeviceTransfer(IOTensorBundle next) {
-    m_tf_2_ng.Add(std::move(next));
+  // Fails if the shared data is terminated
+  Status AddNextIOTensorBundleForDeviceTransfer(IOTensorBundle next) {
+    return m_tf_2_ng.Add(std::move(next));
   }
 
   // Returns the Input output tensors to be used to copy TF tensors to NG device
   // This will be called by the prefetcher
-  IOTensorBundle GetNextIOTensorBundleForDeviceTransfer() {
-    return std::move(m_tf_2_ng.GetNextAvailable());
+  // Returns DeadlineExceeded if there are none within the timeout
+  Status GetNextIOTensorBundleForDeviceTransfer(IOTensorBundle* next,
+                                                absl::Duration timeout) {
+    return m_tf_2_ng.TryGetNextAvailable(next, timeout);
   }
 
   // Adds the given nGraph input output tensors to write to
   // This is called by the prefetcher to add Tensors that are copied
   // from TF tensor and are now ready for the next iteration
-  void AddNextIOTensorBundleReadyForDeviceExecution(IOTensorBundle next) {
-    m_ng_2_tf.Add(std::move(next));
+  // Fails if the shared data is terminated
+  Status AddNextIOTensorBundleReadyForDeviceExecution(IOTensorBundle next) {
+    return m_ng_2_tf.Add(std::move(next));
   }
 
   // Returns the Input output tensors ready to be executed by NG device
   // This will be called by the NGEncOp
-  IOTensorBundle GetNextIOTensorBundleReadyForDeviceExecution() {
-    return std::move(m_ng_2_tf.GetNextAvailable());
+  // Returns DeadlineExceeded if there are none within the timeout
+  Status GetNextIOTensorBundleReadyForDeviceExecution(IOTensorBundle* next,
+                                                      absl::Duration timeout) {
+    return m_ng_2_tf.TryGetNextAvailable(next, timeout);
   }
 
-  void SetBufferDepth(int depth) {
-    m_mutex.Lock();
-    // TODO assert m_prefetch_buffer_depth == -1 || m_prefetch_buffer_depth ==
-    // depth
-    // To make sure we never try to set a different depth once it is set
-    m_prefetch_buffer_depth = depth;
+  // Stops the prefetching, e.g. when the prefetch iterator is destroyed. The
+  // threads waiting for tensors or for the buffer depth get the status. The
+  // tensors in the queues can still be taken (to give them back to the
+  // PipelinedTensorsStore), after which the Get calls return the status
+  void Terminate(const Status& status) {
+    m_tf_2_ng.Terminate(status);
+    m_ng_2_tf.Terminate(status);
+    absl::MutexLock lock(&m_mutex);
+    m_terminated = true;
     m_cv.SignalAll();
-    m_mutex.Unlock();
   }
-  int GetBufferDepth() {
+
+  bool IsTerminated() { return m_tf_2_ng.IsTerminated(); }
+
+  // Called by the prefetcher with the buffer limit of the prefetch dataset
+  // for every element it copies. Only the first call counts: the depth is
+  // fixed when the pipeline starts, even though the autotuner can raise or
+  // lower the buffer limit later
+  void SetBufferDepth(int depth) {
+    absl::MutexLock lock(&m_mutex);
+    if (m_prefetch_buffer_depth == -1) {
+      m_prefetch_buffer_depth = std::max(depth, 1);
+      m_cv.SignalAll();
+    }
+  }
+
+  // Waits till SetBufferDepth is called. Fails if the shared data is
+  // terminated first
+  Status GetBufferDepth(int* depth) {
     // Locking GetBufferDepth till SetBufferDepth is called
     // In case of races where Get is called before Set,
     // We want to ensure Set finishes before Get returns
-    m_mutex.ReaderLock();
-    while (m_prefetch_buffer_depth == -1) {
+    absl::MutexLock lock(&m_mutex);
+    while (m_prefetch_buffer_depth == -1 && !m_terminated) {
       m_cv.Wait(&m_mutex);
     }
-    m_mutex.ReaderUnlock();
-    return m_prefetch_buffer_depth;
+    if (m_prefetch_buffer_depth == -1) {
+      return errors::Cancelled("Prefetching of ", m_ng_enc_op_name,
+                               " was terminated");
+    }
+    *depth = m_prefetch_buffer_depth;
+    return Status::OK();
+  }
+
+  // Called by the prefetcher before SetBufferDepth, with the sequence
+  // number of the element it copies. Only the first call counts: the
+  // elements before that one were buffered before the shared data existed,
+  // so the NGEncOp copies their inputs itself
+  void SetFirstPrefetchedSequence(int64 sequence) {
+    absl::MutexLock lock(&m_mutex);
+    if (m_first_prefetched_sequence == -1) {
+      m_first_prefetched_sequence = sequence;
+    }
   }
 
-  void IncrSkipCount() { m_skip_count++; }
-  int GetSkipCount() { return m_skip_count; }
+  // Valid once GetBufferDepth has returned OK
+  int64 GetFirstPrefetchedSequence() {
+    absl::MutexLock lock(&m_mutex);
+    return m_first_prefetched_sequence;
+  }
+
+  // Returns the sequence number of the iterator element the NGEncOp gets in
+  // this step. The NGEncOp consumes one element per step, starting with
+  // element 0 in the step that creates the shared data
+  int64 NextStepSequence() { return m_step_sequence++; }
+
+  // Number of IOTensorBundles that cycle between the NGEncOp and the
+  // prefetcher, i.e. the number of steps the device copies can run ahead of
+  // the execution. The NGEncOp adds bundles till it matches the buffer depth
+  void IncrNumSlots() { m_num_slots++; }
+  void DecrNumSlots() { m_num_slots--; }
+  int GetNumSlots() { return m_num_slots; }
+
+  // Gives the tensors of a bundle that is not used any more, e.g. because
+  // the shared data was terminated while the prefetcher was copying to them,
+  // back to the PipelinedTensorsStore the NGEncOp took them from
+  void ReturnIOTensorBundle(const IOTensorBundle& bundle) {
+    if (m_pipelined_tensor_store != nullptr) {
+      m_pipelined_tensor_store->return_tensors(bundle.Id);
+    }
+    DecrNumSlots();
+  }
 
   const map<int, int>& GetPrefetchInputIndexesMap() {
     return m_prefetch_input_index_map;
   }
 
+  // Called by the NGEncOp at every step. The interval between the calls is
+  // the time the consumer takes per prefetched element
+  void RecordStep(int64 now_us) {
+    absl::MutexLock lock(&m_timing_mutex);
+    if (m_last_step_us > 0 && now_us > m_last_step_us) {
+      m_step_time_us = MovingAverage(m_step_time_us, now_us - m_last_step_us);
+    }
+    m_last_step_us = now_us;
+  }
+
+  // Called by the prefetcher with the time it took to copy the prefetched
+  // inputs of an element to the device tensors
+  void RecordTransferTime(int64 transfer_time_us) {
+    absl::MutexLock lock(&m_timing_mutex);
+    m_transfer_time_us = MovingAverage(m_transfer_time_us, transfer_time_us);
+  }
+
+  // Moving averages of the above, 0 till there is a measurement
+  int64 GetStepTimeUs() {
+    absl::MutexLock lock(&m_timing_mutex);
+    return m_step_time_us;
+  }
+  int64 GetTransferTimeUs() {
+    absl::MutexLock lock(&m_timing_mutex);
+    return m_transfer_time_us;
+  }
+
+  // Exponential moving average with a weight of 1/8 for the new sample
+  static int64 MovingAverage(int64 average, int64 sample) {
+    return average == 0 ? sample : average + (sample - average) / 8;
+  }
+
  private:
   const std::string m_ng_enc_op_name;
   const int m_graph_id;
@@ -130,6 +257,8 @@ class NGraphPrefetchSharedResouce : public ResourceBase {
   // Key : indexes of IOTensorBundle.Inputs that are prefetched
   // Value : corresponding index for TF PrefetchBuffer
   const map<int, int> m_prefetch_input_index_map;
+  const std::string m_iterator_name;
+  const shared_ptr<PipelinedTensorsStore> m_pipelined_tensor_store;
   // We need to maintain two queues as follows:
   // ----------+------------+------------+------------------------------------+
   // Queue     | Writer     | Reader     | Comments                           |
@@ -150,16 +279,31 @@ class NGraphPrefetchSharedResouce : public ResourceBase {
   //            NGEncOp pulls Input/Output tensors from m_tf_2_ng (from previous
   //            iteration) and executes
   // 3          Repeat
+  //
+  // After the first iteration the NGEncOp pushes more Input/Output tensors
+  // to the queue, till there are as many of them in flight as the buffer
+  // depth of the prefetch dataset (see IncrNumSlots). So the prefetcher can
+  // copy the inputs of up to that many iterations ahead
 
   ThreadSafeQueue<IOTensorBundle> m_tf_2_ng;
   ThreadSafeQueue<IOTensorBundle> m_ng_2_tf;
 
   int m_prefetch_buffer_depth{-1};
-  int m_skip_count{0};
+  int64 m_first_prefetched_sequence{-1};
+  bool m_terminated{false};
+  std::atomic<int64> m_step_sequence{0};
+  std::atomic<int> m_num_slots{0};
 
-  // Mutex and cond var to control m_prefetch_buffer_depth
+  // Mutex and cond var to control m_prefetch_buffer_depth,
+  // m_first_prefetched_sequence and m_terminated
   absl::CondVar m_cv;
   absl::Mutex m_mutex;
+
+  // Timings fed back to the prefetcher, guarded by m_timing_mutex
+  int64 m_last_step_us{0};
+  int64 m_step_time_us{0};
+  int64 m_transfer_time_us{0};
+  absl::Mutex m_timing_mutex;
 };
 
 }  // namespace ngraph_bridge
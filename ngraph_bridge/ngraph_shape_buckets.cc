@@ -0,0 +1,370 @@
+/*******************************************************************************
+ * Copyright 2019 Intel Corporation
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ *******************************************************************************/
+
+#include "ngraph_bridge/ngraph_shape_buckets.h"
+
+#include <algorithm>
+#include <cstring>
+
+#include "tensorflow/core/common_runtime/dma_helper.h"
+#include "tensorflow/core/lib/core/errors.h"
+#include "tensorflow/core/lib/strings/numbers.h"
+#include "tensorflow/core/lib/strings/str_util.h"
+#include "tensorflow/core/lib/strings/strcat.h"
+
+using namespace std;
+
+namespace tensorflow {
+
+namespace ngraph_bridge {
+
+// Parses "<prefix><index>:<dim>", e.g. "in0:1"
+static bool ParseIndexAndDim(const string& str, const string& prefix,
+                             int* index, int* dim) {
+  if (!str_util::StartsWith(str, prefix)) {
+    return false;
+  }
+  std::vector<string> fields = str_util::Split(str.substr(prefix.size()), ':');
+  return fields.size() == 2 && strings::safe_strto32(fields[0], index) &&
+         strings::safe_strto32(fields[1], dim) && *index >= 0 && *dim >= 0;
+}
+
+//---------------------------------------------------------------------------
+//  NGraphShapeBuckets::Parse
+//---------------------------------------------------------------------------
+Status NGraphShapeBuckets::Parse(const string& spec,
+                                 NGraphShapeBuckets* buckets) {
+  buckets->m_input_rules.clear();
+  buckets->m_output_rules.clear();
+  for (const string& rule : str_util::Split(spec, ';', str_util::SkipEmpty())) {
+    std::vector<string> sides = str_util::Split(rule, '=');
+    if (sides.size() != 2) {
+      return errors::InvalidArgument("Invalid shape bucket rule: ", rule);
+    }
+    if (str_util::StartsWith(sides[0], "in")) {
+      InputRule input_rule;
+      if (!ParseIndexAndDim(sides[0], "in", &input_rule.input_index,
+                            &input_rule.dim)) {
+        return errors::InvalidArgument("Invalid shape bucket rule: ", rule);
+      }
+      if (sides[1] != "pow2") {
+        for (const string& boundary : str_util::Split(sides[1], ',')) {
+          int64 value;
+          if (!strings::safe_strto64(boundary, &value) || value <= 0 ||
+              (!input_rule.boundaries.empty() &&
+               value <= input_rule.boundaries.back())) {
+            return errors::InvalidArgument(
+                "Shape bucket boundaries must be increasing positive "
+                "integers or pow2, but got: ",
+                rule);
+          }
+          input_rule.boundaries.push_back(value);
+        }
+      }
+      buckets->m_input_rules.push_back(input_rule);
+    } else {
+      OutputRule output_rule;
+      if (!ParseIndexAndDim(sides[0], "out", &output_rule.output_index,
+                            &output_rule.dim) ||
+          !ParseIndexAndDim(sides[1], "in", &output_rule.input_index,
+                            &output_rule.input_dim)) {
+        return errors::InvalidArgument("Invalid shape bucket rule: ", rule);
+      }
+      buckets->m_output_rules.push_back(output_rule);
+    }
+  }
+  if (buckets->m_input_rules.empty() && !buckets->m_output_rules.empty()) {
+    return errors::InvalidArgument(
+        "Shape bucket rules for outputs require rules for inputs: ", spec);
+  }
+  return Status::OK();
+}
+
+// Parses "<prefix>(<tensor>):<dim>", e.g. "in(input_ids:0):1". A tensor
+// without an output index is output 0 of the node
+static bool ParseTensorAndDim(const string& str, const string& prefix,
+                              string* tensor, string* dim) {
+  if (!str_util::StartsWith(str, prefix + "(")) {
+    return false;
+  }
+  auto name_end = str.rfind(')');
+  int32 dim_value;
+  if (name_end == string::npos || name_end <= prefix.size() + 1 ||
+      name_end + 1 >= str.size() || str[name_end + 1] != ':' ||
+      !strings::safe_strto32(str.substr(name_end + 2), &dim_value) ||
+      dim_value < 0) {
+    return false;
+  }
+  *tensor = str.substr(prefix.size() + 1, name_end - prefix.size() - 1);
+  if (tensor->find(':') == string::npos) {
+    *tensor += ":0";
+  }
+  *dim = str.substr(name_end + 2);
+  return true;
+}
+
+static int FindTensor(const std::vector<string>& names, const string& name) {
+  auto itr = std::find(names.begin(), names.end(), name);
+  return itr == names.end() ? -1 : itr - names.begin();
+}
+
+//---------------------------------------------------------------------------
+//  NGraphShapeBuckets::ScopeToEncapsulate
+//---------------------------------------------------------------------------
+Status NGraphShapeBuckets::ScopeToEncapsulate(
+    const string& spec, const std::vector<string>& input_names,
+    const std::vector<string>& output_names, string* encapsulate_spec) {
+  std::vector<string> input_rules, output_rules;
+  for (const string& rule : str_util::Split(spec, ';', str_util::SkipEmpty())) {
+    std::vector<string> sides = str_util::Split(rule, '=');
+    string tensor, dim;
+    if (sides.size() != 2) {
+      return errors::InvalidArgument("Invalid shape bucket rule: ", rule);
+    }
+    if (ParseTensorAndDim(sides[0], "in", &tensor, &dim)) {
+      int input_index = FindTensor(input_names, tensor);
+      if (input_index >= 0) {
+        input_rules.push_back(
+            strings::StrCat("in", input_index, ":", dim, "=", sides[1]));
+      }
+    } else if (ParseTensorAndDim(sides[0], "out", &tensor, &dim)) {
+      string input_tensor, input_dim;
+      if (!ParseTensorAndDim(sides[1], "in", &input_tensor, &input_dim)) {
+        return errors::InvalidArgument("Invalid shape bucket rule: ", rule);
+      }
+      int output_index = FindTensor(output_names, tensor);
+      if (output_index < 0) {
+        continue;
+      }
+      int input_index = FindTensor(input_names, input_tensor);
+      if (input_index < 0) {
+        return errors::InvalidArgument(
+            "Shape bucket rule ", rule, " slices an output of an encapsulate ",
+            "that does not have ", input_tensor, " as input");
+      }
+      output_rules.push_back(strings::StrCat(
+          "out", output_index, ":", dim, "=in", input_index, ":", input_dim));
+    } else {
+      return errors::InvalidArgument(
+          "Shape bucket rules in the rewriter config must name the tensors, "
+          "e.g. in(input_ids:0):1=16,32, but got: ",
+          rule);
+    }
+  }
+  if (input_rules.empty() && !output_rules.empty()) {
+    return errors::InvalidArgument(
+        "Shape bucket rules slice outputs of an encapsulate, but do not pad "
+        "any of its inputs: ",
+        spec);
+  }
+  input_rules.insert(input_rules.end(), output_rules.begin(),
+                     output_rules.end());
+  *encapsulate_spec = str_util::Join(input_rules, ";");
+  return Status::OK();
+}
+
+//---------------------------------------------------------------------------
+//  NGraphShapeBuckets::Validate
+//---------------------------------------------------------------------------
+Status NGraphShapeBuckets::Validate(const std::vector<bool>& input_is_static,
+                                    int num_outputs) const {
+  for (const auto& rule : m_input_rules) {
+    if (rule.input_index >= input_is_static.size()) {
+      return errors::InvalidArgument("Shape bucket rule for input ",
+                                     rule.input_index, ", but there are only ",
+                                     input_is_static.size(), " inputs");
+    }
+    if (input_is_static[rule.input_index]) {
+      return errors::InvalidArgument("Shape bucket rule for input ",
+                                     rule.input_index,
+                                     ", which is a static input");
+    }
+  }
+  for (const auto& rule : m_output_rules) {
+    if (rule.output_index >= num_outputs) {
+      return errors::InvalidArgument("Shape bucket rule for output ",
+                                     rule.output_index, ", but there are only ",
+                                     num_outputs, " outputs");
+    }
+    if (rule.input_index >= input_is_static.size()) {
+      return errors::InvalidArgument("Shape bucket rule for output ",
+                                     rule.output_index, " refers to input ",
+                                     rule.input_index, ", but there are only ",
+                                     input_is_static.size(), " inputs");
+    }
+  }
+  return Status::OK();
+}
+
+//---------------------------------------------------------------------------
+//  NGraphShapeBuckets::HasOutputRule
+//---------------------------------------------------------------------------
+bool NGraphShapeBuckets::HasOutputRule(int output_index) const {
+  for (const auto& rule : m_output_rules) {
+    if (rule.output_index == output_index) {
+      return true;
+    }
+  }
+  return false;
+}
+
+//---------------------------------------------------------------------------
+//  NGraphShapeBuckets::GetBucketSize
+//---------------------------------------------------------------------------
+int64 NGraphShapeBuckets::GetBucketSize(int input_index, int dim,
+                                        int64 size) const {
+  for (const auto& rule : m_input_rules) {
+    if (rule.input_index != input_index || rule.dim != dim) {
+      continue;
+    }
+    if (rule.boundaries.empty()) {
+      int64 bucket_size = 1;
+      while (bucket_size < size) {
+        bucket_size <<= 1;
+      }
+      return size == 0 ? size : bucket_size;
+    }
+    auto itr =
+        std::lower_bound(rule.boundaries.begin(), rule.boundaries.end(), size);
+    return itr == rule.boundaries.end() ? size : *itr;
+  }
+  return size;
+}
+
+//---------------------------------------------------------------------------
+//  NGraphShapeBuckets::PadInputs
+//---------------------------------------------------------------------------
+Status NGraphShapeBuckets::PadInputs(
+    const std::vector<Tensor>& tf_input_tensors,
+    std::vector<Tensor>* padded_input_tensors) const {
+  padded_input_tensors->clear();
+  for (int i = 0; i < tf_input_tensors.size(); i++) {
+    const Tensor& input_tensor = tf_input_tensors[i];
+    TensorShape padded_shape(input_tensor.shape());
+    for (const auto& rule : m_input_rules) {
+      if (rule.input_index != i) {
+        continue;
+      }
+      if (rule.dim >= input_tensor.dims()) {
+        return errors::InvalidArgument(
+            "Shape bucket rule for dimension ", rule.dim, " of input ", i,
+            ", which has shape ", input_tensor.shape().DebugString());
+      }
+      padded_shape.set_dim(
+          rule.dim,
+          GetBucketSize(i, rule.dim, input_tensor.dim_size(rule.dim)));
+    }
+    if (padded_shape == input_tensor.shape()) {
+      padded_input_tensors->push_back(input_tensor);
+      continue;
+    }
+    Tensor padded_tensor(input_tensor.dtype(), padded_shape);
+    void* padded_data = DMAHelper::base(&padded_tensor);
+    if (padded_data != nullptr) {
+      std::memset(padded_data, 0, padded_tensor.TotalBytes());
+    }
+    TF_RETURN_IF_ERROR(CopyCorner(input_tensor, &padded_tensor));
+    padded_input_tensors->push_back(padded_tensor);
+  }
+  return Status::OK();
+}
+
+//---------------------------------------------------------------------------
+//  NGraphShapeBuckets::GetOutputShape
+//---------------------------------------------------------------------------
+Status NGraphShapeBuckets::GetOutputShape(
+    int output_index, const TensorShape& padded_shape,
+    const std::vector<Tensor>& tf_input_tensors,
+    TensorShape* output_shape) const {
+  *output_shape = padded_shape;
+  for (const auto& rule : m_output_rules) {
+    if (rule.output_index != output_index) {
+      continue;
+    }
+    const Tensor& input_tensor = tf_input_tensors[rule.input_index];
+    if (rule.dim >= padded_shape.dims() ||
+        rule.input_dim >= input_tensor.dims() ||
+        input_tensor.dim_size(rule.input_dim) >
+            padded_shape.dim_size(rule.dim)) {
+      return errors::InvalidArgument(
+          "Cannot apply the shape bucket rule for dimension ", rule.dim,
+          " of output ", output_index, " with shape ",
+          padded_shape.DebugString(), " and dimension ", rule.input_dim,
+          " of input ", rule.input_index, " with shape ",
+          input_tensor.shape().DebugString());
+    }
+    output_shape->set_dim(rule.dim, input_tensor.dim_size(rule.input_dim));
+  }
+  return Status::OK();
+}
+
+//---------------------------------------------------------------------------
+//  NGraphShapeBuckets::CopyCorner
+//---------------------------------------------------------------------------
+Status NGraphShapeBuckets::CopyCorner(const Tensor& src, Tensor* dst) {
+  if (src.dtype() != dst->dtype() || src.dims() != dst->dims() ||
+      !DataTypeCanUseMemcpy(src.dtype())) {
+    return errors::Internal(
+        "Cannot copy a tensor of type ", DataType_Name(src.dtype()),
+        " and shape ", src.shape().DebugString(), " to a tensor of type ",
+        DataType_Name(dst->dtype()), " and shape ", dst->shape().DebugString());
+  }
+  const int rank = src.dims();
+  const int64 element_size = DataTypeSize(src.dtype());
+  const char* src_data = static_cast<const char*>(DMAHelper::base(&src));
+  char* dst_data = static_cast<char*>(DMAHelper::base(dst));
+  if (rank == 0) {
+    std::memcpy(dst_data, src_data, element_size);
+    return Status::OK();
+  }
+
+  // Copy the region row by row, a row being the innermost dimension
+  std::vector<int64> extent(rank), src_stride(rank), dst_stride(rank);
+  for (int d = rank - 1; d >= 0; d--) {
+    extent[d] = std::min(src.dim_size(d), dst->dim_size(d));
+    if (extent[d] == 0) {
+      return Status::OK();
+    }
+    src_stride[d] = (d == rank - 1) ? element_size
+                                    : src_stride[d + 1] * src.dim_size(d + 1);
+    dst_stride[d] = (d == rank - 1) ? element_size
+                                    : dst_stride[d + 1] * dst->dim_size(d + 1);
+  }
+  const int64 row_size = extent[rank - 1] * element_size;
+  std::vector<int64> index(rank, 0);
+  while (true) {
+    int64 src_offset = 0, dst_offset = 0;
+    for (int d = 0; d < rank - 1; d++) {
+      src_offset += index[d] * src_stride[d];
+      dst_offset += index[d] * dst_stride[d];
+    }
+    std::memcpy(dst_data + dst_offset, src_data + src_offset, row_size);
+
+    int d = rank - 2;
+    while (d >= 0 && ++index[d] == extent[d]) {
+      index[d] = 0;
+      d--;
+    }
+    if (d < 0) {
+      break;
+    }
+  }
+  return Status::OK();
+}
+
+}  // namespace ngraph_bridge
+
+}  // namespace tensorflow
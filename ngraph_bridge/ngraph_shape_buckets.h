@@ -0,0 +1,118 @@
+/*******************************************************************************
+ * Copyright 2019 Intel Corporation
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ *******************************************************************************/
+
+#ifndef NGRAPH_TF_BRIDGE_SHAPE_BUCKETS_H_
+#define NGRAPH_TF_BRIDGE_SHAPE_BUCKETS_H_
+#pragma once
+
+#include <string>
+#include <vector>
+
+#include "tensorflow/core/framework/tensor.h"
+#include "tensorflow/core/framework/tensor_shape.h"
+#include "tensorflow/core/lib/core/status.h"
+
+namespace tensorflow {
+
+namespace ngraph_bridge {
+
+// NGraphShapeBuckets pads the inputs of an encapsulate up to a small set of
+// bucket shapes, so that a few executables serve inputs of many different
+// shapes (e.g. the sequence lengths of NLP requests) instead of compiling one
+// executable per shape.
+//
+// The policy is set per encapsulate by the _ngraph_shape_buckets attribute,
+// a list of rules separated by ';':
+//   in<i>:<d>=<b0>,<b1>,...  pads dimension d of input i up to the smallest
+//                            boundary that is not less than its size
+//   in<i>:<d>=pow2           pads dimension d of input i up to the next power
+//                            of two
+//   out<j>:<d>=in<i>:<e>     slices dimension d of output j back to the size
+//                            of dimension e of input i before padding
+// For example "in0:1=16,32,64,128;in1:1=16,32,64,128;out0:1=in0:1"
+//
+// The shape_buckets option of the rewriter config applies to every
+// encapsulate of the graph, so its rules name the TF tensors instead of the
+// indexes, e.g. "in(input_ids:0):1=16,32;out(logits:0):1=in(input_ids:0):1".
+// The encapsulation pass rewrites them to the index form of each encapsulate
+// (see ScopeToEncapsulate).
+//
+// Sizes larger than the last boundary are not padded. Inputs are padded with
+// zeros, masking the padded elements is left to the model.
+class NGraphShapeBuckets {
+ public:
+  static Status Parse(const std::string& spec, NGraphShapeBuckets* buckets);
+
+  // Rewrites the rules of spec, which name the tensors, to the index form for
+  // an encapsulate with the given input and output tensors. Rules for tensors
+  // that are not inputs or outputs of the encapsulate are dropped, so
+  // encapsulate_spec is empty if no rule names one of its inputs
+  static Status ScopeToEncapsulate(const std::string& spec,
+                                   const std::vector<std::string>& input_names,
+                                   const std::vector<std::string>& output_names,
+                                   std::string* encapsulate_spec);
+
+  bool IsEnabled() const { return !m_input_rules.empty(); }
+
+  // Checks the rules against the inputs and outputs of the encapsulate.
+  // Static inputs cannot be padded
+  Status Validate(const std::vector<bool>& input_is_static,
+                  int num_outputs) const;
+
+  bool HasOutputRule(int output_index) const;
+
+  // The size dimension of an input is padded to
+  int64 GetBucketSize(int input_index, int dim, int64 size) const;
+
+  // Pads the inputs up to their bucket shapes. Inputs that do not need
+  // padding are shared with tf_input_tensors
+  Status PadInputs(const std::vector<Tensor>& tf_input_tensors,
+                   std::vector<Tensor>* padded_input_tensors) const;
+
+  // Shape of an output after slicing it back to the shapes of the inputs
+  // before padding
+  Status GetOutputShape(int output_index, const TensorShape& padded_shape,
+                        const std::vector<Tensor>& tf_input_tensors,
+                        TensorShape* output_shape) const;
+
+  // Copies the elements of src that are within the shape of dst, in every
+  // dimension, to the same position in dst
+  static Status CopyCorner(const Tensor& src, Tensor* dst);
+
+ private:
+  struct InputRule {
+    int input_index;
+    int dim;
+    // Empty to round up to a power of two
+    std::vector<int64> boundaries;
+  };
+
+  struct OutputRule {
+    int output_index;
+    int dim;
+    int input_index;
+    int input_dim;
+  };
+
+  std::vector<InputRule> m_input_rules;
+  std::vector<OutputRule> m_output_rules;
+};
+
+}  // namespace ngraph_bridge
+
+}  // namespace tensorflow
+
+#endif  // NGRAPH_TF_BRIDGE_SHAPE_BUCKETS_H_
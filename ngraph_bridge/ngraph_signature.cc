@@ -0,0 +1,163 @@
+/*******************************************************************************
+ * Copyright 2019 Intel Corporation
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ *******************************************************************************/
+
+#include <cstring>
+#include <sstream>
+
+#include "tensorflow/core/lib/core/errors.h"
+#include "tensorflow/core/lib/hash/hash.h"
+
+#include "ngraph_bridge/ngraph_signature.h"
+#include "ngraph_bridge/ngraph_utils.h"
+
+using namespace std;
+
+namespace tensorflow {
+
+namespace ngraph_bridge {
+
+// Hash of the contents of a static input. The elements of string tensors
+// are hashed one by one, since their buffer holds the string objects
+static Status HashStaticInput(int index, const Tensor& tensor, uint64* hash) {
+  if (tensor.dtype() == DT_STRING) {
+    auto elements = tensor.flat<string>();
+    *hash = Hash64Combine(DT_STRING, elements.size());
+    for (int64 j = 0; j < elements.size(); j++) {
+      *hash = Hash64Combine(*hash, Hash64(elements(j)));
+    }
+    return Status::OK();
+  }
+  if (!DataTypeCanUseMemcpy(tensor.dtype())) {
+    return errors::Internal("Static input ", index,
+                            " has unsupported data type ",
+                            DataType_Name(tensor.dtype()));
+  }
+  StringPiece data = tensor.tensor_data();
+  *hash = Hash64(data.data(), data.size(), tensor.dtype());
+  return Status::OK();
+}
+
+// Compares the contents of two static inputs of the same data type
+static bool StaticInputsEqual(const Tensor& lhs, const Tensor& rhs) {
+  if (lhs.dtype() == DT_STRING) {
+    if (lhs.NumElements() != rhs.NumElements()) {
+      return false;
+    }
+    auto lhs_elements = lhs.flat<string>();
+    auto rhs_elements = rhs.flat<string>();
+    for (int64 j = 0; j < lhs_elements.size(); j++) {
+      if (lhs_elements(j) != rhs_elements(j)) {
+        return false;
+      }
+    }
+    return true;
+  }
+  StringPiece lhs_data = lhs.tensor_data();
+  StringPiece rhs_data = rhs.tensor_data();
+  if (lhs_data.size() != rhs_data.size()) {
+    return false;
+  }
+  return lhs_data.data() == rhs_data.data() ||
+         std::memcmp(lhs_data.data(), rhs_data.data(), lhs_data.size()) == 0;
+}
+
+//---------------------------------------------------------------------------
+//  NGraphSignature::Compute
+//---------------------------------------------------------------------------
+Status NGraphSignature::Compute(const std::vector<Tensor>& tf_input_tensors,
+                                const std::vector<bool>& input_is_static,
+                                std::vector<TensorShape>& input_shapes,
+                                std::vector<const Tensor*>& static_input_map) {
+  m_dims.clear();
+  m_static_inputs.clear();
+  m_static_hash = 0;
+
+  for (int i = 0; i < tf_input_tensors.size(); i++) {
+    const Tensor& input_tensor = tf_input_tensors[i];
+    input_shapes.push_back(input_tensor.shape());
+    m_dims.push_back(input_tensor.dims());
+    for (const auto& x : input_tensor.shape()) {
+      m_dims.push_back(x.size);
+    }
+  }
+
+  static_input_map.resize(tf_input_tensors.size());
+  for (int i = 0; i < tf_input_tensors.size(); i++) {
+    const Tensor& input_tensor = tf_input_tensors[i];
+    if (input_is_static[i]) {
+      uint64 input_hash;
+      TF_RETURN_IF_ERROR(HashStaticInput(i, input_tensor, &input_hash));
+      static_input_map[i] = &input_tensor;
+      m_static_inputs.push_back(input_tensor);
+      m_static_hash = Hash64Combine(m_static_hash, input_hash);
+    }
+  }
+
+  m_hash = Hash64Combine(
+      Hash64(reinterpret_cast<const char*>(m_dims.data()),
+             m_dims.size() * sizeof(int64)),
+      m_static_hash);
+  return Status::OK();
+}
+
+//---------------------------------------------------------------------------
+//  NGraphSignature::operator==
+//---------------------------------------------------------------------------
+bool NGraphSignature::operator==(const NGraphSignature& other) const {
+  if (m_hash != other.m_hash || m_static_hash != other.m_static_hash ||
+      m_dims != other.m_dims ||
+      m_static_inputs.size() != other.m_static_inputs.size()) {
+    return false;
+  }
+  // The hashes match, compare the static input contents to rule out a
+  // collision
+  for (size_t i = 0; i < m_static_inputs.size(); i++) {
+    const Tensor& lhs = m_static_inputs[i];
+    const Tensor& rhs = other.m_static_inputs[i];
+    if (lhs.dtype() != rhs.dtype() || !StaticInputsEqual(lhs, rhs)) {
+      return false;
+    }
+  }
+  return true;
+}
+
+//---------------------------------------------------------------------------
+//  NGraphSignature::ToString
+//---------------------------------------------------------------------------
+Status NGraphSignature::ToString(std::string* signature_str) const {
+  std::stringstream signature_ss;
+  size_t pos = 0;
+  while (pos < m_dims.size()) {
+    int64 rank = m_dims[pos++];
+    for (int64 d = 0; d < rank; d++) {
+      signature_ss << m_dims[pos++] << ",";
+    }
+    signature_ss << ";";
+  }
+
+  signature_ss << "/";
+
+  for (const auto& input_tensor : m_static_inputs) {
+    TF_RETURN_IF_ERROR(TensorToStream(signature_ss, input_tensor));
+    signature_ss << ";";
+  }
+  *signature_str = signature_ss.str();
+  return Status::OK();
+}
+
+}  // namespace ngraph_bridge
+
+}  // namespace tensorflow
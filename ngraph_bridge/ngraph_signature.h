@@ -0,0 +1,92 @@
+/*******************************************************************************
+ * Copyright 2019 Intel Corporation
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ *******************************************************************************/
+
+#ifndef NGRAPH_TF_BRIDGE_SIGNATURE_H_
+#define NGRAPH_TF_BRIDGE_SIGNATURE_H_
+#pragma once
+
+#include <functional>
+#include <string>
+#include <vector>
+
+#include "tensorflow/core/framework/tensor.h"
+#include "tensorflow/core/framework/tensor_shape.h"
+#include "tensorflow/core/lib/core/status.h"
+
+namespace tensorflow {
+
+namespace ngraph_bridge {
+
+// NGraphSignature is the key used to look up compiled executables.
+//
+// The signature of a set of input tensors consists of
+// 1. The shapes of all the inputs, stored as a flat vector of int64:
+//    [rank_0, dim_0_0, dim_0_1, ..., rank_1, dim_1_0, ...]
+// 2. A 64 bit hash of the contents of the static inputs
+//
+// The static input tensors themselves are held by reference (TF tensors
+// share their buffer on copy), so computing a signature does not copy or
+// format any tensor data. Two signatures are compared element by element
+// only when their hashes match, and the static input bytes are compared only
+// when everything else matches. The static inputs of type string are hashed
+// and compared element by element.
+//
+// ToString() produces the human readable form that was used as the cache key
+// earlier: "d0,d1,;d0,;/v0,v1,;". It is used for the AOT attribute lookup and
+// for logging.
+class NGraphSignature {
+ public:
+  NGraphSignature() = default;
+
+  // Use tensorflow input tensors to get input_shapes, static_input_map
+  // and compute the signature
+  Status Compute(const std::vector<Tensor>& tf_input_tensors,
+                 const std::vector<bool>& input_is_static,
+                 std::vector<TensorShape>& input_shapes,
+                 std::vector<const Tensor*>& static_input_map);
+
+  // Human readable form of the signature
+  Status ToString(std::string* signature_str) const;
+
+  size_t Hash() const { return m_hash; }
+
+  bool operator==(const NGraphSignature& other) const;
+  bool operator!=(const NGraphSignature& other) const {
+    return !(*this == other);
+  }
+
+ private:
+  std::vector<int64> m_dims;
+  std::vector<Tensor> m_static_inputs;
+  uint64 m_static_hash{0};
+  size_t m_hash{0};
+};
+
+}  // namespace ngraph_bridge
+
+}  // namespace tensorflow
+
+namespace std {
+template <>
+struct hash<tensorflow::ngraph_bridge::NGraphSignature> {
+  size_t operator()(
+      const tensorflow::ngraph_bridge::NGraphSignature& signature) const {
+    return signature.Hash();
+  }
+};
+}  // namespace std
+
+#endif  // NGRAPH_TF_BRIDGE_SIGNATURE_H_
@@ -112,6 +112,8 @@ void NGraphTensorManager::Initialize() {
     auto prefetch_index_map =
         NGraphCatalog::GetIndexesFromPrefetchedInputIndexMap(
             m_ng_encap_graph_id, m_ng_encap_node_name);
+    m_prefetch_iterator_name = NGraphCatalog::GetPrefetchIterator(
+        m_ng_encap_graph_id, m_ng_encap_node_name);
 
     // Since it's a map, the keys must be sorted
     for (auto itr : prefetch_index_map) {
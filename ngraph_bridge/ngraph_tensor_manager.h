@@ -97,6 +97,9 @@ class NGraphTensorManager {
     return m_prefetch_iterator_encap_index_map;
   }
 
+  // name of the iterator node the prefetched inputs come from
+  const string& GetPrefetchIteratorName() { return m_prefetch_iterator_name; }
+
   // input ng-variable shared name
   Status GetInputVariableSharedName(const int& input_index,
                                     string* input_var_shared_name);
@@ -146,6 +149,8 @@ class NGraphTensorManager {
   // value: index of the IteratorGetNext feeding into this input of NGEncap Op
   // Used to create prefetch shared data by NGEncap Op
   map<int, int> m_prefetch_iterator_encap_index_map;
+  // Used to name the prefetch shared data of this NGEncap Op
+  string m_prefetch_iterator_name;
 
   // Book-keeping for weights-on-device optimizations
   unordered_map<int, string> input_variable_shared_name_map;
@@ -223,6 +223,14 @@ Status TensorToStream(std::ostream& ostream, const Tensor& tensor) {
     case DT_BOOL:
       TensorDataToStream<bool>(ostream, n_elements, data);
       break;
+    case DT_STRING: {
+      // Quoted and escaped, so that the elements cannot run into each other
+      auto elements = tensor.flat<string>();
+      for (int64 i = 0; i < n_elements; i++) {
+        ostream << "\"" << str_util::CEscape(elements(i)) << "\",";
+      }
+      break;
+    }
     default:
       return errors::Internal("TensorToStream got unsupported data type ",
                               DataType_Name(tensor.dtype()));
@@ -0,0 +1,154 @@
+/*******************************************************************************
+ * Copyright 2019 Intel Corporation
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ *******************************************************************************/
+
+
+#include <algorithm>
+#include <cstdint>
+#include <new>
+
+#include "tensorflow/core/framework/allocator.h"
+#include "tensorflow/core/framework/types.h"
+#include "tensorflow/core/lib/core/errors.h"
+#include "tensorflow/core/platform/mem.h"
+
+#include "logging/ngraph_log.h"
+#include "ngraph_bridge/ngraph_zero_copy.h"
+
+using namespace std;
+namespace ng = ngraph;
+
+namespace tensorflow {
+
+namespace ngraph_bridge {
+
+namespace {
+
+// Frees the host buffer after the backend tensor using it. It is the deleter
+// of the shared_ptr returned by CreateHostTensor, which lets
+// GetHostTensorData find the buffer of any copy of that shared_ptr
+struct HostTensorDeleter {
+  void* data;
+  shared_ptr<ng::runtime::Tensor> tensor;
+
+  void operator()(ng::runtime::Tensor*) {
+    tensor.reset();
+    port::AlignedFree(data);
+    data = nullptr;
+  }
+};
+
+// Allocator used for a single TF tensor. The "allocation" is the buffer it
+// was created with, and deallocating it drops the reference to the slot
+class NGraphSlotAllocator : public Allocator {
+ public:
+  NGraphSlotAllocator(void* data, shared_ptr<NGraphPipelineSlot> slot)
+      : m_data(data), m_slot(slot) {}
+
+  string Name() override { return "ngraph_pipeline_slot"; }
+
+  void* AllocateRaw(size_t alignment, size_t num_bytes) override {
+    return m_data;
+  }
+
+  void DeallocateRaw(void* ptr) override { delete this; }
+
+ private:
+  void* m_data;
+  shared_ptr<NGraphPipelineSlot> m_slot;
+};
+
+}  // namespace
+
+//---------------------------------------------------------------------------
+//  CreateHostTensor
+//---------------------------------------------------------------------------
+shared_ptr<ng::runtime::Tensor> CreateHostTensor(
+    ng::runtime::Backend* backend, const ng::element::Type& element_type,
+    const ng::Shape& shape) {
+  size_t size_in_bytes = ng::shape_size(shape) * element_type.size();
+  // Aligned like the buffers of TF tensors, so that TF kernels can use the
+  // buffer as is
+  void* data = port::AlignedMalloc(std::max<size_t>(size_in_bytes, 1),
+                                   Allocator::kAllocatorAlignment);
+  if (data == nullptr) {
+    throw std::bad_alloc();
+  }
+  shared_ptr<ng::runtime::Tensor> tensor;
+  try {
+    tensor = backend->create_tensor(element_type, shape, data);
+  } catch (...) {
+    port::AlignedFree(data);
+    throw;
+  }
+  return shared_ptr<ng::runtime::Tensor>(tensor.get(),
+                                         HostTensorDeleter{data, tensor});
+}
+
+//---------------------------------------------------------------------------
+//  GetHostTensorData
+//---------------------------------------------------------------------------
+void* GetHostTensorData(const shared_ptr<ng::runtime::Tensor>& tensor) {
+  auto deleter = std::get_deleter<HostTensorDeleter>(tensor);
+  return deleter == nullptr ? nullptr : deleter->data;
+}
+
+//---------------------------------------------------------------------------
+//  CreateAliasTensor
+//---------------------------------------------------------------------------
+shared_ptr<ng::runtime::Tensor> CreateAliasTensor(
+    ng::runtime::Backend* backend, const Tensor& tf_tensor,
+    const shared_ptr<ng::runtime::Tensor>& pipelined_tensor) {
+  if (!DataTypeCanUseMemcpy(tf_tensor.dtype()) ||
+      tf_tensor.TotalBytes() != pipelined_tensor->get_size_in_bytes() ||
+      tf_tensor.NumElements() == 0) {
+    return nullptr;
+  }
+  void* data = const_cast<char*>(tf_tensor.tensor_data().data());
+  if (reinterpret_cast<uintptr_t>(data) % Allocator::kAllocatorAlignment != 0) {
+    return nullptr;
+  }
+  try {
+    return backend->create_tensor(pipelined_tensor->get_element_type(),
+                                  pipelined_tensor->get_shape(), data);
+  } catch (const std::exception& exp) {
+    NGRAPH_VLOG(4) << "Cannot create an alias tensor: " << exp.what();
+    return nullptr;
+  }
+}
+
+//---------------------------------------------------------------------------
+//  MakeZeroCopyTensor
+//---------------------------------------------------------------------------
+Status MakeZeroCopyTensor(DataType type, const TensorShape& shape, void* data,
+                          shared_ptr<NGraphPipelineSlot> slot, Tensor* tensor) {
+  if (!DataTypeCanUseMemcpy(type)) {
+    return errors::Internal("Cannot create a zero-copy tensor of type ",
+                            DataType_Name(type));
+  }
+  if (shape.num_elements() == 0) {
+    // TF does not allocate empty tensors, so the allocator would never be
+    // released
+    *tensor = Tensor(type, shape);
+    return Status::OK();
+  }
+  // The allocator deletes itself when TF deallocates the buffer
+  *tensor = Tensor(new NGraphSlotAllocator(data, slot), type, shape);
+  return Status::OK();
+}
+
+}  // namespace ngraph_bridge
+
+}  // namespace tensorflow
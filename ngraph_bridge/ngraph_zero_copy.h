@@ -0,0 +1,99 @@
+/*******************************************************************************
+ * Copyright 2019 Intel Corporation
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ *******************************************************************************/
+
+
+#ifndef NGRAPH_TF_BRIDGE_ZERO_COPY_H_
+#define NGRAPH_TF_BRIDGE_ZERO_COPY_H_
+#pragma once
+
+#include <memory>
+
+#include "tensorflow/core/framework/tensor.h"
+#include "tensorflow/core/framework/tensor_shape.h"
+#include "tensorflow/core/lib/core/status.h"
+
+#include "ngraph/runtime/backend.hpp"
+
+#include "ngraph_bridge/ngraph_pipelined_tensors.h"
+
+namespace tensorflow {
+
+namespace ngraph_bridge {
+
+// Zero-copy inputs and outputs for the backends that keep their tensors in
+// host memory.
+//
+// The inputs are bound to the executable with tensors that alias the buffers
+// of the TF input tensors (CreateAliasTensor), for the duration of the call.
+//
+// The output tensors of the pipeline are created over host buffers allocated
+// by the bridge (CreateHostTensor), instead of by the executable. After the
+// executable is called, the TF output tensors are created over the same
+// buffers (MakeZeroCopyTensor) instead of being allocated and filled with
+// read(). Each of these TF tensors holds a reference to the
+// NGraphPipelineSlot it was computed in, and the slot is returned to the
+// PipelinedTensorsStore only when TF has released all of them.
+
+// Creates a tensor of the backend over a newly allocated host buffer, that is
+// freed with the tensor
+std::shared_ptr<ng::runtime::Tensor> CreateHostTensor(
+    ng::runtime::Backend* backend, const ng::element::Type& element_type,
+    const ng::Shape& shape);
+
+// Returns the host buffer of a tensor created by CreateHostTensor, nullptr
+// for the other tensors
+void* GetHostTensorData(const std::shared_ptr<ng::runtime::Tensor>& tensor);
+
+// Creates a tensor of the backend that uses the buffer of tf_tensor in place,
+// with the element type and shape of pipelined_tensor. Returns nullptr if the
+// buffer cannot be used (e.g. it is not aligned, as for some slices), in which
+// case the caller copies tf_tensor into pipelined_tensor. The returned tensor
+// must not outlive tf_tensor
+std::shared_ptr<ng::runtime::Tensor> CreateAliasTensor(
+    ng::runtime::Backend* backend, const Tensor& tf_tensor,
+    const std::shared_ptr<ng::runtime::Tensor>& pipelined_tensor);
+
+// Holds a checked out index of a PipelinedTensorsStore, reserved with
+// try_hold, and returns it when destroyed
+class NGraphPipelineSlot {
+ public:
+  NGraphPipelineSlot(const std::shared_ptr<PipelinedTensorsStore>& pts,
+                     int index)
+      : m_pts(pts), m_index(index) {}
+  ~NGraphPipelineSlot() { m_pts->return_held_tensors(m_index); }
+
+  int GetIndex() const { return m_index; }
+
+ private:
+  std::shared_ptr<PipelinedTensorsStore> m_pts;
+  int m_index;
+
+  NGraphPipelineSlot(const NGraphPipelineSlot&) = delete;
+  NGraphPipelineSlot& operator=(const NGraphPipelineSlot&) = delete;
+};
+
+// Creates a TF tensor over data, keeping slot alive till the tensor (and all
+// the tensors sharing its buffer) are destroyed. data must hold
+// shape.num_elements() elements of type, which must be a memcpy-able type
+Status MakeZeroCopyTensor(DataType type, const TensorShape& shape, void* data,
+                          std::shared_ptr<NGraphPipelineSlot> slot,
+                          Tensor* tensor);
+
+}  // namespace ngraph_bridge
+
+}  // namespace tensorflow
+
+#endif  // NGRAPH_TF_BRIDGE_ZERO_COPY_H_
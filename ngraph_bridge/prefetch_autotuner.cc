@@ -15,15 +15,20 @@ limitations under the License.
 
 #include "ngraph_bridge/prefetch_autotuner.h"
 
+#include <algorithm>
+#include <limits>
+
 namespace tensorflow {
 namespace data {
 
-PrefetchAutotuner::PrefetchAutotuner(int64 initial_buffer_size)
-    : buffer_limit_(initial_buffer_size) {
+PrefetchAutotuner::PrefetchAutotuner(int64 initial_buffer_size,
+                                     int64 max_buffer_bytes)
+    : buffer_limit_(initial_buffer_size), max_buffer_bytes_(max_buffer_bytes) {
   if (initial_buffer_size == kAutoTune) {
     mode_ = Mode::kUpswing;
     buffer_limit_ = 1;
   }
+  ResetShrinkWindow();
 }
 
 namespace {
@@ -49,11 +54,46 @@ void PrefetchAutotuner::RecordConsumption(size_t current_buffer_size) {
         } else {
           buffer_limit_ *= 2;
         }
+        ApplyByteLimit();
+        ResetShrinkWindow();
         mode_ = Mode::kUpswing;
+        return;
+      }
+      window_min_buffer_size_ =
+          std::min(window_min_buffer_size_, current_buffer_size);
+      if (++window_consumptions_ >= kShrinkWindow) {
+        // The buffer size includes the element being consumed, the others
+        // were not needed in the whole window
+        int64 unused = static_cast<int64>(window_min_buffer_size_) - 1;
+        if (unused > 0) {
+          buffer_limit_ = std::max<int64>(
+              1, buffer_limit_ - std::max<int64>(1, unused / 2));
+        }
+        ResetShrinkWindow();
       }
       return;
   }
 }
 
+void PrefetchAutotuner::RecordElementBytes(int64 bytes) {
+  if (bytes > element_bytes_) {
+    element_bytes_ = bytes;
+    ApplyByteLimit();
+  }
+}
+
+void PrefetchAutotuner::ApplyByteLimit() {
+  if (max_buffer_bytes_ <= 0 || element_bytes_ <= 0 || buffer_limit_ <= 0) {
+    return;
+  }
+  buffer_limit_ = std::min(
+      buffer_limit_, std::max<int64>(1, max_buffer_bytes_ / element_bytes_));
+}
+
+void PrefetchAutotuner::ResetShrinkWindow() {
+  window_min_buffer_size_ = std::numeric_limits<size_t>::max();
+  window_consumptions_ = 0;
+}
+
 }  // namespace data
 }  // namespace tensorflow
@@ -33,22 +33,40 @@ namespace data {
 // if the prefetching thread is able to successfully fill the buffer at its
 // current size.
 //
-// Note: in the current implementation, we never decrease the buffer_limit().
-// This should change in the future!
+// Every buffered element also pins the device tensors it is copied to, so the
+// buffer_limit is decreased as well: if the buffer never runs low during
+// kShrinkWindow consecutive consumptions, the buffer_limit drops by half of
+// the elements that were never needed.
+//
+// The buffer can also be capped by bytes. With a non-zero max_buffer_bytes,
+// the buffer_limit is at most max_buffer_bytes divided by the largest element
+// recorded with RecordElementBytes (but at least 1). The cap applies to a
+// fixed buffer size as well.
 //
 // PrefetchAutotuner is NOT thread safe.
 class PrefetchAutotuner {
  public:
   static const int64 kAutoTune = -1;
+  // Number of consumptions without running low before the buffer shrinks
+  static const int64 kShrinkWindow = 64;
 
-  explicit PrefetchAutotuner(int64 initial_buffer_size);
+  explicit PrefetchAutotuner(int64 initial_buffer_size,
+                             int64 max_buffer_bytes = 0);
 
   int64 buffer_limit() const { return buffer_limit_; }
+  // Largest element recorded so far, in bytes
+  int64 element_bytes() const { return element_bytes_; }
 
   void RecordConsumption(size_t current_buffer_size);
   void RecordEmpty() { RecordConsumption(0); }
+  // Records the size of a produced element, which can lower the buffer_limit
+  // to stay within max_buffer_bytes
+  void RecordElementBytes(int64 bytes);
 
  private:
+  void ApplyByteLimit();
+  void ResetShrinkWindow();
+
   // PrefetchAutotuner operates as a state machine.
   enum class Mode {
     // Disables the autotuning.
@@ -65,6 +83,12 @@ class PrefetchAutotuner {
 
   int64 buffer_limit_;
   Mode mode_ = Mode::kDisabled;
+  const int64 max_buffer_bytes_;
+  int64 element_bytes_ = 0;
+  // Smallest buffer size seen by the consumptions of the current shrink
+  // window, and the number of those consumptions
+  size_t window_min_buffer_size_;
+  int64 window_consumptions_;
 };
 
 }  // namespace data
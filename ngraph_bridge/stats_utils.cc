@@ -52,6 +52,10 @@ ABSL_CONST_INIT const char kThreadUtilization[] = "thread_utilization";
 ABSL_CONST_INIT const char kBufferSize[] = "buffer_size";
 ABSL_CONST_INIT const char kBufferCapacity[] = "buffer_capacity";
 ABSL_CONST_INIT const char kBufferUtilization[] = "buffer_utilization";
+ABSL_CONST_INIT const char kBufferBytes[] = "buffer_bytes";
+ABSL_CONST_INIT const char kSlackTime[] = "slack_time";
+ABSL_CONST_INIT const char kConsumerStepTime[] = "consumer_step_time";
+ABSL_CONST_INIT const char kProduceTime[] = "produce_time";
 ABSL_CONST_INIT const char kFilteredElements[] = "filtered_elements";
 ABSL_CONST_INIT const char kDroppedElements[] = "dropped_elements";
 ABSL_CONST_INIT const char kFeaturesCount[] = "features_count";
@@ -78,6 +82,22 @@ string BufferUtilizationHistogramName(const string& prefix) {
   return strings::StrCat(prefix, kDelimiter, kBufferUtilization);
 }
 
+string BufferBytesScalarName(const string& prefix) {
+  return strings::StrCat(prefix, kDelimiter, kBufferBytes);
+}
+
+string SlackTimeScalarName(const string& prefix) {
+  return strings::StrCat(prefix, kDelimiter, kSlackTime);
+}
+
+string ConsumerStepTimeScalarName(const string& prefix) {
+  return strings::StrCat(prefix, kDelimiter, kConsumerStepTime);
+}
+
+string ProduceTimeScalarName(const string& prefix) {
+  return strings::StrCat(prefix, kDelimiter, kProduceTime);
+}
+
 string FilterdElementsScalarName(const string& prefix) {
   return strings::StrCat(prefix, kDelimiter, kFilteredElements);
 }
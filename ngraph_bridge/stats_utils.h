@@ -52,6 +52,10 @@ extern const char kThreadUtilization[];
 extern const char kBufferSize[];
 extern const char kBufferCapacity[];
 extern const char kBufferUtilization[];
+extern const char kBufferBytes[];
+extern const char kSlackTime[];
+extern const char kConsumerStepTime[];
+extern const char kProduceTime[];
 extern const char kFilteredElements[];
 extern const char kDroppedElements[];
 extern const char kFeaturesCount[];
@@ -75,6 +79,20 @@ string BufferCapacityScalarName(const string& prefix);
 // buffer size.) histogram metrics.
 string BufferUtilizationHistogramName(const string& prefix);
 
+// Name for buffer bytes (total size of the buffered elements) scalar metrics.
+string BufferBytesScalarName(const string& prefix);
+
+// Name for the time (in us) the prefetch thread sleeps before producing an
+// element scalar metrics.
+string SlackTimeScalarName(const string& prefix);
+
+// Name for the time (in us) the consumer takes per element scalar metrics.
+string ConsumerStepTimeScalarName(const string& prefix);
+
+// Name for the time (in us) the prefetch thread takes to produce an element
+// scalar metrics.
+string ProduceTimeScalarName(const string& prefix);
+
 // Name for filtered elements scalar metrics.
 string FilterdElementsScalarName(const string& prefix);
 
@@ -39,10 +39,15 @@ File: tensorflow/tensorflow/compiler/jit/deadness_analysis.cc
 #include "ngraph_bridge/ngraph_utils.h"
 #if !defined(NGRAPH_TF_DISABLE_DEADNESS_CHECK)
 
+#include <algorithm>
+#include <deque>
+#include <mutex>
+
 #include "tensorflow/core/graph/algorithm.h"
 #include "tensorflow/core/graph/tensor_id.h"
 #include "tensorflow/core/lib/gtl/flatset.h"
 #include "tensorflow/core/lib/hash/hash.h"
+#include "tensorflow/core/lib/strings/strcat.h"
 
 #include "ngraph_bridge/tf_deadness_analysis.h"
 
@@ -59,6 +64,12 @@ File: tensorflow/tensorflow/compiler/jit/deadness_analysis.cc
 // uninterpreted symbols (the same kind we use to represent Switch and _Recv).
 // Predicate equality has to hold over all possible assignments to these
 // uninterpreted symbols.
+//
+// The predicates are hash-consed by the PredicateFactory: an equal predicate
+// is created only once, so two predicates are equal iff they are the same
+// instance, and each is identified by an integer id. The analysis keeps its
+// own copy of the node names, so it can be reused after the graph it ran on
+// is destroyed (see DeadnessAnalysis::RunCached).
 namespace tensorflow {
 
 namespace ngraph_bridge {
@@ -75,6 +86,8 @@ class Predicate {
     return !(*this == other);
   }
   int64 hash() const { return hash_; }
+  // Unique among the predicates of a PredicateFactory
+  int id() const { return id_; }
   virtual Kind kind() const = 0;
   virtual ~Predicate() {}
 
@@ -82,7 +95,9 @@ class Predicate {
   explicit Predicate(int64 hash) : hash_(hash) {}
 
  private:
+  friend class PredicateFactory;
   const int64 hash_;
+  int id_ = -1;
 };
 int64 HashPredicateSequence(Predicate::Kind kind,
                             gtl::ArraySlice<Predicate*> preds) {
@@ -92,13 +107,14 @@ int64 HashPredicateSequence(Predicate::Kind kind,
   }
   return hash;
 }
+// The operands are hash-consed, so they are compared as pointers
 bool PredicateSequenceEqual(gtl::ArraySlice<Predicate*> lhs,
                             gtl::ArraySlice<Predicate*> rhs) {
   if (lhs.size() != rhs.size()) {
     return false;
   }
   for (size_t i = 0; i < lhs.size(); i++) {
-    if (*lhs[i] != *rhs[i]) {
+    if (lhs[i] != rhs[i]) {
       return false;
     }
   }
@@ -173,7 +189,7 @@ class NotPredicate : public Predicate {
   }
   bool operator==(const Predicate& other) const override {
     return other.kind() == Kind::kNot &&
-           *dynamic_cast<const NotPredicate&>(other).operand() == *operand();
+           dynamic_cast<const NotPredicate&>(other).operand() == operand();
   }
   Kind kind() const override { return Kind::kNot; }
   Predicate* operand() const { return operand_; }
@@ -219,9 +235,11 @@ class SymbolPredicate : public Predicate {
   }
 };
 // Creates and owns Predicate instances.  Simplifies predicates as it creates
-// them.
+// them, and hash-conses them. The ids are given from first_id on, True is
+// created first so it gets first_id.
 class PredicateFactory {
  public:
+  explicit PredicateFactory(int first_id) : first_id_(first_id) { MakeTrue(); }
   Predicate* MakeAndPredicate(gtl::ArraySlice<Predicate*> operands) {
     return MakeAndOrImpl(operands, /*is_and=*/true);
   }
@@ -236,12 +254,22 @@ class PredicateFactory {
   }
   Predicate* MakeTrue() { return MakeAndPredicate({}); }
   Predicate* MakeFalse() { return MakeOrPredicate({}); }
+  Predicate* Get(int id) const {
+    return predicate_storage_[id - first_id_].get();
+  }
 
  private:
   template <typename PredicateT, typename... Args>
   Predicate* Make(Args... args) {
     std::unique_ptr<PredicateT> pred(
         new PredicateT(std::forward<Args>(args)...));
+    // Return the existing predicate if an equal one was made before
+    auto it = interned_predicates_.find(pred.get());
+    if (it != interned_predicates_.end()) {
+      return *it;
+    }
+    pred->id_ = first_id_ + predicate_storage_.size();
+    interned_predicates_.insert(pred.get());
     predicate_storage_.emplace_back(std::move(pred));
     return predicate_storage_.back().get();
   }
@@ -256,7 +284,9 @@ class PredicateFactory {
   };
   using PredicateSet =
       gtl::FlatSet<Predicate*, PredicatePtrHash, PredicatePtrEq>;
+  const int first_id_;
   std::vector<std::unique_ptr<Predicate>> predicate_storage_;
+  PredicateSet interned_predicates_;
 };
 // Common code to create AndPredicate or OrPredicate instances.
 Predicate* PredicateFactory::MakeAndOrImpl(gtl::ArraySlice<Predicate*> operands,
@@ -307,19 +337,24 @@ Predicate* PredicateFactory::MakeAndOrImpl(gtl::ArraySlice<Predicate*> operands,
 }
 class DeadnessAnalysisImpl : public DeadnessAnalysis {
  public:
-  explicit DeadnessAnalysisImpl(const Graph* graph)
-      : graph_(*graph), vlog_(VLOG_IS_ON(2)) {}
-  Status Populate();
+  DeadnessAnalysisImpl()
+      : predicate_factory_(TRUE_PRED_ID), vlog_(VLOG_IS_ON(2)) {}
+  Status Populate(const Graph& graph);
   bool HasInputsWithMismatchingDeadness(const Node& node) override;
   void Print() const override;
   Status GetNodePredicate(const Node& node, string& pred_string) override;
+  Status GetNodePredicateId(const Node& node, int& pred_id) override;
+  string GetPredicateString(int pred_id) const override;
 
  private:
   enum class EdgeKind { kDataAndControl, kDataOnly, kControlOnly };
   std::vector<Predicate*> GetIncomingPreds(Node* n, EdgeKind edge_kind);
+  // Id of the output of the node, referring to the copy of its name
+  TensorId GetTensorId(const Node* n, int output_idx) const {
+    return TensorId(node_names_[n->id()], output_idx);
+  }
   void SetPred(Node* n, int output_idx, Predicate* pred) {
-    CHECK(
-        predicate_map_.insert({TensorId(n->name(), output_idx), pred}).second);
+    CHECK(predicate_map_.insert({GetTensorId(n, output_idx), pred}).second);
   }
   void SetPred(Node* n, gtl::ArraySlice<int> output_idxs, Predicate* pred) {
     for (int output_idx : output_idxs) {
@@ -330,7 +365,8 @@ class DeadnessAnalysisImpl : public DeadnessAnalysis {
   Status HandleMerge(Node* n);
   Status HandleRecv(Node* n);
   Status HandleGeneric(Node* n);
-  const Graph& graph_;
+  // Names of the nodes by id, the TensorIds of the analysis point to them
+  std::vector<string> node_names_;
   gtl::FlatMap<TensorId, Predicate*, TensorId::Hasher> predicate_map_;
   PredicateFactory predicate_factory_;
   bool vlog_;
@@ -360,7 +396,7 @@ Status DeadnessAnalysisImpl::HandleSwitch(Node* n) {
   const Edge* pred_edge;
   TF_RETURN_IF_ERROR(n->input_edge(1, &pred_edge));
   Predicate* true_switch = predicate_factory_.MakeSymbolPredicate(
-      TensorId(pred_edge->src()->name(), pred_edge->src_output()),
+      GetTensorId(pred_edge->src(), pred_edge->src_output()),
       /*must_be_true=*/true);
   Predicate* false_switch = predicate_factory_.MakeNotPredicate(true_switch);
   // Output 0 is alive iff all inputs are alive and the condition is false.
@@ -386,7 +422,7 @@ Status DeadnessAnalysisImpl::HandleMerge(Node* n) {
       });
   Predicate* input_data_pred =
       has_backedge
-          ? predicate_factory_.MakeSymbolPredicate(TensorId(n->name(), 0),
+          ? predicate_factory_.MakeSymbolPredicate(GetTensorId(n, 0),
                                                    /*must_be_true=*/false)
           : predicate_factory_.MakeOrPredicate(
                 GetIncomingPreds(n, EdgeKind::kDataOnly));
@@ -399,7 +435,7 @@ Status DeadnessAnalysisImpl::HandleRecv(Node* n) {
   std::vector<Predicate*> input_preds =
       GetIncomingPreds(n, EdgeKind::kDataAndControl);
   input_preds.push_back(predicate_factory_.MakeSymbolPredicate(
-      TensorId(n->name(), 0), /*must_be_true=*/false));
+      GetTensorId(n, 0), /*must_be_true=*/false));
   SetPred(n, {0, Graph::kControlSlot},
           predicate_factory_.MakeAndPredicate(input_preds));
   return Status::OK();
@@ -414,9 +450,14 @@ Status DeadnessAnalysisImpl::HandleGeneric(Node* n) {
   SetPred(n, Graph::kControlSlot, pred);
   return Status::OK();
 }
-Status DeadnessAnalysisImpl::Populate() {
+Status DeadnessAnalysisImpl::Populate(const Graph& graph) {
+  // Sized once, so that the TensorIds pointing to the names stay valid
+  node_names_.resize(graph.num_node_ids());
+  for (const Node* n : graph.nodes()) {
+    node_names_[n->id()] = n->name();
+  }
   std::vector<Node*> rpo;
-  GetReversePostOrder(graph_, &rpo, /*stable_comparator=*/{},
+  GetReversePostOrder(graph, &rpo, /*stable_comparator=*/{},
                       /*edge_filter=*/[](const Edge& edge) {
                         return !edge.src()->IsNextIteration();
                       });
@@ -453,7 +494,7 @@ bool DeadnessAnalysisImpl::HasInputsWithMismatchingDeadness(const Node& node) {
     // Today we just compare the predicates for equality (with some
     // canonicalization/simplification happening before) but we could be more
     // sophisticated here if need be.
-    if (pred != nullptr && *pred != *it->second) {
+    if (pred != nullptr && pred != it->second) {
       if (vlog_) {
         VLOG(2) << "HasInputsWithMismatchingDeadness(" << node.name()
                 << ") -> true";
@@ -471,8 +512,16 @@ bool DeadnessAnalysisImpl::HasInputsWithMismatchingDeadness(const Node& node) {
 
 Status DeadnessAnalysisImpl::GetNodePredicate(const Node& node,
                                               string& pred_string) {
+  int pred_id;
+  TF_RETURN_IF_ERROR(GetNodePredicateId(node, pred_id));
+  pred_string = GetPredicateString(pred_id);
+  return Status::OK();
+}
+
+Status DeadnessAnalysisImpl::GetNodePredicateId(const Node& node,
+                                                int& pred_id) {
   if (node.IsSource() || node.IsSink() || node.IsControlFlow()) {
-    DeadnessAnalysis::GetControlFlowPredString(pred_string);
+    pred_id = CONTROL_FLOW_PRED_ID;
     return Status::OK();
   }
 
@@ -482,7 +531,7 @@ Status DeadnessAnalysisImpl::GetNodePredicate(const Node& node,
     CHECK(it != predicate_map_.end()) << edge->DebugString();
 
     // This node is not control flow but has different output predicates
-    if (pred != nullptr && *pred != *it->second) {
+    if (pred != nullptr && pred != it->second) {
       return errors::Internal(node.name(), "[", node.type_string(), "]",
                               " is a non control flow op. But its outputs have "
                               "different predicates");
@@ -490,13 +539,32 @@ Status DeadnessAnalysisImpl::GetNodePredicate(const Node& node,
     pred = it->second;
   }
 
-  // All outputs have the same predicate
-  if (pred != nullptr) {
-    pred_string = pred->ToString();
+  // The node has no outputs, its control output has the predicate of its
+  // inputs
+  if (pred == nullptr) {
+    auto it = predicate_map_.find(TensorId(node.name(), Graph::kControlSlot));
+    if (it == predicate_map_.end()) {
+      return errors::Internal("No predicate for ", node.name(), "[",
+                              node.type_string(), "]");
+    }
+    pred = it->second;
   }
+
+  // All outputs have the same predicate
+  pred_id = pred->id();
   return Status::OK();
 }
 
+string DeadnessAnalysisImpl::GetPredicateString(int pred_id) const {
+  string pred_string;
+  if (IsControlFlowPredId(pred_id)) {
+    DeadnessAnalysis::GetControlFlowPredString(pred_string);
+  } else {
+    pred_string = predicate_factory_.Get(pred_id)->ToString();
+  }
+  return pred_string;
+}
+
 void DeadnessAnalysisImpl::Print() const {
   std::vector<TensorId> tensor_ids;
   for (const auto& kv_pair : predicate_map_) {
@@ -514,10 +582,9 @@ DeadnessAnalysis::~DeadnessAnalysis() {}
 
 /*static*/ Status DeadnessAnalysis::Run(
     const Graph& graph, std::unique_ptr<DeadnessAnalysis>* result) {
-  std::unique_ptr<DeadnessAnalysisImpl> analysis(
-      new DeadnessAnalysisImpl(&graph));
+  std::unique_ptr<DeadnessAnalysisImpl> analysis(new DeadnessAnalysisImpl());
 
-  TF_RETURN_IF_ERROR(analysis->Populate());
+  TF_RETURN_IF_ERROR(analysis->Populate(graph));
   if (NGRAPH_VLOG_IS_ON(5)) {
     analysis->Print();
   }
@@ -525,6 +592,82 @@ DeadnessAnalysis::~DeadnessAnalysis() {}
   return Status::OK();
 }
 
+namespace {
+// Number of analyses kept by DeadnessAnalysis::RunCached
+const size_t kMaxCachedAnalyses = 4;
+
+// What the analysis depends on: one entry per node with its name, its type
+// and its input edges. The input edges are sorted since the order of the
+// EdgeSet of a node is not deterministic.
+std::vector<string> GraphStructure(const Graph& graph) {
+  std::vector<string> structure;
+  structure.reserve(graph.num_node_ids());
+  for (const Node* node : graph.nodes()) {
+    std::vector<string> in_edges;
+    for (const Edge* edge : node->in_edges()) {
+      in_edges.push_back(strings::StrCat(edge->src()->name(), ":",
+                                         edge->src_output(), "->",
+                                         edge->dst_input()));
+    }
+    std::sort(in_edges.begin(), in_edges.end());
+    string entry = strings::StrCat(node->name(), " ", node->type_string());
+    for (const auto& in_edge : in_edges) {
+      strings::StrAppend(&entry, " ", in_edge);
+    }
+    structure.push_back(std::move(entry));
+  }
+  return structure;
+}
+
+// Fingerprint of the structure, only used to skip the cached analyses that
+// cannot match before comparing the structures
+uint64 StructureFingerprint(const std::vector<string>& structure) {
+  uint64 fingerprint = Hash64Combine(structure.size(), 0);
+  for (const auto& entry : structure) {
+    fingerprint = Hash64Combine(fingerprint, Hash64(entry));
+  }
+  return fingerprint;
+}
+
+struct CachedAnalysis {
+  uint64 fingerprint;
+  std::vector<string> structure;
+  std::shared_ptr<DeadnessAnalysis> analysis;
+};
+}  // namespace
+
+/*static*/ Status DeadnessAnalysis::RunCached(
+    const Graph& graph, std::shared_ptr<DeadnessAnalysis>* result) {
+  static std::mutex s_mutex;
+  static auto* s_cache = new std::deque<CachedAnalysis>();
+
+  std::vector<string> structure = GraphStructure(graph);
+  uint64 fingerprint = StructureFingerprint(structure);
+  {
+    std::lock_guard<std::mutex> lock(s_mutex);
+    for (const auto& entry : *s_cache) {
+      // A fingerprint can collide, the analysis is reused only for a graph
+      // with the same structure
+      if (entry.fingerprint == fingerprint && entry.structure == structure) {
+        NGRAPH_VLOG(2) << "Reusing the deadness analysis of the graph";
+        *result = entry.analysis;
+        return Status::OK();
+      }
+    }
+  }
+
+  std::unique_ptr<DeadnessAnalysis> analysis;
+  TF_RETURN_IF_ERROR(Run(graph, &analysis));
+  *result = std::move(analysis);
+
+  std::lock_guard<std::mutex> lock(s_mutex);
+  s_cache->push_back({fingerprint, std::move(structure), *result});
+  if (s_cache->size() > kMaxCachedAnalyses) {
+    s_cache->pop_front();
+  }
+  return Status::OK();
+}
+
 /*static*/ const std::string DeadnessAnalysis::CONTROL_FLOW_PRED_STRING =
     "#control_flow";
 // Same as the True predicate used in AndPredicate
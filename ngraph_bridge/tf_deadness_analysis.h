@@ -96,6 +96,30 @@ class DeadnessAnalysis {
   // assigned a placeholder predicate string (CONTROL_FLOW_PRED_STRING) .
   virtual Status GetNodePredicate(const Node& node, string& pred_string) = 0;
 
+  // Same as GetNodePredicate, but returns the id of the predicate instead of
+  // its string. The predicates are hash-consed, so two nodes have the same
+  // predicate iff they have the same id. A node without outputs gets the
+  // predicate of its control output.
+  virtual Status GetNodePredicateId(const Node& node, int& pred_id) = 0;
+
+  // Returns the string of the predicate with the id
+  virtual string GetPredicateString(int pred_id) const = 0;
+
+  // Same as Run, but reuses the analysis of a previous call on a graph with
+  // the same nodes and edges, as the grappler optimizer may be invoked again
+  // on the same graph. The analysis only refers to the graph by node names,
+  // so it stays valid after the graph is destroyed.
+  static Status RunCached(const Graph& graph,
+                          std::shared_ptr<DeadnessAnalysis>* result);
+
+  inline static bool IsControlFlowPredId(int pred_id) {
+    return CONTROL_FLOW_PRED_ID == pred_id;
+  }
+
+  inline static bool IsTruePredId(int pred_id) {
+    return TRUE_PRED_ID == pred_id;
+  }
+
   inline static bool IsControlFlowPredString(const string& predicate) {
     return CONTROL_FLOW_PRED_STRING == predicate;
   }
@@ -112,6 +136,10 @@ class DeadnessAnalysis {
     predicate = TRUE_PRED_STRING;
   }
 
+ protected:
+  static const int CONTROL_FLOW_PRED_ID = 0;
+  static const int TRUE_PRED_ID = 1;
+
  private:
   static const std::string CONTROL_FLOW_PRED_STRING;
   static const std::string TRUE_PRED_STRING;
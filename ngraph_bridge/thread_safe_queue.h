@@ -21,44 +21,106 @@
 #include <queue>
 
 #include "absl/synchronization/mutex.h"
+#include "absl/time/clock.h"
+#include "absl/time/time.h"
+
+#include "tensorflow/core/lib/core/errors.h"
+#include "tensorflow/core/lib/core/status.h"
 
 using namespace std;
 namespace tensorflow {
 namespace ngraph_bridge {
 
+// A queue shared by producer and consumer threads.
+//
+// The queue is unbounded, unless it is given a capacity, in which case Add
+// waits while the queue is full. Terminate wakes up all the waiting threads:
+// from then on Add fails with the status given to Terminate, and the
+// consumers get the items left in the queue and then that status.
 template <typename T>
 class ThreadSafeQueue {
  public:
-  // Return T and a status thing so that in case or termination,
-  // caller can check
-  // TODO
-  T GetNextAvailable() {
-    m_mutex.Lock();
-    while (m_queue.empty()) {
-      m_cv.Wait(&m_mutex);
+  // A capacity of 0 means the queue is unbounded
+  explicit ThreadSafeQueue(size_t capacity = 0) : m_capacity(capacity) {}
+
+  // Waits till an item is available, or the queue is terminated and empty
+  Status GetNextAvailable(T* item) {
+    absl::MutexLock lock(&m_mutex);
+    while (m_queue.empty() && m_status.ok()) {
+      m_cv_not_empty.Wait(&m_mutex);
     }
+    return Pop(item);
+  }
 
-    T next = std::move(m_queue.front());
-    m_queue.pop();
-    m_mutex.Unlock();
-    return next;
+  // Same as GetNextAvailable, but returns DeadlineExceeded if there is no
+  // item within the timeout
+  Status TryGetNextAvailable(T* item, absl::Duration timeout) {
+    absl::MutexLock lock(&m_mutex);
+    absl::Time deadline = absl::Now() + timeout;
+    while (m_queue.empty() && m_status.ok()) {
+      if (m_cv_not_empty.WaitWithDeadline(&m_mutex, deadline)) {
+        break;
+      }
+    }
+    if (m_queue.empty() && m_status.ok()) {
+      return errors::DeadlineExceeded("No item in the queue after ",
+                                      absl::FormatDuration(timeout));
+    }
+    return Pop(item);
   }
 
-  void Add(T item) {
-    m_mutex.Lock();
+  // Waits till there is space in the queue. Fails if the queue is terminated
+  Status Add(T item) {
+    absl::MutexLock lock(&m_mutex);
+    while (m_capacity > 0 && m_queue.size() >= m_capacity && m_status.ok()) {
+      m_cv_not_full.Wait(&m_mutex);
+    }
+    TF_RETURN_IF_ERROR(m_status);
     m_queue.push(std::move(item));
-    m_cv.SignalAll();
-    m_mutex.Unlock();
+    m_cv_not_empty.Signal();
+    return Status::OK();
+  }
+
+  // Wakes up all the waiting threads, see above. Only the first status is
+  // kept if the queue is terminated more than once
+  void Terminate(const Status& status) {
+    absl::MutexLock lock(&m_mutex);
+    if (m_status.ok()) {
+      m_status =
+          status.ok() ? errors::Cancelled("The queue is terminated") : status;
+    }
+    m_cv_not_empty.SignalAll();
+    m_cv_not_full.SignalAll();
+  }
+
+  bool IsTerminated() {
+    absl::MutexLock lock(&m_mutex);
+    return !m_status.ok();
   }
 
-  void Terminate() {
-    // TODO
-    //
+  size_t Size() {
+    absl::MutexLock lock(&m_mutex);
+    return m_queue.size();
   }
 
  private:
+  // Requires m_mutex
+  Status Pop(T* item) {
+    if (m_queue.empty()) {
+      return m_status;
+    }
+    *item = std::move(m_queue.front());
+    m_queue.pop();
+    m_cv_not_full.Signal();
+    return Status::OK();
+  }
+
+  const size_t m_capacity;
   queue<T> m_queue;
-  absl::CondVar m_cv;
+  // OK till the queue is terminated
+  Status m_status;
+  absl::CondVar m_cv_not_empty;
+  absl::CondVar m_cv_not_full;
   absl::Mutex m_mutex;
 };
 
@@ -48,6 +48,7 @@ __all__ = [
     'is_logging_placement', '__version__', 'cxx11_abi_flag'
     'is_grappler_enabled', 'update_config', 'are_variables_enabled',
     'set_disabled_ops', 'get_disabled_ops', 'is_distributed_enabled',
+    'get_cache_stats', 'get_num_fallback_calls',
 ]
 
 ext = 'dylib' if system() == 'Darwin' else 'so'
@@ -134,6 +135,8 @@ if ngraph_classic_loaded:
     ngraph_bridge_lib.ngraph_tf_are_variables_enabled.restype = ctypes.c_bool
     ngraph_bridge_lib.ngraph_set_disabled_ops.argtypes = [ctypes.c_char_p]
     ngraph_bridge_lib.ngraph_get_disabled_ops.restype = ctypes.c_char_p
+    ngraph_bridge_lib.ngraph_get_cache_stats.restype = ctypes.c_char_p
+    ngraph_bridge_lib.ngraph_get_num_fallback_calls.restype = ctypes.c_size_t
 
     try:
         importlib.import_module('plaidml.settings')
@@ -204,7 +207,7 @@ if ngraph_classic_loaded:
     def is_grappler_enabled():
         return ngraph_bridge_lib.ngraph_tf_is_grappler_enabled()
 
-    def update_config(config, backend_name = "CPU", device_id = ""):
+    def update_config(config, backend_name = "CPU", device_id = "", optional_params = None):
         #updating session config if grappler is enabled
         if(ngraph_bridge_lib.ngraph_tf_is_grappler_enabled()):
             opt_name = 'ngraph-optimizer'
@@ -222,6 +225,12 @@ if ngraph_classic_loaded:
             ngraph_optimizer.name = opt_name
             ngraph_optimizer.parameter_map["ngraph_backend"].s = backend_name.encode()
             ngraph_optimizer.parameter_map["device_id"].s = device_id.encode()
+            # Optional parameters are attached to the encapsulates as
+            # _ngraph_<name>, e.g. {"pipeline_depth": 4} sets the depth of
+            # the pipelined tensors
+            if optional_params is not None:
+                for name, value in optional_params.items():
+                    ngraph_optimizer.parameter_map[name].s = str(value).encode()
             config.MergeFrom(tf.ConfigProto(graph_options=tf.GraphOptions(rewrite_options=rewriter_options)))
             # For reference, if we want to provide configuration support(backend parameters)
             # in a python script using the ngraph-optimizer
@@ -246,6 +255,24 @@ if ngraph_classic_loaded:
     def get_disabled_ops():
         return ngraph_bridge_lib.ngraph_get_disabled_ops()
 
+    def get_cache_stats():
+        # Returns a dict of encapsulate op name -> dict of executable cache
+        # counters. size_in_bytes is an estimate: the length of the
+        # serialized nGraph functions plus the pipelined IO tensors, since
+        # nGraph does not report the memory held by a compiled executable
+        stat_names = ['hits', 'misses', 'evictions', 'create_time_us',
+                      'num_items', 'size_in_bytes']
+        cache_stats = {}
+        for line in ngraph_bridge_lib.ngraph_get_cache_stats().decode("utf-8").splitlines():
+            fields = line.split()
+            cache_stats[fields[0]] = dict(zip(stat_names, map(int, fields[1:])))
+        return cache_stats
+
+    def get_num_fallback_calls():
+        # Number of encapsulate op calls that ran the TF graph of the cluster
+        # instead of the nGraph executable
+        return ngraph_bridge_lib.ngraph_get_num_fallback_calls()
+
     def is_distributed_enabled():
         return ngraph_bridge_lib.ngraph_tf_is_distributed_enabled()
 
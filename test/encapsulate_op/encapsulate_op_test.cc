@@ -64,10 +64,12 @@ TEST(EncapsulateOp, ComputeSignature) {
       static_input_map[i] = &input_tensor;
     }
   }
-  std::stringstream signature_ss;
+  NGraphSignature signature;
   ASSERT_OK(ng_encap_impl.ComputeSignature(input_tensors, input_shapes,
-                                           static_input_map, signature_ss));
-  ASSERT_EQ(signature_ss.str(), "0,;2,;6,10,;10,10,10,;/");
+                                           static_input_map, signature));
+  string signature_str;
+  ASSERT_OK(signature.ToString(&signature_str));
+  ASSERT_EQ(signature_str, "0,;2,;6,10,;10,10,10,;/");
 }
 
 // Test: Create backend and get ngraph executable
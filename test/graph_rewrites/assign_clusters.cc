@@ -13,10 +13,13 @@
  * See the License for the specific language governing permissions and
  * limitations under the License.
  *******************************************************************************/
+#include <chrono>
+
 #include "gtest/gtest.h"
 
 #include "tensorflow/core/graph/graph.h"
 #include "tensorflow/core/graph/node_builder.h"
+#include "tensorflow/core/lib/strings/strcat.h"
 
 #include "logging/tf_graph_writer.h"
 #include "ngraph_bridge/ngraph_assign_clusters.h"
@@ -168,6 +171,65 @@ TEST(AssignClusters, Cone) {
   ASSERT_EQ(node3_cluster, -1);
 }
 
+// Benchmark: a chain of steps h = Add(Mul(h, x), h), as in an unrolled RNN,
+// where every segment_size steps h goes through an unmarked Identity. Each
+// segment must be a cluster of its own. Prints the time of AssignClusters,
+// there is no assertion on it since it depends on the machine
+TEST(AssignClusters, LargeGraph) {
+  const int num_steps = 50000;
+  const int segment_size = 1000;
+  Graph g(OpRegistry::Global());
+
+  Node* x;
+  ASSERT_OK(
+      NodeBuilder("x", "Placeholder").Attr("dtype", DT_FLOAT).Finalize(&g, &x));
+
+  Node* h = x;
+  vector<Node*> adds;
+  for (int i = 0; i < num_steps; i++) {
+    if (i > 0 && i % segment_size == 0) {
+      ASSERT_OK(NodeBuilder(strings::StrCat("identity_", i), "Identity")
+                    .Input(h, 0)
+                    .Attr("T", DT_FLOAT)
+                    .Finalize(&g, &h));
+    }
+    Node* mul;
+    ASSERT_OK(NodeBuilder(strings::StrCat("mul_", i), "Mul")
+                  .Input(h, 0)
+                  .Input(x, 0)
+                  .Attr("T", DT_FLOAT)
+                  .Attr("_ngraph_marked_for_clustering", true)
+                  .Finalize(&g, &mul));
+    ASSERT_OK(NodeBuilder(strings::StrCat("add_", i), "Add")
+                  .Input(mul, 0)
+                  .Input(h, 0)
+                  .Attr("T", DT_FLOAT)
+                  .Attr("_ngraph_marked_for_clustering", true)
+                  .Finalize(&g, &h));
+    adds.push_back(h);
+  }
+
+  auto start = chrono::steady_clock::now();
+  ASSERT_OK(AssignClusters(&g));
+  auto elapsed_ms = chrono::duration_cast<chrono::milliseconds>(
+                        chrono::steady_clock::now() - start)
+                        .count();
+
+  int segment_cluster = -1;
+  for (int i = 0; i < num_steps; i++) {
+    int cluster;
+    ASSERT_OK(GetNodeCluster(adds[i], &cluster));
+    if (i % segment_size == 0) {
+      ASSERT_NE(cluster, segment_cluster);
+      segment_cluster = cluster;
+    } else {
+      ASSERT_EQ(cluster, segment_cluster);
+    }
+  }
+  cout << "AssignClusters of " << g.num_nodes() << " nodes: " << elapsed_ms
+       << " ms" << endl;
+}
+
 }  // namespace testing
 
 }  // namespace ngraph_bridge
@@ -250,6 +250,68 @@ TEST(BackendManager, GetBackendCreationString) {
   ASSERT_EQ(gpu_backend, "GPU:678");
 }
 
+// Test the backend lock policy APIs
+TEST(BackendManager, BackendLockPolicy) {
+  list<string> env_vars{"NGRAPH_TF_BACKEND_LOCK_POLICY"};
+  const unordered_map<string, string>& env_map = StoreEnv(env_vars);
+
+  BackendLockPolicy lock_policy;
+  ASSERT_OK(BackendManager::GetBackendLockPolicyFromString("LOCK_FREE",
+                                                           &lock_policy));
+  ASSERT_EQ(lock_policy, BackendLockPolicy::LOCK_FREE);
+  ASSERT_NOT_OK(
+      BackendManager::GetBackendLockPolicyFromString("bogus", &lock_policy));
+
+  UnsetEnvVariable("NGRAPH_TF_BACKEND_LOCK_POLICY");
+  ASSERT_OK(BackendManager::CreateBackend("INTERPRETER"));
+  ASSERT_EQ(BackendManager::GetBackendLockPolicy("INTERPRETER"),
+            BackendLockPolicy::GLOBAL);
+  ASSERT_OK(BackendManager::SetBackendLockPolicy(
+      "INTERPRETER", BackendLockPolicy::PER_EXECUTABLE));
+
+  // Two different executables can be locked at the same time
+  ng::runtime::Executable* exec_1 =
+      reinterpret_cast<ng::runtime::Executable*>(0x10);
+  ng::runtime::Executable* exec_2 =
+      reinterpret_cast<ng::runtime::Executable*>(0x20);
+  {
+    ExecutableLock lock_1 =
+        BackendManager::LockExecutable("INTERPRETER", exec_1);
+    ExecutableLock lock_2 =
+        BackendManager::LockExecutable("INTERPRETER", exec_2);
+  }
+
+  // A policy change while an executable is locked does not change what the
+  // guard unlocks
+  {
+    ExecutableLock lock_1 =
+        BackendManager::LockExecutable("INTERPRETER", exec_1);
+    ASSERT_OK(BackendManager::SetBackendLockPolicy("INTERPRETER",
+                                                   BackendLockPolicy::GLOBAL));
+    lock_1.Unlock();
+    ExecutableLock global_lock =
+        BackendManager::LockExecutable("INTERPRETER", exec_1);
+    ASSERT_OK(BackendManager::SetBackendLockPolicy(
+        "INTERPRETER", BackendLockPolicy::PER_EXECUTABLE));
+  }
+  ExecutableLock relock_1 =
+      BackendManager::LockExecutable("INTERPRETER", exec_1);
+  relock_1.Unlock();
+  BackendManager::RemoveExecutableLock("INTERPRETER", exec_1);
+  BackendManager::RemoveExecutableLock("INTERPRETER", exec_2);
+
+  ASSERT_OK(BackendManager::SetBackendLockPolicy(
+      "INTERPRETER", BackendLockPolicy::LOCK_FREE));
+  ASSERT_EQ(BackendManager::GetBackendLockPolicy("INTERPRETER"),
+            BackendLockPolicy::LOCK_FREE);
+  BackendManager::ReleaseBackend("INTERPRETER");
+
+  ASSERT_NOT_OK(BackendManager::SetBackendLockPolicy(
+      "bogus", BackendLockPolicy::GLOBAL));
+
+  RestoreEnv(env_map);
+}
+
 }  // namespace testing
 }  // namespace ngraph_bridge
 }  // namespace tensorflow
@@ -58,7 +58,7 @@ TEST(CaptureVariables, TempVar) {
   Graph graph(OpRegistry::Global());
   TF_CHECK_OK(root.ToGraph(&graph));
 
-  ASSERT_OK(CaptureVariables(&graph, skip_these_nodes));
+  ASSERT_OK(CaptureVariables(&graph, skip_these_nodes, 0));
 
   for (auto node : graph.op_nodes()) {
     auto node_name = node->name();
@@ -102,7 +102,7 @@ TEST(CaptureVariables, TempVar2) {
   Graph graph(OpRegistry::Global());
   TF_CHECK_OK(root.ToGraph(&graph));
 
-  ASSERT_OK(CaptureVariables(&graph, skip_these_nodes));
+  ASSERT_OK(CaptureVariables(&graph, skip_these_nodes, 0));
 
   for (auto node : graph.op_nodes()) {
     auto node_name = node->name();
@@ -138,7 +138,7 @@ TEST(CaptureVariables, VariableScope) {
   Graph graph(OpRegistry::Global());
   TF_CHECK_OK(root.ToGraph(&graph));
 
-  ASSERT_OK(CaptureVariables(&graph, skip_these_nodes));
+  ASSERT_OK(CaptureVariables(&graph, skip_these_nodes, 0));
 
   for (auto node : graph.op_nodes()) {
     auto node_name = node->name();
@@ -182,7 +182,7 @@ TEST(CaptureVariables, SingleVariable1) {
   Graph graph(OpRegistry::Global());
   TF_CHECK_OK(root.ToGraph(&graph));
 
-  ASSERT_OK(CaptureVariables(&graph, skip_these_nodes));
+  ASSERT_OK(CaptureVariables(&graph, skip_these_nodes, 0));
 
   for (auto node : graph.op_nodes()) {
     auto node_name = node->name();
@@ -224,7 +224,7 @@ TEST(CaptureVariables, SingleVariable2) {
   Graph graph(OpRegistry::Global());
   TF_CHECK_OK(root.ToGraph(&graph));
 
-  ASSERT_OK(CaptureVariables(&graph, skip_these_nodes));
+  ASSERT_OK(CaptureVariables(&graph, skip_these_nodes, 0));
 
   for (auto node : graph.op_nodes()) {
     auto node_name = node->name();
@@ -268,7 +268,7 @@ TEST(CaptureVariables, SingleVariable3) {
   Graph graph(OpRegistry::Global());
   TF_CHECK_OK(root.ToGraph(&graph));
 
-  ASSERT_OK(CaptureVariables(&graph, skip_these_nodes));
+  ASSERT_OK(CaptureVariables(&graph, skip_these_nodes, 0));
 
   for (auto node : graph.op_nodes()) {
     auto node_name = node->name();
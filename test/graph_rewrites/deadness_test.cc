@@ -33,6 +33,7 @@
 #include "ngraph_bridge/ngraph_assign_clusters.h"
 #include "ngraph_bridge/ngraph_mark_for_clustering.h"
 #include "ngraph_bridge/ngraph_utils.h"
+#include "ngraph_bridge/tf_deadness_analysis.h"
 #include "test/test_utilities.h"
 
 #if !defined(NGRAPH_TF_DISABLE_DEADNESS_CHECK)
@@ -494,6 +495,81 @@ TEST(DeadnessCheck, DTestG5) {
   ASSERT_NE(A_cluster, N5_Add_cluster);
 }
 
+// Nodes with the same predicate get the same id, and the analysis of a graph
+// with the same nodes and edges is reused
+TEST(DeadnessCheck, PredicateIds) {
+  auto build_graph = [](Graph* graph) {
+    Scope root = Scope::NewRootScope();
+    auto A = ops::Placeholder(root.WithOpName("A"), DataType::DT_FLOAT);
+    auto B = ops::Placeholder(root.WithOpName("B"), DataType::DT_FLOAT);
+    auto pred = ops::Placeholder(root.WithOpName("predS"), DataType::DT_BOOL);
+
+    auto S = ops::Switch(root.WithOpName("S"), A, pred);
+    auto P = ops::Add(root.WithOpName("P"), A, B);
+    auto R = ops::Sub(root.WithOpName("R"), S.output_true, B);
+    auto T = ops::Mul(root.WithOpName("T"), S.output_true, R);
+    return root.ToGraph(graph);
+  };
+
+  Graph graph(OpRegistry::Global());
+  ASSERT_OK(build_graph(&graph));
+  std::map<std::string, Node*> node_map;
+  for (auto node : graph.op_nodes()) {
+    node_map[node->name()] = node;
+  }
+
+  std::shared_ptr<DeadnessAnalysis> analysis;
+  ASSERT_OK(DeadnessAnalysis::RunCached(graph, &analysis));
+  int S_pred, P_pred, R_pred, T_pred;
+  ASSERT_OK(analysis->GetNodePredicateId(*node_map["S"], S_pred));
+  ASSERT_OK(analysis->GetNodePredicateId(*node_map["P"], P_pred));
+  ASSERT_OK(analysis->GetNodePredicateId(*node_map["R"], R_pred));
+  ASSERT_OK(analysis->GetNodePredicateId(*node_map["T"], T_pred));
+
+  ASSERT_TRUE(DeadnessAnalysis::IsControlFlowPredId(S_pred));
+  ASSERT_TRUE(DeadnessAnalysis::IsTruePredId(P_pred));
+  ASSERT_FALSE(DeadnessAnalysis::IsTruePredId(R_pred));
+  ASSERT_EQ(R_pred, T_pred);
+
+  string T_pred_string;
+  ASSERT_OK(analysis->GetNodePredicate(*node_map["T"], T_pred_string));
+  ASSERT_EQ(T_pred_string, analysis->GetPredicateString(T_pred));
+  ASSERT_TRUE(
+      DeadnessAnalysis::IsTruePredString(analysis->GetPredicateString(P_pred)));
+
+  // The same graph built again reuses the analysis
+  Graph graph_again(OpRegistry::Global());
+  ASSERT_OK(build_graph(&graph_again));
+  std::shared_ptr<DeadnessAnalysis> analysis_again;
+  ASSERT_OK(DeadnessAnalysis::RunCached(graph_again, &analysis_again));
+  ASSERT_EQ(analysis.get(), analysis_again.get());
+
+  // A graph with the same nodes but other edges does not reuse it, R is not
+  // fed by the Switch
+  Graph graph_rewired(OpRegistry::Global());
+  {
+    Scope root = Scope::NewRootScope();
+    auto A = ops::Placeholder(root.WithOpName("A"), DataType::DT_FLOAT);
+    auto B = ops::Placeholder(root.WithOpName("B"), DataType::DT_FLOAT);
+    auto pred = ops::Placeholder(root.WithOpName("predS"), DataType::DT_BOOL);
+
+    auto S = ops::Switch(root.WithOpName("S"), A, pred);
+    auto P = ops::Add(root.WithOpName("P"), A, B);
+    auto R = ops::Sub(root.WithOpName("R"), A, B);
+    auto T = ops::Mul(root.WithOpName("T"), S.output_true, R);
+    ASSERT_OK(root.ToGraph(&graph_rewired));
+  }
+  std::shared_ptr<DeadnessAnalysis> analysis_rewired;
+  ASSERT_OK(DeadnessAnalysis::RunCached(graph_rewired, &analysis_rewired));
+  ASSERT_NE(analysis.get(), analysis_rewired.get());
+  for (auto node : graph_rewired.op_nodes()) {
+    if (node->name() == "R") {
+      ASSERT_OK(analysis_rewired->GetNodePredicateId(*node, R_pred));
+      ASSERT_TRUE(DeadnessAnalysis::IsTruePredId(R_pred));
+    }
+  }
+}
+
 }  // namespace testing
 }  // namespace ngraph_bridge
 }  // namespace tensorflow
@@ -0,0 +1,200 @@
+/*******************************************************************************
+ * Copyright 2019 Intel Corporation
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ *******************************************************************************/
+#include "gtest/gtest.h"
+
+#include "tensorflow/core/graph/graph.h"
+#include "tensorflow/core/graph/node_builder.h"
+
+#include "ngraph_bridge/ngraph_assign_clusters.h"
+#include "ngraph_bridge/ngraph_cluster_cost_model.h"
+#include "ngraph_bridge/ngraph_deassign_clusters.h"
+#include "ngraph_bridge/ngraph_utils.h"
+#include "test/test_utilities.h"
+
+using namespace std;
+
+namespace tensorflow {
+
+namespace ngraph_bridge {
+
+namespace testing {
+
+// Builds Placeholder(a), Placeholder(b) -> MatMul in cluster 0, where a and
+// b are [dim, dim]
+static void BuildMatMulGraph(Graph* g, int64 dim, Node** matmul) {
+  Node* a;
+  ASSERT_OK(NodeBuilder("a", "Placeholder")
+                .Attr("dtype", DT_FLOAT)
+                .Attr("shape", TensorShape({dim, dim}))
+                .Finalize(g, &a));
+  Node* b;
+  ASSERT_OK(NodeBuilder("b", "Placeholder")
+                .Attr("dtype", DT_FLOAT)
+                .Attr("shape", TensorShape({dim, dim}))
+                .Finalize(g, &b));
+  ASSERT_OK(NodeBuilder("matmul", "MatMul")
+                .Input(a, 0)
+                .Input(b, 0)
+                .Attr("T", DT_FLOAT)
+                .Attr("_ngraph_marked_for_clustering", true)
+                .Attr("_ngraph_cluster", 0)
+                .Finalize(g, matmul));
+}
+
+// Builds Placeholder(x) -> Add -> Mul in cluster 0, where x is a scalar
+static void BuildScalarGraph(Graph* g, Node** add, Node** mul) {
+  Node* x;
+  ASSERT_OK(NodeBuilder("x", "Placeholder")
+                .Attr("dtype", DT_FLOAT)
+                .Attr("shape", TensorShape({}))
+                .Finalize(g, &x));
+  ASSERT_OK(NodeBuilder("add", "Add")
+                .Input(x, 0)
+                .Input(x, 0)
+                .Attr("T", DT_FLOAT)
+                .Attr("_ngraph_marked_for_clustering", true)
+                .Attr("_ngraph_cluster", 0)
+                .Finalize(g, add));
+  ASSERT_OK(NodeBuilder("mul", "Mul")
+                .Input(*add, 0)
+                .Input(x, 0)
+                .Attr("T", DT_FLOAT)
+                .Attr("_ngraph_marked_for_clustering", true)
+                .Attr("_ngraph_cluster", 0)
+                .Finalize(g, mul));
+}
+
+// Test: FLOPs and boundary bytes are estimated from the static shapes
+TEST(DeassignClusters, EstimateCosts) {
+  Graph g(OpRegistry::Global());
+  Node* matmul;
+  BuildMatMulGraph(&g, 64, &matmul);
+
+  std::map<int, std::set<Node*>> cluster_map{{0, {matmul}}};
+  std::map<int, ClusterCost> cluster_costs;
+  ASSERT_OK(EstimateClusterCosts(&g, cluster_map, true, &cluster_costs));
+  const ClusterCost& cost = cluster_costs[0];
+  ASSERT_EQ(cost.num_nodes, 1);
+  ASSERT_EQ(cost.num_nontrivial_nodes, 1);
+  ASSERT_EQ(cost.num_unknown_shapes, 0);
+  ASSERT_EQ(cost.flops, 2 * 64 * 64 * 64);
+  ASSERT_EQ(cost.input_bytes, 2 * 64 * 64 * 4);
+  // The MatMul has no consumer, so nothing leaves the cluster
+  ASSERT_EQ(cost.output_bytes, 0);
+
+  // Without shape inference only the nodes are counted
+  std::map<int, ClusterCost> node_counts;
+  ASSERT_OK(EstimateClusterCosts(&g, cluster_map, false, &node_counts));
+  ASSERT_EQ(node_counts[0].num_nodes, 1);
+  ASSERT_EQ(node_counts[0].num_nontrivial_nodes, 1);
+  ASSERT_EQ(node_counts[0].flops, 0);
+  ASSERT_EQ(node_counts[0].input_bytes, 0);
+  ASSERT_EQ(node_counts[0].profile_key, cost.profile_key);
+}
+
+// Test: a cluster with a single large MatMul is kept, a cluster of two ops
+// on scalars is deassigned, though the node count rule would keep it
+TEST(DeassignClusters, StaticShapeCostModel) {
+  auto env_map = StoreEnv({"NGRAPH_TF_DISABLE_DEASSIGN_CLUSTERS"});
+  SetClusterCostModel(
+      std::unique_ptr<ClusterCostModel>(new StaticShapeCostModel()));
+
+  Graph g1(OpRegistry::Global());
+  Node* matmul;
+  BuildMatMulGraph(&g1, 512, &matmul);
+  ASSERT_OK(DeassignClusters(&g1));
+  int cluster_idx;
+  ASSERT_OK(GetNodeCluster(matmul, &cluster_idx));
+  ASSERT_EQ(cluster_idx, 0);
+
+  Graph g2(OpRegistry::Global());
+  Node *add, *mul;
+  BuildScalarGraph(&g2, &add, &mul);
+  ASSERT_OK(DeassignClusters(&g2));
+  ASSERT_NOT_OK(GetNodeCluster(add, &cluster_idx));
+  ASSERT_NOT_OK(GetNodeCluster(mul, &cluster_idx));
+
+  SetClusterCostModel(nullptr);
+  RestoreEnv(env_map);
+}
+
+// Test: the node count model keeps clusters with 2 non-trivial nodes
+TEST(DeassignClusters, NodeCountCostModel) {
+  auto env_map = StoreEnv({"NGRAPH_TF_DISABLE_DEASSIGN_CLUSTERS"});
+  SetClusterCostModel(
+      std::unique_ptr<ClusterCostModel>(new NodeCountCostModel()));
+
+  Graph g1(OpRegistry::Global());
+  Node* matmul;
+  BuildMatMulGraph(&g1, 512, &matmul);
+  ASSERT_OK(DeassignClusters(&g1));
+  int cluster_idx;
+  ASSERT_NOT_OK(GetNodeCluster(matmul, &cluster_idx));
+
+  Graph g2(OpRegistry::Global());
+  Node *add, *mul;
+  BuildScalarGraph(&g2, &add, &mul);
+  ASSERT_OK(DeassignClusters(&g2));
+  ASSERT_OK(GetNodeCluster(add, &cluster_idx));
+  ASSERT_OK(GetNodeCluster(mul, &cluster_idx));
+
+  SetClusterCostModel(nullptr);
+  RestoreEnv(env_map);
+}
+
+// Test: the node count model is used unless NGRAPH_TF_CLUSTER_COST_MODEL
+// selects the static shape model
+TEST(DeassignClusters, CostModelFromEnv) {
+  auto env_map = StoreEnv({"NGRAPH_TF_CLUSTER_COST_MODEL"});
+  SetClusterCostModel(nullptr);
+  ASSERT_EQ(GetClusterCostModel()->Name(), "node_count");
+
+  // The default model does not need shape inference
+  ASSERT_FALSE(GetClusterCostModel()->NeedsShapes());
+
+  SetEnvVariable("NGRAPH_TF_CLUSTER_COST_MODEL", "static_shape");
+  SetClusterCostModel(nullptr);
+  ASSERT_EQ(GetClusterCostModel()->Name(), "static_shape");
+  ASSERT_TRUE(GetClusterCostModel()->NeedsShapes());
+
+  SetEnvVariable("NGRAPH_TF_CLUSTER_COST_MODEL", "bogus");
+  SetClusterCostModel(nullptr);
+  ASSERT_EQ(GetClusterCostModel()->Name(), "node_count");
+
+  UnsetEnvVariable("NGRAPH_TF_CLUSTER_COST_MODEL");
+  SetClusterCostModel(nullptr);
+  RestoreEnv(env_map);
+}
+
+// Test: clusters whose shapes are unknown are kept as by the node count rule
+TEST(DeassignClusters, UnknownShapes) {
+  StaticShapeCostModel cost_model;
+  string reason;
+  ClusterCost cost;
+  cost.num_nodes = 2;
+  cost.num_nontrivial_nodes = 2;
+  ASSERT_FALSE(cost_model.ShouldEncapsulate(cost, &reason));
+  cost.num_unknown_shapes = 1;
+  ASSERT_TRUE(cost_model.ShouldEncapsulate(cost, &reason));
+  cost.num_nontrivial_nodes = 1;
+  ASSERT_FALSE(cost_model.ShouldEncapsulate(cost, &reason));
+}
+
+}  // namespace testing
+
+}  // namespace ngraph_bridge
+
+}  // namespace tensorflow
@@ -69,7 +69,7 @@ TEST(CatalogTest, SmallGraph1) {
   TF_CHECK_OK(root.ToGraph(&graph));
 
   // Execute all the passes one by one
-  ASSERT_OK(CaptureVariables(&graph, skip_these_nodes));
+  ASSERT_OK(CaptureVariables(&graph, skip_these_nodes, 0));
   ASSERT_OK(ReplaceModifiers(&graph, 0));
   ASSERT_OK(MarkForClustering(&graph, skip_these_nodes, "CPU"));
   ASSERT_OK(AssignClusters(&graph));
@@ -116,7 +116,7 @@ TEST(CatalogTest, SmallGraph2) {
   TF_CHECK_OK(root.ToGraph(&graph));
 
   // Execute all the passes one by one
-  ASSERT_OK(CaptureVariables(&graph, skip_these_nodes));
+  ASSERT_OK(CaptureVariables(&graph, skip_these_nodes, 0));
   ASSERT_OK(ReplaceModifiers(&graph, 0));
   ASSERT_OK(MarkForClustering(&graph, skip_these_nodes, "CPU"));
   ASSERT_OK(AssignClusters(&graph));
@@ -190,7 +190,7 @@ TEST(CatalogTest, SmallGraph3) {
   TF_CHECK_OK(root.ToGraph(&graph));
 
   // Execute all the passes one by one
-  ASSERT_OK(CaptureVariables(&graph, skip_these_nodes));
+  ASSERT_OK(CaptureVariables(&graph, skip_these_nodes, 0));
   ASSERT_OK(ReplaceModifiers(&graph, 0));
   ASSERT_OK(MarkForClustering(&graph, skip_these_nodes, "CPU"));
   ASSERT_OK(AssignClusters(&graph));
@@ -259,7 +259,7 @@ TEST(CatalogTest, SmallGraph4) {
   TF_CHECK_OK(root.ToGraph(&graph));
 
   // Execute all the passes one by one
-  ASSERT_OK(CaptureVariables(&graph, skip_these_nodes));
+  ASSERT_OK(CaptureVariables(&graph, skip_these_nodes, 0));
   ASSERT_OK(ReplaceModifiers(&graph, 0));
   ASSERT_OK(MarkForClustering(&graph, skip_these_nodes, "CPU"));
   ASSERT_OK(AssignClusters(&graph));
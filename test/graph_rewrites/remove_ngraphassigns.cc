@@ -61,7 +61,7 @@ TEST(RemoveNGraphAssigns, Graph1) {
   // Capture Variables: to convert Var and Assign to NGraphVar and NGraphAssign
   // there is no other way to create these ops
   std::set<string> skip_these_nodes = {};
-  ASSERT_OK(CaptureVariables(&graph, skip_these_nodes));
+  ASSERT_OK(CaptureVariables(&graph, skip_these_nodes, 0));
 
   // Need encapsulate op for test
   ASSERT_OK(MarkForClustering(&graph, skip_these_nodes, "CPU"));
@@ -115,7 +115,7 @@ TEST(RemoveNGraphAssigns, Graph2) {
   // Capture Variables: to convert Var and Assign to NGraphVar and NGraphAssign
   // there is no other way to create these ops
   std::set<string> skip_these_nodes = {};
-  ASSERT_OK(CaptureVariables(&graph, skip_these_nodes));
+  ASSERT_OK(CaptureVariables(&graph, skip_these_nodes, 0));
 
   // Need encapsulate op for test
   // Keeping Add out of encap, to get the name easily and test
@@ -220,7 +220,7 @@ TEST(RemoveNGraphAssigns, Graph3) {
   // Capture Variables: to convert Var and Assign to NGraphVar and NGraphAssign
   // there is no other way to create these ops
   std::set<string> skip_these_nodes = {};
-  ASSERT_OK(CaptureVariables(&graph, skip_these_nodes));
+  ASSERT_OK(CaptureVariables(&graph, skip_these_nodes, 0));
 
   // Need encapsulate op for test
   ASSERT_OK(MarkForClustering(&graph, skip_these_nodes, "CPU"));
@@ -322,7 +322,7 @@ TEST(RemoveNGraphAssigns, Graph4) {
   // Capture Variables: to convert Var and Assign to NGraphVar and NGraphAssign
   // there is no other way to create these ops
   std::set<string> skip_these_nodes = {};
-  ASSERT_OK(CaptureVariables(&graph, skip_these_nodes));
+  ASSERT_OK(CaptureVariables(&graph, skip_these_nodes, 0));
 
   // Need encapsulate op for test
   // Keeping Add out of encap, to get the name easily and test
@@ -428,7 +428,7 @@ TEST(RemoveNGraphAssigns, Graph5) {
   // Capture Variables: to convert Var and Assign to NGraphVar and NGraphAssign
   // there is no other way to create these ops
   std::set<string> skip_these_nodes = {};
-  ASSERT_OK(CaptureVariables(&graph, skip_these_nodes));
+  ASSERT_OK(CaptureVariables(&graph, skip_these_nodes, 0));
 
   // Need encapsulate op for test
   // Keeping Const out of encap
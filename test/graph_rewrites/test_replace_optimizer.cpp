@@ -76,7 +76,7 @@ TEST(ReplaceModifierTest, Momentum2) {
   ASSERT_EQ(node_map.find("Momentum")->second->type_string(), "ApplyMomentum");
   node_map.clear();
   // Execute all the passes one by one
-  ASSERT_OK(CaptureVariables(&graph, skip_these_nodes));
+  ASSERT_OK(CaptureVariables(&graph, skip_these_nodes, 0));
   // Get all the nodes in map [utility]
   for (auto node : graph.op_nodes()) {
     node_map[node->name()] = node;
@@ -57,3 +57,12 @@ class TestNgraphAPI(NgraphTest):
     def test_stop_logging_placement(self):
         ngraph_bridge.stop_logging_placement()
         assert ngraph_bridge.is_logging_placement() == 0
+
+    def test_get_cache_stats(self):
+        cache_stats = ngraph_bridge.get_cache_stats()
+        assert isinstance(cache_stats, dict)
+        for stats in cache_stats.values():
+            assert set(stats.keys()) == set([
+                'hits', 'misses', 'evictions', 'create_time_us', 'num_items',
+                'size_in_bytes'
+            ])
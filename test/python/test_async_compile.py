@@ -0,0 +1,77 @@
+# ==============================================================================
+#  Copyright 2019 Intel Corporation
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+# ==============================================================================
+"""nGraph TensorFlow bridge background compilation test
+
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import os
+import time
+
+import numpy as np
+import tensorflow as tf
+
+from common import NgraphTest
+import ngraph_bridge
+
+
+class TestAsyncCompile(NgraphTest):
+
+    # The steps that run before the executable is ready use the TF graph of
+    # the cluster, so the results must match TF for every step
+    def test_async_compile(self):
+        env_var_map = self.store_env_variables(['NGRAPH_TF_ASYNC_COMPILE'])
+        os.environ['NGRAPH_TF_ASYNC_COMPILE'] = '1'
+
+        x = tf.placeholder(tf.float32, shape=(None, 3))
+        y = tf.placeholder(tf.float32, shape=(None, 3))
+        out = tf.nn.relu(tf.add(tf.abs(x), y))
+
+        feeds = []
+        for batch in [2, 4, 2, 4, 2, 4]:
+            feeds.append({
+                x: np.random.rand(batch, 3) - 0.5,
+                y: np.random.rand(batch, 3) - 0.5
+            })
+
+        cache_stats = []
+
+        def run_test(sess):
+            results = []
+            for feed in feeds:
+                results.append(sess.run(out, feed_dict=feed))
+                # Give the background compilation a chance to finish
+                time.sleep(0.1)
+            # The executors unregister their stats when the session is closed
+            cache_stats.append(ngraph_bridge.get_cache_stats())
+            return results
+
+        num_fallback_calls = ngraph_bridge.get_num_fallback_calls()
+        ng_results = self.with_ngraph(run_test)
+        # The first step of each batch size cannot wait for the compilation,
+        # so it must have run the TF graph
+        assert ngraph_bridge.get_num_fallback_calls() >= num_fallback_calls + 2
+        # and the background compilations must have cached the executables
+        assert sum(stats['num_items']
+                   for stats in cache_stats[0].values()) >= 2
+        os.environ.pop('NGRAPH_TF_ASYNC_COMPILE', None)
+        self.restore_env_variables(env_var_map)
+        tf_results = self.without_ngraph(run_test)
+
+        for ng_result, tf_result in zip(ng_results, tf_results):
+            assert np.allclose(ng_result, tf_result)
@@ -162,6 +162,8 @@ class Testtf2ngraph(NgraphTest):
             assert np.isclose(res1, res2).all()
             # Comparing with expected value
             assert np.isclose(res1, exp).all()
+        if precompile:
+            os.remove(out_loc.rstrip('/') + '.ngaot')
 
     def test_output_node_inference_for_saved_model(self):
         # The saved model we create in this pytest
@@ -70,11 +70,16 @@ def run_pbtxt(pbtxt_filename, inp0, inp1):
 
 
 def check_pbtxt_has_exec(pbtxt_filename, num_expected_execs):
+    # The executables are in the AOT artifact, the graph only refers to them
+    assert os.path.isfile(pbtxt_filename + '.ngaot')
     with open(pbtxt_filename, 'r') as f:
         contents = '\n'.join(f.readlines())
         assert contents.count('_ngraph_aot_requested') == 1
-        assert contents.count('_ngraph_aot_ngexec_') == num_expected_execs
-        assert contents.count('_ngraph_aot_ngfunction_') == num_expected_execs
+        assert contents.count('_ngraph_aot_artifact') == 1
+        assert contents.count('_ngraph_aot_ngexec_') == 0
+        assert contents.count('_ngraph_aot_ngexecref_') == num_expected_execs
+        assert contents.count(
+            '_ngraph_aot_ngfunctionref_') == num_expected_execs
 
 
 def helper(p0_shape, p1_shape, p0_actual_shape, p1_actual_shape, shapehints):
@@ -100,6 +105,7 @@ def helper(p0_shape, p1_shape, p0_actual_shape, p1_actual_shape, shapehints):
 
     os.remove(temp_in_pbtxt_name)
     os.remove(temp_out_pbtxt_name)
+    os.remove(temp_out_pbtxt_name + '.ngaot')
     os.remove(json_name)
 
 
@@ -47,7 +47,7 @@ TEST(CapturePrefetchTest, SmallGraph1) {
   // and using the precapture_0000.pbtxt
   ASSERT_OK(LoadGraphFromPbTxt("test_capture_prefetch.pbtxt", &input_graph));
   std::set<string> skip_these_nodes = {};
-  ASSERT_OK(CaptureVariables(&input_graph, skip_these_nodes));
+  ASSERT_OK(CaptureVariables(&input_graph, skip_these_nodes, 5));
   int count_ng_prefetch = 0;
   int count_tf_prefetch = 0;
   for (auto node : input_graph.op_nodes()) {
@@ -55,6 +55,20 @@ TEST(CapturePrefetchTest, SmallGraph1) {
       count_ng_prefetch = count_ng_prefetch + 1;
       // This NGraphPrefetchDataset node should have only one output
       ASSERT_EQ(node->num_outputs(), 1);
+      // It knows the iterator it feeds
+      string iterator_name;
+      ASSERT_OK(GetNodeAttr(node->attrs(), "ngraph_iterator", &iterator_name));
+      ASSERT_EQ(iterator_name, "IteratorV2");
+      int graph_id = -1;
+      ASSERT_OK(GetNodeAttr(node->attrs(), "ngraph_graph_id", &graph_id));
+      ASSERT_EQ(graph_id, 5);
+    }
+    // The iterator is tagged with the same graph id
+    if (node->name() == "IteratorV2") {
+      int graph_id = -1;
+      ASSERT_OK(
+          GetNodeAttr(node->attrs(), "_ngraph_prefetch_graph_id", &graph_id));
+      ASSERT_EQ(graph_id, 5);
     }
     if (node->type_string() == "PrefetchDataset") {
       count_tf_prefetch = count_tf_prefetch + 1;
@@ -82,7 +96,7 @@ TEST(CapturePrefetchTest, SmallGraph2) {
   // and using the encapsulated_0002.pbtxt
   ASSERT_OK(LoadGraphFromPbTxt("test_capture_prefetch_1.pbtxt", &input_graph));
   std::set<string> skip_these_nodes = {};
-  ASSERT_OK(CaptureVariables(&input_graph, skip_these_nodes));
+  ASSERT_OK(CaptureVariables(&input_graph, skip_these_nodes, 5));
   int count_ng_prefetch = 0;
   int count_tf_prefetch = 0;
   for (auto node : input_graph.op_nodes()) {
@@ -97,6 +111,9 @@ TEST(CapturePrefetchTest, SmallGraph2) {
       // The only one output of NGraphPrefetchDataset should go to
       // a MakeIterator node
       ASSERT_EQ(dst->type_string(), "MakeIterator");
+      string iterator_name;
+      ASSERT_OK(GetNodeAttr(node->attrs(), "ngraph_iterator", &iterator_name));
+      ASSERT_EQ(iterator_name, "input_processing/batch_processing/IteratorV2");
     }
     if (node->type_string() == "PrefetchDataset") {
       count_tf_prefetch = count_tf_prefetch + 1;
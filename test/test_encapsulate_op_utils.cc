@@ -0,0 +1,67 @@
+/*******************************************************************************
+ * Copyright 2019 Intel Corporation
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ *******************************************************************************/
+
+
+#include <atomic>
+
+#include "gtest/gtest.h"
+
+#include "tensorflow/core/lib/core/errors.h"
+
+#include "ngraph_bridge/ngraph_encapsulate_op_utils.h"
+#include "test/test_utilities.h"
+
+using namespace std;
+
+namespace tensorflow {
+
+namespace ngraph_bridge {
+
+namespace testing {
+
+// Test: all the copies are made, with or without the transfer thread pool
+// (NGRAPH_TF_TRANSFER_THREADS), and the first error is returned
+TEST(EncapsulateOpUtils, RunTensorCopies) {
+  ASSERT_OK(RunTensorCopies({}));
+
+  atomic<int> num_copies{0};
+  vector<TensorCopy> copies;
+  for (int i = 0; i < 8; i++) {
+    copies.push_back({"D2H_Output_" + to_string(i), [&num_copies]() {
+                        num_copies++;
+                        return Status::OK();
+                      }});
+  }
+  ASSERT_OK(RunTensorCopies(copies));
+  ASSERT_EQ(num_copies, 8);
+
+  copies.push_back({"D2H_Output_8", []() -> Status {
+                      return errors::Internal("copy failed");
+                    }});
+  copies.push_back({"D2H_Output_9", []() -> Status {
+                      throw std::runtime_error("copy threw");
+                    }});
+  num_copies = 0;
+  Status status = RunTensorCopies(copies);
+  ASSERT_EQ(num_copies, 8);
+  ASSERT_EQ(status, errors::Internal("copy failed"));
+}
+
+}  // namespace testing
+
+}  // namespace ngraph_bridge
+
+}  // namespace tensorflow
@@ -75,6 +75,11 @@ TEST(PrefetchCatalogTest, SmallGraph1) {
   indexes_map = NGraphCatalog::GetIndexesFromPrefetchedInputIndexMap(
       0, "ngraph_cluster_4");
   ASSERT_EQ(indexes_map, expected);
+  ASSERT_EQ(NGraphCatalog::GetPrefetchIterator(0, "ngraph_cluster_4"),
+            "IteratorV2");
+  // The iterator is not tagged, it is entered with the graph id given
+  ASSERT_EQ(NGraphCatalog::GetPrefetchConsumers(0, "IteratorV2"),
+            std::set<string>{"0_ngraph_cluster_4"});
 
   // Clean up
   NGraphCatalog::ClearCatalog();
@@ -109,6 +114,8 @@ TEST(PrefetchCatalogTest, SmallGraph2) {
   indexes = NGraphCatalog::GetIndexesFromPrefetchedInputIndexMap(
       0, "ngraph_cluster_340");
   ASSERT_EQ(indexes, expected);
+  ASSERT_EQ(NGraphCatalog::GetPrefetchIterator(0, "ngraph_cluster_340"),
+            "input_processing/batch_processing/IteratorV2");
 
   // Clean up
   NGraphCatalog::ClearCatalog();
@@ -117,6 +124,68 @@ TEST(PrefetchCatalogTest, SmallGraph2) {
   RestoreEnv(env_map);
 }
 
+// Test: iterators with the same name in different graphs have their own
+// consumers
+TEST(PrefetchCatalogTest, TaggedIterator) {
+  list<string> env_vars{"NGRAPH_TF_USE_PREFETCH"};
+  const unordered_map<string, string>& env_map = StoreEnv(env_vars);
+  SetEnvVariable("NGRAPH_TF_USE_PREFETCH", "1");
+
+  Graph input_graph(OpRegistry::Global());
+  ASSERT_OK(
+      LoadGraphFromPbTxt("test_catalog_for_prefetch.pbtxt", &input_graph));
+  for (auto node : input_graph.op_nodes()) {
+    if (node->name() == "IteratorV2") {
+      node->AddAttr("_ngraph_prefetch_graph_id", 7);
+    }
+  }
+
+  ASSERT_OK(EnterPrefetchInCatalog(&input_graph, 3));
+  ASSERT_EQ(NGraphCatalog::GetPrefetchIterator(3, "ngraph_cluster_4"),
+            "IteratorV2");
+  ASSERT_EQ(NGraphCatalog::GetPrefetchConsumers(7, "IteratorV2"),
+            std::set<string>{"3_ngraph_cluster_4"});
+  ASSERT_TRUE(NGraphCatalog::GetPrefetchConsumers(3, "IteratorV2").empty());
+
+  NGraphCatalog::ClearCatalog();
+  UnsetEnvVariable("NGRAPH_TF_USE_PREFETCH");
+  RestoreEnv(env_map);
+}
+
+// Test: several encapsulates consume the same iterator, and an encapsulate
+// can be fed by several iterators
+TEST(PrefetchCatalogTest, Consumers) {
+  NGraphCatalog::AddToPrefetchedInputIndexMap(0, "ngraph_cluster_1", {{0, 0}},
+                                              "IteratorV2");
+  NGraphCatalog::AddToPrefetchedInputIndexMap(0, "ngraph_cluster_2", {{1, 1}},
+                                              "IteratorV2");
+  NGraphCatalog::AddToPrefetchedInputIndexMap(1, "ngraph_cluster_1", {{0, 0}},
+                                              "IteratorV2_1");
+  // Same iterator name, captured in another graph
+  NGraphCatalog::AddToPrefetchedInputIndexMap(2, "ngraph_cluster_1", {{0, 0}},
+                                              "IteratorV2", 1);
+  // Entered without an iterator
+  NGraphCatalog::AddToPrefetchedInputIndexMap(1, "ngraph_cluster_3", {{0, 0}});
+
+  ASSERT_EQ(NGraphCatalog::GetPrefetchConsumers(0, "IteratorV2"),
+            (std::set<string>{"0_ngraph_cluster_1", "0_ngraph_cluster_2"}));
+  ASSERT_EQ(NGraphCatalog::GetPrefetchConsumers(1, "IteratorV2"),
+            std::set<string>{"2_ngraph_cluster_1"});
+  ASSERT_EQ(NGraphCatalog::GetPrefetchConsumers(1, "IteratorV2_1"),
+            std::set<string>{"1_ngraph_cluster_1"});
+  ASSERT_TRUE(NGraphCatalog::GetPrefetchConsumers(0, "IteratorV2_1").empty());
+  ASSERT_TRUE(NGraphCatalog::GetPrefetchConsumers(1, "IteratorV2_2").empty());
+  ASSERT_EQ(NGraphCatalog::GetPrefetchIterator(0, "ngraph_cluster_2"),
+            "IteratorV2");
+  ASSERT_EQ(NGraphCatalog::GetPrefetchIterator(1, "ngraph_cluster_1"),
+            "IteratorV2_1");
+  ASSERT_EQ(NGraphCatalog::GetPrefetchIterator(1, "ngraph_cluster_3"), "");
+
+  NGraphCatalog::ClearCatalog();
+  ASSERT_TRUE(NGraphCatalog::GetPrefetchConsumers(0, "IteratorV2").empty());
+  ASSERT_EQ(NGraphCatalog::GetPrefetchIterator(0, "ngraph_cluster_2"), "");
+}
+
 }  // namespace testing
 }  // namespace ngraph_bridge
 }  // namespace tensorflow
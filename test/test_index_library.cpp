@@ -75,6 +75,25 @@ TEST(IndexLibrary, SingleThreadTest2) {
   ASSERT_EQ(idx_lib.get_index(), -1);
 }
 
+TEST(IndexLibrary, GrowTest) {
+  IndexLibrary idx_lib{1};
+  ASSERT_EQ(idx_lib.get_depth(), 1);
+  ASSERT_EQ(idx_lib.get_index(), 0);
+  ASSERT_EQ(idx_lib.get_index(), -1);
+
+  idx_lib.grow(3);
+  ASSERT_EQ(idx_lib.get_depth(), 3);
+  // 0 is still checked out, 1 and 2 are new
+  ASSERT_EQ(idx_lib.get_index(), 1);
+  ASSERT_EQ(idx_lib.get_index(), 2);
+  ASSERT_EQ(idx_lib.get_index(), -1);
+  idx_lib.return_index(0);
+  ASSERT_EQ(idx_lib.get_index(), 0);
+
+  // Cannot shrink
+  ASSERT_THROW(idx_lib.grow(2), std::runtime_error);
+}
+
 // 2 threads run randomly and attempt to get and return indices from the same
 // IndexLibrary 10 times.
 // The test asserts if one of the threads managed to get an index i, then the
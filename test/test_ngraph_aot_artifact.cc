@@ -0,0 +1,105 @@
+/*******************************************************************************
+ * Copyright 2019 Intel Corporation
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ *******************************************************************************/
+
+#include <istream>
+
+#include "gtest/gtest.h"
+#include "ngraph_bridge/ngraph_aot_artifact.h"
+#include "tensorflow/core/platform/env.h"
+#include "test/test_utilities.h"
+
+using namespace std;
+
+namespace tensorflow {
+
+namespace ngraph_bridge {
+
+namespace testing {
+
+class NGraphAOTArtifactTest : public ::testing::Test {
+ protected:
+  void SetUp() override {
+    ASSERT_TRUE(Env::Default()->LocalTempFilename(&m_path));
+  }
+
+  void TearDown() override { Env::Default()->DeleteFile(m_path).IgnoreError(); }
+
+  string m_path;
+};
+
+// Test: blobs are read back through their references, and the artifact is
+// mapped once
+TEST_F(NGraphAOTArtifactTest, WriteAndRead) {
+  std::unique_ptr<NGraphAOTArtifactWriter> writer;
+  ASSERT_OK(NGraphAOTArtifactWriter::Create(m_path, &writer));
+  string ref_0, ref_1;
+  ASSERT_OK(writer->Append("enc_0", "ngexec", "2,3,;/", "executable", &ref_0));
+  ASSERT_OK(writer->Append("enc_1", "ngexec", "2,3,;/", "", &ref_1));
+  // Nothing is visible before Finish
+  ASSERT_FALSE(Env::Default()->FileExists(m_path).ok());
+  ASSERT_OK(writer->Finish());
+
+  shared_ptr<NGraphAOTArtifact> artifact;
+  ASSERT_OK(NGraphAOTArtifact::Open(m_path, &artifact));
+  StringPiece blob;
+  ASSERT_OK(artifact->GetBlob(ref_0, &blob));
+  ASSERT_EQ(blob, "executable");
+  ASSERT_OK(artifact->GetBlob(ref_1, &blob));
+  ASSERT_EQ(blob, "");
+
+  shared_ptr<NGraphAOTArtifact> artifact_again;
+  ASSERT_OK(NGraphAOTArtifact::Open(m_path, &artifact_again));
+  ASSERT_EQ(artifact, artifact_again);
+
+  // The stream reads the blob in place
+  ASSERT_OK(artifact->GetBlob(ref_0, &blob));
+  NGraphMemoryStreamBuf buf(blob);
+  std::istream stream(&buf);
+  string word;
+  stream >> word;
+  ASSERT_EQ(word, "executable");
+  stream.clear();
+  stream.seekg(4);
+  stream >> word;
+  ASSERT_EQ(word, "utable");
+}
+
+// Test: references that are not in the index and files that are not
+// artifacts are rejected
+TEST_F(NGraphAOTArtifactTest, Invalid) {
+  std::unique_ptr<NGraphAOTArtifactWriter> writer;
+  ASSERT_OK(NGraphAOTArtifactWriter::Create(m_path, &writer));
+  string ref;
+  ASSERT_OK(writer->Append("enc_0", "ngexec", "2,;/", "executable", &ref));
+  ASSERT_OK(writer->Finish());
+
+  shared_ptr<NGraphAOTArtifact> artifact;
+  ASSERT_OK(NGraphAOTArtifact::Open(m_path, &artifact));
+  StringPiece blob;
+  ASSERT_NOT_OK(artifact->GetBlob("8,3", &blob));
+  ASSERT_NOT_OK(artifact->GetBlob("1000,10", &blob));
+  ASSERT_NOT_OK(artifact->GetBlob("executable", &blob));
+  artifact.reset();
+
+  ASSERT_OK(WriteStringToFile(Env::Default(), m_path, "not an artifact"));
+  ASSERT_NOT_OK(NGraphAOTArtifact::Open(m_path, &artifact));
+}
+
+}  // namespace testing
+
+}  // namespace ngraph_bridge
+
+}  // namespace tensorflow
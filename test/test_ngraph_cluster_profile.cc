@@ -0,0 +1,121 @@
+/*******************************************************************************
+ * Copyright 2019 Intel Corporation
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ *******************************************************************************/
+
+#include "gtest/gtest.h"
+
+#include "tensorflow/core/platform/env.h"
+
+#include "ngraph_bridge/ngraph_cluster_cost_model.h"
+#include "ngraph_bridge/ngraph_cluster_profile.h"
+#include "test/test_utilities.h"
+
+using namespace std;
+
+namespace tensorflow {
+
+namespace ngraph_bridge {
+
+namespace testing {
+
+// Test: the key depends on the names of the nodes, not on their order
+TEST(NGraphClusterProfile, ClusterKey) {
+  string key_1 = NGraphClusterProfile::ClusterKey({"add", "mul"});
+  string key_2 = NGraphClusterProfile::ClusterKey({"mul", "add"});
+  string key_3 = NGraphClusterProfile::ClusterKey({"add", "sub"});
+  ASSERT_EQ(key_1, key_2);
+  ASSERT_NE(key_1, key_3);
+  ASSERT_EQ(key_1.size(), 16);
+}
+
+// Test: the recorded timings are written and read back
+TEST(NGraphClusterProfile, WriteRead) {
+  NGraphClusterProfile profile;
+  profile.RecordNGraphCall("k0", "ngraph_cluster_0", 100, 20);
+  profile.RecordNGraphCall("k0", "ngraph_cluster_0", 80, 40);
+  profile.RecordTFCall("k0", "ngraph_cluster_0", 300);
+  profile.RecordNGraphCall("k1", "ngraph_cluster_1", 50, 0);
+
+  string file_path;
+  ASSERT_TRUE(Env::Default()->LocalTempFilename(&file_path));
+  ASSERT_OK(profile.Write(file_path));
+
+  NGraphClusterProfile read_profile;
+  ASSERT_OK(read_profile.Read(file_path));
+  Env::Default()->DeleteFile(file_path).IgnoreError();
+  ASSERT_EQ(read_profile.Size(), 2);
+
+  ClusterProfileEntry entry;
+  ASSERT_TRUE(read_profile.Find("k0", &entry));
+  ASSERT_EQ(entry.name, "ngraph_cluster_0");
+  ASSERT_EQ(entry.ngraph_calls, 2);
+  ASSERT_EQ(entry.ngraph_exec_us, 180);
+  ASSERT_EQ(entry.ngraph_copy_us, 60);
+  ASSERT_EQ(entry.tf_calls, 1);
+  ASSERT_EQ(entry.tf_us, 300);
+  ASSERT_EQ(entry.NGraphUsPerCall(), 120);
+  ASSERT_EQ(entry.TFUsPerCall(), 300);
+
+  ASSERT_TRUE(read_profile.Find("k1", &entry));
+  ASSERT_EQ(entry.TFUsPerCall(), 0);
+  ASSERT_FALSE(read_profile.Find("k2", &entry));
+}
+
+// Test: a malformed profile is rejected
+TEST(NGraphClusterProfile, Malformed) {
+  string file_path;
+  ASSERT_TRUE(Env::Default()->LocalTempFilename(&file_path));
+  ASSERT_OK(WriteStringToFile(Env::Default(), file_path, "k0 cluster 1 2\n"));
+  NGraphClusterProfile profile;
+  ASSERT_NOT_OK(profile.Read(file_path));
+  Env::Default()->DeleteFile(file_path).IgnoreError();
+}
+
+// Test: the measured timings decide, the clusters that were not measured in
+// both TF and nGraph are left to the fallback model
+TEST(NGraphClusterProfile, ProfileGuidedCostModel) {
+  NGraphClusterProfile profile;
+  // nGraph is slower than TF
+  profile.RecordNGraphCall("slow", "ngraph_cluster_0", 200, 100);
+  profile.RecordTFCall("slow", "ngraph_cluster_0", 250);
+  // nGraph is faster than TF
+  profile.RecordNGraphCall("fast", "ngraph_cluster_1", 10, 5);
+  profile.RecordTFCall("fast", "ngraph_cluster_1", 40);
+  // TF was not measured
+  profile.RecordNGraphCall("ng_only", "ngraph_cluster_2", 10, 5);
+
+  ProfileGuidedCostModel cost_model(
+      std::unique_ptr<ClusterCostModel>(new NodeCountCostModel()), &profile);
+  string reason;
+  ClusterCost cost;
+  cost.num_nodes = 3;
+  cost.num_nontrivial_nodes = 3;
+
+  cost.profile_key = "slow";
+  ASSERT_FALSE(cost_model.ShouldEncapsulate(cost, &reason));
+  cost.profile_key = "fast";
+  ASSERT_TRUE(cost_model.ShouldEncapsulate(cost, &reason));
+
+  cost.profile_key = "ng_only";
+  ASSERT_TRUE(cost_model.ShouldEncapsulate(cost, &reason));
+  cost.num_nontrivial_nodes = 1;
+  ASSERT_FALSE(cost_model.ShouldEncapsulate(cost, &reason));
+}
+
+}  // namespace testing
+
+}  // namespace ngraph_bridge
+
+}  // namespace tensorflow
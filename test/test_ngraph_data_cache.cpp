@@ -14,8 +14,10 @@
  * limitations under the License.
  *******************************************************************************/
 #include <atomic>
+#include <chrono>
 #include <memory>
-#include "absl/synchronization/barrier.h"
+#include <thread>
+#include "absl/synchronization/notification.h"
 #include "gtest/gtest.h"
 #include "test/test_utilities.h"
 
@@ -39,17 +41,17 @@ namespace testing {
 class NGraphDataCacheTest : public ::testing::Test {
  protected:
   NgraphDataCache<std::string, int> m_ng_data_cache{3};
-  int num_threads = 2;
-  absl::Barrier* barrier_ = new absl::Barrier(num_threads);
+  // Released by the test once the other threads wait for the pending item
+  absl::Notification release_create_;
+  absl::Notification release_create_error_;
   std::atomic<int> create_count{0};
+  std::atomic<int> create_error_count{0};
   int destroy_count = 0;
   bool item_evicted = false;
 
   std::pair<Status, int> CreateItem(std::string abc) {
     create_count++;
-    if (barrier_->Block()) {
-      delete barrier_;
-    }
+    release_create_.WaitForNotification();
     return std::make_pair(Status::OK(), 3);
   }
 
@@ -58,15 +60,27 @@ class NGraphDataCacheTest : public ::testing::Test {
   }
 
   std::pair<Status, int> CreateItemReturnError(std::string abc) {
+    create_error_count++;
+    release_create_error_.WaitForNotification();
     return std::make_pair(errors::Internal("Failed to create item"), 0);
   }
   void DestroyItem(int i) {
     item_evicted = true;
     destroy_count++;
   }
+
+  // Waits till num_misses lookups have missed. A lookup that misses while
+  // the item of its key is pending holds the future of that item
+  void WaitForMisses(int64 num_misses) {
+    while (m_ng_data_cache.GetStats().misses < num_misses) {
+      std::this_thread::sleep_for(std::chrono::milliseconds(1));
+    }
+  }
 };
 
-// Tests LooUpOrCreate(), in multithreading environment
+// Tests LooUpOrCreate(), in multithreading environment. Threads that miss on
+// the same key at the same time wait for the item created by the first one,
+// and get the same error if the creation fails
 TEST_F(NGraphDataCacheTest, SameKeyMultiThread) {
   auto worker = [&](size_t thread_id) {
     auto create_item =
@@ -80,26 +94,41 @@ TEST_F(NGraphDataCacheTest, SameKeyMultiThread) {
         (m_ng_data_cache.LookUpOrCreate("abc", create_item, cache_hit)).first);
     ASSERT_OK(
         m_ng_data_cache.LookUpOrCreate("abc", create_item, cache_hit).first);
-    ASSERT_NOT_OK(
-        m_ng_data_cache.LookUpOrCreate("def", create_item_ret_err, cache_hit)
-            .first);
+    ASSERT_EQ(cache_hit, true);
     ASSERT_EQ(
         m_ng_data_cache.LookUpOrCreate("def", create_item_ret_err, cache_hit)
             .first.error_message(),
         "Failed to create item");
-
   };
 
   std::thread thread0(worker, 0);
   std::thread thread1(worker, 1);
 
+  // The items are created only once both the threads have missed on them
+  WaitForMisses(2);
+  release_create_.Notify();
+  WaitForMisses(4);
+  release_create_error_.Notify();
+
   thread0.join();
   thread1.join();
-  // This is ensured by using Barrier inside CreateItem()
-  ASSERT_EQ(create_count, 2);
+  // The item is created only once for both the threads
+  ASSERT_EQ(create_count, 1);
+  ASSERT_EQ(create_error_count, 1);
   ASSERT_EQ(m_ng_data_cache.m_ng_items_map.size(), 1);
   ASSERT_EQ(m_ng_data_cache.m_ng_items_map.find("def"),
             m_ng_data_cache.m_ng_items_map.end());
+  ASSERT_EQ(m_ng_data_cache.m_pending_items_map.size(), 0);
+
+  // Failed items are not cached, so the next lookup tries again
+  bool cache_hit;
+  auto create_item_ret_err = std::bind(
+      &NGraphDataCacheTest_SameKeyMultiThread_Test::CreateItemReturnError,
+      this, std::placeholders::_1);
+  ASSERT_NOT_OK(
+      m_ng_data_cache.LookUpOrCreate("def", create_item_ret_err, cache_hit)
+          .first);
+  ASSERT_EQ(create_error_count, 2);
 }
 
 // Testing to ensure destoy called back is called, when cache is full.
@@ -160,6 +189,85 @@ TEST_F(NGraphDataCacheTest, RemoveItemTest) {
   ASSERT_EQ(destroy_count, 1);
   ASSERT_EQ(m_ng_data_cache.m_ng_items_map.size(), 0);
 }
+
+// Testing that a hit makes an item the most recently used, so that the least
+// recently used item is evicted and not the oldest one
+TEST_F(NGraphDataCacheTest, LRUOrder) {
+  auto create_item =
+      std::bind(&NGraphDataCacheTest_LRUOrder_Test::CreateItemNoBarrier, this,
+                std::placeholders::_1);
+  auto destroy_item = std::bind(&NGraphDataCacheTest_LRUOrder_Test::DestroyItem,
+                                this, std::placeholders::_1);
+  bool cache_hit;
+  ASSERT_OK(m_ng_data_cache
+                .LookUpOrCreate("abc", create_item, destroy_item, cache_hit)
+                .first);
+  ASSERT_OK(m_ng_data_cache
+                .LookUpOrCreate("def", create_item, destroy_item, cache_hit)
+                .first);
+  ASSERT_OK(m_ng_data_cache
+                .LookUpOrCreate("efg", create_item, destroy_item, cache_hit)
+                .first);
+  // "abc" is now the most recently used
+  ASSERT_OK(m_ng_data_cache
+                .LookUpOrCreate("abc", create_item, destroy_item, cache_hit)
+                .first);
+  ASSERT_EQ(cache_hit, true);
+  ASSERT_EQ(m_ng_data_cache.m_lru.front(), "abc");
+  ASSERT_OK(m_ng_data_cache
+                .LookUpOrCreate("hij", create_item, destroy_item, cache_hit)
+                .first);
+  ASSERT_EQ(destroy_count, 1);
+  ASSERT_NE(m_ng_data_cache.m_ng_items_map.find("abc"),
+            m_ng_data_cache.m_ng_items_map.end());
+  ASSERT_EQ(m_ng_data_cache.m_ng_items_map.find("def"),
+            m_ng_data_cache.m_ng_items_map.end());
+
+  // Removing an item in the middle of m_lru removes that key only
+  ASSERT_OK(m_ng_data_cache.RemoveItem("efg"));
+  ASSERT_EQ(m_ng_data_cache.m_lru.size(), 2);
+  ASSERT_EQ(m_ng_data_cache.m_lru.front(), "hij");
+  ASSERT_EQ(m_ng_data_cache.m_lru.back(), "abc");
+
+  auto stats = m_ng_data_cache.GetStats();
+  ASSERT_EQ(stats.hits, 1);
+  ASSERT_EQ(stats.misses, 4);
+  ASSERT_EQ(stats.evictions, 1);
+  ASSERT_EQ(stats.num_items, 2);
+}
+
+// Testing eviction when the total size of the items exceeds the limit
+TEST_F(NGraphDataCacheTest, EvictBySize) {
+  // Item i has size i
+  NgraphDataCache<std::string, int> size_limited_cache(
+      10, 10, [](const int& item) { return static_cast<size_t>(item); });
+  auto create_item = [](std::string key) {
+    return std::make_pair(Status::OK(), std::stoi(key));
+  };
+  auto destroy_item =
+      std::bind(&NGraphDataCacheTest_EvictBySize_Test::DestroyItem, this,
+                std::placeholders::_1);
+  bool cache_hit;
+  ASSERT_OK(size_limited_cache
+                .LookUpOrCreate("4", create_item, destroy_item, cache_hit)
+                .first);
+  ASSERT_OK(size_limited_cache
+                .LookUpOrCreate("5", create_item, destroy_item, cache_hit)
+                .first);
+  ASSERT_EQ(destroy_count, 0);
+  ASSERT_EQ(size_limited_cache.GetStats().size_in_bytes, 9);
+  // Adding 3 takes the size to 12, so 4 is evicted
+  ASSERT_OK(size_limited_cache
+                .LookUpOrCreate("3", create_item, destroy_item, cache_hit)
+                .first);
+  ASSERT_EQ(destroy_count, 1);
+  ASSERT_EQ(size_limited_cache.m_ng_items_map.find("4"),
+            size_limited_cache.m_ng_items_map.end());
+  auto stats = size_limited_cache.GetStats();
+  ASSERT_EQ(stats.size_in_bytes, 8);
+  ASSERT_EQ(stats.evictions, 1);
+  ASSERT_EQ(stats.num_items, 2);
+}
 }
 }
 }
@@ -20,6 +20,7 @@
 #include "tensorflow/core/graph/algorithm.h"
 #include "tensorflow/core/graph/graph.h"
 #include "tensorflow/core/graph/graph_constructor.h"
+#include "tensorflow/core/graph/node_builder.h"
 #include "tensorflow/core/platform/env.h"
 
 #include "ngraph_bridge/ngraph_builder.h"
@@ -501,6 +502,63 @@ TEST_F(NGraphExecTest, MixedTensorsPipelined) {
   }
 }
 
+// Test: a graph translated with an unknown batch dimension is compiled once
+// and called with different batch sizes
+TEST_F(NGraphExecTest, DynamicBatch) {
+  Graph input_graph(OpRegistry::Global());
+  Node* arg_node;
+  ASSERT_OK(NodeBuilder("arg", "_Arg")
+                .Attr("T", DT_FLOAT)
+                .Attr("index", 0)
+                .Finalize(&input_graph, &arg_node));
+  Node* abs_node;
+  ASSERT_OK(NodeBuilder("abs", "Abs")
+                .Input(arg_node, 0)
+                .Attr("T", DT_FLOAT)
+                .Finalize(&input_graph, &abs_node));
+  Node* retval_node;
+  ASSERT_OK(NodeBuilder("retval", "_Retval")
+                .Input(abs_node, 0)
+                .Attr("T", DT_FLOAT)
+                .Attr("index", 0)
+                .Finalize(&input_graph, &retval_node));
+
+  ng::PartialShape partial_shape{ng::Dimension::dynamic(), 3};
+  std::vector<const Tensor*> static_input_map(1, nullptr);
+  shared_ptr<ng::Function> ng_function;
+  ASSERT_OK(Builder::TranslateGraph({partial_shape}, static_input_map,
+                                    &input_graph, ng_function));
+  ASSERT_TRUE(
+      ng_function->get_output_partial_shape(0).same_scheme(partial_shape));
+
+  auto backend = ng::runtime::Backend::create("INTERPRETER", true);
+  auto exec = backend->compile(ng_function);
+  for (size_t batch : {1, 4}) {
+    auto t_x = backend->create_tensor(ng::element::f32, ng::Shape{batch, 3});
+    vector<float> v_x(batch * 3, -2);
+    t_x->write(v_x.data(), v_x.size() * sizeof(float));
+    auto t_result = backend->create_dynamic_tensor(
+        ng::element::f32, ng_function->get_output_partial_shape(0));
+    exec->call({t_result}, {t_x});
+
+    ASSERT_EQ(t_result->get_shape(), (ng::Shape{batch, 3}));
+    vector<float> v_result(batch * 3);
+    t_result->read(v_result.data(), v_result.size() * sizeof(float));
+    for (auto v : v_result) {
+      ASSERT_EQ(v, 2);
+    }
+  }
+
+  // Translations that need the static shapes fail, and the graph is compiled
+  // for the concrete shapes instead
+  Graph axpy_graph(OpRegistry::Global());
+  ASSERT_OK(LoadGraph("test_axpy_launchop.pbtxt", &axpy_graph));
+  std::vector<const Tensor*> axpy_static_input_map(2, nullptr);
+  ASSERT_NOT_OK(Builder::TranslateGraph({partial_shape, partial_shape},
+                                        axpy_static_input_map, &axpy_graph,
+                                        ng_function));
+}
+
 TEST_F(NGraphExecTest, FindNumberOfNodesUtil1) {
   Graph input_graph(OpRegistry::Global());
   ASSERT_OK(LoadGraph("test_axpy_launchop.pbtxt", &input_graph));
@@ -0,0 +1,122 @@
+/*******************************************************************************
+ * Copyright 2019 Intel Corporation
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ *******************************************************************************/
+
+#include "gtest/gtest.h"
+#include "ngraph/ngraph.hpp"
+#include "ngraph_bridge/ngraph_executable_disk_cache.h"
+#include "tensorflow/core/lib/io/path.h"
+#include "tensorflow/core/platform/env.h"
+#include "test/test_utilities.h"
+
+using namespace std;
+namespace ng = ngraph;
+
+namespace tensorflow {
+
+namespace ngraph_bridge {
+
+namespace testing {
+
+class NGraphExecutableDiskCacheTest : public ::testing::Test {
+ protected:
+  void SetUp() override {
+    ASSERT_TRUE(Env::Default()->LocalTempFilename(&m_cache_dir));
+    ASSERT_OK(Env::Default()->RecursivelyCreateDir(m_cache_dir));
+  }
+
+  void TearDown() override {
+    int64 undeleted_files, undeleted_dirs;
+    Env::Default()
+        ->DeleteRecursively(m_cache_dir, &undeleted_files, &undeleted_dirs)
+        .IgnoreError();
+  }
+
+  // Compiles f(x) = x + x
+  shared_ptr<ng::runtime::Executable> CompileAdd(
+      ng::runtime::Backend* backend) {
+    auto x = make_shared<ng::op::Parameter>(ng::element::f32, ng::Shape{2});
+    auto ng_function = make_shared<ng::Function>(make_shared<ng::op::Add>(x, x),
+                                                 ng::ParameterVector{x});
+    return backend->compile(ng_function);
+  }
+
+  string m_cache_dir;
+};
+
+// Test: each part of the key changes the key
+TEST_F(NGraphExecutableDiskCacheTest, Key) {
+  string key = NGraphExecutableDiskCache::GetKey(1, "2,3,;/", "CPU");
+  ASSERT_NE(key, NGraphExecutableDiskCache::GetKey(2, "2,3,;/", "CPU"));
+  ASSERT_NE(key, NGraphExecutableDiskCache::GetKey(1, "3,2,;/", "CPU"));
+  ASSERT_NE(key, NGraphExecutableDiskCache::GetKey(1, "2,3,;/", "INTERPRETER"));
+  ASSERT_EQ(key, NGraphExecutableDiskCache::GetKey(1, "2,3,;/", "CPU"));
+}
+
+// Test: a stored executable is loaded and computes the same result
+TEST_F(NGraphExecutableDiskCacheTest, StoreAndLoad) {
+  auto backend = ng::runtime::Backend::create("CPU");
+  NGraphExecutableDiskCache disk_cache(m_cache_dir, 1LL << 30);
+  string key = NGraphExecutableDiskCache::GetKey(1, "2,;/", "CPU");
+
+  shared_ptr<ng::runtime::Executable> ng_exec;
+  string serialized_ng_function;
+  ASSERT_TRUE(errors::IsNotFound(
+      disk_cache.Load(key, backend.get(), ng_exec, serialized_ng_function)));
+
+  // The serialized function is stored next to the executable
+  ASSERT_OK(disk_cache.Store(key, CompileAdd(backend.get()), "{\n}"));
+  ASSERT_OK(
+      disk_cache.Load(key, backend.get(), ng_exec, serialized_ng_function));
+  ASSERT_NE(ng_exec, nullptr);
+  ASSERT_EQ(serialized_ng_function, "{\n}");
+
+  auto t_x = backend->create_tensor(ng::element::f32, ng::Shape{2});
+  auto t_result = backend->create_tensor(ng::element::f32, ng::Shape{2});
+  vector<float> v_x{1, 2};
+  t_x->write(v_x.data(), sizeof(float) * v_x.size());
+  ng_exec->call({t_result}, {t_x});
+  vector<float> v_result(2);
+  t_result->read(v_result.data(), sizeof(float) * v_result.size());
+  ASSERT_EQ(v_result, (vector<float>{2, 4}));
+
+  // A different key misses
+  string other_key = NGraphExecutableDiskCache::GetKey(2, "2,;/", "CPU");
+  ASSERT_TRUE(errors::IsNotFound(disk_cache.Load(
+      other_key, backend.get(), ng_exec, serialized_ng_function)));
+}
+
+// Test: entries are not written beyond the size limit
+TEST_F(NGraphExecutableDiskCacheTest, SizeLimit) {
+  auto backend = ng::runtime::Backend::create("CPU");
+  NGraphExecutableDiskCache disk_cache(m_cache_dir, 16);
+  string key = NGraphExecutableDiskCache::GetKey(1, "2,;/", "CPU");
+
+  ASSERT_NOT_OK(disk_cache.Store(key, CompileAdd(backend.get()), "{}"));
+  shared_ptr<ng::runtime::Executable> ng_exec;
+  string serialized_ng_function;
+  ASSERT_TRUE(errors::IsNotFound(
+      disk_cache.Load(key, backend.get(), ng_exec, serialized_ng_function)));
+
+  std::vector<string> children;
+  ASSERT_OK(Env::Default()->GetChildren(m_cache_dir, &children));
+  ASSERT_EQ(children.size(), 0);
+}
+
+}  // namespace testing
+
+}  // namespace ngraph_bridge
+
+}  // namespace tensorflow
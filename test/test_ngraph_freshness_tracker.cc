@@ -0,0 +1,154 @@
+/*******************************************************************************
+ * Copyright 2019 Intel Corporation
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ *******************************************************************************/
+
+#include <chrono>
+#include <iostream>
+#include <memory>
+#include <thread>
+
+#include "gtest/gtest.h"
+
+#include "ngraph/ngraph.hpp"
+
+#include "ngraph_bridge/ngraph_freshness_tracker.h"
+#include "test/dummy_backend.h"
+#include "test/test_utilities.h"
+
+using namespace std;
+namespace ng = ngraph;
+
+namespace tensorflow {
+
+namespace ngraph_bridge {
+
+namespace testing {
+
+static shared_ptr<ng::runtime::Executable> CreateExecutable() {
+  auto A = make_shared<ng::op::Parameter>(ng::element::f32, ng::Shape{2});
+  auto f = make_shared<ng::Function>(make_shared<ng::op::Abs>(A),
+                                     ng::ParameterVector{A});
+  return make_shared<ng::runtime::dummy::DummyExecutable>(f);
+}
+
+// Test: the usage described in ngraph_freshness_tracker.h
+TEST(NGraphFreshnessTracker, Usage) {
+  auto tracker = new NGraphFreshnessTracker();
+  auto ng_exec1 = CreateExecutable();
+  auto ng_exec2 = CreateExecutable();
+  float data[4];
+  const void* tensor_base_ptr = data;
+
+  ASSERT_FALSE(tracker->IsFresh(tensor_base_ptr, ng_exec1));
+  // Not registered yet
+  tracker->MarkFresh(tensor_base_ptr, ng_exec1);
+  ASSERT_FALSE(tracker->IsFresh(tensor_base_ptr, ng_exec1));
+
+  tracker->AddTensor(tensor_base_ptr);
+  tracker->MarkFresh(tensor_base_ptr, ng_exec1);
+  ASSERT_TRUE(tracker->IsFresh(tensor_base_ptr, ng_exec1));
+  ASSERT_FALSE(tracker->IsFresh(tensor_base_ptr, ng_exec2));
+  // Adding the tensor again does not change its freshness
+  tracker->AddTensor(tensor_base_ptr);
+  ASSERT_TRUE(tracker->IsFresh(tensor_base_ptr, ng_exec1));
+
+  tracker->MarkStale(tensor_base_ptr);
+  ASSERT_FALSE(tracker->IsFresh(tensor_base_ptr, ng_exec1));
+  ASSERT_FALSE(tracker->IsFresh(tensor_base_ptr, ng_exec2));
+
+  // A user marked fresh again after the tensor went stale
+  tracker->MarkFresh(tensor_base_ptr, ng_exec1);
+  tracker->MarkFresh(tensor_base_ptr, ng_exec2);
+  ASSERT_TRUE(tracker->IsFresh(tensor_base_ptr, ng_exec1));
+  tracker->RemoveUser(ng_exec1);
+  ASSERT_FALSE(tracker->IsFresh(tensor_base_ptr, ng_exec1));
+  ASSERT_TRUE(tracker->IsFresh(tensor_base_ptr, ng_exec2));
+
+  // Other tensors are independent
+  const void* other_base_ptr = data + 1;
+  tracker->AddTensor(other_base_ptr);
+  tracker->MarkFresh(other_base_ptr, ng_exec1);
+  tracker->MarkStale(tensor_base_ptr);
+  ASSERT_TRUE(tracker->IsFresh(other_base_ptr, ng_exec1));
+
+  tracker->MarkFresh(tensor_base_ptr, ng_exec2);
+  tracker->RemoveTensor(tensor_base_ptr);
+  ASSERT_FALSE(tracker->IsFresh(tensor_base_ptr, ng_exec2));
+  tracker->Unref();
+}
+
+// Contention benchmark: every thread checks and marks the freshness of its
+// own tensors for a shared executable, as the encapsulate ops of concurrent
+// sessions do for their inputs. Prints the time per check, there is no
+// assertion on it since it depends on the machine
+TEST(NGraphFreshnessTracker, Contention) {
+  auto tracker = new NGraphFreshnessTracker();
+  auto ng_exec = CreateExecutable();
+  const int num_threads = 8;
+  const int num_tensors_per_thread = 16;
+  const int num_steps = 20000;
+
+  vector<vector<float>> buffers(num_threads * num_tensors_per_thread,
+                                vector<float>(16));
+  for (auto& buffer : buffers) {
+    tracker->AddTensor(buffer.data());
+  }
+
+  atomic<int> num_fresh{0};
+  auto start = chrono::steady_clock::now();
+  vector<thread> threads;
+  for (int t = 0; t < num_threads; t++) {
+    threads.emplace_back([&, t]() {
+      int fresh = 0;
+      for (int step = 0; step < num_steps; step++) {
+        for (int i = 0; i < num_tensors_per_thread; i++) {
+          const void* base_ptr = buffers[t * num_tensors_per_thread + i].data();
+          if (tracker->IsFresh(base_ptr, ng_exec)) {
+            fresh++;
+          } else {
+            tracker->MarkFresh(base_ptr, ng_exec);
+          }
+          // Some of the tensors are assigned by variable ops
+          if (step % 4 == 0 && i == 0) {
+            tracker->MarkStale(base_ptr);
+          }
+        }
+      }
+      num_fresh += fresh;
+    });
+  }
+  for (auto& th : threads) {
+    th.join();
+  }
+  auto elapsed_ns = chrono::duration_cast<chrono::nanoseconds>(
+                        chrono::steady_clock::now() - start)
+                        .count();
+
+  // Every tensor is fresh after the first step, except the ones marked stale
+  int num_checks = num_threads * num_tensors_per_thread * num_steps;
+  int num_stale = num_threads * (num_tensors_per_thread + num_steps / 4);
+  ASSERT_EQ(num_fresh, num_checks - num_stale);
+  cout << "Freshness check with " << num_threads
+       << " threads: " << elapsed_ns / num_checks << " ns per check" << endl;
+
+  tracker->RemoveUser(ng_exec);
+  tracker->Unref();
+}
+
+}  // namespace testing
+
+}  // namespace ngraph_bridge
+
+}  // namespace tensorflow
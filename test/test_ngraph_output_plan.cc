@@ -0,0 +1,136 @@
+/*******************************************************************************
+ * Copyright 2019 Intel Corporation
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ *******************************************************************************/
+
+
+#include "gtest/gtest.h"
+
+#include "tensorflow/core/graph/graph_constructor.h"
+#include "tensorflow/core/platform/env.h"
+
+#include "ngraph_bridge/ngraph_backend_manager.h"
+#include "ngraph_bridge/ngraph_executor.h"
+#include "ngraph_bridge/ngraph_output_plan.h"
+#include "ngraph_bridge/ngraph_utils.h"
+#include "test/test_utilities.h"
+
+using namespace std;
+namespace ng = ngraph;
+
+namespace tensorflow {
+
+namespace ngraph_bridge {
+
+namespace testing {
+
+class NGraphOutputPlanTest : public ::testing::Test {
+ protected:
+  void SetUp() override {
+    GraphDef gdef;
+    ASSERT_OK(ReadTextProto(Env::Default(), "test_axpy_launchop.pbtxt", &gdef));
+    GraphConstructorOptions opts;
+    opts.allow_internal_ops = true;
+    unique_ptr<Graph> input_graph(new Graph(OpRegistry::Global()));
+    ASSERT_OK(ConvertGraphDefToGraph(opts, gdef, input_graph.get()));
+
+    BackendManager::CreateBackend("INTERPRETER");
+    m_executor.reset(new NGraphExecutor(100, 500, 600, input_graph,
+                                        "INTERPRETER", "xyz_500", 10));
+
+    Tensor x(DT_FLOAT, TensorShape({2, 3}));
+    AssignInputValues<float>(x, 1.0f);
+    Tensor y(DT_FLOAT, TensorShape({2, 3}));
+    AssignInputValues<float>(y, 1.0f);
+    m_inputs = {x, y};
+  }
+
+  unique_ptr<NGraphExecutor> m_executor;
+  vector<Tensor> m_inputs;
+};
+
+// Test: the plan is cached with the executable and describes its outputs
+TEST_F(NGraphOutputPlanTest, Outputs) {
+  shared_ptr<ng::runtime::Executable> ng_exec;
+  shared_ptr<PipelinedTensorsStore> pts;
+  shared_ptr<NGraphOutputPlan> output_plan;
+  string serialized_ng_function;
+  bool cache_hit = false;
+  ASSERT_OK(m_executor->GetExecutableFunctionAndTensors(
+      m_inputs, ng_exec, serialized_ng_function, pts, cache_hit, &output_plan));
+  ASSERT_FALSE(cache_hit);
+  ASSERT_TRUE(output_plan != nullptr);
+
+  const auto& outputs = output_plan->GetOutputs();
+  ASSERT_EQ(outputs.size(), 2);
+  for (const auto& output : outputs) {
+    ASSERT_EQ(output.shape, TensorShape({2, 3}));
+    ASSERT_FALSE(output.is_dynamic);
+    ASSERT_EQ(output.dtype, DT_FLOAT);
+    ASSERT_EQ(output.element_size, sizeof(float));
+    ASSERT_TRUE(output.needs_copy);
+  }
+
+  // The cache hit returns the same plan
+  shared_ptr<NGraphOutputPlan> cached_output_plan;
+  ASSERT_OK(m_executor->GetExecutableFunctionAndTensors(
+      m_inputs, ng_exec, serialized_ng_function, pts, cache_hit,
+      &cached_output_plan));
+  ASSERT_TRUE(cache_hit);
+  ASSERT_EQ(cached_output_plan, output_plan);
+}
+
+// Test: the element types of the results are checked against the TF types
+TEST_F(NGraphOutputPlanTest, TypeMismatch) {
+  shared_ptr<ng::runtime::Executable> ng_exec;
+  shared_ptr<PipelinedTensorsStore> pts;
+  string serialized_ng_function;
+  bool cache_hit = false;
+  ASSERT_OK(m_executor->GetExecutableFunctionAndTensors(
+      m_inputs, ng_exec, serialized_ng_function, pts, cache_hit));
+
+  shared_ptr<NGraphOutputPlan> output_plan;
+  ASSERT_NOT_OK(NGraphOutputPlan::Create(ng_exec, {DT_FLOAT, DT_INT32},
+                                         m_executor->GetTensorManager(),
+                                         &output_plan));
+  ASSERT_NOT_OK(NGraphOutputPlan::Create(
+      ng_exec, {DT_FLOAT}, m_executor->GetTensorManager(), &output_plan));
+  ASSERT_TRUE(output_plan == nullptr);
+}
+
+// Test: the plan lists the outputs that are copied, as the tensor manager
+// classifies them, with the names of their copies
+TEST_F(NGraphOutputPlanTest, CopiedOutputs) {
+  shared_ptr<ng::runtime::Executable> ng_exec;
+  shared_ptr<PipelinedTensorsStore> pts;
+  shared_ptr<NGraphOutputPlan> output_plan;
+  string serialized_ng_function;
+  bool cache_hit = false;
+  ASSERT_OK(m_executor->GetExecutableFunctionAndTensors(
+      m_inputs, ng_exec, serialized_ng_function, pts, cache_hit, &output_plan));
+
+  auto tensor_manager = m_executor->GetTensorManager();
+  ASSERT_EQ(output_plan->GetCopiedOutputIndexes(),
+            tensor_manager->GetOutputIndexesThatNeedCopy());
+  const auto& outputs = output_plan->GetOutputs();
+  for (auto i : output_plan->GetCopiedOutputIndexes()) {
+    ASSERT_EQ(outputs[i].copy_name, "D2H_Output_" + to_string(i));
+  }
+}
+
+}  // namespace testing
+
+}  // namespace ngraph_bridge
+
+}  // namespace tensorflow
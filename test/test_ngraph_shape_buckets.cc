@@ -0,0 +1,137 @@
+/*******************************************************************************
+ * Copyright 2019 Intel Corporation
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ *******************************************************************************/
+
+#include "gtest/gtest.h"
+#include "ngraph_bridge/ngraph_shape_buckets.h"
+#include "test/test_utilities.h"
+
+using namespace std;
+
+namespace tensorflow {
+
+namespace ngraph_bridge {
+
+namespace testing {
+
+// Test: sizes are rounded up to the boundaries or to powers of two
+TEST(NGraphShapeBuckets, BucketSize) {
+  NGraphShapeBuckets buckets;
+  ASSERT_OK(NGraphShapeBuckets::Parse("in0:1=16,32,64;in1:0=pow2", &buckets));
+  ASSERT_TRUE(buckets.IsEnabled());
+  ASSERT_EQ(buckets.GetBucketSize(0, 1, 1), 16);
+  ASSERT_EQ(buckets.GetBucketSize(0, 1, 16), 16);
+  ASSERT_EQ(buckets.GetBucketSize(0, 1, 17), 32);
+  // Larger than the last boundary
+  ASSERT_EQ(buckets.GetBucketSize(0, 1, 65), 65);
+  // No rule for this dimension
+  ASSERT_EQ(buckets.GetBucketSize(0, 0, 5), 5);
+  ASSERT_EQ(buckets.GetBucketSize(1, 0, 5), 8);
+  ASSERT_EQ(buckets.GetBucketSize(1, 0, 8), 8);
+  ASSERT_EQ(buckets.GetBucketSize(1, 0, 1), 1);
+
+  ASSERT_OK(NGraphShapeBuckets::Parse("", &buckets));
+  ASSERT_FALSE(buckets.IsEnabled());
+}
+
+// Test: malformed rules are rejected
+TEST(NGraphShapeBuckets, Parse) {
+  NGraphShapeBuckets buckets;
+  ASSERT_NOT_OK(NGraphShapeBuckets::Parse("in0:1", &buckets));
+  ASSERT_NOT_OK(NGraphShapeBuckets::Parse("in0=16", &buckets));
+  ASSERT_NOT_OK(NGraphShapeBuckets::Parse("in0:1=32,16", &buckets));
+  ASSERT_NOT_OK(NGraphShapeBuckets::Parse("in0:1=0", &buckets));
+  ASSERT_NOT_OK(NGraphShapeBuckets::Parse("in0:1=pow3", &buckets));
+  ASSERT_NOT_OK(NGraphShapeBuckets::Parse("out0:1=in0:1", &buckets));
+  ASSERT_NOT_OK(NGraphShapeBuckets::Parse("in0:1=16;out0:1=0:1", &buckets));
+
+  ASSERT_OK(NGraphShapeBuckets::Parse("in1:1=16;out0:1=in1:1", &buckets));
+  ASSERT_TRUE(buckets.HasOutputRule(0));
+  ASSERT_FALSE(buckets.HasOutputRule(1));
+  ASSERT_OK(buckets.Validate({false, false}, 1));
+  // Static input
+  ASSERT_NOT_OK(buckets.Validate({false, true}, 1));
+  // Not enough inputs or outputs
+  ASSERT_NOT_OK(buckets.Validate({false}, 1));
+  ASSERT_NOT_OK(buckets.Validate({false, false}, 0));
+}
+
+// Test: the rules of the rewriter config only apply to the encapsulates that
+// have the tensors they name
+TEST(NGraphShapeBuckets, ScopeToEncapsulate) {
+  string spec = "in(ids):1=16,32;in(mask:0):1=pow2;out(logits:0):1=in(ids:0):1";
+  string encapsulate_spec;
+  ASSERT_OK(NGraphShapeBuckets::ScopeToEncapsulate(
+      spec, {"mask:0", "ids:0"}, {"other:0", "logits:0"}, &encapsulate_spec));
+  ASSERT_EQ(encapsulate_spec, "in1:1=16,32;in0:1=pow2;out1:1=in1:1");
+
+  // An encapsulate that has none of the tensors gets no rules
+  ASSERT_OK(NGraphShapeBuckets::ScopeToEncapsulate(
+      spec, {"other:0"}, {"other:1"}, &encapsulate_spec));
+  ASSERT_EQ(encapsulate_spec, "");
+
+  // The output is sliced by an input of another encapsulate
+  ASSERT_NOT_OK(NGraphShapeBuckets::ScopeToEncapsulate(
+      spec, {"mask:0"}, {"logits:0"}, &encapsulate_spec));
+  // The rewriter config cannot use input indexes
+  ASSERT_NOT_OK(NGraphShapeBuckets::ScopeToEncapsulate("in0:1=16", {"ids:0"},
+                                                       {}, &encapsulate_spec));
+}
+
+// Test: inputs are padded with zeros and outputs are sliced back
+TEST(NGraphShapeBuckets, PadAndSlice) {
+  NGraphShapeBuckets buckets;
+  ASSERT_OK(NGraphShapeBuckets::Parse("in0:1=4,8;out0:1=in0:1", &buckets));
+
+  Tensor input(DT_FLOAT, TensorShape({2, 3}));
+  AssignInputValues<float>(input, vector<float>{1, 2, 3, 4, 5, 6});
+  Tensor other_input(DT_INT32, TensorShape({2}));
+  vector<Tensor> inputs{input, other_input};
+
+  vector<Tensor> padded_inputs;
+  ASSERT_OK(buckets.PadInputs(inputs, &padded_inputs));
+  ASSERT_EQ(padded_inputs.size(), 2);
+  ASSERT_EQ(padded_inputs[0].shape(), TensorShape({2, 4}));
+  auto padded = padded_inputs[0].flat<float>();
+  vector<float> expected{1, 2, 3, 0, 4, 5, 6, 0};
+  for (int i = 0; i < expected.size(); i++) {
+    ASSERT_EQ(padded(i), expected[i]);
+  }
+  // Inputs without rules are not copied
+  ASSERT_EQ(padded_inputs[1].tensor_data().data(),
+            other_input.tensor_data().data());
+
+  TensorShape output_shape;
+  ASSERT_OK(
+      buckets.GetOutputShape(0, TensorShape({5, 4}), inputs, &output_shape));
+  ASSERT_EQ(output_shape, TensorShape({5, 3}));
+
+  Tensor output(DT_FLOAT, TensorShape({2, 3}));
+  ASSERT_OK(NGraphShapeBuckets::CopyCorner(padded_inputs[0], &output));
+  auto sliced = output.flat<float>();
+  for (int i = 0; i < 6; i++) {
+    ASSERT_EQ(sliced(i), i + 1);
+  }
+
+  // The rule refers to a dimension the input does not have
+  vector<Tensor> bad_inputs{Tensor(DT_FLOAT, TensorShape({3})), other_input};
+  ASSERT_NOT_OK(buckets.PadInputs(bad_inputs, &padded_inputs));
+}
+
+}  // namespace testing
+
+}  // namespace ngraph_bridge
+
+}  // namespace tensorflow
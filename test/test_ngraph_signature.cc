@@ -0,0 +1,163 @@
+/*******************************************************************************
+ * Copyright 2019 Intel Corporation
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ *******************************************************************************/
+
+#include <unordered_map>
+
+#include "gtest/gtest.h"
+
+#include "ngraph_bridge/ngraph_signature.h"
+#include "test/test_utilities.h"
+
+using namespace std;
+
+namespace tensorflow {
+
+namespace ngraph_bridge {
+
+namespace testing {
+
+// Test: signatures of tensors with the same shapes are equal and the human
+// readable form matches the format used by AOT
+TEST(NGraphSignature, ShapesOnly) {
+  vector<Tensor> inputs_1{Tensor(DT_FLOAT, TensorShape({2, 3})),
+                          Tensor(DT_FLOAT, TensorShape({}))};
+  vector<Tensor> inputs_2{Tensor(DT_FLOAT, TensorShape({2, 3})),
+                          Tensor(DT_FLOAT, TensorShape({}))};
+  vector<Tensor> inputs_3{Tensor(DT_FLOAT, TensorShape({3, 2})),
+                          Tensor(DT_FLOAT, TensorShape({}))};
+  vector<bool> input_is_static{false, false};
+
+  NGraphSignature sig_1, sig_2, sig_3;
+  vector<TensorShape> input_shapes;
+  vector<const Tensor*> static_input_map;
+  ASSERT_OK(sig_1.Compute(inputs_1, input_is_static, input_shapes,
+                          static_input_map));
+  ASSERT_EQ(input_shapes.size(), 2);
+  ASSERT_EQ(input_shapes[0], TensorShape({2, 3}));
+  ASSERT_EQ(static_input_map.size(), 2);
+  ASSERT_EQ(static_input_map[0], nullptr);
+
+  input_shapes.clear();
+  ASSERT_OK(sig_2.Compute(inputs_2, input_is_static, input_shapes,
+                          static_input_map));
+  input_shapes.clear();
+  ASSERT_OK(sig_3.Compute(inputs_3, input_is_static, input_shapes,
+                          static_input_map));
+
+  ASSERT_EQ(sig_1, sig_2);
+  ASSERT_EQ(sig_1.Hash(), sig_2.Hash());
+  ASSERT_NE(sig_1, sig_3);
+
+  string sig_str;
+  ASSERT_OK(sig_1.ToString(&sig_str));
+  ASSERT_EQ(sig_str, "2,3,;;/");
+}
+
+// Test: the contents of the static inputs are part of the signature
+TEST(NGraphSignature, StaticInputs) {
+  Tensor shape_1(DT_INT32, TensorShape({2}));
+  AssignInputValues<int>(shape_1, vector<int>{4, 5});
+  Tensor shape_2(DT_INT32, TensorShape({2}));
+  AssignInputValues<int>(shape_2, vector<int>{4, 5});
+  Tensor shape_3(DT_INT32, TensorShape({2}));
+  AssignInputValues<int>(shape_3, vector<int>{5, 4});
+  Tensor data(DT_FLOAT, TensorShape({20}));
+
+  vector<bool> input_is_static{false, true};
+  NGraphSignature sig_1, sig_2, sig_3;
+  vector<TensorShape> input_shapes;
+  vector<const Tensor*> static_input_map;
+
+  vector<Tensor> inputs_1{data, shape_1};
+  ASSERT_OK(sig_1.Compute(inputs_1, input_is_static, input_shapes,
+                          static_input_map));
+  ASSERT_EQ(static_input_map[0], nullptr);
+  ASSERT_EQ(static_input_map[1], &inputs_1[1]);
+
+  vector<Tensor> inputs_2{data, shape_2};
+  ASSERT_OK(sig_2.Compute(inputs_2, input_is_static, input_shapes,
+                          static_input_map));
+  vector<Tensor> inputs_3{data, shape_3};
+  ASSERT_OK(sig_3.Compute(inputs_3, input_is_static, input_shapes,
+                          static_input_map));
+
+  // Different buffers with the same contents
+  ASSERT_EQ(sig_1, sig_2);
+  ASSERT_NE(sig_1, sig_3);
+
+  string sig_str;
+  ASSERT_OK(sig_3.ToString(&sig_str));
+  ASSERT_EQ(sig_str, "20,;2,;/5,4,;");
+
+  // Signatures can be used as keys of a hash map
+  unordered_map<NGraphSignature, int> sig_map;
+  sig_map[sig_1] = 1;
+  sig_map[sig_3] = 3;
+  ASSERT_EQ(sig_map.size(), 2);
+  ASSERT_EQ(sig_map.at(sig_2), 1);
+}
+
+// Test: the elements of static string inputs are part of the signature
+TEST(NGraphSignature, StringStaticInputs) {
+  Tensor strings_1(DT_STRING, TensorShape({2}));
+  strings_1.flat<string>()(0) = "a,b";
+  strings_1.flat<string>()(1) = "c";
+  Tensor strings_2(DT_STRING, TensorShape({2}));
+  strings_2.flat<string>()(0) = "a,b";
+  strings_2.flat<string>()(1) = "c";
+  Tensor strings_3(DT_STRING, TensorShape({2}));
+  strings_3.flat<string>()(0) = "a";
+  strings_3.flat<string>()(1) = "b,c";
+
+  vector<bool> input_is_static{true};
+  NGraphSignature sig_1, sig_2, sig_3;
+  vector<TensorShape> input_shapes;
+  vector<const Tensor*> static_input_map;
+  ASSERT_OK(sig_1.Compute({strings_1}, input_is_static, input_shapes,
+                          static_input_map));
+  ASSERT_OK(sig_2.Compute({strings_2}, input_is_static, input_shapes,
+                          static_input_map));
+  ASSERT_OK(sig_3.Compute({strings_3}, input_is_static, input_shapes,
+                          static_input_map));
+
+  ASSERT_EQ(sig_1, sig_2);
+  ASSERT_EQ(sig_1.Hash(), sig_2.Hash());
+  ASSERT_NE(sig_1, sig_3);
+
+  string sig_str_1, sig_str_3;
+  ASSERT_OK(sig_1.ToString(&sig_str_1));
+  ASSERT_OK(sig_3.ToString(&sig_str_3));
+  ASSERT_EQ(sig_str_1, "2,;/\"a,b\",\"c\",;");
+  ASSERT_NE(sig_str_1, sig_str_3);
+}
+
+// Test: static inputs that cannot be hashed are rejected
+TEST(NGraphSignature, UnsupportedStaticInput) {
+  vector<Tensor> inputs{Tensor(DT_RESOURCE, TensorShape({2}))};
+  vector<bool> input_is_static{true};
+  NGraphSignature signature;
+  vector<TensorShape> input_shapes;
+  vector<const Tensor*> static_input_map;
+  ASSERT_NE(signature.Compute(inputs, input_is_static, input_shapes,
+                              static_input_map),
+            Status::OK());
+}
+
+}  // namespace testing
+
+}  // namespace ngraph_bridge
+
+}  // namespace tensorflow
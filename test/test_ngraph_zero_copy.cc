@@ -0,0 +1,148 @@
+/*******************************************************************************
+ * Copyright 2019 Intel Corporation
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ *******************************************************************************/
+
+
+#include "gtest/gtest.h"
+
+#include "tensorflow/core/common_runtime/dma_helper.h"
+
+#include "ngraph_bridge/ngraph_zero_copy.h"
+#include "test/test_utilities.h"
+
+using namespace std;
+namespace ng = ngraph;
+
+namespace tensorflow {
+
+namespace ngraph_bridge {
+
+namespace testing {
+
+// Test: the host buffer of a tensor created by CreateHostTensor holds the
+// data written to the tensor
+TEST(NGraphZeroCopy, HostTensor) {
+  auto backend = ng::runtime::Backend::create("INTERPRETER");
+  auto host_tensor =
+      CreateHostTensor(backend.get(), ng::element::f32, ng::Shape{2, 3});
+  vector<float> values{1, 2, 3, 4, 5, 6};
+  host_tensor->write(values.data(), values.size() * sizeof(float));
+
+  float* host_data = static_cast<float*>(GetHostTensorData(host_tensor));
+  ASSERT_NE(host_data, nullptr);
+  for (size_t i = 0; i < values.size(); i++) {
+    ASSERT_EQ(host_data[i], values[i]);
+  }
+
+  // Copies share the buffer
+  shared_ptr<ng::runtime::Tensor> copy = host_tensor;
+  ASSERT_EQ(GetHostTensorData(copy), host_data);
+
+  // Tensors created by the backend do not expose a buffer
+  auto backend_tensor = backend->create_tensor(ng::element::f32, {2, 3});
+  ASSERT_EQ(GetHostTensorData(backend_tensor), nullptr);
+}
+
+// Test: an alias tensor reads the buffer of the TF tensor, unless the buffer
+// cannot be used in place
+TEST(NGraphZeroCopy, AliasTensor) {
+  auto backend = ng::runtime::Backend::create("INTERPRETER");
+  auto pipelined_tensor = backend->create_tensor(ng::element::f32, {2, 3});
+
+  Tensor tf_tensor(DT_FLOAT, TensorShape({2, 3}));
+  AssignInputValues<float>(tf_tensor, vector<float>{1, 2, 3, 4, 5, 6});
+  auto alias = CreateAliasTensor(backend.get(), tf_tensor, pipelined_tensor);
+  ASSERT_NE(alias, nullptr);
+  vector<float> values(6);
+  alias->read(values.data(), values.size() * sizeof(float));
+  ASSERT_EQ(values, (vector<float>{1, 2, 3, 4, 5, 6}));
+
+  // No copy was made
+  tf_tensor.flat<float>()(0) = 7;
+  alias->read(values.data(), values.size() * sizeof(float));
+  ASSERT_EQ(values[0], 7);
+
+  // Unaligned slice
+  Tensor tf_tensor_3x3(DT_FLOAT, TensorShape({3, 3}));
+  Tensor slice = tf_tensor_3x3.Slice(1, 3);
+  auto pipelined_tensor_2x3 = backend->create_tensor(ng::element::f32, {2, 3});
+  ASSERT_EQ(CreateAliasTensor(backend.get(), slice, pipelined_tensor_2x3),
+            nullptr);
+
+  // Size mismatch
+  ASSERT_EQ(CreateAliasTensor(backend.get(), tf_tensor_3x3, pipelined_tensor),
+            nullptr);
+}
+
+// Test: the slot is returned to the store once the TF tensors using its
+// buffers are released
+TEST(NGraphZeroCopy, SlotIsHeldByTensors) {
+  auto backend = ng::runtime::Backend::create("INTERPRETER");
+  PipelinedTensorMatrix pipelined_input_tensors(2);
+  PipelinedTensorMatrix pipelined_output_tensors{
+      {CreateHostTensor(backend.get(), ng::element::f32, ng::Shape{4})},
+      {CreateHostTensor(backend.get(), ng::element::f32, ng::Shape{4})}};
+  auto pts = make_shared<PipelinedTensorsStore>(pipelined_input_tensors,
+                                                pipelined_output_tensors);
+
+  auto io_tensors = pts->get_tensors();
+  ASSERT_EQ(get<0>(io_tensors), 0);
+  ASSERT_TRUE(pts->try_hold());
+  // The other index is taken by another step
+  ASSERT_EQ(get<0>(pts->get_tensors()), 1);
+  auto ng_output = get<2>(io_tensors)[0];
+  vector<float> values{1, -2, 3, -4};
+  ng_output->write(values.data(), values.size() * sizeof(float));
+
+  auto slot = make_shared<NGraphPipelineSlot>(pts, get<0>(io_tensors));
+  Tensor tf_tensor;
+  ASSERT_OK(MakeZeroCopyTensor(DT_FLOAT, TensorShape({4}),
+                               GetHostTensorData(ng_output), slot, &tf_tensor));
+  ASSERT_EQ(DMAHelper::base(&tf_tensor), GetHostTensorData(ng_output));
+  auto tf_values = tf_tensor.flat<float>();
+  for (size_t i = 0; i < values.size(); i++) {
+    ASSERT_EQ(tf_values(i), values[i]);
+  }
+
+  // The tensor holds the slot
+  slot.reset();
+  ASSERT_EQ(get<0>(pts->get_tensors()), -1);
+
+  // So does a tensor sharing the buffer
+  Tensor tf_tensor_copy = tf_tensor;
+  tf_tensor = Tensor();
+  ASSERT_EQ(get<0>(pts->get_tensors()), -1);
+
+  tf_tensor_copy = Tensor();
+  ASSERT_EQ(get<0>(pts->get_tensors()), 0);
+}
+
+// Test: only memcpy-able types can be used
+TEST(NGraphZeroCopy, UnsupportedType) {
+  auto pts = make_shared<PipelinedTensorsStore>(PipelinedTensorMatrix(2),
+                                                PipelinedTensorMatrix(2));
+  ASSERT_TRUE(pts->try_hold());
+  auto slot = make_shared<NGraphPipelineSlot>(pts, get<0>(pts->get_tensors()));
+  char data[16];
+  Tensor tf_tensor;
+  ASSERT_NOT_OK(
+      MakeZeroCopyTensor(DT_STRING, TensorShape({1}), data, slot, &tf_tensor));
+}
+
+}  // namespace testing
+
+}  // namespace ngraph_bridge
+
+}  // namespace tensorflow
@@ -126,6 +126,44 @@ TEST(ParallelExecutor, CompilerTest) {
   ASSERT_TRUE(cache_hit);
 }
 
+// Test: the executable of the input shapes recorded on the _Arg nodes is
+// compiled by WarmUp, and the first call finds it in the cache
+TEST(ParallelExecutor, WarmUp) {
+  unique_ptr<tf::Graph> input_graph;
+  ASSERT_OK(LoadGraphFromPbTxt("test_axpy_launchop.pbtxt", input_graph));
+  for (auto node : input_graph->op_nodes()) {
+    if (node->type_string() == "_Arg") {
+      node->AddAttr("_output_shapes", std::vector<PartialTensorShape>{
+                                          PartialTensorShape({2, 3})});
+    }
+  }
+
+  tf::ngraph_bridge::BackendManager::CreateBackend("INTERPRETER");
+  NGraphExecutor executor(100, 500, 600, input_graph, "INTERPRETER", "xyz_500",
+                          10);
+
+  std::vector<std::vector<TensorShape>> input_shapes_list;
+  ASSERT_OK(executor.GetKnownInputShapes(&input_shapes_list));
+  ASSERT_EQ(input_shapes_list.size(), 1);
+  ASSERT_EQ(input_shapes_list[0].size(), 2);
+  ASSERT_EQ(input_shapes_list[0][0], TensorShape({2, 3}));
+  ASSERT_EQ(input_shapes_list[0][1], TensorShape({2, 3}));
+
+  ASSERT_EQ(executor.WarmUp(), 1);
+  executor.WaitForBackgroundCompiles();
+
+  Tensor x(DT_FLOAT, TensorShape({2, 3}));
+  Tensor y(DT_FLOAT, TensorShape({2, 3}));
+  std::vector<Tensor> tf_input_tensors{x, y};
+  shared_ptr<ngraph::runtime::Executable> ng_exec;
+  shared_ptr<PipelinedTensorsStore> pts;
+  std::string ser_ng_function;
+  bool cache_hit = false;
+  ASSERT_OK(executor.GetExecutableFunctionAndTensors(
+      tf_input_tensors, ng_exec, ser_ng_function, pts, cache_hit));
+  ASSERT_TRUE(cache_hit);
+}
+
 TEST(ParallelExecutor, ExecuteOnSingleThread) {
   // Read the graph
   // We are using a graph with _Arg and _Retval
@@ -14,6 +14,9 @@
  * limitations under the License.
  *******************************************************************************/
 
+#include <chrono>
+#include <thread>
+
 #include "gtest/gtest.h"
 
 #include "tensorflow/core/common_runtime/dma_helper.h"
@@ -40,6 +43,148 @@ TEST(PipelinedTensorStoreTest, SimpleTest) {
                std::runtime_error);
 }
 
+// Test: a store with a fixed depth returns -1 when all tensors are checked out
+TEST(PipelinedTensorStoreTest, FixedDepth) {
+  PipelinedTensorMatrix pipelined_input_tensors(2);
+  PipelinedTensorMatrix pipelined_output_tensors(2);
+  PipelinedTensorsStore pts(pipelined_input_tensors, pipelined_output_tensors);
+  ASSERT_FALSE(pts.is_adaptive());
+  ASSERT_EQ(get<0>(pts.get_tensors()), 0);
+  ASSERT_EQ(get<0>(pts.get_tensors()), 1);
+  ASSERT_EQ(get<0>(pts.get_tensors()), -1);
+  ASSERT_EQ(pts.get_depth(), 2);
+}
+
+// Test: an adaptive store grows till max depth and then blocks till tensors
+// are returned
+TEST(PipelinedTensorStoreTest, AdaptiveDepth) {
+  PipelinedTensorMatrix pipelined_input_tensors(1);
+  PipelinedTensorMatrix pipelined_output_tensors(1);
+  int num_created = 0;
+  auto creator = [&num_created]() {
+    num_created++;
+    return make_pair(PipelinedTensorVector{}, PipelinedTensorVector{});
+  };
+
+  // A creator is needed to grow
+  ASSERT_THROW(new PipelinedTensorsStore(pipelined_input_tensors,
+                                         pipelined_output_tensors, 3, nullptr),
+               std::runtime_error);
+
+  PipelinedTensorsStore pts(pipelined_input_tensors, pipelined_output_tensors,
+                            3, creator);
+  ASSERT_TRUE(pts.is_adaptive());
+  ASSERT_EQ(get<0>(pts.get_tensors()), 0);
+  ASSERT_EQ(num_created, 0);
+  ASSERT_EQ(get<0>(pts.get_tensors()), 1);
+  ASSERT_EQ(get<0>(pts.get_tensors()), 2);
+  ASSERT_EQ(num_created, 2);
+  ASSERT_EQ(pts.get_depth(), 3);
+
+  // The store is at max depth, so this thread waits till 1 is returned
+  int idx = -1;
+  std::thread waiter([&pts, &idx]() { idx = get<0>(pts.get_tensors()); });
+  std::this_thread::sleep_for(std::chrono::milliseconds(50));
+  pts.return_tensors(1);
+  waiter.join();
+  ASSERT_EQ(idx, 1);
+  ASSERT_EQ(num_created, 2);
+  ASSERT_EQ(pts.get_depth(), 3);
+}
+
+// Test: try_get_tensors grows an adaptive store, but does not wait at max
+// depth
+TEST(PipelinedTensorStoreTest, TryGetTensors) {
+  PipelinedTensorMatrix pipelined_input_tensors(1);
+  PipelinedTensorMatrix pipelined_output_tensors(1);
+  auto creator = []() {
+    return make_pair(PipelinedTensorVector{}, PipelinedTensorVector{});
+  };
+  PipelinedTensorsStore pts(pipelined_input_tensors, pipelined_output_tensors,
+                            2, creator);
+  ASSERT_EQ(get<0>(pts.try_get_tensors()), 0);
+  ASSERT_EQ(get<0>(pts.try_get_tensors()), 1);
+  ASSERT_EQ(get<0>(pts.try_get_tensors()), -1);
+  ASSERT_EQ(pts.get_depth(), 2);
+  pts.return_tensors(0);
+  ASSERT_EQ(get<0>(pts.try_get_tensors()), 0);
+
+  PipelinedTensorsStore fixed_pts(pipelined_input_tensors,
+                                  pipelined_output_tensors);
+  ASSERT_EQ(get<0>(fixed_pts.try_get_tensors()), 0);
+  ASSERT_EQ(get<0>(fixed_pts.try_get_tensors()), -1);
+}
+
+// Test: indexes can be held while at least one index of the max depth is left
+// to the other steps
+TEST(PipelinedTensorStoreTest, HoldTensors) {
+  PipelinedTensorMatrix pipelined_input_tensors(1);
+  PipelinedTensorMatrix pipelined_output_tensors(1);
+  auto creator = []() {
+    return make_pair(PipelinedTensorVector{}, PipelinedTensorVector{});
+  };
+  PipelinedTensorsStore pts(pipelined_input_tensors, pipelined_output_tensors,
+                            3, creator);
+  int idx_0 = get<0>(pts.get_tensors());
+  ASSERT_TRUE(pts.try_hold());
+  int idx_1 = get<0>(pts.get_tensors());
+  ASSERT_TRUE(pts.try_hold());
+  int idx_2 = get<0>(pts.get_tensors());
+  ASSERT_FALSE(pts.try_hold());
+  pts.return_tensors(idx_2);
+
+  // The index that was not held is left to the next step
+  ASSERT_EQ(get<0>(pts.try_get_tensors()), idx_2);
+  pts.return_tensors(idx_2);
+
+  // A returned index can be held again
+  pts.return_held_tensors(idx_0);
+  ASSERT_EQ(get<0>(pts.get_tensors()), idx_0);
+  ASSERT_TRUE(pts.try_hold());
+  ASSERT_EQ(pts.get_depth(), 3);
+
+  // A store of depth 1 cannot hold its only index
+  PipelinedTensorsStore fixed_pts(pipelined_input_tensors,
+                                  pipelined_output_tensors);
+  ASSERT_FALSE(fixed_pts.try_hold());
+}
+
+// Test: a scoped index is returned to the store when it goes out of scope,
+// unless it is released
+TEST(PipelinedTensorStoreTest, ScopedPipelineIndex) {
+  PipelinedTensorMatrix pipelined_input_tensors(2);
+  PipelinedTensorMatrix pipelined_output_tensors(2);
+  auto pts = make_shared<PipelinedTensorsStore>(pipelined_input_tensors,
+                                                pipelined_output_tensors);
+  {
+    ScopedPipelineIndex index(pts, get<0>(pts->get_tensors()));
+    ASSERT_EQ(index.get(), 0);
+    ASSERT_EQ(get<0>(pts->try_get_tensors()), 1);
+    ASSERT_EQ(get<0>(pts->try_get_tensors()), -1);
+    pts->return_tensors(1);
+  }
+  // Both indexes are free again
+  ASSERT_EQ(get<0>(pts->try_get_tensors()), 0);
+  ASSERT_EQ(get<0>(pts->try_get_tensors()), 1);
+  pts->return_tensors(1);
+
+  // reset returns the held index and holds the new one
+  {
+    ScopedPipelineIndex index(pts, 0);
+    index.reset(get<0>(pts->get_tensors()));
+    ASSERT_EQ(index.get(), 1);
+    ASSERT_EQ(get<0>(pts->try_get_tensors()), 0);
+    ASSERT_EQ(index.release(), 1);
+  }
+  // The released index is still checked out
+  ASSERT_EQ(get<0>(pts->try_get_tensors()), -1);
+
+  // A negative index is not returned
+  {
+    ScopedPipelineIndex index(pts, -1);
+  }
+}
+
 }  // namespace testing
 }  // namespace ngraph_bridge
 }  // namespace tensorflow
\ No newline at end of file
@@ -0,0 +1,136 @@
+/*******************************************************************************
+ * Copyright 2019 Intel Corporation
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ *******************************************************************************/
+
+#include "gtest/gtest.h"
+
+#include "ngraph_bridge/prefetch_autotuner.h"
+
+using namespace std;
+
+namespace tensorflow {
+
+namespace ngraph_bridge {
+
+namespace testing {
+
+using data::PrefetchAutotuner;
+
+// Grows the buffer limit of an autotuned PrefetchAutotuner from 1 to 8
+static void GrowTo8(PrefetchAutotuner& tuner) {
+  ASSERT_EQ(tuner.buffer_limit(), 1);
+  for (int64 limit = 1; limit < 8; limit *= 2) {
+    tuner.RecordConsumption(limit);
+    tuner.RecordEmpty();
+    ASSERT_EQ(tuner.buffer_limit(), 2 * limit);
+  }
+  tuner.RecordConsumption(8);
+}
+
+// Test: a fixed buffer size is not changed
+TEST(PrefetchAutotuner, Disabled) {
+  PrefetchAutotuner tuner(2);
+  ASSERT_EQ(tuner.buffer_limit(), 2);
+  tuner.RecordConsumption(0);
+  tuner.RecordConsumption(2);
+  tuner.RecordConsumption(0);
+  tuner.RecordConsumption(2);
+  for (int i = 0; i < 2 * PrefetchAutotuner::kShrinkWindow; i++) {
+    tuner.RecordConsumption(2);
+  }
+  ASSERT_EQ(tuner.buffer_limit(), 2);
+}
+
+// Test: the buffer limit doubles when the consumer finds the buffer empty
+// after the buffer was filled
+TEST(PrefetchAutotuner, Grows) {
+  PrefetchAutotuner tuner(PrefetchAutotuner::kAutoTune);
+  ASSERT_EQ(tuner.buffer_limit(), 1);
+  // The buffer has not been filled yet
+  tuner.RecordEmpty();
+  ASSERT_EQ(tuner.buffer_limit(), 1);
+  GrowTo8(tuner);
+  ASSERT_EQ(tuner.buffer_limit(), 8);
+}
+
+// Test: the buffer limit drops when the buffer does not run low for a window
+TEST(PrefetchAutotuner, Shrinks) {
+  PrefetchAutotuner tuner(PrefetchAutotuner::kAutoTune);
+  GrowTo8(tuner);
+
+  // 6 elements were never needed, the limit drops by half of them
+  for (int i = 0; i < PrefetchAutotuner::kShrinkWindow - 1; i++) {
+    tuner.RecordConsumption(7);
+  }
+  ASSERT_EQ(tuner.buffer_limit(), 8);
+  tuner.RecordConsumption(7);
+  ASSERT_EQ(tuner.buffer_limit(), 5);
+
+  // The smallest buffer size of the window counts
+  tuner.RecordConsumption(2);
+  for (int i = 1; i < PrefetchAutotuner::kShrinkWindow; i++) {
+    tuner.RecordConsumption(5);
+  }
+  ASSERT_EQ(tuner.buffer_limit(), 4);
+
+  // The buffer ran as low as it could without starving
+  for (int i = 0; i < PrefetchAutotuner::kShrinkWindow; i++) {
+    tuner.RecordConsumption(1);
+  }
+  ASSERT_EQ(tuner.buffer_limit(), 4);
+
+  // Starving grows the limit again, and restarts the window
+  for (int i = 0; i < PrefetchAutotuner::kShrinkWindow - 1; i++) {
+    tuner.RecordConsumption(4);
+  }
+  tuner.RecordEmpty();
+  ASSERT_EQ(tuner.buffer_limit(), 8);
+  tuner.RecordConsumption(8);
+  tuner.RecordConsumption(8);
+  ASSERT_EQ(tuner.buffer_limit(), 8);
+}
+
+// Test: the buffer limit is capped by the bytes of the largest element
+TEST(PrefetchAutotuner, MaxBytes) {
+  PrefetchAutotuner tuner(PrefetchAutotuner::kAutoTune, 1000);
+  tuner.RecordElementBytes(300);
+  ASSERT_EQ(tuner.element_bytes(), 300);
+  for (int i = 0; i < 4; i++) {
+    tuner.RecordConsumption(tuner.buffer_limit());
+    tuner.RecordEmpty();
+  }
+  ASSERT_EQ(tuner.buffer_limit(), 3);
+
+  // A fixed buffer size is capped as well, but never below 1
+  PrefetchAutotuner fixed_tuner(10, 1000);
+  ASSERT_EQ(fixed_tuner.buffer_limit(), 10);
+  fixed_tuner.RecordElementBytes(300);
+  ASSERT_EQ(fixed_tuner.buffer_limit(), 3);
+  fixed_tuner.RecordElementBytes(100);
+  ASSERT_EQ(fixed_tuner.buffer_limit(), 3);
+  fixed_tuner.RecordElementBytes(2000);
+  ASSERT_EQ(fixed_tuner.buffer_limit(), 1);
+
+  // No prefetching stays so
+  PrefetchAutotuner no_prefetch_tuner(0, 1000);
+  no_prefetch_tuner.RecordElementBytes(300);
+  ASSERT_EQ(no_prefetch_tuner.buffer_limit(), 0);
+}
+
+}  // namespace testing
+
+}  // namespace ngraph_bridge
+
+}  // namespace tensorflow
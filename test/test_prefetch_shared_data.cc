@@ -0,0 +1,154 @@
+/*******************************************************************************
+ * Copyright 2019 Intel Corporation
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ *******************************************************************************/
+
+#include "gtest/gtest.h"
+
+#include "ngraph_bridge/ngraph_prefetch_shared_data.h"
+#include "test/test_utilities.h"
+
+using namespace std;
+
+namespace tensorflow {
+
+namespace ngraph_bridge {
+
+namespace testing {
+
+// Test: the step time is the moving average of the intervals between the
+// steps, and the transfer time the moving average of the transfer times
+TEST(NGraphPrefetchSharedResouce, Timings) {
+  NGraphPrefetchSharedResouce* shared_data =
+      new NGraphPrefetchSharedResouce("ngraph_cluster_0", 0, 0, {{0, 0}});
+  core::ScopedUnref unref_shared_data(shared_data);
+  ASSERT_EQ(shared_data->GetStepTimeUs(), 0);
+  ASSERT_EQ(shared_data->GetTransferTimeUs(), 0);
+
+  // The first step has no interval
+  shared_data->RecordStep(1000);
+  ASSERT_EQ(shared_data->GetStepTimeUs(), 0);
+  shared_data->RecordStep(1800);
+  ASSERT_EQ(shared_data->GetStepTimeUs(), 800);
+  shared_data->RecordStep(4200);
+  ASSERT_EQ(shared_data->GetStepTimeUs(), 1000);
+
+  shared_data->RecordTransferTime(160);
+  ASSERT_EQ(shared_data->GetTransferTimeUs(), 160);
+  shared_data->RecordTransferTime(80);
+  ASSERT_EQ(shared_data->GetTransferTimeUs(), 150);
+}
+
+// Test: the moving average starts at the first sample and follows the new
+// samples with a weight of 1/8
+TEST(NGraphPrefetchSharedResouce, MovingAverage) {
+  ASSERT_EQ(NGraphPrefetchSharedResouce::MovingAverage(0, 100), 100);
+  ASSERT_EQ(NGraphPrefetchSharedResouce::MovingAverage(100, 900), 200);
+  ASSERT_EQ(NGraphPrefetchSharedResouce::MovingAverage(200, 120), 190);
+  int64 average = 100;
+  for (int i = 0; i < 100; i++) {
+    average = NGraphPrefetchSharedResouce::MovingAverage(average, 500);
+  }
+  ASSERT_GT(average, 490);
+}
+
+// Test: each encap and iterator pair gets a resource of its own
+TEST(NGraphPrefetchSharedResouce, ResourceName) {
+  string name_0 =
+      NGraphPrefetchSharedResouce::GetResourceName("0_ngraph_cluster_0", "It");
+  string name_1 =
+      NGraphPrefetchSharedResouce::GetResourceName("0_ngraph_cluster_1", "It");
+  string name_2 =
+      NGraphPrefetchSharedResouce::GetResourceName("0_ngraph_cluster_0", "It2");
+  ASSERT_EQ(name_0, "NG_PREFETCH_DATA_0_ngraph_cluster_0_It");
+  ASSERT_NE(name_0, name_1);
+  ASSERT_NE(name_0, name_2);
+
+  NGraphPrefetchSharedResouce* shared_data =
+      new NGraphPrefetchSharedResouce("ngraph_cluster_0", 0, 0, {{0, 0}}, "It");
+  core::ScopedUnref unref_shared_data(shared_data);
+  ASSERT_EQ(shared_data->GetIteratorName(), "It");
+}
+
+// Test: the elements are numbered from the step that creates the shared data,
+// and only the first element the prefetcher copies is recorded
+TEST(NGraphPrefetchSharedResouce, Sequence) {
+  NGraphPrefetchSharedResouce* shared_data =
+      new NGraphPrefetchSharedResouce("ngraph_cluster_0", 0, 0, {{0, 0}});
+  core::ScopedUnref unref_shared_data(shared_data);
+  ASSERT_EQ(shared_data->NextStepSequence(), 0);
+  ASSERT_EQ(shared_data->NextStepSequence(), 1);
+
+  ASSERT_EQ(shared_data->GetFirstPrefetchedSequence(), -1);
+  shared_data->SetFirstPrefetchedSequence(3);
+  shared_data->SetFirstPrefetchedSequence(4);
+  ASSERT_EQ(shared_data->GetFirstPrefetchedSequence(), 3);
+}
+
+// Test: the depth is fixed by the first buffer limit the prefetcher sets
+TEST(NGraphPrefetchSharedResouce, BufferDepth) {
+  NGraphPrefetchSharedResouce* shared_data =
+      new NGraphPrefetchSharedResouce("ngraph_cluster_0", 0, 0, {{0, 0}});
+  core::ScopedUnref unref_shared_data(shared_data);
+  shared_data->SetBufferDepth(4);
+  shared_data->SetBufferDepth(1);
+  int depth = 0;
+  ASSERT_OK(shared_data->GetBufferDepth(&depth));
+  ASSERT_EQ(depth, 4);
+
+  // A depth of at least 1 is kept, and GetBufferDepth fails once the
+  // shared data is terminated before a depth is set
+  NGraphPrefetchSharedResouce* zero_depth_shared_data =
+      new NGraphPrefetchSharedResouce("ngraph_cluster_1", 1, 0, {{0, 0}});
+  core::ScopedUnref unref_zero_depth_shared_data(zero_depth_shared_data);
+  zero_depth_shared_data->SetBufferDepth(0);
+  ASSERT_OK(zero_depth_shared_data->GetBufferDepth(&depth));
+  ASSERT_EQ(depth, 1);
+
+  NGraphPrefetchSharedResouce* terminated_shared_data =
+      new NGraphPrefetchSharedResouce("ngraph_cluster_2", 2, 0, {{0, 0}});
+  core::ScopedUnref unref_terminated_shared_data(terminated_shared_data);
+  terminated_shared_data->Terminate(errors::Cancelled("Terminated"));
+  ASSERT_NOT_OK(terminated_shared_data->GetBufferDepth(&depth));
+}
+
+// Test: a bundle that cannot be handed over after the shared data is
+// terminated goes back to the store it was taken from
+TEST(NGraphPrefetchSharedResouce, ReturnIOTensorBundle) {
+  auto pts = make_shared<PipelinedTensorsStore>(PipelinedTensorMatrix(1),
+                                                PipelinedTensorMatrix(1));
+  NGraphPrefetchSharedResouce* shared_data = new NGraphPrefetchSharedResouce(
+      "ngraph_cluster_0", 0, 0, {{0, 0}}, "It", pts);
+  core::ScopedUnref unref_shared_data(shared_data);
+
+  auto io_tensors = pts->get_tensors();
+  NGraphPrefetchSharedResouce::IOTensorBundle bundle{
+      get<0>(io_tensors), get<1>(io_tensors), get<2>(io_tensors)};
+  ASSERT_EQ(bundle.Id, 0);
+  shared_data->IncrNumSlots();
+  ASSERT_EQ(get<0>(pts->get_tensors()), -1);
+
+  shared_data->Terminate(errors::Cancelled("Terminated"));
+  ASSERT_NOT_OK(
+      shared_data->AddNextIOTensorBundleReadyForDeviceExecution(bundle));
+  shared_data->ReturnIOTensorBundle(bundle);
+  ASSERT_EQ(shared_data->GetNumSlots(), 0);
+  ASSERT_EQ(get<0>(pts->get_tensors()), 0);
+}
+
+}  // namespace testing
+
+}  // namespace ngraph_bridge
+
+}  // namespace tensorflow
@@ -24,6 +24,7 @@
 #include "gtest/gtest.h"
 #include "ngraph/event_tracing.hpp"
 #include "ngraph_bridge/thread_safe_queue.h"
+#include "test/test_utilities.h"
 
 using namespace std;
 
@@ -58,7 +59,8 @@ TEST(ThreadSafeQueue, Simple) {
       ngraph::Event evt_consumer_waiting_for_item("Consumer", "Waiting", "");
       consumer_state = WAITING_FOR_ITEM;
       // cout << "\033[1;32mWaiting\033[0m" << endl;
-      queue.GetNextAvailable();
+      unique_ptr<Session> item;
+      ASSERT_OK(queue.GetNextAvailable(&item));
       evt_consumer_waiting_for_item.Stop();
       // cout << "\033[1;32mGot Item: " << item_count << "\033[0m\n";
       item_count++;
@@ -87,7 +89,7 @@ TEST(ThreadSafeQueue, Simple) {
 
   // cout << "Now adding an item\n";
   ngraph::Event evt_producer_add("Producer", "Add", "");
-  queue.Add(nullptr);
+  ASSERT_OK(queue.Add(nullptr));
   evt_producer_add.Stop();
   ngraph::Event::write_trace(evt_producer_add);
 
@@ -105,8 +107,8 @@ TEST(ThreadSafeQueue, Simple) {
 
   ngraph::Event evt_producer_add_again("Producer", "Add-2", "");
 
-  queue.Add(nullptr);
-  queue.Add(nullptr);
+  ASSERT_OK(queue.Add(nullptr));
+  ASSERT_OK(queue.Add(nullptr));
   evt_producer_add_again.Stop();
   ngraph::Event::write_trace(evt_producer_add_again);
 
@@ -129,6 +131,75 @@ TEST(ThreadSafeQueue, Simple) {
 
   thread0.join();
 }
+
+// Test: Add waits while a bounded queue is full
+TEST(ThreadSafeQueue, Capacity) {
+  ThreadSafeQueue<int> queue(2);
+  ASSERT_OK(queue.Add(1));
+  ASSERT_OK(queue.Add(2));
+
+  atomic<bool> added{false};
+  std::thread producer([&]() {
+    ASSERT_OK(queue.Add(3));
+    added = true;
+  });
+  absl::SleepFor(absl::Milliseconds(50));
+  ASSERT_FALSE(added);
+  ASSERT_EQ(queue.Size(), 2);
+
+  int item;
+  ASSERT_OK(queue.GetNextAvailable(&item));
+  ASSERT_EQ(item, 1);
+  producer.join();
+  ASSERT_TRUE(added);
+  ASSERT_OK(queue.GetNextAvailable(&item));
+  ASSERT_EQ(item, 2);
+  ASSERT_OK(queue.GetNextAvailable(&item));
+  ASSERT_EQ(item, 3);
+}
+
+// Test: TryGetNextAvailable gives up after the timeout
+TEST(ThreadSafeQueue, TryGet) {
+  ThreadSafeQueue<int> queue;
+  int item = 0;
+  Status status = queue.TryGetNextAvailable(&item, absl::Milliseconds(10));
+  ASSERT_TRUE(errors::IsDeadlineExceeded(status));
+
+  ASSERT_OK(queue.Add(5));
+  ASSERT_OK(queue.TryGetNextAvailable(&item, absl::Milliseconds(10)));
+  ASSERT_EQ(item, 5);
+}
+
+// Test: Terminate wakes up the waiting consumers and producers with the
+// status, and the items left in the queue can still be taken
+TEST(ThreadSafeQueue, Terminate) {
+  ThreadSafeQueue<int> empty_queue;
+  Status consumer_status;
+  std::thread consumer([&]() {
+    int item;
+    consumer_status = empty_queue.GetNextAvailable(&item);
+  });
+
+  ThreadSafeQueue<int> full_queue(1);
+  ASSERT_OK(full_queue.Add(1));
+  Status producer_status;
+  std::thread producer([&]() { producer_status = full_queue.Add(2); });
+
+  absl::SleepFor(absl::Milliseconds(50));
+  empty_queue.Terminate(errors::Cancelled("Stop"));
+  full_queue.Terminate(errors::Cancelled("Stop"));
+  consumer.join();
+  producer.join();
+  ASSERT_TRUE(errors::IsCancelled(consumer_status));
+  ASSERT_TRUE(errors::IsCancelled(producer_status));
+  ASSERT_TRUE(full_queue.IsTerminated());
+
+  int item;
+  ASSERT_OK(full_queue.GetNextAvailable(&item));
+  ASSERT_EQ(item, 1);
+  ASSERT_TRUE(errors::IsCancelled(full_queue.GetNextAvailable(&item)));
+  ASSERT_TRUE(errors::IsCancelled(full_queue.Add(3)));
+}
 }
 
 }  // namespace ngraph_bridge
@@ -109,9 +109,13 @@ def exit_on_error(success, error_message, assert_on_failure=False):
             sys.exit(1)
 
 
-def update_config_to_include_custom_config(config, backend, device_id,
-                                           backend_optional_params, shape_hints,
-                                           do_aot):
+def update_config_to_include_custom_config(config,
+                                           backend,
+                                           device_id,
+                                           backend_optional_params,
+                                           shape_hints,
+                                           do_aot,
+                                           aot_artifact=None):
     rewriter_options = rewriter_config_pb2.RewriterConfig()
     rewriter_options.meta_optimizer_iterations = (
         rewriter_config_pb2.RewriterConfig.ONE)
@@ -139,15 +143,24 @@ def update_config_to_include_custom_config(config, backend, device_id,
     # Attach aot request
     ngraph_optimizer.parameter_map["aot_requested"].s = str(
         ("0", "1")[do_aot]).encode()
+    # The precompiled executables are written to this file instead of being
+    # embedded in the graph
+    if do_aot and aot_artifact is not None:
+        ngraph_optimizer.parameter_map["aot_artifact"].s = aot_artifact.encode()
     config.MergeFrom(
         tf.ConfigProto(
             graph_options=tf.GraphOptions(rewrite_options=rewriter_options)))
     return config
 
 
-def run_ngraph_grappler_optimizer(input_gdef, output_nodes, ng_backend,
-                                  device_id, backend_optional_params,
-                                  shape_hints, do_aot):
+def run_ngraph_grappler_optimizer(input_gdef,
+                                  output_nodes,
+                                  ng_backend,
+                                  device_id,
+                                  backend_optional_params,
+                                  shape_hints,
+                                  do_aot,
+                                  aot_artifact=None):
     graph = tf.Graph()
     with graph.as_default():
         tf.import_graph_def(input_gdef, name="")
@@ -171,7 +184,7 @@ def run_ngraph_grappler_optimizer(input_gdef, output_nodes, ng_backend,
     # TODO: move update_config_to_include_custom_config to ngraph_bridge
     session_config = update_config_to_include_custom_config(
         session_config, ng_backend, device_id, backend_optional_params,
-        shape_hints, do_aot)
+        shape_hints, do_aot, aot_artifact)
     try:
         output_gdef = tf_optimizer.OptimizeGraph(
             session_config, grappler_meta_graph_def, graph_id=b"tf_graph")
@@ -273,7 +286,13 @@ def prepare_argparser(formats):
         "--precompile",
         action='store_true',
         help=
-        "Perform precompilation to embed the ngraph executable in the dumped TF graph"
+        "Perform precompilation and store the ngraph executables in an AOT artifact file referenced by the dumped TF graph"
+    )
+    parser.add_argument(
+        "--aot_artifact",
+        default=None,
+        help=
+        "Location of the AOT artifact file written by --precompile. Defaults to the output location with an .ngaot suffix"
     )
     parser.add_argument(
         "--save_ng_clusters",
@@ -343,9 +362,18 @@ allowed_formats = {
 }
 
 
-def convert(inp_format, inp_loc, out_format, out_loc, output_nodes, ng_backend,
-            device_id, backend_optional_params, shape_hints, do_aot,
-            save_ng_clusters):
+def convert(inp_format,
+            inp_loc,
+            out_format,
+            out_loc,
+            output_nodes,
+            ng_backend,
+            device_id,
+            backend_optional_params,
+            shape_hints,
+            do_aot,
+            save_ng_clusters,
+            aot_artifact=None):
     """Functional api for converting TF models by inserting ngraph nodes.
     Sample usage:
     from tf2ngraph import convert
@@ -358,6 +386,9 @@ def convert(inp_format, inp_loc, out_format, out_loc, output_nodes, ng_backend,
     out_format (string): 'savedmodel', 'pbtxt', 'pb'
     out_loc (string): Location of output file or folder (in case of savedmodel)
     output_nodes (iterable of strings): names of output nodes
+    aot_artifact (string): Location of the file that holds the precompiled
+    executables when do_aot is set. Defaults to out_loc + '.ngaot'. The graph
+    refers to this location, so the file has to be found there at runtime
 
     Returns: void
    """
@@ -373,9 +404,11 @@ def convert(inp_format, inp_loc, out_format, out_loc, output_nodes, ng_backend,
     )
     input_gdef = get_gdef(inp_format, inp_loc)
     attach_device(input_gdef)
+    if do_aot and aot_artifact is None:
+        aot_artifact = out_loc.rstrip('/') + '.ngaot'
     output_gdef = run_ngraph_grappler_optimizer(
         input_gdef, output_nodes, ng_backend, device_id,
-        backend_optional_params, shape_hints, do_aot)
+        backend_optional_params, shape_hints, do_aot, aot_artifact)
     if save_ng_clusters:
         for fn in output_gdef.library.function:
             tf.io.write_graph(
@@ -491,7 +524,8 @@ def main():
         args.config_file)
     convert(inp_format, inp_loc, out_format, out_loc, output_nodes,
             args.ng_backend, args.device_id, backend_optional_params,
-            shape_hints, args.precompile, args.save_ng_clusters)
+            shape_hints, args.precompile, args.save_ng_clusters,
+            args.aot_artifact)
     print('Converted the model. Exiting now')
 
 